@@ -0,0 +1,47 @@
+"""reply threads
+
+Revision ID: 3e7a91c5b2d4
+Revises: c41e8a2d97b3
+Create Date: 2026-10-19 23:40:12.118305
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3e7a91c5b2d4"
+down_revision: Union[str, Sequence[str], None] = "c41e8a2d97b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REPLIES = sa.text("conversation_id IS NOT NULL AND deleted_at IS NULL")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable, or with a constant default: adding them rewrites no rows.
+    op.add_column("tweets", sa.Column("in_reply_to_id", sa.UUID(), nullable=True))
+    op.add_column("tweets", sa.Column("conversation_id", sa.UUID(), nullable=True))
+    op.add_column(
+        "tweets",
+        sa.Column(
+            "replies_count", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+    op.create_index(
+        "ix_tweets_conversation_id_created_at",
+        "tweets",
+        ["conversation_id", "created_at", "id"],
+        postgresql_where=REPLIES,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tweets_conversation_id_created_at", table_name="tweets")
+    op.drop_column("tweets", "replies_count")
+    op.drop_column("tweets", "conversation_id")
+    op.drop_column("tweets", "in_reply_to_id")
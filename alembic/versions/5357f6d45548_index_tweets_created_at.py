@@ -0,0 +1,29 @@
+"""index tweets created_at
+
+Revision ID: 5357f6d45548
+Revises: ecb09fd86990
+Create Date: 2026-10-19 19:20:41.508114
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5357f6d45548"
+down_revision: Union[str, Sequence[str], None] = "ecb09fd86990"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Serves the newest-first listing of all tweets (and the per-shard
+    # queries of its scatter-gather) without sorting whole partitions.
+    op.create_index("ix_tweets_created_at", "tweets", ["created_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tweets_created_at", table_name="tweets")
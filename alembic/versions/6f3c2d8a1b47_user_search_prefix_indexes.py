@@ -0,0 +1,44 @@
+"""user search prefix indexes
+
+Revision ID: 6f3c2d8a1b47
+Revises: 8d4b6f1e2a93
+Create Date: 2026-10-20 15:41:09.318204
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6f3c2d8a1b47"
+down_revision: Union[str, Sequence[str], None] = "8d4b6f1e2a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE = sa.text("deleted_at IS NULL")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # text_pattern_ops compares byte-wise, so a prefix is a range scan
+    # whatever the database collation.
+    op.create_index(
+        "ix_users_username_prefix",
+        "users",
+        [sa.text("lower(username) text_pattern_ops")],
+        postgresql_where=LIVE,
+    )
+    op.create_index(
+        "ix_users_full_name_prefix",
+        "users",
+        [sa.text("lower(full_name) text_pattern_ops")],
+        postgresql_where=LIVE,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_full_name_prefix", table_name="users")
+    op.drop_index("ix_users_username_prefix", table_name="users")
@@ -0,0 +1,39 @@
+"""user activity rollups
+
+Revision ID: 8d4b6f1e2a93
+Revises: 3e7a91c5b2d4
+Create Date: 2026-10-20 10:12:47.502116
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d4b6f1e2a93"
+down_revision: Union[str, Sequence[str], None] = "3e7a91c5b2d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Empty until filled by the rollup rebuild:
+    #   python -m src.fake_twitter.infrastructure.database.rollups
+    op.create_table(
+        "user_activity",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("granularity", sa.String(length=4), nullable=False),
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("tweets", sa.Integer(), nullable=False),
+        sa.Column("likes_received", sa.Integer(), nullable=False),
+        sa.Column("retweets_received", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "granularity", "bucket"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_activity")
@@ -0,0 +1,38 @@
+"""create likes
+
+Revision ID: 9b2f4c71d0ae
+Revises: 5357f6d45548
+Create Date: 2026-10-19 20:04:12.381907
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b2f4c71d0ae"
+down_revision: Union[str, Sequence[str], None] = "5357f6d45548"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No foreign key to tweets: tweets may live on other databases (shards)
+    # and their partitioned primary key includes created_at.
+    op.create_table(
+        "likes",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("tweet_id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "tweet_id"),
+    )
+    op.create_index("ix_likes_tweet_id", "likes", ["tweet_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_likes_tweet_id", table_name="likes")
+    op.drop_table("likes")
@@ -0,0 +1,33 @@
+"""tweet media
+
+Revision ID: b85e0d3c6a19
+Revises: 6f3c2d8a1b47
+Create Date: 2026-10-21 09:26:53.870412
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b85e0d3c6a19"
+down_revision: Union[str, Sequence[str], None] = "6f3c2d8a1b47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable without a default: adding the column rewrites no rows.
+    op.add_column(
+        "tweets",
+        sa.Column("media_ids", postgresql.ARRAY(sa.String(length=72)), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tweets", "media_ids")
@@ -0,0 +1,61 @@
+"""soft delete tombstones
+
+Revision ID: c41e8a2d97b3
+Revises: 9b2f4c71d0ae
+Create Date: 2026-10-19 21:12:37.604215
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41e8a2d97b3"
+down_revision: Union[str, Sequence[str], None] = "9b2f4c71d0ae"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE = sa.text("deleted_at IS NULL")
+TOMBSTONED = sa.text("deleted_at IS NOT NULL")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable without a default: adding the columns rewrites no rows.
+    op.add_column("users", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.add_column("tweets", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+
+    # Reads only ever look at live rows, so their indexes leave out tombstones.
+    op.drop_index("ix_tweets_user_id_created_at", table_name="tweets")
+    op.create_index(
+        "ix_tweets_user_id_created_at",
+        "tweets",
+        ["user_id", "created_at"],
+        postgresql_where=LIVE,
+    )
+    op.drop_index("ix_tweets_created_at", table_name="tweets")
+    op.create_index(
+        "ix_tweets_created_at", "tweets", ["created_at"], postgresql_where=LIVE
+    )
+
+    # What the purger scans for.
+    op.create_index(
+        "ix_tweets_deleted_at", "tweets", ["deleted_at"], postgresql_where=TOMBSTONED
+    )
+    op.create_index(
+        "ix_users_deleted_at", "users", ["deleted_at"], postgresql_where=TOMBSTONED
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_deleted_at", table_name="users")
+    op.drop_index("ix_tweets_deleted_at", table_name="tweets")
+    op.drop_index("ix_tweets_created_at", table_name="tweets")
+    op.create_index("ix_tweets_created_at", "tweets", ["created_at"])
+    op.drop_index("ix_tweets_user_id_created_at", table_name="tweets")
+    op.create_index("ix_tweets_user_id_created_at", "tweets", ["user_id", "created_at"])
+    op.drop_column("tweets", "deleted_at")
+    op.drop_column("users", "deleted_at")
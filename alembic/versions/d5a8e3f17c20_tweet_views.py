@@ -0,0 +1,35 @@
+"""tweet views
+
+Revision ID: d5a8e3f17c20
+Revises: b85e0d3c6a19
+Create Date: 2026-10-22 14:03:18.226954
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a8e3f17c20"
+down_revision: Union[str, Sequence[str], None] = "b85e0d3c6a19"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tweet_views",
+        sa.Column("tweet_id", sa.UUID(), nullable=False),
+        sa.Column("registers", sa.LargeBinary(), nullable=False),
+        sa.Column("views_count", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("tweet_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("tweet_views")
@@ -0,0 +1,108 @@
+"""partition tweets by created_at
+
+Revision ID: ecb09fd86990
+Revises: 24ca1e7849f0
+Create Date: 2026-10-19 18:52:10.114523
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ecb09fd86990"
+down_revision: Union[str, Sequence[str], None] = "24ca1e7849f0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions from the oldest existing tweet up to this many months
+# ahead; the partition maintenance task keeps creating them from then on.
+MONTHS_AHEAD = 3
+
+
+def _tweets_columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("content", sa.String(280), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("likes_count", sa.Integer(), nullable=False, default=0),
+        sa.Column("retweets_count", sa.Integer(), nullable=False, default=0),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table("tweets", "tweets_unpartitioned")
+    op.execute(
+        "ALTER INDEX ix_tweets_user_id RENAME TO ix_tweets_unpartitioned_user_id"
+    )
+    op.execute(
+        "ALTER TABLE tweets_unpartitioned "
+        "RENAME CONSTRAINT tweets_pkey TO tweets_unpartitioned_pkey"
+    )
+
+    op.create_table(
+        "tweets",
+        *_tweets_columns(),
+        sa.PrimaryKeyConstraint("id", "created_at", name="tweets_pkey"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index("ix_tweets_user_id_created_at", "tweets", ["user_id", "created_at"])
+
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month_start timestamp := date_trunc(
+                'month', coalesce((SELECT min(created_at) FROM tweets_unpartitioned), now())
+            );
+            last_month timestamp := date_trunc('month', now())
+                + interval '{MONTHS_AHEAD} months';
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF tweets FOR VALUES FROM (%L) TO (%L)',
+                    'tweets_p' || to_char(month_start, 'YYYYMMDD'),
+                    month_start,
+                    month_start + interval '1 month'
+                );
+                month_start := month_start + interval '1 month';
+            END LOOP;
+        END $$;
+        """
+    )
+    op.execute("CREATE TABLE tweets_default PARTITION OF tweets DEFAULT")
+
+    op.execute(
+        "INSERT INTO tweets (id, content, user_id, created_at, likes_count, "
+        "retweets_count) SELECT id, content, user_id, created_at, likes_count, "
+        "retweets_count FROM tweets_unpartitioned"
+    )
+    op.drop_table("tweets_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table("tweets", "tweets_partitioned")
+    op.execute(
+        "ALTER TABLE tweets_partitioned "
+        "RENAME CONSTRAINT tweets_pkey TO tweets_partitioned_pkey"
+    )
+
+    op.create_table(
+        "tweets",
+        *_tweets_columns(),
+        sa.PrimaryKeyConstraint("id", name="tweets_pkey"),
+    )
+    op.create_index("ix_tweets_user_id", "tweets", ["user_id"])
+
+    op.execute(
+        "INSERT INTO tweets (id, content, user_id, created_at, likes_count, "
+        "retweets_count) SELECT id, content, user_id, created_at, likes_count, "
+        "retweets_count FROM tweets_partitioned"
+    )
+    # Dropping the parent drops all of its partitions.
+    op.drop_table("tweets_partitioned")
@@ -0,0 +1,42 @@
+"""unique live usernames
+
+Revision ID: f2c6a9d4e871
+Revises: d5a8e3f17c20
+Create Date: 2026-10-24 10:17:42.518306
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c6a9d4e871"
+down_revision: Union[str, Sequence[str], None] = "d5a8e3f17c20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE = sa.text("deleted_at IS NULL")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tombstoned users no longer hold on to their username and email.
+    for column in ("username", "email"):
+        op.drop_index(f"ix_users_{column}", table_name="users")
+        op.create_index(
+            f"ix_users_{column}",
+            "users",
+            [column],
+            unique=True,
+            postgresql_where=LIVE,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fails while a live user shares a username or email with a tombstone.
+    for column in ("username", "email"):
+        op.drop_index(f"ix_users_{column}", table_name="users")
+        op.create_index(f"ix_users_{column}", "users", [column], unique=True)
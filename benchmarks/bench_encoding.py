@@ -0,0 +1,93 @@
+"""Bytes on the wire against CPU time for the response formats and encodings.
+
+Serializes a page of synthetic tweets as JSON (the way FastAPI does) and as
+MessagePack, compresses each with gzip and zstd, and prints the size and the
+time per page of every combination, plus the cost of a compressed-body cache
+hit. Needs the ``perf`` extra for MessagePack and zstd.
+
+    uv run --extra perf python benchmarks/bench_encoding.py --page-size 100
+"""
+
+import argparse
+import random
+import string
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+
+from src.fake_twitter.application.dtos.tweet_dtos import TweetResponseDTO
+from src.fake_twitter.infrastructure.api.compression import (
+    CompressedBodyCache,
+    compressors,
+)
+from src.fake_twitter.infrastructure.api.rendering import msgpack, packb
+
+
+def make_page(size: int) -> List[TweetResponseDTO]:
+    words = ["".join(random.choices(string.ascii_lowercase, k=6)) for _ in range(500)]
+    now = datetime.now()
+    return [
+        TweetResponseDTO(
+            id=uuid.uuid4(),
+            content=" ".join(random.choices(words, k=random.randint(5, 40)))[:280],
+            user_id=uuid.uuid4(),
+            created_at=now - timedelta(seconds=random.randint(0, 86400)),
+            likes_count=random.randint(0, 5000),
+            retweets_count=random.randint(0, 500),
+        )
+        for _ in range(size)
+    ]
+
+
+def per_call(function: Callable[[], object], min_time: float = 0.5) -> float:
+    """Mean seconds per call over at least ``min_time`` seconds."""
+    calls, started = 0, time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    page = make_page(args.page_size)
+    adapter = TypeAdapter(List[TweetResponseDTO])
+    formats = {"json": lambda: adapter.dump_json(page)}
+    if msgpack is not None:
+        formats["msgpack"] = lambda: packb(page)
+
+    print(f"{args.page_size} tweets per page")
+    print(f"{'format':<10}{'encoding':<10}{'bytes':>10}{'step µs':>12}{'total µs':>12}")
+    for name, serialize in formats.items():
+        body = serialize()
+        serialize_time = per_call(serialize)
+        print(
+            f"{name:<10}{'identity':<10}{len(body):>10}"
+            f"{serialize_time * 1e6:>12.0f}{serialize_time * 1e6:>12.0f}"
+        )
+        for encoding, compress in compressors().items():
+            compress_time = per_call(lambda: compress(body))
+            print(
+                f"{'':<10}{encoding:<10}{len(compress(body)):>10}"
+                f"{compress_time * 1e6:>12.0f}"
+                f"{(serialize_time + compress_time) * 1e6:>12.0f}"
+            )
+
+    cache = CompressedBodyCache()
+    body = formats["json"]()
+    encoding, compress = next(iter(compressors().items()))
+    cache.compress(encoding, body, compress)
+    hit_time = per_call(lambda: cache.compress(encoding, body, compress))
+    print(f"cached {encoding} body of the JSON page: {hit_time * 1e6:.0f} µs per hit")
+
+
+if __name__ == "__main__":
+    main()
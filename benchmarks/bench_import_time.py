@@ -0,0 +1,54 @@
+"""Import time of the application module, the first cost of every cold start.
+
+Imports ``src.fake_twitter.main`` in fresh interpreters with ``-X importtime``
+and prints the median total plus the slowest modules by cumulative time.
+
+    uv run python benchmarks/bench_import_time.py
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULE = "src.fake_twitter.main"
+
+
+def import_profile() -> dict[str, int]:
+    """Cumulative import time in microseconds per module, for one run."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals = [profile[MODULE] for profile in profiles]
+    print(f"{MODULE}: median {statistics.median(totals) / 1000:.1f} ms")
+
+    medians = {
+        name: statistics.median(profile.get(name, 0) for profile in profiles)
+        for name in profiles[0]
+    }
+    slowest = sorted(medians.items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative in slowest[: args.top]:
+        print(f"{cumulative / 1000:>10.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
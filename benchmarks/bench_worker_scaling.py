@@ -0,0 +1,127 @@
+"""Throughput of the gunicorn serving profile as the worker count grows.
+
+Starts gunicorn with 1, 2, 4, ... workers (up to the core count) and drives
+each run with several load generator processes, printing requests/s and the
+speedup over a single worker. The load generators share the machine with the
+server, so run it on a box with spare cores or point ``--path`` at a cheap
+endpoint to keep the client side from becoming the bottleneck.
+
+    uv run python benchmarks/bench_worker_scaling.py --path /health
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def _generate_load(url: str, concurrency: int, duration: float, results) -> None:
+    async def run() -> int:
+        completed = 0
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+
+            async def worker() -> None:
+                nonlocal completed
+                while time.perf_counter() < deadline:
+                    response = await client.get(url)
+                    if response.status_code < 500:
+                        completed += 1
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return completed
+
+    results.put(asyncio.run(run()))
+
+
+def measure(url: str, clients: int, concurrency: int, duration: float) -> float:
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_generate_load, args=(url, concurrency, duration, results)
+        )
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total / duration
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers))
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "src.fake_twitter.main:app",
+            "-c",
+            "gunicorn.conf.py",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--access-logfile",
+            "/dev/null",
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    worker_counts = []
+    workers = 1
+    while workers <= args.max_workers:
+        worker_counts.append(workers)
+        workers *= 2
+    if worker_counts[-1] != args.max_workers:
+        worker_counts.append(args.max_workers)
+
+    baseline = None
+    print(f"{'workers':>8} {'req/s':>12} {'speedup':>8} {'efficiency':>10}")
+    for workers in worker_counts:
+        server = start_server(workers, args.port)
+        try:
+            url = f"http://127.0.0.1:{args.port}{args.path}"
+            throughput = measure(url, args.clients, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        baseline = baseline or throughput
+        speedup = throughput / baseline
+        print(
+            f"{workers:>8} {throughput:>12.0f} {speedup:>8.2f} "
+            f"{speedup / workers:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,55 @@
+import os
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.infrastructure.logs import logging_config
+from src.fake_twitter.serving import compute_pool_limits, compute_worker_count
+
+settings = get_settings()
+
 # Server socket
 bind = "0.0.0.0:8000"
 backlog = 2048
 
 # Worker processes
-workers = 1
+# One event loop per core, bounded by the database connection budget. Set
+# WEB_CONCURRENCY to pin the worker count (still at most one per connection
+# in the budget).
+workers = compute_worker_count(
+    os.cpu_count(),
+    settings.db_max_connections,
+    reserved=settings.db_reserved_connections,
+    override=settings.web_concurrency,
+)
+# The uvicorn worker picks uvloop and httptools automatically when they are
+# installed (`uv sync --extra perf`).
 worker_class = "uvicorn.workers.UvicornWorker"
 worker_connections = 1000
 timeout = 60
 keepalive = 2
 
+# Recycle workers to bound slow leaks; the jitter keeps them from all
+# restarting at the same time.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+# Import the app once in the master so workers fork with warm modules.
+preload_app = True
+
+# Database pool per worker: the budget split evenly across workers. Applied
+# before the app is preloaded so every worker's engine is built with it;
+# DB_POOL_SIZE / DB_MAX_OVERFLOW set in the environment or .env still win.
+_pool = compute_pool_limits(
+    workers, settings.db_max_connections, reserved=settings.db_reserved_connections
+)
+if not {"db_pool_size", "db_max_overflow"} & settings.model_fields_set:
+    settings.db_pool_size = _pool.pool_size
+    settings.db_max_overflow = _pool.max_overflow
+
 # Logging
-accesslog = "-"
-errorlog = "-"
-loglevel = "info"
-access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+# Access, error and SQL logs all go through the app's non-blocking JSON
+# logging (src/fake_twitter/infrastructure/logs.py).
+loglevel = settings.log_level.lower()
+logconfig_dict = logging_config(settings)
 
 # Process naming
 proc_name = "fake_twitter"
@@ -29,3 +65,21 @@ tmp_upload_dir = None
 # SSL (uncomment and configure if needed)
 # keyfile = None
 # certfile = None
+
+
+# Server hooks
+def when_ready(server):
+    server.log.info(
+        "Serving with %s workers, db pool %s+%s per worker",
+        workers,
+        settings.db_pool_size,
+        settings.db_max_overflow,
+    )
+
+
+def post_fork(server, worker):
+    from src.fake_twitter.infrastructure.database.connection import (
+        reset_engine_after_fork,
+    )
+
+    reset_engine_after_fork()
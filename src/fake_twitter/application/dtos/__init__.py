@@ -1,11 +1,47 @@
-from .user_dtos import UserCreateDTO, UserUpdateDTO, UserResponseDTO
-from .tweet_dtos import TweetCreateDTO, TweetUpdateDTO, TweetResponseDTO
+from .user_dtos import (
+    UserCreateDTO,
+    UserUpdateDTO,
+    UserResponseDTO,
+    AuthorDTO,
+    UserSuggestionDTO,
+    ActivityBucketDTO,
+    UserStatsResponseDTO,
+)
+from .tweet_dtos import (
+    TweetCreateDTO,
+    TweetUpdateDTO,
+    TweetResponseDTO,
+    ThreadResponseDTO,
+    TweetLikeDTO,
+    LikeLookupDTO,
+    LikeLookupResponseDTO,
+)
+from .media_dtos import MediaResponseDTO
+from .batch_dtos import (
+    BatchOperationDTO,
+    BatchRequestDTO,
+    BatchResultDTO,
+    BatchResponseDTO,
+)
 
 __all__ = [
     "UserCreateDTO",
     "UserUpdateDTO",
     "UserResponseDTO",
+    "AuthorDTO",
+    "UserSuggestionDTO",
+    "ActivityBucketDTO",
+    "UserStatsResponseDTO",
     "TweetCreateDTO",
     "TweetUpdateDTO",
     "TweetResponseDTO",
+    "ThreadResponseDTO",
+    "TweetLikeDTO",
+    "LikeLookupDTO",
+    "LikeLookupResponseDTO",
+    "MediaResponseDTO",
+    "BatchOperationDTO",
+    "BatchRequestDTO",
+    "BatchResultDTO",
+    "BatchResponseDTO",
 ]
@@ -0,0 +1,25 @@
+from typing import Any, Dict, List
+from pydantic import BaseModel, Field
+
+
+class BatchOperationDTO(BaseModel):
+    op: str
+    args: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchRequestDTO(BaseModel):
+    operations: List[BatchOperationDTO] = Field(..., min_length=1, max_length=100)
+    # All operations commit together or not at all; the batch stops at the
+    # first failure.
+    atomic: bool = False
+
+
+class BatchResultDTO(BaseModel):
+    status: int
+    body: Any = None
+    detail: Any = None
+
+
+class BatchResponseDTO(BaseModel):
+    committed: bool
+    results: List[BatchResultDTO]
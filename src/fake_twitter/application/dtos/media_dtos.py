@@ -0,0 +1,9 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class MediaResponseDTO(BaseModel):
+    id: str
+    content_type: str
+    size: int
+
+    model_config = ConfigDict(from_attributes=True)
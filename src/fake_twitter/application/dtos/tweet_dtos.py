@@ -1,11 +1,22 @@
 from datetime import datetime
+from typing import Annotated, List, Optional
 from uuid import UUID
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+
+from src.fake_twitter.application.dtos.user_dtos import AuthorDTO
+from src.fake_twitter.domain.entities.media import MAX_TWEET_MEDIA, MEDIA_ID_PATTERN
+
+MediaId = Annotated[str, StringConstraints(pattern=MEDIA_ID_PATTERN)]
 
 
 class TweetCreateDTO(BaseModel):
     content: str = Field(..., min_length=1, max_length=280)
     user_id: UUID
+    in_reply_to_id: Optional[UUID] = None
+    # Uploaded with POST /media/ first.
+    media_ids: Optional[List[MediaId]] = Field(
+        None, min_length=1, max_length=MAX_TWEET_MEDIA
+    )
 
 
 class TweetUpdateDTO(BaseModel):
@@ -19,5 +30,36 @@ class TweetResponseDTO(BaseModel):
     created_at: datetime
     likes_count: int
     retweets_count: int
+    in_reply_to_id: Optional[UUID] = None
+    conversation_id: Optional[UUID] = None
+    replies_count: int = 0
+    # Unique viewers, estimated within about 1%; only on tweet read endpoints
+    # while views are counted, null elsewhere.
+    views_count: Optional[int] = None
+    media_ids: Optional[List[str]] = None
+    # Only with expand=user; None for authors deleted since.
+    user: Optional[AuthorDTO] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ThreadResponseDTO(BaseModel):
+    """A page of a conversation: its first tweet and replies, oldest first."""
+
+    root: Optional[TweetResponseDTO]
+    replies: List[TweetResponseDTO]
+    next_cursor: Optional[str] = None
+
+
+class TweetLikeDTO(BaseModel):
+    user_id: UUID
+
+
+class LikeLookupDTO(BaseModel):
+    user_id: UUID
+    tweet_ids: List[UUID] = Field(..., max_length=1000)
+
+
+class LikeLookupResponseDTO(BaseModel):
+    user_id: UUID
+    liked_tweet_ids: List[UUID]
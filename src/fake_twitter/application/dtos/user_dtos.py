@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel, ConfigDict, Field, EmailStr
 
@@ -27,3 +27,41 @@ class UserResponseDTO(BaseModel):
     following_count: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class AuthorDTO(BaseModel):
+    """The compact user embedded in tweets with ``expand=user``."""
+
+    id: UUID
+    username: str
+    full_name: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserSuggestionDTO(BaseModel):
+    id: UUID
+    username: str
+    full_name: str
+    followers_count: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ActivityBucketDTO(BaseModel):
+    bucket: datetime
+    tweets: int
+    likes_received: int
+    retweets_received: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserStatsResponseDTO(BaseModel):
+    """A user's activity over [since, until); empty buckets are left out."""
+
+    user_id: UUID
+    granularity: str
+    since: datetime
+    until: datetime
+    buckets: List[ActivityBucketDTO]
@@ -1,66 +1,320 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 from uuid import UUID
 
-from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.domain.entities.tweet import ArchivedTweetError, Tweet
+from src.fake_twitter.domain.repositories.activity_repository import (
+    ActivityRepository,
+)
+from src.fake_twitter.domain.repositories.like_repository import LikeRepository
+from src.fake_twitter.domain.repositories.media_store import MediaStore
+from src.fake_twitter.domain.repositories.tweet_ingestor import TweetIngestor
+from src.fake_twitter.domain.repositories.tweet_ranking import TweetRanking
 from src.fake_twitter.domain.repositories.tweet_repository import TweetRepository
+from src.fake_twitter.domain.repositories.tweet_views import TweetViews
+from src.fake_twitter.domain.repositories.user_repository import UserRepository
+from src.fake_twitter.domain.repositories.view_repository import ViewRepository
 from src.fake_twitter.application.dtos.tweet_dtos import TweetCreateDTO, TweetUpdateDTO
 
 
 class TweetUseCases:
-    def __init__(self, tweet_repository: TweetRepository):
+    def __init__(
+        self,
+        tweet_repository: TweetRepository,
+        like_repository: LikeRepository,
+        tweet_ingestor: Optional[TweetIngestor] = None,
+        tweet_ranking: Optional[TweetRanking] = None,
+        activity_repository: Optional[ActivityRepository] = None,
+        media_store: Optional[MediaStore] = None,
+        tweet_views: Optional[TweetViews] = None,
+        view_repository: Optional[ViewRepository] = None,
+        user_repository: Optional[UserRepository] = None,
+    ):
         self.tweet_repository = tweet_repository
+        self.like_repository = like_repository
+        self.tweet_ingestor = tweet_ingestor
+        self.tweet_ranking = tweet_ranking
+        self.activity_repository = activity_repository
+        self.media_store = media_store
+        self.tweet_views = tweet_views
+        self.view_repository = view_repository
+        self.user_repository = user_repository
 
-    async def create_tweet(self, tweet_dto: TweetCreateDTO) -> Tweet:
+    def _ranked(self, tweet: Optional[Tweet]) -> Optional[Tweet]:
+        if tweet is not None and self.tweet_ranking is not None:
+            self.tweet_ranking.record(tweet)
+        return tweet
+
+    async def _record(self, user_id: UUID, at: datetime, **changes: int) -> None:
+        # Tweets count in the bucket they were created in; engagement in the
+        # bucket it happened in.
+        if self.activity_repository is not None:
+            await self.activity_repository.record(user_id, at, **changes)
+
+    async def _check_media(self, media_ids: Optional[List[str]]) -> None:
+        if not media_ids:
+            return
+        if self.media_store is None:
+            missing = media_ids
+        else:
+            missing = await self.media_store.missing(media_ids)
+        if missing:
+            raise ValueError(f"Media not found: {', '.join(missing)}")
+
+    @staticmethod
+    def _check_writable(tweet: Tweet) -> None:
+        if tweet.archived:
+            raise ArchivedTweetError("Tweet is archived and cannot change")
+
+    async def _check_user(self, user_id: UUID) -> None:
+        if self.user_repository is None:
+            return
+        if not await self.user_repository.get_by_id(user_id):
+            raise ValueError("User not found")
+
+    async def create_tweet(self, tweet_dto: TweetCreateDTO) -> Optional[Tweet]:
+        """The new tweet, or None when the tweet replied to does not exist.
+
+        Raises ValueError when an attached media id was never uploaded, and
+        ArchivedTweetError when the tweet replied to is archived.
+        """
+        await self._check_media(tweet_dto.media_ids)
+        if tweet_dto.in_reply_to_id is not None:
+            return await self._reply(tweet_dto)
         tweet = Tweet(
             content=tweet_dto.content,
             user_id=tweet_dto.user_id,
+            media_ids=tweet_dto.media_ids,
         )
-        return await self.tweet_repository.create(tweet)
+        if self.tweet_ingestor is not None:
+            tweet = await self.tweet_ingestor.submit(tweet)
+        else:
+            tweet = await self.tweet_repository.create(tweet)
+        await self._record(tweet.user_id, tweet.created_at, tweets=1)
+        return tweet
+
+    async def _reply(self, tweet_dto: TweetCreateDTO) -> Optional[Tweet]:
+        # Not group-committed: the reply and its parent's replies_count are
+        # written in the request's transaction, together.
+        parent = await self.tweet_repository.get_by_id(tweet_dto.in_reply_to_id)
+        if not parent:
+            return None
+        self._check_writable(parent)
+        reply = await self.tweet_repository.create(
+            parent.reply(tweet_dto.content, tweet_dto.user_id, tweet_dto.media_ids)
+        )
+        await self.tweet_repository.increment_counters(parent.id, replies=1)
+        await self._record(reply.user_id, reply.created_at, tweets=1)
+        return reply
 
     async def get_tweet_by_id(self, tweet_id: UUID) -> Optional[Tweet]:
         return await self.tweet_repository.get_by_id(tweet_id)
 
+    async def get_tweets_by_ids(self, tweet_ids: Sequence[UUID]) -> List[Tweet]:
+        return await self.tweet_repository.get_by_ids(tweet_ids)
+
     async def get_tweets_by_user(
-        self, user_id: UUID, skip: int = 0, limit: int = 100
+        self,
+        user_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
     ) -> List[Tweet]:
-        return await self.tweet_repository.get_by_user_id(user_id, skip, limit)
+        return await self.tweet_repository.get_by_user_id(
+            user_id, skip, limit, since, until
+        )
+
+    async def get_all_tweets(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tweet]:
+        return await self.tweet_repository.get_all(skip, limit, since, until)
 
-    async def get_all_tweets(self, skip: int = 0, limit: int = 100) -> List[Tweet]:
-        return await self.tweet_repository.get_all(skip, limit)
+    async def get_partial_tweet_by_id(
+        self, tweet_id: UUID, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        return await self.tweet_repository.get_partial_by_id(tweet_id, fields)
+
+    async def get_partial_tweets_by_user(
+        self,
+        user_id: UUID,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        return await self.tweet_repository.get_partial_by_user_id(
+            user_id, fields, skip, limit, since, until
+        )
+
+    async def get_all_partial_tweets(
+        self,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        return await self.tweet_repository.get_all_partial(
+            fields, skip, limit, since, until
+        )
 
     async def update_tweet(
         self, tweet_id: UUID, tweet_dto: TweetUpdateDTO
     ) -> Optional[Tweet]:
+        """The updated tweet, or None when it does not exist.
+
+        Raises ArchivedTweetError when the tweet is archived.
+        """
         tweet = await self.tweet_repository.get_by_id(tweet_id)
         if not tweet:
             return None
+        self._check_writable(tweet)
 
         tweet.content = tweet_dto.content
-        return await self.tweet_repository.update(tweet)
+        return self._ranked(await self.tweet_repository.update(tweet))
+
+    async def get_thread(
+        self,
+        tweet_id: UUID,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        limit: int = 100,
+    ) -> Optional[Tuple[Optional[Tweet], List[Tweet]]]:
+        """The first tweet of ``tweet_id``'s conversation (None once deleted)
+        and a page of its replies, or None when the tweet does not exist."""
+        tweet = await self.tweet_repository.get_by_id(tweet_id)
+        if not tweet:
+            return None
+        if tweet.conversation_id is None:
+            root = tweet
+        else:
+            root = await self.tweet_repository.get_by_id(tweet.conversation_id)
+        replies = await self.tweet_repository.get_conversation(
+            tweet.conversation_id or tweet.id,
+            root.created_at if root else None,
+            after,
+            limit,
+        )
+        return root, replies
 
     async def delete_tweet(self, tweet_id: UUID) -> bool:
-        return await self.tweet_repository.delete(tweet_id)
+        tweet = await self.tweet_repository.get_by_id(tweet_id)
+        if not tweet:
+            return False
+        # Only the request whose delete took effect decrements the parent.
+        deleted = await self.tweet_repository.delete(tweet_id)
+        if deleted:
+            await self._record(tweet.user_id, tweet.created_at, tweets=-1)
+        if deleted and tweet.in_reply_to_id is not None:
+            await self.tweet_repository.increment_counters(
+                tweet.in_reply_to_id, replies=-1
+            )
+        if deleted and self.tweet_ranking is not None:
+            self.tweet_ranking.discard(tweet_id)
+        return deleted
+
+    async def like_tweet(self, tweet_id: UUID, user_id: UUID) -> Optional[Tweet]:
+        """The liked tweet, or None when it does not exist.
 
-    async def like_tweet(self, tweet_id: UUID) -> Optional[Tweet]:
+        Raises ValueError when the user does not exist, and
+        ArchivedTweetError when the tweet is archived.
+        """
         tweet = await self.tweet_repository.get_by_id(tweet_id)
         if not tweet:
             return None
+        self._check_writable(tweet)
+        await self._check_user(user_id)
 
-        tweet.like()
-        return await self.tweet_repository.update(tweet)
+        # Liking twice is a no-op; the counter only follows real changes.
+        if not await self.like_repository.add(tweet_id, user_id):
+            return tweet
+        await self._record(tweet.user_id, datetime.now(), likes_received=1)
+        return self._ranked(
+            await self.tweet_repository.increment_counters(tweet_id, likes=1)
+        )
 
-    async def unlike_tweet(self, tweet_id: UUID) -> Optional[Tweet]:
+    async def unlike_tweet(self, tweet_id: UUID, user_id: UUID) -> Optional[Tweet]:
+        """The unliked tweet, or None when it does not exist.
+
+        Raises ValueError when the user does not exist, and
+        ArchivedTweetError when the tweet is archived.
+        """
         tweet = await self.tweet_repository.get_by_id(tweet_id)
         if not tweet:
             return None
+        self._check_writable(tweet)
+        await self._check_user(user_id)
 
-        tweet.unlike()
-        return await self.tweet_repository.update(tweet)
+        liked_at = await self.like_repository.remove(tweet_id, user_id)
+        if not liked_at:
+            return tweet
+        # Taken back from the bucket the like was counted in.
+        await self._record(tweet.user_id, liked_at, likes_received=-1)
+        return self._ranked(
+            await self.tweet_repository.increment_counters(tweet_id, likes=-1)
+        )
+
+    async def get_liked_tweet_ids(
+        self, user_id: UUID, tweet_ids: Sequence[UUID]
+    ) -> Set[UUID]:
+        return await self.like_repository.get_liked_tweet_ids(user_id, tweet_ids)
 
     async def retweet(self, tweet_id: UUID) -> Optional[Tweet]:
+        """The retweeted tweet, or None when it does not exist.
+
+        Raises ArchivedTweetError when the tweet is archived.
+        """
         tweet = await self.tweet_repository.get_by_id(tweet_id)
         if not tweet:
             return None
+        self._check_writable(tweet)
+
+        await self._record(tweet.user_id, datetime.now(), retweets_received=1)
+        return self._ranked(
+            await self.tweet_repository.increment_counters(tweet_id, retweets=1)
+        )
+
+    async def view_tweets(
+        self, tweet_ids: Sequence[UUID], viewer: str
+    ) -> Optional[Dict[UUID, int]]:
+        """Count ``viewer`` among the viewers of the tweets; their views so far,
+        or None when views are not counted.
+
+        The views counted since the last ``flush_views`` are left out.
+        """
+        if self.tweet_views is None or self.view_repository is None:
+            return None
+        self.tweet_views.record(tweet_ids, viewer)
+        return await self.view_repository.get_counts(tweet_ids)
+
+    async def flush_views(self) -> None:
+        """Store the views counted in memory since the last flush."""
+        if self.tweet_views is None or self.view_repository is None:
+            return
+        sketches = self.tweet_views.drain()
+        try:
+            await self.view_repository.merge(sketches)
+        except Exception:
+            self.tweet_views.restore(sketches)
+            raise
+
+    async def get_top_tweets(self, window: str, limit: int) -> List[Tweet]:
+        if self.tweet_ranking is None:
+            return []
+        return self.tweet_ranking.top(window, limit)
 
-        tweet.retweet()
-        return await self.tweet_repository.update(tweet)
+    async def refresh_top_tweets(self) -> None:
+        """Recompute every window of the ranking from the database."""
+        if self.tweet_ranking is None:
+            return
+        now = datetime.now()
+        for window, span in self.tweet_ranking.windows.items():
+            candidates = await self.tweet_repository.get_top_candidates(
+                now - span, now, self.tweet_ranking.capacity
+            )
+            self.tweet_ranking.replace(window, candidates)
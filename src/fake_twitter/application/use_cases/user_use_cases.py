@@ -1,14 +1,38 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
 from uuid import UUID
 
-from src.fake_twitter.domain.entities.user import User
+from src.fake_twitter.domain.entities.activity import ActivityBucket
+from src.fake_twitter.domain.entities.user import User, UserSuggestion
+from src.fake_twitter.domain.repositories.activity_repository import (
+    ActivityRepository,
+)
+from src.fake_twitter.domain.repositories.tweet_ranking import TweetRanking
+from src.fake_twitter.domain.repositories.tweet_repository import TweetRepository
 from src.fake_twitter.domain.repositories.user_repository import UserRepository
+from src.fake_twitter.domain.repositories.user_search_index import UserSearchIndex
 from src.fake_twitter.application.dtos.user_dtos import UserCreateDTO, UserUpdateDTO
 
 
 class UserUseCases:
-    def __init__(self, user_repository: UserRepository):
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        activity_repository: Optional[ActivityRepository] = None,
+        user_search_index: Optional[UserSearchIndex] = None,
+        tweet_repository: Optional[TweetRepository] = None,
+        tweet_ranking: Optional[TweetRanking] = None,
+    ):
         self.user_repository = user_repository
+        self.activity_repository = activity_repository
+        self.user_search_index = user_search_index
+        self.tweet_repository = tweet_repository
+        self.tweet_ranking = tweet_ranking
+
+    def _indexed(self, user: User) -> User:
+        if self.user_search_index is not None:
+            self.user_search_index.add(UserSuggestion.of(user))
+        return user
 
     async def create_user(self, user_dto: UserCreateDTO) -> User:
         user = User(
@@ -17,17 +41,35 @@ class UserUseCases:
             full_name=user_dto.full_name,
             bio=user_dto.bio,
         )
-        return await self.user_repository.create(user)
+        return self._indexed(await self.user_repository.create(user))
 
     async def get_user_by_id(self, user_id: UUID) -> Optional[User]:
         return await self.user_repository.get_by_id(user_id)
 
+    async def get_users_by_ids(self, user_ids: Sequence[UUID]) -> List[User]:
+        return await self.user_repository.get_by_ids(user_ids)
+
     async def get_user_by_username(self, username: str) -> Optional[User]:
         return await self.user_repository.get_by_username(username)
 
     async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[User]:
         return await self.user_repository.get_all(skip, limit)
 
+    async def get_partial_user_by_id(
+        self, user_id: UUID, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        return await self.user_repository.get_partial_by_id(user_id, fields)
+
+    async def get_partial_user_by_username(
+        self, username: str, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        return await self.user_repository.get_partial_by_username(username, fields)
+
+    async def get_all_partial_users(
+        self, fields: Sequence[str], skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        return await self.user_repository.get_all_partial(fields, skip, limit)
+
     async def update_user(
         self, user_id: UUID, user_dto: UserUpdateDTO
     ) -> Optional[User]:
@@ -36,14 +78,63 @@ class UserUseCases:
             return None
 
         if user_dto.full_name is not None:
+            if self.user_search_index is not None:
+                # Indexed under the old name until now.
+                self.user_search_index.discard(UserSuggestion.of(user))
             user.full_name = user_dto.full_name
         if user_dto.bio is not None:
             user.bio = user_dto.bio
 
-        return await self.user_repository.update(user)
+        return self._indexed(await self.user_repository.update(user))
+
+    async def get_user_activity(
+        self, user_id: UUID, granularity: str, since: datetime, until: datetime
+    ) -> Optional[List[ActivityBucket]]:
+        """The user's non-empty buckets in [since, until), or None when the
+        user does not exist."""
+        if not await self.user_repository.get_by_id(user_id):
+            return None
+        if self.activity_repository is None:
+            return []
+        return await self.activity_repository.get_range(
+            user_id, granularity, since, until
+        )
+
+    async def search_users(self, prefix: str, limit: int) -> List[UserSuggestion]:
+        """Users whose username or full name starts with ``prefix``, most
+        followed first."""
+        index = self.user_search_index
+        if index is not None and index.ready and limit <= index.capacity:
+            return index.search(prefix, limit)
+        return await self.user_repository.search_by_prefix(prefix, limit)
+
+    async def refresh_user_search(self, batch_size: int = 1000) -> None:
+        """Rebuild the search index from the database."""
+        if self.user_search_index is None:
+            return
+        self.user_search_index.begin_rebuild()
+        # Small batches: the event loop serves requests between them.
+        async for users in self.user_repository.iter_suggestions(batch_size):
+            self.user_search_index.add_to_rebuild(users)
+        self.user_search_index.finish_rebuild()
 
     async def delete_user(self, user_id: UUID) -> bool:
-        return await self.user_repository.delete(user_id)
+        """Tombstone the user and, in the same request, their tweets."""
+        user = None
+        if self.user_search_index is not None:
+            user = await self.user_repository.get_by_id(user_id)
+            if not user:
+                return False
+        if not await self.user_repository.delete(user_id):
+            return False
+        if user is not None:
+            self.user_search_index.discard(UserSuggestion.of(user))
+        # Hidden from every read at once; the purger removes the rows.
+        if self.tweet_repository is not None:
+            await self.tweet_repository.delete_by_user(user_id)
+        if self.tweet_ranking is not None:
+            self.tweet_ranking.discard_user(user_id)
+        return True
 
     async def follow_user(self, user_id: UUID) -> Optional[User]:
         user = await self.user_repository.get_by_id(user_id)
@@ -51,7 +142,7 @@ class UserUseCases:
             return None
 
         user.follow()
-        return await self.user_repository.update(user)
+        return self._indexed(await self.user_repository.update(user))
 
     async def unfollow_user(self, user_id: UUID) -> Optional[User]:
         user = await self.user_repository.get_by_id(user_id)
@@ -59,4 +150,4 @@ class UserUseCases:
             return None
 
         user.unfollow()
-        return await self.user_repository.update(user)
+        return self._indexed(await self.user_repository.update(user))
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict
+
+# Buckets of the activity rollups, by the length of time they cover. Like
+# tweets' created_at, buckets are local time without a time zone.
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    """The start of the ``granularity`` bucket ``at`` falls in."""
+    start = at.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        start = start.replace(hour=0)
+    return start
+
+
+class ActivityBucket(BaseModel):
+    """A user's activity over one hour or day."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: UUID
+    granularity: str
+    bucket: datetime
+    tweets: int = 0
+    likes_received: int = 0
+    retweets_received: int = 0
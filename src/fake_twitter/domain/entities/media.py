@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+
+# Accepted media by file extension. A media id is the SHA-256 of the file's
+# bytes plus its extension, so identical uploads are stored once and a
+# file's id never points at other content.
+MEDIA_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "mp4": "video/mp4",
+}
+MEDIA_ID_PATTERN = r"^[0-9a-f]{64}\.(jpg|png|gif|webp|mp4)$"
+# Attachments per tweet.
+MAX_TWEET_MEDIA = 4
+
+
+class Media(BaseModel):
+    id: str
+    size: int
+
+    @property
+    def digest(self) -> str:
+        return self.id.partition(".")[0]
+
+    @property
+    def content_type(self) -> str:
+        return MEDIA_TYPES[self.id.rpartition(".")[2]]
@@ -1,7 +1,17 @@
 from datetime import datetime
+from typing import List, Optional
 from uuid import UUID, uuid4
 from pydantic import BaseModel, ConfigDict, Field
 
+# Ranking of "top" tweets: engagement divided by (age in hours + 2) ** GRAVITY,
+# so a tweet needs ever more engagement to stay up as it ages.
+RETWEET_WEIGHT = 2
+GRAVITY = 1.8
+
+
+class ArchivedTweetError(Exception):
+    """Raised on a change to an archived tweet, which is read-only."""
+
 
 class Tweet(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -12,6 +22,15 @@ class Tweet(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
     likes_count: int = Field(default=0, ge=0)
     retweets_count: int = Field(default=0, ge=0)
+    in_reply_to_id: Optional[UUID] = None
+    # The tweet that started the conversation; None when this one did.
+    conversation_id: Optional[UUID] = None
+    replies_count: int = Field(default=0, ge=0)
+    # Ids of attached media (see entities/media.py); None without any.
+    media_ids: Optional[List[str]] = None
+    # Read back from the tweet archive (infrastructure/archive.py); never
+    # stored or sent.
+    archived: bool = Field(default=False, exclude=True)
 
     def like(self) -> None:
         self.likes_count += 1
@@ -22,3 +41,22 @@ class Tweet(BaseModel):
 
     def retweet(self) -> None:
         self.retweets_count += 1
+
+    def reply(
+        self, content: str, user_id: UUID, media_ids: Optional[List[str]] = None
+    ) -> "Tweet":
+        return Tweet(
+            content=content,
+            user_id=user_id,
+            media_ids=media_ids,
+            in_reply_to_id=self.id,
+            conversation_id=self.conversation_id or self.id,
+        )
+
+    @property
+    def engagement(self) -> int:
+        return self.likes_count + RETWEET_WEIGHT * self.retweets_count
+
+    def hot_score(self, now: datetime) -> float:
+        age_hours = max((now - self.created_at).total_seconds(), 0) / 3600
+        return self.engagement / (age_hours + 2) ** GRAVITY
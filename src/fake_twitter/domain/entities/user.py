@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import NamedTuple, Optional
 from uuid import UUID, uuid4
 from pydantic import BaseModel, ConfigDict, Field, EmailStr
 
@@ -21,3 +21,19 @@ class User(BaseModel):
     def unfollow(self) -> None:
         if self.followers_count > 0:
             self.followers_count -= 1
+
+
+class UserSuggestion(NamedTuple):
+    """What autocomplete shows of a user.
+
+    A tuple rather than a model: an in-memory index keeps one per user.
+    """
+
+    id: UUID
+    username: str
+    full_name: str
+    followers_count: int
+
+    @classmethod
+    def of(cls, user: User) -> "UserSuggestion":
+        return cls(user.id, user.username, user.full_name, user.followers_count)
@@ -0,0 +1,36 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from src.fake_twitter.domain.entities.activity import ActivityBucket
+
+
+class ActivityRepository(ABC):
+    """Per-user activity rollups, kept by hour and by day."""
+
+    @abstractmethod
+    async def record(
+        self,
+        user_id: UUID,
+        at: datetime,
+        tweets: int = 0,
+        likes_received: int = 0,
+        retweets_received: int = 0,
+    ) -> None:
+        """Add the changes to the user's hour and day buckets of ``at``.
+
+        Implementations may apply them some time after the transaction
+        they were recorded in commits, and drop them if it rolls back.
+        """
+        pass
+
+    @abstractmethod
+    async def get_range(
+        self, user_id: UUID, granularity: str, since: datetime, until: datetime
+    ) -> List[ActivityBucket]:
+        """The user's buckets starting in [since, until), oldest first.
+
+        Buckets without activity are left out.
+        """
+        pass
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional, Sequence, Set
+from uuid import UUID
+
+
+class LikeRepository(ABC):
+    @abstractmethod
+    async def add(self, tweet_id: UUID, user_id: UUID) -> bool:
+        """Record a like; False if the user already liked the tweet."""
+        pass
+
+    @abstractmethod
+    async def remove(self, tweet_id: UUID, user_id: UUID) -> Optional[datetime]:
+        """Remove a like; when it was made, or None if there was none."""
+        pass
+
+    @abstractmethod
+    async def get_liked_tweet_ids(
+        self, user_id: UUID, tweet_ids: Sequence[UUID]
+    ) -> Set[UUID]:
+        """Which of ``tweet_ids`` the user has liked."""
+        pass
+
+    @abstractmethod
+    async def get_all_liked_tweet_ids(self, user_id: UUID, limit: int) -> List[UUID]:
+        pass
@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence
+
+from src.fake_twitter.domain.entities.media import Media
+
+
+class MediaStore(ABC):
+    @abstractmethod
+    async def get(self, media_id: str) -> Optional[Media]:
+        pass
+
+    @abstractmethod
+    async def missing(self, media_ids: Sequence[str]) -> List[str]:
+        """The ids among ``media_ids`` with no stored file."""
+        pass
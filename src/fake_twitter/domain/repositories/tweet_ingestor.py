@@ -0,0 +1,13 @@
+from abc import ABC, abstractmethod
+
+from src.fake_twitter.domain.entities.tweet import Tweet
+
+
+class TweetIngestor(ABC):
+    @abstractmethod
+    async def submit(self, tweet: Tweet) -> Tweet:
+        """Store a new tweet durably, possibly together with others.
+
+        Returns the stored tweet once it is committed.
+        """
+        pass
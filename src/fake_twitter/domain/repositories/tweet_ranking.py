@@ -0,0 +1,45 @@
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Dict, List, Sequence
+from uuid import UUID
+
+from src.fake_twitter.domain.entities.tweet import Tweet
+
+
+class TweetRanking(ABC):
+    """Top tweets by hot score over a few recent time windows."""
+
+    @property
+    @abstractmethod
+    def windows(self) -> Dict[str, timedelta]:
+        """Window names and the age of the oldest tweet they rank."""
+        pass
+
+    @property
+    @abstractmethod
+    def capacity(self) -> int:
+        """How many candidates a window keeps."""
+        pass
+
+    @abstractmethod
+    def record(self, tweet: Tweet) -> None:
+        """Take a created or changed tweet into account."""
+        pass
+
+    @abstractmethod
+    def discard(self, tweet_id: UUID) -> None:
+        pass
+
+    @abstractmethod
+    def discard_user(self, user_id: UUID) -> None:
+        """Forget every tweet of a deleted user."""
+        pass
+
+    @abstractmethod
+    def replace(self, window: str, candidates: Sequence[Tweet]) -> None:
+        """Start a window over from freshly computed candidates."""
+        pass
+
+    @abstractmethod
+    def top(self, window: str, limit: int) -> List[Tweet]:
+        pass
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from datetime import datetime
+from typing import Any, Dict, Optional, List, Sequence, Tuple
 from uuid import UUID
 
 from src.fake_twitter.domain.entities.tweet import Tweet
@@ -14,14 +15,74 @@ class TweetRepository(ABC):
     async def get_by_id(self, tweet_id: UUID) -> Optional[Tweet]:
         pass
 
+    @abstractmethod
+    async def get_by_ids(self, tweet_ids: Sequence[UUID]) -> List[Tweet]:
+        """The tweets that exist among ``tweet_ids``, in no particular order."""
+        pass
+
     @abstractmethod
     async def get_by_user_id(
-        self, user_id: UUID, skip: int = 0, limit: int = 100
+        self,
+        user_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tweet]:
+        pass
+
+    @abstractmethod
+    async def get_conversation(
+        self,
+        conversation_id: UUID,
+        started_at: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        limit: int = 100,
     ) -> List[Tweet]:
+        """Replies in a conversation, oldest first, after the ``(created_at,
+        id)`` of the previous page's last one. ``started_at``, the creation
+        time of the first tweet, bounds the search when known."""
+        pass
+
+    @abstractmethod
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tweet]:
+        pass
+
+    # Projections: only the named fields of each tweet, as plain dicts.
+
+    @abstractmethod
+    async def get_partial_by_id(
+        self, tweet_id: UUID, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
         pass
 
     @abstractmethod
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Tweet]:
+    async def get_partial_by_user_id(
+        self,
+        user_id: UUID,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def get_all_partial(
+        self,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
         pass
 
     @abstractmethod
@@ -31,3 +92,27 @@ class TweetRepository(ABC):
     @abstractmethod
     async def delete(self, tweet_id: UUID) -> bool:
         pass
+
+    @abstractmethod
+    async def delete_by_user(self, user_id: UUID) -> int:
+        """Tombstone every tweet of a deleted user; returns how many.
+
+        Their replies still count in their parents' ``replies_count`` until
+        the purger removes them.
+        """
+        pass
+
+    @abstractmethod
+    async def increment_counters(
+        self, tweet_id: UUID, likes: int = 0, retweets: int = 0, replies: int = 0
+    ) -> Optional[Tweet]:
+        """Atomically add to the engagement counters (never below zero)."""
+        pass
+
+    @abstractmethod
+    async def get_top_candidates(
+        self, since: datetime, now: datetime, limit: int
+    ) -> List[Tweet]:
+        """The ``limit`` tweets created since ``since`` with the highest hot
+        score at ``now`` (see ``Tweet.hot_score``), best first."""
+        pass
@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Sequence
+from uuid import UUID
+
+
+class TweetViews(ABC):
+    """Unique viewers per tweet, collected in memory until stored.
+
+    What is collected goes out as serialized sketches of the viewers, which
+    ``ViewRepository.merge`` adds to those stored.
+    """
+
+    @abstractmethod
+    def record(self, tweet_ids: Sequence[UUID], viewer: str) -> None:
+        """Count ``viewer`` among the viewers of the tweets."""
+        pass
+
+    @abstractmethod
+    def drain(self) -> Dict[UUID, bytes]:
+        """The sketches collected since the last drain, by tweet."""
+        pass
+
+    @abstractmethod
+    def restore(self, sketches: Dict[UUID, bytes]) -> None:
+        """Take back drained sketches that could not be stored."""
+        pass
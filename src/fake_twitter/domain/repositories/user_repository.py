@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Any, AsyncIterator, Dict, Optional, List, Sequence
 from uuid import UUID
 
-from src.fake_twitter.domain.entities.user import User
+from src.fake_twitter.domain.entities.user import User, UserSuggestion
 
 
 class UserRepository(ABC):
@@ -14,6 +14,11 @@ class UserRepository(ABC):
     async def get_by_id(self, user_id: UUID) -> Optional[User]:
         pass
 
+    @abstractmethod
+    async def get_by_ids(self, user_ids: Sequence[UUID]) -> List[User]:
+        """The users that exist among ``user_ids``, in no particular order."""
+        pass
+
     @abstractmethod
     async def get_by_username(self, username: str) -> Optional[User]:
         pass
@@ -22,6 +27,37 @@ class UserRepository(ABC):
     async def get_all(self, skip: int = 0, limit: int = 100) -> List[User]:
         pass
 
+    @abstractmethod
+    async def search_by_prefix(self, prefix: str, limit: int) -> List[UserSuggestion]:
+        """Users whose username or full name starts with ``prefix`` (in any
+        case), most followed first."""
+        pass
+
+    @abstractmethod
+    def iter_suggestions(self, batch_size: int) -> AsyncIterator[List[UserSuggestion]]:
+        """Every user, in batches, for building a search index."""
+        pass
+
+    # Projections: only the named fields of each user, as plain dicts.
+
+    @abstractmethod
+    async def get_partial_by_id(
+        self, user_id: UUID, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def get_partial_by_username(
+        self, username: str, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def get_all_partial(
+        self, fields: Sequence[str], skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        pass
+
     @abstractmethod
     async def update(self, user: User) -> User:
         pass
@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+from typing import List, Sequence
+
+from src.fake_twitter.domain.entities.user import UserSuggestion
+
+
+class UserSearchIndex(ABC):
+    """Prefix search over usernames and full names, most followed first."""
+
+    @property
+    @abstractmethod
+    def ready(self) -> bool:
+        """Whether the index has been built and can answer searches."""
+        pass
+
+    @property
+    @abstractmethod
+    def capacity(self) -> int:
+        """The most results a search returns."""
+        pass
+
+    @abstractmethod
+    def search(self, prefix: str, limit: int) -> List[UserSuggestion]:
+        pass
+
+    @abstractmethod
+    def add(self, user: UserSuggestion) -> None:
+        """Index a new or changed user."""
+        pass
+
+    @abstractmethod
+    def discard(self, user: UserSuggestion) -> None:
+        pass
+
+    @abstractmethod
+    def begin_rebuild(self) -> None:
+        """Start building a fresh index; searches keep using the current one."""
+        pass
+
+    @abstractmethod
+    def add_to_rebuild(self, users: Sequence[UserSuggestion]) -> None:
+        pass
+
+    @abstractmethod
+    def finish_rebuild(self) -> None:
+        """Switch to the fresh index, with the changes made while building."""
+        pass
@@ -0,0 +1,17 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Sequence
+from uuid import UUID
+
+
+class ViewRepository(ABC):
+    """Stored sketches of the unique viewers of each tweet."""
+
+    @abstractmethod
+    async def get_counts(self, tweet_ids: Sequence[UUID]) -> Dict[UUID, int]:
+        """Estimated unique viewers; tweets never viewed are left out."""
+        pass
+
+    @abstractmethod
+    async def merge(self, sketches: Dict[UUID, bytes]) -> None:
+        """Add the viewers of the sketches (see ``TweetViews``) to those stored."""
+        pass
@@ -0,0 +1,75 @@
+"""Activity rollup changes summed in memory and written every few seconds.
+
+Every tweet, like and retweet adds to its author's hour and day buckets
+(``user_activity``). Written in the request's transaction, each change held
+the locks of those two rows until the commit, so the likes of a popular
+author waited for one another. Instead, each process sums the changes of
+the transactions that commit, and every ``ACTIVITY_FLUSH_SECONDS`` writes the
+sums in one short transaction (``SQLAlchemyActivityRepository.merge``).
+
+Changes only count once the transaction that made them commits
+(``database/on_commit.py``): a rolled back transaction, or savepoint, takes
+its changes with it. Stats trail the activity by up to the flush interval,
+and a process that dies loses the changes of its last interval until the
+rollups are rebuilt (``database/rollups.py``).
+"""
+
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.domain.entities.activity import GRANULARITIES, bucket_start
+from src.fake_twitter.infrastructure.database.on_commit import on_commit
+
+# (user id, granularity, bucket start)
+BucketKey = Tuple[UUID, str, datetime]
+
+
+class ActivityBuffer:
+    def __init__(self):
+        self._changes: Dict[BucketKey, Counter] = {}
+
+    def add(self, user_id: UUID, at: datetime, changes: Dict[str, int]) -> None:
+        """Add the changes to the user's hour and day buckets of ``at``."""
+        for granularity in GRANULARITIES:
+            key = (user_id, granularity, bucket_start(at, granularity))
+            counts = self._changes.get(key)
+            if counts is None:
+                counts = self._changes[key] = Counter()
+            counts.update(changes)
+
+    def add_on_commit(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        at: datetime,
+        changes: Dict[str, int],
+    ) -> None:
+        """Like ``add``, once ``session``'s transaction commits."""
+        on_commit(session, lambda: self.add(user_id, at, changes))
+
+    def drain(self) -> Dict[BucketKey, Counter]:
+        """The changes summed since the last drain, by bucket."""
+        changes, self._changes = self._changes, {}
+        return changes
+
+    def restore(self, changes: Dict[BucketKey, Counter]) -> None:
+        """Take back drained changes that could not be stored."""
+        for key, counts in changes.items():
+            self._changes.setdefault(key, Counter()).update(counts)
+
+    def __len__(self) -> int:
+        return len(self._changes)
+
+
+@lru_cache
+def get_activity_buffer() -> Optional[ActivityBuffer]:
+    """The process-wide buffer, or None when changes are written at once."""
+    if get_settings().activity_flush_seconds <= 0:
+        return None
+    return ActivityBuffer()
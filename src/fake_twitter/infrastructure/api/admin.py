@@ -0,0 +1,79 @@
+"""Operational endpoints, guarded by the ``ADMIN_TOKEN`` setting."""
+
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.infrastructure.api.profiling import get_profiler
+from src.fake_twitter.infrastructure.database.statement_cache import (
+    statement_cache_stats,
+)
+from src.fake_twitter.infrastructure.ingest import get_tweet_ingestor
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    expected = get_settings().admin_token
+    if expected is None:
+        # Admin endpoints do not exist unless a token is configured.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode(), expected.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token"
+        )
+
+
+router = APIRouter(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin_token)]
+)
+
+
+@router.get("/sql-cache")
+async def get_sql_cache_stats():
+    """Hit rate of the compiled SQL cache since start or the last reset"""
+    return statement_cache_stats.snapshot()
+
+
+@router.post("/sql-cache/reset", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_sql_cache_stats():
+    """Start counting compiled SQL cache outcomes afresh"""
+    statement_cache_stats.reset()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Counters of the in-process tweet ingestion pipeline"""
+    ingestor = get_tweet_ingestor()
+    if ingestor is None:
+        return {"tweet_ingest": None}
+    return {
+        "tweet_ingest": {
+            "max_batch_size_setting": ingestor.max_batch_size,
+            "max_delay_ms_setting": ingestor.max_delay * 1000,
+            "queued": ingestor.queued,
+            **ingestor.metrics.snapshot(),
+        }
+    }
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """Profiled routes with their request durations, slowest first"""
+    profiler = get_profiler()
+    return {"interval_ms": profiler.interval * 1000, "routes": profiler.summary()}
+
+
+@router.get("/profiles/folded", response_class=PlainTextResponse)
+async def get_folded_stacks(route: Optional[str] = None):
+    """Sampled stacks in folded format, for flamegraph.pl or speedscope"""
+    return get_profiler().folded(route)
+
+
+@router.post("/profiles/reset", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_profiles():
+    """Drop the collected profiles"""
+    get_profiler().reset()
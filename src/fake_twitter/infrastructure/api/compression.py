@@ -0,0 +1,165 @@
+"""Response compression negotiated from ``Accept-Encoding``.
+
+Bodies under ``minimum_size`` are sent as they are: compressing them costs
+more CPU than the bytes it saves. Compressed bodies are kept in a small LRU
+keyed by a hash of the uncompressed body, so hot responses (the first page
+of tweets, popular profiles) are compressed once rather than per request.
+
+zstd is offered when available (Python 3.14+ or the ``perf`` extra), gzip
+always.
+"""
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.fake_twitter.infrastructure.api.negotiation import preferred
+
+
+def _gzip(level: int) -> Callable[[bytes], bytes]:
+    # mtime=0 keeps the output identical for identical bodies.
+    return lambda data: gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _zstd(level: int) -> Optional[Callable[[bytes], bytes]]:
+    try:
+        from compression import zstd
+
+        return lambda data: zstd.compress(data, level=level)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:  # the perf extra is not installed
+        return None
+    return zstandard.ZstdCompressor(level=level).compress
+
+
+def compressors(
+    gzip_level: int = 6, zstd_level: int = 3
+) -> Dict[str, Callable[[bytes], bytes]]:
+    """Available encodings in order of preference."""
+    available = {}
+    zstd = _zstd(zstd_level)
+    if zstd is not None:
+        available["zstd"] = zstd
+    available["gzip"] = _gzip(gzip_level)
+    return available
+
+
+_COMPRESSIBLE = ("text/", "application/json", "application/msgpack")
+
+
+def _compressible(content_type: str) -> bool:
+    return content_type.startswith(_COMPRESSIBLE) or "+json" in content_type
+
+
+class CompressedBodyCache:
+    def __init__(self, max_entries: int = 512, max_body_size: int = 1 << 20):
+        self.max_entries = max_entries
+        self.max_body_size = max_body_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+
+    def compress(
+        self, encoding: str, body: bytes, compress: Callable[[bytes], bytes]
+    ) -> bytes:
+        if self.max_entries <= 0 or len(body) > self.max_body_size:
+            return compress(body)
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self._entries.get(key)
+        if compressed is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return compressed
+        self.misses += 1
+        compressed = compress(body)
+        self._entries[key] = compressed
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return compressed
+
+
+class CompressionMiddleware:
+    """Compresses complete (non-streaming) response bodies.
+
+    Streaming responses are passed through untouched, as are bodies that
+    already carry a Content-Encoding or are not text-like.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        cache_entries: int = 512,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressors = compressors(gzip_level, zstd_level)
+        self.cache = CompressedBodyCache(cache_entries)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = preferred(
+            Headers(scope=scope).get("accept-encoding"), list(self.compressors)
+        )
+        start: Optional[Message] = None
+        streaming = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, streaming
+            if message["type"] == "http.response.start":
+                if encoding is None:
+                    # Caches must not hand this to clients that accept more.
+                    MutableHeaders(raw=message["headers"]).add_vary_header(
+                        "Accept-Encoding"
+                    )
+                    await send(message)
+                else:
+                    start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # A body sent from a file (pathsend, zerocopysend): as is.
+                if not streaming:
+                    MutableHeaders(raw=start["headers"]).add_vary_header(
+                        "Accept-Encoding"
+                    )
+                    await send(start)
+                    streaming = True
+                await send(message)
+                return
+            if streaming:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                streaming = True
+            elif (
+                len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and _compressible(headers.get("content-type", ""))
+            ):
+                body = self.cache.compress(encoding, body, self.compressors[encoding])
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
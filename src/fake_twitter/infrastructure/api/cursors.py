@@ -0,0 +1,38 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor encodes the ``(created_at, id)`` of the last item of a page; the
+next page starts right after it. Clients pass it back unchanged.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Query, status
+
+Position = Tuple[datetime, UUID]
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Position:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from None
+
+
+def page_cursor(
+    cursor: Optional[str] = Query(None, description="next_cursor of the last page"),
+) -> Optional[Position]:
+    """A dependency decoding ``cursor``."""
+    return decode_cursor(cursor) if cursor is not None else None
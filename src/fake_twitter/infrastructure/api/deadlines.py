@@ -0,0 +1,151 @@
+"""Per-route request deadlines (see ``infrastructure/deadlines.py``).
+
+Routes of a ``DeadlineRoute`` router run under a deadline from the moment
+they are matched until their response starts: dependencies, the endpoint
+and serialization. It is ``REQUEST_TIMEOUT_SECONDS``, or the route's entry
+in ``REQUEST_TIMEOUTS`` (keyed like ``"GET /api/v1/tweets/"``), unless the
+client sends ``X-Request-Timeout`` in seconds, which is held between
+``REQUEST_TIMEOUT_MIN_SECONDS`` and ``REQUEST_TIMEOUT_MAX_SECONDS``.
+
+When the deadline passes, the request's task is cancelled, and with it any
+query in flight, and the client gets a 504. A client that disconnects
+cancels its request the same way, without an answer. Once the response has
+started the request runs to the end, so work done after it (the commit of
+``get_db``) is never cut short by either.
+"""
+
+import asyncio
+import math
+from typing import Any, Callable, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.fake_twitter.config import Settings, get_settings
+from src.fake_twitter.infrastructure.api.tracing import TracedRoute
+from src.fake_twitter.infrastructure.deadlines import deadline
+
+TIMEOUT_HEADER = "x-request-timeout"
+
+
+def request_timeout(default: float, header: Optional[str], settings: Settings) -> float:
+    """The deadline in seconds of a request to a route with ``default``."""
+    if header is None:
+        return default
+    try:
+        seconds = float(header)
+    except ValueError:
+        return default
+    if not math.isfinite(seconds):
+        return default
+    return min(
+        max(seconds, settings.request_timeout_min_seconds),
+        settings.request_timeout_max_seconds,
+    )
+
+
+class _Receiver:
+    """The app's ``receive``, which also notices the client going away.
+
+    The app reads the request body as usual. Once it is all in (at once for
+    requests without a body) ``watch`` reads on, which returns as soon as
+    the client disconnects.
+    """
+
+    def __init__(self, receive: Receive, has_body: bool):
+        self._receive = receive
+        self._body_read = asyncio.Event()
+        # A request without a body still has an empty one for the app to read.
+        self._empty_body = not has_body
+        if not has_body:
+            self._body_read.set()
+        self.disconnected = asyncio.Event()
+
+    async def receive(self) -> Message:
+        if self._empty_body:
+            self._empty_body = False
+            return {"type": "http.request", "body": b"", "more_body": False}
+        if self._body_read.is_set():
+            await self.disconnected.wait()
+            return {"type": "http.disconnect"}
+        message = await self._receive()
+        if message["type"] == "http.disconnect":
+            self.disconnected.set()
+        elif not message.get("more_body", False):
+            self._body_read.set()
+        return message
+
+    async def watch(self) -> None:
+        await self._body_read.wait()
+        while True:
+            message = await self._receive()
+            if message["type"] == "http.disconnect":
+                self.disconnected.set()
+                return
+
+
+def with_deadline(app: ASGIApp, route: str) -> ASGIApp:
+    """``app`` under the deadline of ``route`` ("METHOD /path")."""
+
+    async def deadline_app(scope: Scope, receive: Receive, send: Send) -> None:
+        settings = get_settings()
+        headers = Headers(scope=scope)
+        seconds = request_timeout(
+            settings.request_timeouts.get(route, settings.request_timeout_seconds),
+            headers.get(TIMEOUT_HEADER),
+            settings,
+        )
+        receiver = _Receiver(
+            receive,
+            has_body=headers.get("content-length", "0") != "0"
+            or "transfer-encoding" in headers,
+        )
+        task = asyncio.current_task()
+        started = abandoned = False
+        timeout: Optional[asyncio.Timeout] = None
+
+        async def send_tracked(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                timeout.reschedule(None)
+            await send(message)
+
+        async def cancel_on_disconnect() -> None:
+            nonlocal abandoned
+            await receiver.disconnected.wait()
+            if not started:
+                abandoned = True
+                task.cancel()
+
+        watcher = asyncio.create_task(receiver.watch())
+        canceller = asyncio.create_task(cancel_on_disconnect())
+        try:
+            with deadline(seconds):
+                async with asyncio.timeout(seconds) as timeout:
+                    await app(scope, receiver.receive, send_tracked)
+        except TimeoutError:
+            if not started:
+                response = JSONResponse(
+                    {"detail": f"Request deadline of {seconds:g}s exceeded"},
+                    status_code=504,
+                )
+                await response(scope, receive, send)
+        except asyncio.CancelledError:
+            # The client is gone: there is no one to answer.
+            if not abandoned or task.uncancel() > 0:
+                raise
+        finally:
+            watcher.cancel()
+            canceller.cancel()
+
+    return deadline_app
+
+
+class DeadlineRoute(TracedRoute):
+    """A traced route whose requests run under a deadline."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, endpoint, **kwargs)
+        self.app = with_deadline(self.app, f"{min(self.methods)} {self.path}")
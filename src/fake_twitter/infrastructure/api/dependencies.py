@@ -3,28 +3,130 @@ from fastapi import Depends
 
 from src.fake_twitter.application.use_cases.tweet_use_cases import TweetUseCases
 from src.fake_twitter.application.use_cases.user_use_cases import UserUseCases
-from src.fake_twitter.infrastructure.database.connection import get_db
+from src.fake_twitter.domain.repositories.tweet_repository import TweetRepository
+from src.fake_twitter.infrastructure.activity import get_activity_buffer
+from src.fake_twitter.infrastructure.archive import get_tweet_archive
+from src.fake_twitter.infrastructure.database.connection import get_db, get_read_db
+from src.fake_twitter.infrastructure.database.on_commit import AfterCommit
+from src.fake_twitter.infrastructure.database.sharding import get_shard_set
+from src.fake_twitter.infrastructure.ingest import get_tweet_ingestor
+from src.fake_twitter.infrastructure.media import get_media_store
+from src.fake_twitter.infrastructure.ranking import get_tweet_ranking
+from src.fake_twitter.infrastructure.repositories.bloom_like_repository import (
+    BloomFilteredLikeRepository,
+    get_like_filter_cache,
+)
+from src.fake_twitter.infrastructure.repositories.sharded_tweet_repository import (
+    ShardedTweetRepository,
+)
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_activity_repository import (
+    SQLAlchemyActivityRepository,
+)
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_like_repository import (
+    SQLAlchemyLikeRepository,
+)
 from src.fake_twitter.infrastructure.repositories.sqlalchemy_tweet_repository import (
     SQLAlchemyTweetRepository,
 )
 from src.fake_twitter.infrastructure.repositories.sqlalchemy_user_repository import (
     SQLAlchemyUserRepository,
 )
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_view_repository import (
+    SQLAlchemyViewRepository,
+)
+from src.fake_twitter.infrastructure.tracing import Traced, get_tracer
+from src.fake_twitter.infrastructure.user_search import get_user_search_index
+from src.fake_twitter.infrastructure.views import get_tweet_views
 
 
 async def get_db_session(db: AsyncSession = Depends(get_db)) -> AsyncSession:
     return db
 
 
+def traced(target):
+    """``target`` with a span per async method call while tracing is on."""
+    if get_tracer() is None:
+        return target
+    return Traced(target)
+
+
+def _after_commit(target, db: AsyncSession, *methods: str):
+    """``target`` with ``methods`` applied once ``db`` commits.
+
+    In-process state is only changed by writes that commit: a batch
+    operation rolled back to its savepoint takes its changes with it.
+    """
+    if target is None:
+        return None
+    return AfterCommit(target, db, methods)
+
+
+def _tweet_repository(db: AsyncSession) -> TweetRepository:
+    shards = get_shard_set()
+    if shards is not None:
+        return ShardedTweetRepository(shards)
+    return SQLAlchemyTweetRepository(db, get_tweet_archive())
+
+
+def build_tweet_use_cases(db: AsyncSession) -> TweetUseCases:
+    tweet_repository = _tweet_repository(db)
+    # Group commit does not apply to sharded tweets.
+    tweet_ingestor = None if get_shard_set() is not None else get_tweet_ingestor()
+    like_repository = BloomFilteredLikeRepository(
+        SQLAlchemyLikeRepository(db), get_like_filter_cache()
+    )
+    return traced(
+        TweetUseCases(
+            traced(tweet_repository),
+            traced(like_repository),
+            tweet_ingestor,
+            _after_commit(get_tweet_ranking(), db, "record", "discard"),
+            # Rollups live with the users, also when tweets are sharded.
+            traced(SQLAlchemyActivityRepository(db, get_activity_buffer())),
+            get_media_store(),
+            get_tweet_views(),
+            # Like the rollups, views live with the users.
+            traced(SQLAlchemyViewRepository(db)),
+            # Likes are only taken from users that exist.
+            traced(SQLAlchemyUserRepository(db)),
+        )
+    )
+
+
 async def get_tweet_use_cases(
     db: AsyncSession = Depends(get_db_session),
 ) -> TweetUseCases:
-    tweet_repository = SQLAlchemyTweetRepository(db)
-    return TweetUseCases(tweet_repository)
+    return build_tweet_use_cases(db)
+
+
+async def get_read_tweet_use_cases(
+    db: AsyncSession = Depends(get_read_db),
+) -> TweetUseCases:
+    """Tweet use cases for GET endpoints, over a read-only session."""
+    return build_tweet_use_cases(db)
+
+
+def build_user_use_cases(db: AsyncSession) -> UserUseCases:
+    return traced(
+        UserUseCases(
+            traced(SQLAlchemyUserRepository(db)),
+            traced(SQLAlchemyActivityRepository(db, get_activity_buffer())),
+            _after_commit(get_user_search_index(), db, "add", "discard"),
+            # A deleted user's tweets are tombstoned with them.
+            traced(_tweet_repository(db)),
+            _after_commit(get_tweet_ranking(), db, "discard_user"),
+        )
+    )
 
 
 async def get_user_use_cases(
     db: AsyncSession = Depends(get_db_session),
 ) -> UserUseCases:
-    user_repository = SQLAlchemyUserRepository(db)
-    return UserUseCases(user_repository)
+    return build_user_use_cases(db)
+
+
+async def get_read_user_use_cases(
+    db: AsyncSession = Depends(get_read_db),
+) -> UserUseCases:
+    """User use cases for GET endpoints, over a read-only session."""
+    return build_user_use_cases(db)
@@ -0,0 +1,104 @@
+"""Embedded related objects: ``?expand=user`` on tweet read endpoints.
+
+Each tweet of the response gets its author as a compact ``user`` object. The
+authors of a page are loaded together, with one query for the distinct
+``user_id``s the request has not loaded yet, so expanding adds at most one
+query per page instead of a ``GET /users/{user_id}`` per tweet.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Query, status
+
+from src.fake_twitter.application.dtos.tweet_dtos import TweetResponseDTO
+from src.fake_twitter.application.dtos.user_dtos import AuthorDTO
+from src.fake_twitter.application.use_cases.user_use_cases import UserUseCases
+from src.fake_twitter.domain.entities.user import User
+from src.fake_twitter.infrastructure.api.dependencies import get_read_user_use_cases
+
+EXPANSIONS = ("user",)
+
+
+class UserLoader:
+    """Users by id for one request: each id is queried at most once."""
+
+    def __init__(self, use_cases: UserUseCases):
+        self.use_cases = use_cases
+        self._users: Dict[UUID, Optional[User]] = {}
+
+    async def load_many(self, user_ids: Iterable[UUID]) -> Dict[UUID, Optional[User]]:
+        """The users of ``user_ids``; None for those that do not exist."""
+        wanted = list(dict.fromkeys(user_ids))
+        missing = [user_id for user_id in wanted if user_id not in self._users]
+        if missing:
+            found = {
+                user.id: user for user in await self.use_cases.get_users_by_ids(missing)
+            }
+            for user_id in missing:
+                self._users[user_id] = found.get(user_id)
+        return {user_id: self._users[user_id] for user_id in wanted}
+
+
+def _author(user: Optional[User]) -> Optional[AuthorDTO]:
+    return AuthorDTO.model_validate(user) if user else None
+
+
+class Expander:
+    """Embeds the expansions a request asked for into its tweets."""
+
+    def __init__(self, expand: Set[str], loader: UserLoader):
+        self.expand = expand
+        self.loader = loader
+
+    async def tweets(self, tweets: List[TweetResponseDTO]) -> List[TweetResponseDTO]:
+        if "user" in self.expand and tweets:
+            users = await self.loader.load_many(tweet.user_id for tweet in tweets)
+            for tweet in tweets:
+                tweet.user = _author(users[tweet.user_id])
+        return tweets
+
+    async def tweet(self, tweet: TweetResponseDTO) -> TweetResponseDTO:
+        return (await self.tweets([tweet]))[0]
+
+    async def partial(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Partial tweets (see fields.py), which need their user_id to expand."""
+        if "user" not in self.expand or not rows:
+            return rows
+        if "user_id" not in rows[0]:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="expand=user needs user_id among the fields",
+            )
+        users = await self.loader.load_many(row["user_id"] for row in rows)
+        for row in rows:
+            author = _author(users[row["user_id"]])
+            row["user"] = author.model_dump() if author else None
+        return rows
+
+
+def expansions(
+    expand: Optional[str] = Query(
+        None, description=f"Comma-separated subset of: {', '.join(EXPANSIONS)}"
+    ),
+) -> Set[str]:
+    """A dependency parsing ``expand``."""
+    if expand is None:
+        return set()
+    names = {name.strip() for name in expand.split(",") if name.strip()}
+    unknown = sorted(names.difference(EXPANSIONS))
+    if not names or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Unknown expansions: {', '.join(unknown) or '(none given)'}; "
+            f"allowed: {', '.join(EXPANSIONS)}",
+        )
+    return names
+
+
+async def get_expander(
+    expand: Set[str] = Depends(expansions),
+    users: UserUseCases = Depends(get_read_user_use_cases),
+) -> Expander:
+    # A loader per request: authors are never cached across requests.
+    return Expander(expand, UserLoader(users))
@@ -0,0 +1,47 @@
+"""Sparse fieldsets: ``?fields=id,content`` on read endpoints.
+
+The requested fields are checked against the response DTO and selected as
+columns in SQL, and the rows go out as partial objects without building
+entities or DTOs (``Renderer.partial``).
+"""
+
+from typing import Callable, List, Optional, Sequence, Type
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+from src.fake_twitter.application.dtos.tweet_dtos import TweetResponseDTO
+from src.fake_twitter.application.dtos.user_dtos import UserResponseDTO
+
+
+def sparse_fields(
+    dto: Type[BaseModel], exclude: Sequence[str] = ()
+) -> Callable[..., Optional[List[str]]]:
+    """A dependency parsing ``fields`` into names of ``dto``'s column fields."""
+    allowed = [name for name in dto.model_fields if name not in exclude]
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated subset of: {', '.join(allowed)}"
+        ),
+    ) -> Optional[List[str]]:
+        if fields is None:
+            return None
+        names = list(
+            dict.fromkeys(name.strip() for name in fields.split(",") if name.strip())
+        )
+        unknown = [name for name in names if name not in allowed]
+        if not names or unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail=f"Unknown fields: {', '.join(unknown) or '(none given)'}; "
+                f"allowed: {', '.join(allowed)}",
+            )
+        return names
+
+    return dependency
+
+
+# user is embedded by expand=user (see expansion.py) and views_count comes
+# from tweet_views (see views.py): neither is a column.
+tweet_fields = sparse_fields(TweetResponseDTO, exclude=("user", "views_count"))
+user_fields = sparse_fields(UserResponseDTO)
@@ -0,0 +1,188 @@
+"""Responses serving stored media files.
+
+A media file never changes once stored and its id is its SHA-256, so the
+digest is a strong ETag and clients and proxies may cache the file for good
+(``immutable``): a revalidation is answered 304 without opening the file.
+A single byte range (``Range: bytes=a-b``, ``a-`` or ``-n``) is answered
+206, which is what video players and resumed downloads ask for; requests
+with several ranges get the whole file.
+
+The body is handed to the server without passing through Python where the
+server supports it: with the ASGI ``http.response.zerocopysend`` extension
+the server sends from the file descriptor itself (``sendfile``), and with
+``http.response.pathsend`` it sends a whole file by path. Otherwise the file
+is read in chunks off the event loop.
+"""
+
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from src.fake_twitter.domain.entities.media import Media
+
+CHUNK_SIZE = 256 * 1024
+CACHE_FOREVER = "public, max-age=31536000, immutable"
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """The ``[start, end)`` a Range header asks for, or None for everything.
+
+    Raises ``RangeNotSatisfiable`` when the range lies past the end of the
+    file. Malformed headers and several ranges are ignored, as RFC 9110
+    allows.
+    """
+    if header is None:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first or last):
+        return None
+    try:
+        if not first:
+            # The last n bytes.
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiable
+            return max(size - length, 0), size
+        start = int(first)
+        end = int(last) + 1 if last else size
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    if end <= start:
+        return None
+    return start, min(end, size)
+
+
+class MediaFileResponse(Response):
+    def __init__(self, path: str, media: Media):
+        self.path = path
+        self.media = media
+        self.status_code = 200
+        self.media_type = media.content_type
+        self.background = None
+        self.raw_headers = []
+
+    def _headers(self, extra: Optional[Dict[str, str]] = None) -> List:
+        headers = {
+            "etag": f'"{self.media.digest}"',
+            "cache-control": CACHE_FOREVER,
+            "accept-ranges": "bytes",
+            **(extra or {}),
+        }
+        return [(name.encode(), value.encode()) for name, value in headers.items()]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._respond(scope, send)
+        if self.background is not None:
+            await self.background()
+
+    async def _respond(self, scope: Scope, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        etag = f'"{self.media.digest}"'
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None and (
+            if_none_match.strip() == "*"
+            or etag
+            in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        ):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": self._headers(),
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        size = self.media.size
+        if_range = request_headers.get("if-range")
+        try:
+            requested = (
+                byte_range(request_headers.get("range"), size)
+                if if_range is None or if_range.strip() == etag
+                else None
+            )
+        except RangeNotSatisfiable:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 416,
+                    "headers": self._headers({"content-range": f"bytes */{size}"}),
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start, end = requested or (0, size)
+        extra = {
+            "content-type": self.media.content_type,
+            "content-length": str(end - start),
+        }
+        if requested is not None:
+            extra["content-range"] = f"bytes {start}-{end - 1}/{size}"
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 206 if requested is not None else 200,
+                "headers": self._headers(extra),
+            }
+        )
+        if scope["method"] == "HEAD" or start == end:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_file(scope, send, start, end, whole=requested is None)
+
+    async def _send_file(
+        self, scope: Scope, send: Send, start: int, end: int, whole: bool
+    ) -> None:
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            file = await asyncio.to_thread(open, self.path, "rb")
+            try:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": file,
+                        "offset": start,
+                        "count": end - start,
+                    }
+                )
+            finally:
+                file.close()
+        elif whole and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": self.path})
+        else:
+            fd = await asyncio.to_thread(os.open, self.path, os.O_RDONLY)
+            try:
+                while start < end:
+                    chunk = await asyncio.to_thread(
+                        os.pread, fd, min(CHUNK_SIZE, end - start), start
+                    )
+                    if not chunk:
+                        break
+                    start += len(chunk)
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": start < end,
+                        }
+                    )
+            finally:
+                os.close(fd)
+            if start < end:
+                # The file was cut short under us; end the response anyway.
+                await send({"type": "http.response.body", "body": b""})
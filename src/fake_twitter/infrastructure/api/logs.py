@@ -0,0 +1,39 @@
+"""Request ids for log correlation (see ``infrastructure/logs.py``).
+
+``RequestIdMiddleware`` gives each request an id, the caller's
+``X-Request-ID`` when it sends a usable one, makes it current for every
+record logged while serving the request and returns it in ``X-Request-ID``.
+"""
+
+import re
+from uuid import uuid4
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.fake_twitter.infrastructure.logs import request_id
+
+REQUEST_ID_HEADER = "x-request-id"
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestIdMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        current = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        if current is None or not _REQUEST_ID.match(current):
+            current = uuid4().hex
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"])[REQUEST_ID_HEADER] = current
+            await send(message)
+
+        with request_id(current):
+            await self.app(scope, receive, send_with_id)
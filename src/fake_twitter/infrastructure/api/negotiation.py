@@ -0,0 +1,40 @@
+"""Parsing of ``Accept``-style headers with quality values."""
+
+from typing import Dict, Optional, Sequence
+
+
+def qualities(header: Optional[str]) -> Dict[str, float]:
+    """``"gzip;q=0.5, zstd"`` -> ``{"gzip": 0.5, "zstd": 1.0}``."""
+    result: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        value, *params = (part.strip() for part in item.split(";"))
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, number = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        result[value.lower()] = quality
+    return result
+
+
+def preferred(header: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """The offered value the client rates highest, or None if it accepts none.
+
+    Wildcards (``*``, ``*/*``, ``type/*``) match what they cover, and ties go
+    to the value offered first.
+    """
+    rated = qualities(header)
+    best, best_quality = None, 0.0
+    for value in offered:
+        major = value.split("/")[0]
+        for candidate in (value, f"{major}/*", "*/*", "*"):
+            if candidate in rated:
+                if rated[candidate] > best_quality:
+                    best, best_quality = value, rated[candidate]
+                break
+    return best
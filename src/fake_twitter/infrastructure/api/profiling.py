@@ -0,0 +1,222 @@
+"""Statistical profiling of live requests.
+
+A request is profiled when it carries ``X-Profile`` set to the admin token, or
+at random with probability ``PROFILE_SAMPLE_RATE``. While any profiled request
+is in flight, a background thread wakes every ``PROFILE_INTERVAL_MS`` and
+records the stack of each profiled request's asyncio task:
+
+- while the task runs on the event loop, the loop thread's Python stack from
+  the middleware down, synchronous calls included;
+- while it is suspended, its chain of awaiting coroutines ending in an
+  ``<await>`` frame, so time spent waiting on the database shows up as well.
+
+Stacks are counted per route in the folded format read by flamegraph.pl and
+speedscope (``frame;frame;frame count``) and served from ``/api/admin``.
+Requests that are not profiled cost a random draw; the sampling thread only
+runs while a profiled request does.
+"""
+
+import asyncio
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.fake_twitter.config import get_settings
+
+WAITING = "<await>"
+UNMATCHED = "<unmatched>"
+_OTHER = ("<other stacks>",)
+
+
+@lru_cache(maxsize=4096)
+def _label(code: CodeType) -> str:
+    filename = code.co_filename
+    # Shortest path relative to an import root, e.g. src/fake_twitter/main.py.
+    roots = {os.getcwd(), *filter(None, sys.path)}
+    for root in sorted(roots, key=len, reverse=True):
+        if filename.startswith(root + os.sep):
+            filename = filename[len(root) + 1 :]
+            break
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+def _awaiting(coro: Any, root: FrameType) -> List[str]:
+    """Frames of a suspended task's await chain from ``root`` down."""
+    stack = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        if stack or frame is root:
+            stack.append(_label(frame.f_code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    stack.append(WAITING)
+    return stack
+
+
+def _running(frame: Optional[FrameType], root: FrameType) -> List[str]:
+    """Frames of the loop thread from ``root`` down."""
+    stack = []
+    while frame is not None:
+        stack.append(_label(frame.f_code))
+        if frame is root:
+            break
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class RouteProfile:
+    def __init__(self):
+        self.requests = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.stacks: Counter = Counter()
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+
+class Profiler:
+    def __init__(self, interval: float = 0.005, max_stacks: int = 2000):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.routes: Dict[str, RouteProfile] = {}
+        self._active: Dict[asyncio.Task, Tuple[FrameType, Counter]] = {}
+        self._loops: Dict[asyncio.AbstractEventLoop, int] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, task: asyncio.Task, root: FrameType) -> None:
+        """Sample ``task``, keeping the frames from ``root`` down."""
+        with self._lock:
+            self._active[task] = (root, Counter())
+            self._loops[task.get_loop()] = threading.get_ident()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+            self._wake.set()
+
+    def finish(self, task: asyncio.Task, route: str, elapsed: float) -> None:
+        with self._lock:
+            _, stacks = self._active.pop(task, (None, Counter()))
+            profile = self.routes.setdefault(route, RouteProfile())
+        profile.requests += 1
+        profile.total_seconds += elapsed
+        profile.slowest_seconds = max(profile.slowest_seconds, elapsed)
+        for stack, count in stacks.items():
+            # Bounded: stacks past the limit are counted together.
+            if stack not in profile.stacks and len(profile.stacks) >= self.max_stacks:
+                stack = _OTHER
+            profile.stacks[stack] += count
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            self.sample()
+
+    def sample(self) -> None:
+        """Record one stack of every profiled task."""
+        frames = sys._current_frames()
+        with self._lock:
+            if not self._active:
+                self._wake.clear()
+                return
+            running = {loop: asyncio.current_task(loop) for loop in self._loops}
+            for task, (root, stacks) in self._active.items():
+                loop = task.get_loop()
+                if running.get(loop) is task:
+                    stack = _running(frames.get(self._loops[loop]), root)
+                else:
+                    stack = _awaiting(task.get_coro(), root)
+                stacks[tuple(stack)] += 1
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Profiled routes, slowest on average first."""
+        rows = [
+            {
+                "route": route,
+                "requests": profile.requests,
+                "mean_ms": 1000 * profile.total_seconds / profile.requests,
+                "slowest_ms": 1000 * profile.slowest_seconds,
+                "samples": profile.samples,
+            }
+            for route, profile in list(self.routes.items())
+        ]
+        return sorted(rows, key=lambda row: row["mean_ms"], reverse=True)
+
+    def folded(self, route: Optional[str] = None) -> str:
+        """Folded stacks of one route, or of all with the route as root frame."""
+        lines = []
+        for name, profile in list(self.routes.items()):
+            if route is not None and name != route:
+                continue
+            prefix = () if route is not None else (name,)
+            for stack, count in profile.stacks.most_common():
+                lines.append(f"{';'.join(prefix + stack)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def reset(self) -> None:
+        self.routes = {}
+
+
+class ProfilingMiddleware:
+    """Profiles requests selected by header or by sampling rate."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: Profiler,
+        sample_rate: float = 0.0,
+        token: Optional[str] = None,
+    ):
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.token = token
+
+    def _selected(self, scope: Scope) -> bool:
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        if self.token is None:
+            return False
+        requested = Headers(scope=scope).get("x-profile")
+        return requested is not None and hmac.compare_digest(
+            requested.encode(), self.token.encode()
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        started = time.perf_counter()
+        self.profiler.start(task, sys._getframe())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Set by the router; templates keep the number of routes bounded.
+            route = getattr(scope.get("route"), "path", None)
+            name = f"{scope['method']} {route}" if route else UNMATCHED
+            self.profiler.finish(task, name, time.perf_counter() - started)
+
+
+@lru_cache
+def get_profiler() -> Profiler:
+    return Profiler(interval=get_settings().profile_interval_ms / 1000)
@@ -0,0 +1,88 @@
+"""Content negotiation for the tweet and user routes.
+
+``Accept: application/msgpack`` gets MessagePack (with the ``perf`` extra
+installed), where UUIDs are 16-byte binaries and datetimes are integer
+microseconds since the Unix epoch. Everything else gets the usual JSON.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from src.fake_twitter.infrastructure.api.negotiation import preferred
+
+try:
+    import msgpack
+except ImportError:  # the perf extra is not installed
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_ALIASES = ("application/x-msgpack", "application/vnd.msgpack")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _encode_extra(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return value.bytes
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            # Naive datetimes are stored as local time.
+            value = value.astimezone()
+        return (value - _EPOCH) // _MICROSECOND
+    raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+def _plain(data: Any) -> Any:
+    if isinstance(data, BaseModel):
+        return data.model_dump()
+    if isinstance(data, list):
+        return [_plain(item) for item in data]
+    return data
+
+
+def packb(data: Any) -> bytes:
+    return msgpack.packb(_plain(data), default=_encode_extra, use_bin_type=True)
+
+
+class MessagePackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+class Renderer:
+    """Turns endpoint results into the representation the client accepts."""
+
+    def __init__(self, media_type: str = JSON):
+        self.media_type = media_type
+
+    def __call__(self, data: Any) -> Any:
+        # JSON is left to FastAPI, so the response model still applies.
+        if self.media_type == MSGPACK:
+            return MessagePackResponse(data, headers={"Vary": "Accept"})
+        return data
+
+    def partial(self, data: Any) -> Response:
+        """Partial objects, which bypass the response model (see fields.py)."""
+        if self.media_type == MSGPACK:
+            return MessagePackResponse(data, headers={"Vary": "Accept"})
+        return JSONResponse(jsonable_encoder(data), headers={"Vary": "Accept"})
+
+
+def get_renderer(request: Request, response: Response) -> Renderer:
+    response.headers["Vary"] = "Accept"
+    if msgpack is None:
+        return Renderer(JSON)
+    accept = request.headers.get("accept")
+    for alias in _MSGPACK_ALIASES:
+        if accept and alias in accept:
+            accept = accept.replace(alias, MSGPACK)
+    return Renderer(preferred(accept, (JSON, MSGPACK)) or JSON)
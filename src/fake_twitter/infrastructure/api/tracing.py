@@ -0,0 +1,76 @@
+"""Entry points of request tracing (see ``infrastructure/tracing.py``).
+
+``TracingMiddleware`` opens the request span, continuing the caller's
+``traceparent``, and returns the trace's own ``traceparent`` on sampled
+responses. ``TracedRoute`` opens a span around the endpoint function only,
+so time spent validating the request and serializing the response is the
+request span's time outside it.
+"""
+
+import functools
+import inspect
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.fake_twitter.infrastructure.tracing import Tracer, activate, span
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        root = self.tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            Headers(scope=scope).get("traceparent"),
+            **{"http.method": scope["method"], "url.path": scope["path"]},
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_traced(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                MutableHeaders(raw=message["headers"])["traceparent"] = root.traceparent
+            await send(message)
+
+        with activate(root):
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                # Named by route template once routed, as other tracers do.
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    root.name = f"{scope['method']} {route}"
+                    root.attributes["http.route"] = route
+
+
+def _traced_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    name = f"route {endpoint.__name__}"
+
+    # FastAPI reads the signature through functools.wraps' __wrapped__.
+    @functools.wraps(endpoint)
+    async def traced(*args, **kwargs):
+        with span(name):
+            return await endpoint(*args, **kwargs)
+
+    traced._traced = True
+    return traced
+
+
+class TracedRoute(APIRoute):
+    """An APIRoute whose async endpoint runs inside a span."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        # include_router builds its copy of a route from the wrapped endpoint.
+        if inspect.iscoroutinefunction(endpoint) and not hasattr(endpoint, "_traced"):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,151 @@
+"""Streaming multipart uploads into the media store.
+
+``request.form()`` spools every file part to a temporary file before the
+endpoint runs, which the store would then read back and copy. Here the
+request body is fed to python-multipart as it arrives and the file part is
+hashed and written straight into a ``MediaWriter``: one copy on disk, at
+most one received chunk in memory, and an upload that is too large or not
+an accepted type is refused as soon as that is known.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from src.fake_twitter.domain.entities.media import Media
+from src.fake_twitter.infrastructure.media import (
+    SNIFF_BYTES,
+    LocalMediaStore,
+    MediaWriter,
+    sniff,
+)
+
+UNSUPPORTED = "Only JPEG, PNG, GIF, WebP and MP4 files are accepted"
+
+
+class _Parts:
+    """Collects parser callbacks; the parser itself cannot await."""
+
+    def __init__(self):
+        # ("part", content disposition), ("data", bytes) or ("end", b"").
+        self.events: List[Tuple[str, bytes]] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self._headers.clear,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": lambda: self.events.append(("end", b"")),
+        }
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def _on_headers_finished(self) -> None:
+        disposition = self._headers.get(b"content-disposition", b"")
+        self.events.append(("part", disposition))
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self.events.append(("data", bytes(data[start:end])))
+
+
+@contextmanager
+def _parsing() -> Iterator[None]:
+    """Answer a body the parser rejects with ``400 Bad Request``."""
+    try:
+        yield
+    except MultipartParseError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Malformed multipart/form-data body",
+        ) from error
+
+
+async def receive_media(
+    request: Request, store: LocalMediaStore, field: str = "file"
+) -> Media:
+    """Store the ``field`` file part of a multipart/form-data request."""
+    content_type, options = parse_options_header(
+        request.headers.get("content-type", "")
+    )
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected a multipart/form-data body",
+        )
+
+    parts = _Parts()
+    parser = MultipartParser(boundary, parts.callbacks())
+    writer: Optional[MediaWriter] = None
+    receiving = received = False
+    try:
+        async for chunk in request.stream():
+            with _parsing():
+                parser.write(chunk)
+            pieces: List[bytes] = []
+            for event, value in parts.events:
+                if event == "part":
+                    _, disposition = parse_options_header(value)
+                    # Only the first part with the name; other fields are ignored.
+                    receiving = not received and disposition.get(b"name") == (
+                        field.encode()
+                    )
+                elif event == "data" and receiving:
+                    pieces.append(value)
+                elif event == "end" and receiving:
+                    receiving, received = False, True
+            parts.events.clear()
+            if not pieces:
+                continue
+            if writer is None:
+                writer = await asyncio.to_thread(store.writer)
+            data = b"".join(pieces)
+            if writer.size + len(data) > store.max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                    detail=f"Media is limited to {store.max_bytes} bytes",
+                )
+            await asyncio.to_thread(writer.write, data)
+            if len(writer.head) >= SNIFF_BYTES and sniff(writer.head) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail=UNSUPPORTED,
+                )
+        with _parsing():
+            parser.finalize()
+
+        if not received or writer is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail=f"A non-empty {field!r} file part is required",
+            )
+        extension = sniff(writer.head)
+        if extension is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=UNSUPPORTED,
+            )
+        media = await asyncio.to_thread(writer.commit, extension)
+        writer = None
+        return media
+    finally:
+        if writer is not None:
+            await asyncio.to_thread(writer.abort)
@@ -1,9 +1,13 @@
 from fastapi import APIRouter
 from .users import router as users_router
 from .tweets import router as tweets_router
+from .batch import router as batch_router
+from .media import router as media_router
 
 router = APIRouter()
 router.include_router(users_router)
 router.include_router(tweets_router)
+router.include_router(batch_router)
+router.include_router(media_router)
 
 __all__ = ["router"]
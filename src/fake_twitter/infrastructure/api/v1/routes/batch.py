@@ -0,0 +1,373 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Type
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.fake_twitter.application.use_cases.tweet_use_cases import TweetUseCases
+from src.fake_twitter.application.use_cases.user_use_cases import UserUseCases
+from src.fake_twitter.domain.entities.tweet import ArchivedTweetError
+from src.fake_twitter.application.dtos.batch_dtos import (
+    BatchOperationDTO,
+    BatchRequestDTO,
+    BatchResultDTO,
+    BatchResponseDTO,
+)
+from src.fake_twitter.application.dtos.tweet_dtos import (
+    TweetCreateDTO,
+    TweetUpdateDTO,
+    TweetResponseDTO,
+    TweetLikeDTO,
+    LikeLookupDTO,
+)
+from src.fake_twitter.application.dtos.user_dtos import (
+    UserCreateDTO,
+    UserUpdateDTO,
+    UserResponseDTO,
+)
+from src.fake_twitter.infrastructure.api.deadlines import DeadlineRoute
+from src.fake_twitter.infrastructure.api.dependencies import (
+    get_db_session,
+    get_tweet_use_cases,
+    get_user_use_cases,
+)
+from src.fake_twitter.infrastructure.database.sharding import get_shard_set
+from src.fake_twitter.infrastructure.ingest import get_tweet_ingestor
+
+
+router = APIRouter(tags=["batch"], route_class=DeadlineRoute)
+
+
+class TweetIdArgs(BaseModel):
+    tweet_id: UUID
+
+
+class UserIdArgs(BaseModel):
+    user_id: UUID
+
+
+class UsernameArgs(BaseModel):
+    username: str
+
+
+class TweetsByUserArgs(BaseModel):
+    user_id: UUID
+    skip: int = 0
+    limit: int = 100
+
+
+class TweetUpdateArgs(TweetUpdateDTO):
+    tweet_id: UUID
+
+
+class TweetLikeArgs(TweetLikeDTO):
+    tweet_id: UUID
+
+
+class UserUpdateArgs(UserUpdateDTO):
+    user_id: UUID
+
+
+@dataclass
+class UseCases:
+    tweets: TweetUseCases
+    users: UserUseCases
+
+
+@dataclass(frozen=True)
+class Operation:
+    """A batchable use-case call and how its result maps onto a response.
+
+    Operations with ``fetch_many`` are lookups by ``key``: a run of
+    consecutive ones is answered by a single query.
+    """
+
+    args: Type[BaseModel]
+    run: Callable[[UseCases, Any], Awaitable[Any]]
+    response: Optional[Type[BaseModel]] = None
+    status: int = 200
+    not_found: str = "Not found"
+    key: Optional[str] = None
+    fetch_many: Optional[Callable[[UseCases, List[Any]], Awaitable[Dict[Any, Any]]]] = (
+        None
+    )
+
+
+async def _fetch_tweets(use_cases: UseCases, tweet_ids: List[UUID]) -> Dict[UUID, Any]:
+    tweets = await use_cases.tweets.get_tweets_by_ids(list(set(tweet_ids)))
+    return {tweet.id: tweet for tweet in tweets}
+
+
+async def _fetch_users(use_cases: UseCases, user_ids: List[UUID]) -> Dict[UUID, Any]:
+    users = await use_cases.users.get_users_by_ids(list(set(user_ids)))
+    return {user.id: user for user in users}
+
+
+async def _lookup_likes(use_cases: UseCases, args: LikeLookupDTO) -> List[UUID]:
+    liked = await use_cases.tweets.get_liked_tweet_ids(args.user_id, args.tweet_ids)
+    return [tweet_id for tweet_id in dict.fromkeys(args.tweet_ids) if tweet_id in liked]
+
+
+TWEET_NOT_FOUND = "Tweet not found"
+USER_NOT_FOUND = "User not found"
+
+OPERATIONS: Dict[str, Operation] = {
+    "create_tweet": Operation(
+        TweetCreateDTO,
+        lambda u, a: u.tweets.create_tweet(a),
+        TweetResponseDTO,
+        status=201,
+        not_found="Tweet replied to not found",
+    ),
+    "get_tweet": Operation(
+        TweetIdArgs,
+        lambda u, a: u.tweets.get_tweet_by_id(a.tweet_id),
+        TweetResponseDTO,
+        not_found=TWEET_NOT_FOUND,
+        key="tweet_id",
+        fetch_many=_fetch_tweets,
+    ),
+    "get_tweets_by_user": Operation(
+        TweetsByUserArgs,
+        lambda u, a: u.tweets.get_tweets_by_user(a.user_id, a.skip, a.limit),
+        TweetResponseDTO,
+    ),
+    "update_tweet": Operation(
+        TweetUpdateArgs,
+        lambda u, a: u.tweets.update_tweet(a.tweet_id, a),
+        TweetResponseDTO,
+        not_found=TWEET_NOT_FOUND,
+    ),
+    "delete_tweet": Operation(
+        TweetIdArgs,
+        lambda u, a: u.tweets.delete_tweet(a.tweet_id),
+        not_found=TWEET_NOT_FOUND,
+    ),
+    "like_tweet": Operation(
+        TweetLikeArgs,
+        lambda u, a: u.tweets.like_tweet(a.tweet_id, a.user_id),
+        TweetResponseDTO,
+        not_found=TWEET_NOT_FOUND,
+    ),
+    "unlike_tweet": Operation(
+        TweetLikeArgs,
+        lambda u, a: u.tweets.unlike_tweet(a.tweet_id, a.user_id),
+        TweetResponseDTO,
+        not_found=TWEET_NOT_FOUND,
+    ),
+    "retweet": Operation(
+        TweetIdArgs,
+        lambda u, a: u.tweets.retweet(a.tweet_id),
+        TweetResponseDTO,
+        not_found=TWEET_NOT_FOUND,
+    ),
+    "lookup_likes": Operation(LikeLookupDTO, _lookup_likes),
+    "create_user": Operation(
+        UserCreateDTO,
+        lambda u, a: u.users.create_user(a),
+        UserResponseDTO,
+        status=201,
+    ),
+    "get_user": Operation(
+        UserIdArgs,
+        lambda u, a: u.users.get_user_by_id(a.user_id),
+        UserResponseDTO,
+        not_found=USER_NOT_FOUND,
+        key="user_id",
+        fetch_many=_fetch_users,
+    ),
+    "get_user_by_username": Operation(
+        UsernameArgs,
+        lambda u, a: u.users.get_user_by_username(a.username),
+        UserResponseDTO,
+        not_found=USER_NOT_FOUND,
+    ),
+    "update_user": Operation(
+        UserUpdateArgs,
+        lambda u, a: u.users.update_user(a.user_id, a),
+        UserResponseDTO,
+        not_found=USER_NOT_FOUND,
+    ),
+    "delete_user": Operation(
+        UserIdArgs,
+        lambda u, a: u.users.delete_user(a.user_id),
+        not_found=USER_NOT_FOUND,
+    ),
+    "follow_user": Operation(
+        UserIdArgs,
+        lambda u, a: u.users.follow_user(a.user_id),
+        UserResponseDTO,
+        not_found=USER_NOT_FOUND,
+    ),
+    "unfollow_user": Operation(
+        UserIdArgs,
+        lambda u, a: u.users.unfollow_user(a.user_id),
+        UserResponseDTO,
+        not_found=USER_NOT_FOUND,
+    ),
+}
+
+
+def _invalid(error: ValidationError) -> BatchResultDTO:
+    return BatchResultDTO(
+        status=422, detail=error.errors(include_url=False, include_context=False)
+    )
+
+
+def _to_result(operation: Operation, result: Any) -> BatchResultDTO:
+    if result is None or result is False:
+        return BatchResultDTO(status=404, detail=operation.not_found)
+    if result is True:
+        return BatchResultDTO(status=204)
+    if operation.response is not None:
+        if isinstance(result, list):
+            result = [operation.response.model_validate(item) for item in result]
+        else:
+            result = operation.response.model_validate(result)
+    return BatchResultDTO(status=operation.status, body=result)
+
+
+def _error(error: Exception) -> BatchResultDTO:
+    # Use cases answer a missing target with None (see _to_result); a
+    # ValueError is a request they refused, like the single endpoints' 422,
+    # and so is a change to an archived tweet, like their 409.
+    if isinstance(error, ArchivedTweetError):
+        return BatchResultDTO(status=409, detail=str(error))
+    if isinstance(error, IntegrityError):
+        return BatchResultDTO(status=409, detail="Conflicts with existing data")
+    if isinstance(error, SQLAlchemyError):
+        return BatchResultDTO(status=500, detail="Database error")
+    return BatchResultDTO(status=422, detail=str(error))
+
+
+@asynccontextmanager
+async def _isolated(session: AsyncSession, savepoint: bool) -> AsyncIterator[None]:
+    # A failing operation, read or write, only undoes itself: without the
+    # savepoint its error would abort the whole transaction, and every later
+    # operation and the commit with it. In-process effects wait for the
+    # commit too (database/on_commit.py), so the rollback drops them.
+    if savepoint:
+        async with session.begin_nested():
+            yield
+    else:
+        yield
+
+
+async def _run_one(
+    request: BatchOperationDTO,
+    use_cases: UseCases,
+    session: AsyncSession,
+    savepoint: bool,
+) -> BatchResultDTO:
+    operation = OPERATIONS.get(request.op)
+    if operation is None:
+        return BatchResultDTO(status=400, detail=f"Unknown operation {request.op!r}")
+    try:
+        args = operation.args.model_validate(request.args)
+    except ValidationError as error:
+        return _invalid(error)
+
+    try:
+        async with _isolated(session, savepoint):
+            result = await operation.run(use_cases, args)
+    except (SQLAlchemyError, ValueError, ArchivedTweetError) as error:
+        return _error(error)
+    return _to_result(operation, result)
+
+
+async def _fetch_run(
+    operation: Operation,
+    requests: List[BatchOperationDTO],
+    use_cases: UseCases,
+    session: AsyncSession,
+    savepoint: bool,
+) -> List[BatchResultDTO]:
+    results: List[Optional[BatchResultDTO]] = [None] * len(requests)
+    keys = {}
+    for position, request in enumerate(requests):
+        try:
+            args = operation.args.model_validate(request.args)
+        except ValidationError as error:
+            results[position] = _invalid(error)
+            continue
+        keys[position] = getattr(args, operation.key)
+
+    try:
+        async with _isolated(session, savepoint):
+            found = (
+                await operation.fetch_many(use_cases, list(keys.values()))
+                if keys
+                else {}
+            )
+    except (SQLAlchemyError, ValueError, ArchivedTweetError) as error:
+        failed = _error(error)
+        return [result or failed for result in results]
+    for position, key in keys.items():
+        results[position] = _to_result(operation, found.get(key))
+    return results
+
+
+@router.post("/batch", response_model=BatchResponseDTO)
+async def run_batch(
+    batch_dto: BatchRequestDTO,
+    session: AsyncSession = Depends(get_db_session),
+    tweet_use_cases: TweetUseCases = Depends(get_tweet_use_cases),
+    user_use_cases: UserUseCases = Depends(get_user_use_cases),
+):
+    """Run several operations in order over one session and one commit"""
+    if batch_dto.atomic and (
+        get_shard_set() is not None or get_tweet_ingestor() is not None
+    ):
+        # Sharded and group-committed tweet writes commit outside the
+        # batch's transaction, so nothing could undo them.
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Atomic batches are not available while tweets are sharded "
+            "or group-committed",
+        )
+    use_cases = UseCases(tweet_use_cases, user_use_cases)
+    requests = batch_dto.operations
+    results: List[BatchResultDTO] = []
+
+    start = 0
+    while start < len(requests):
+        operation = OPERATIONS.get(requests[start].op)
+        if operation is not None and operation.fetch_many is not None:
+            end = start + 1
+            while end < len(requests) and requests[end].op == requests[start].op:
+                end += 1
+            results += await _fetch_run(
+                operation,
+                requests[start:end],
+                use_cases,
+                session,
+                not batch_dto.atomic,
+            )
+        else:
+            end = start + 1
+            results.append(
+                await _run_one(
+                    requests[start], use_cases, session, not batch_dto.atomic
+                )
+            )
+
+        if batch_dto.atomic:
+            failed = next(
+                (index for index in range(start, end) if results[index].status >= 400),
+                None,
+            )
+            if failed is not None:
+                await session.rollback()
+                results += [
+                    BatchResultDTO(
+                        status=424, detail=f"Not run: operation {failed} failed"
+                    )
+                    for _ in range(end, len(requests))
+                ]
+                return BatchResponseDTO(committed=False, results=results)
+        start = end
+
+    await session.commit()
+    return BatchResponseDTO(committed=True, results=results)
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, status
+from src.fake_twitter.application.dtos.media_dtos import MediaResponseDTO
+from src.fake_twitter.domain.entities.media import MEDIA_ID_PATTERN
+from src.fake_twitter.infrastructure.api.files import MediaFileResponse
+from src.fake_twitter.infrastructure.api.rendering import Renderer, get_renderer
+from src.fake_twitter.infrastructure.api.tracing import TracedRoute
+from src.fake_twitter.infrastructure.api.uploads import receive_media
+from src.fake_twitter.infrastructure.media import LocalMediaStore, get_media_store
+
+
+router = APIRouter(prefix="/media", tags=["media"], route_class=TracedRoute)
+
+
+def require_media_store() -> LocalMediaStore:
+    store = get_media_store()
+    if store is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Media is not enabled"
+        )
+    return store
+
+
+@router.post("/", response_model=MediaResponseDTO, status_code=status.HTTP_201_CREATED)
+async def upload_media(
+    request: Request,
+    render: Renderer = Depends(get_renderer),
+    store: LocalMediaStore = Depends(require_media_store),
+):
+    """Upload an image or video as the "file" part of a multipart form"""
+    media = await receive_media(request, store)
+    return render(MediaResponseDTO.model_validate(media))
+
+
+@router.head("/{media_id}", include_in_schema=False)
+@router.get("/{media_id}", responses={206: {"description": "The requested byte range"}})
+async def get_media(
+    media_id: str = Path(..., pattern=MEDIA_ID_PATTERN),
+    store: LocalMediaStore = Depends(require_media_store),
+):
+    """A media file, or the byte range asked for with Range"""
+    media = await store.get(media_id)
+    if media is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Media not found"
+        )
+    return MediaFileResponse(store.path(media_id), media)
@@ -1,38 +1,120 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from src.fake_twitter.application.use_cases.tweet_use_cases import TweetUseCases
+from src.fake_twitter.domain.entities.tweet import ArchivedTweetError
 from src.fake_twitter.application.dtos.tweet_dtos import (
     TweetCreateDTO,
     TweetUpdateDTO,
     TweetResponseDTO,
+    ThreadResponseDTO,
+    TweetLikeDTO,
+    LikeLookupDTO,
+    LikeLookupResponseDTO,
 )
-from src.fake_twitter.infrastructure.api.dependencies import get_tweet_use_cases
+from src.fake_twitter.infrastructure.api.deadlines import DeadlineRoute
+from src.fake_twitter.infrastructure.api.dependencies import (
+    get_read_tweet_use_cases,
+    get_tweet_use_cases,
+)
+from src.fake_twitter.infrastructure.api.cursors import (
+    Position,
+    encode_cursor,
+    page_cursor,
+)
+from src.fake_twitter.infrastructure.api.expansion import Expander, get_expander
+from src.fake_twitter.infrastructure.api.fields import tweet_fields
+from src.fake_twitter.infrastructure.api.rendering import Renderer, get_renderer
+from src.fake_twitter.infrastructure.api.views import ViewCounter, get_view_counter
 
 
-router = APIRouter(prefix="/tweets", tags=["tweets"])
+router = APIRouter(prefix="/tweets", tags=["tweets"], route_class=DeadlineRoute)
 
 
 @router.post("/", response_model=TweetResponseDTO, status_code=status.HTTP_201_CREATED)
 async def create_tweet(
-    tweet_dto: TweetCreateDTO, use_cases: TweetUseCases = Depends(get_tweet_use_cases)
+    tweet_dto: TweetCreateDTO,
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_tweet_use_cases),
+):
+    """Create a new tweet, or a reply with in_reply_to_id"""
+    try:
+        tweet = await use_cases.create_tweet(tweet_dto)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(error)
+        )
+    except ArchivedTweetError as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
+    if not tweet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tweet replied to not found",
+        )
+    return render(TweetResponseDTO.model_validate(tweet))
+
+
+@router.post("/likes/lookup", response_model=LikeLookupResponseDTO)
+async def lookup_likes(
+    lookup_dto: LikeLookupDTO,
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_tweet_use_cases),
+):
+    """Which of the given tweets a user has liked"""
+    liked = await use_cases.get_liked_tweet_ids(
+        lookup_dto.user_id, lookup_dto.tweet_ids
+    )
+    # Keep the order the ids were asked in.
+    liked_tweet_ids = [
+        tweet_id
+        for tweet_id in dict.fromkeys(lookup_dto.tweet_ids)
+        if tweet_id in liked
+    ]
+    return render(
+        LikeLookupResponseDTO(
+            user_id=lookup_dto.user_id, liked_tweet_ids=liked_tweet_ids
+        )
+    )
+
+
+@router.get("/top", response_model=List[TweetResponseDTO])
+async def get_top_tweets(
+    window: str = Query("24h", pattern="^(1h|24h|7d)$"),
+    limit: int = Query(20, ge=1, le=100),
+    expand: Expander = Depends(get_expander),
+    views: ViewCounter = Depends(get_view_counter),
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_read_tweet_use_cases),
 ):
-    """Create a new tweet"""
-    tweet = await use_cases.create_tweet(tweet_dto)
-    return TweetResponseDTO.model_validate(tweet)
+    """Most engaging recent tweets, served from the in-memory ranking"""
+    tweets = await use_cases.get_top_tweets(window, limit)
+    page = [TweetResponseDTO.model_validate(t) for t in tweets]
+    return render(await expand.tweets(await views.tweets(page)))
 
 
 @router.get("/{tweet_id}", response_model=TweetResponseDTO)
 async def get_tweet(
-    tweet_id: UUID, use_cases: TweetUseCases = Depends(get_tweet_use_cases)
+    tweet_id: UUID,
+    fields: Optional[List[str]] = Depends(tweet_fields),
+    expand: Expander = Depends(get_expander),
+    views: ViewCounter = Depends(get_view_counter),
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_read_tweet_use_cases),
 ):
     """Get a tweet by ID"""
-    tweet = await use_cases.get_tweet_by_id(tweet_id)
+    if fields:
+        tweet = await use_cases.get_partial_tweet_by_id(tweet_id, fields)
+    else:
+        tweet = await use_cases.get_tweet_by_id(tweet_id)
     if not tweet:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Tweet not found"
         )
-    return TweetResponseDTO.model_validate(tweet)
+    if fields:
+        return render.partial((await expand.partial([tweet]))[0])
+    tweet_dto = await views.tweet(TweetResponseDTO.model_validate(tweet))
+    return render(await expand.tweet(tweet_dto))
 
 
 @router.get("/user/{user_id}", response_model=List[TweetResponseDTO])
@@ -40,37 +122,105 @@ async def get_tweets_by_user(
     user_id: UUID,
     skip: int = 0,
     limit: int = 100,
-    use_cases: TweetUseCases = Depends(get_tweet_use_cases),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[List[str]] = Depends(tweet_fields),
+    expand: Expander = Depends(get_expander),
+    views: ViewCounter = Depends(get_view_counter),
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_read_tweet_use_cases),
 ):
-    """Get all tweets by a user with pagination"""
-    tweets = await use_cases.get_tweets_by_user(user_id, skip, limit)
-    return [TweetResponseDTO.model_validate(tweet) for tweet in tweets]
+    """Get all tweets by a user with pagination, optionally within [since, until)"""
+    if fields:
+        return render.partial(
+            await expand.partial(
+                await use_cases.get_partial_tweets_by_user(
+                    user_id, fields, skip, limit, since, until
+                )
+            )
+        )
+    tweets = await use_cases.get_tweets_by_user(user_id, skip, limit, since, until)
+    page = [TweetResponseDTO.model_validate(t) for t in tweets]
+    return render(await expand.tweets(await views.tweets(page)))
 
 
 @router.get("/", response_model=List[TweetResponseDTO])
 async def get_all_tweets(
     skip: int = 0,
     limit: int = 100,
-    use_cases: TweetUseCases = Depends(get_tweet_use_cases),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[List[str]] = Depends(tweet_fields),
+    expand: Expander = Depends(get_expander),
+    views: ViewCounter = Depends(get_view_counter),
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_read_tweet_use_cases),
 ):
-    """Get all tweets with pagination"""
-    tweets = await use_cases.get_all_tweets(skip, limit)
-    return [TweetResponseDTO.model_validate(tweet) for tweet in tweets]
+    """Get all tweets with pagination, optionally within [since, until)"""
+    if fields:
+        return render.partial(
+            await expand.partial(
+                await use_cases.get_all_partial_tweets(
+                    fields, skip, limit, since, until
+                )
+            )
+        )
+    tweets = await use_cases.get_all_tweets(skip, limit, since, until)
+    page = [TweetResponseDTO.model_validate(t) for t in tweets]
+    return render(await expand.tweets(await views.tweets(page)))
+
+
+@router.get("/{tweet_id}/thread", response_model=ThreadResponseDTO)
+async def get_thread(
+    tweet_id: UUID,
+    after: Optional[Position] = Depends(page_cursor),
+    limit: int = Query(100, ge=1, le=1000),
+    expand: Expander = Depends(get_expander),
+    views: ViewCounter = Depends(get_view_counter),
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_read_tweet_use_cases),
+):
+    """The conversation a tweet belongs to, replies oldest first"""
+    thread = await use_cases.get_thread(tweet_id, after, limit)
+    if not thread:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Tweet not found"
+        )
+    root, replies = thread
+    next_cursor = None
+    if len(replies) == limit:
+        next_cursor = encode_cursor(replies[-1].created_at, replies[-1].id)
+    page = [TweetResponseDTO.model_validate(reply) for reply in replies]
+    if root:
+        page.insert(0, TweetResponseDTO.model_validate(root))
+    # The root's author and the replies' are loaded together, as are their views.
+    page = await expand.tweets(await views.tweets(page))
+    return render(
+        ThreadResponseDTO(
+            root=page.pop(0) if root else None,
+            replies=page,
+            next_cursor=next_cursor,
+        )
+    )
 
 
 @router.put("/{tweet_id}", response_model=TweetResponseDTO)
 async def update_tweet(
     tweet_id: UUID,
     tweet_dto: TweetUpdateDTO,
+    render: Renderer = Depends(get_renderer),
     use_cases: TweetUseCases = Depends(get_tweet_use_cases),
 ):
     """Update a tweet"""
-    tweet = await use_cases.update_tweet(tweet_id, tweet_dto)
+    try:
+        tweet = await use_cases.update_tweet(tweet_id, tweet_dto)
+    except ArchivedTweetError as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
     if not tweet:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Tweet not found"
         )
-    return TweetResponseDTO.model_validate(tweet)
+    return render(TweetResponseDTO.model_validate(tweet))
 
 
 @router.delete("/{tweet_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -87,38 +237,63 @@ async def delete_tweet(
 
 @router.post("/{tweet_id}/like", response_model=TweetResponseDTO)
 async def like_tweet(
-    tweet_id: UUID, use_cases: TweetUseCases = Depends(get_tweet_use_cases)
+    tweet_id: UUID,
+    like_dto: TweetLikeDTO,
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_tweet_use_cases),
 ):
-    """Like a tweet"""
-    tweet = await use_cases.like_tweet(tweet_id)
+    """Like a tweet on behalf of a user; repeating it changes nothing"""
+    try:
+        tweet = await use_cases.like_tweet(tweet_id, like_dto.user_id)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(error)
+        )
+    except ArchivedTweetError as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
     if not tweet:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Tweet not found"
         )
-    return TweetResponseDTO.model_validate(tweet)
+    return render(TweetResponseDTO.model_validate(tweet))
 
 
 @router.post("/{tweet_id}/unlike", response_model=TweetResponseDTO)
 async def unlike_tweet(
-    tweet_id: UUID, use_cases: TweetUseCases = Depends(get_tweet_use_cases)
+    tweet_id: UUID,
+    like_dto: TweetLikeDTO,
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_tweet_use_cases),
 ):
-    """Unlike a tweet"""
-    tweet = await use_cases.unlike_tweet(tweet_id)
+    """Unlike a tweet on behalf of a user; repeating it changes nothing"""
+    try:
+        tweet = await use_cases.unlike_tweet(tweet_id, like_dto.user_id)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(error)
+        )
+    except ArchivedTweetError as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
     if not tweet:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Tweet not found"
         )
-    return TweetResponseDTO.model_validate(tweet)
+    return render(TweetResponseDTO.model_validate(tweet))
 
 
 @router.post("/{tweet_id}/retweet", response_model=TweetResponseDTO)
 async def retweet(
-    tweet_id: UUID, use_cases: TweetUseCases = Depends(get_tweet_use_cases)
+    tweet_id: UUID,
+    render: Renderer = Depends(get_renderer),
+    use_cases: TweetUseCases = Depends(get_tweet_use_cases),
 ):
     """Retweet a tweet"""
-    tweet = await use_cases.retweet(tweet_id)
+    try:
+        tweet = await use_cases.retweet(tweet_id)
+    except ArchivedTweetError as error:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(error))
     if not tweet:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Tweet not found"
         )
-    return TweetResponseDTO.model_validate(tweet)
+    return render(TweetResponseDTO.model_validate(tweet))
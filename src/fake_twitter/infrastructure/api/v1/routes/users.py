@@ -1,68 +1,172 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from src.fake_twitter.application.use_cases.user_use_cases import UserUseCases
 from src.fake_twitter.application.dtos.user_dtos import (
     UserCreateDTO,
     UserUpdateDTO,
     UserResponseDTO,
+    UserSuggestionDTO,
+    ActivityBucketDTO,
+    UserStatsResponseDTO,
 )
-from src.fake_twitter.infrastructure.api.dependencies import get_user_use_cases
+from src.fake_twitter.domain.entities.activity import GRANULARITIES
+from src.fake_twitter.infrastructure.api.deadlines import DeadlineRoute
+from src.fake_twitter.infrastructure.api.dependencies import (
+    get_read_user_use_cases,
+    get_user_use_cases,
+)
+from src.fake_twitter.infrastructure.api.fields import user_fields
+from src.fake_twitter.infrastructure.api.rendering import Renderer, get_renderer
+
+
+router = APIRouter(prefix="/users", tags=["users"], route_class=DeadlineRoute)
+
+# Buckets a stats request returns at most, and by default.
+MAX_STATS_BUCKETS = 1000
+DEFAULT_STATS_BUCKETS = {"hour": 48, "day": 90}
 
 
-router = APIRouter(prefix="/users", tags=["users"])
+def _local(moment: datetime) -> datetime:
+    # Rollup buckets are local time without a time zone.
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
 
 
 @router.post("/", response_model=UserResponseDTO, status_code=status.HTTP_201_CREATED)
 async def create_user(
-    user_dto: UserCreateDTO, use_cases: UserUseCases = Depends(get_user_use_cases)
+    user_dto: UserCreateDTO,
+    render: Renderer = Depends(get_renderer),
+    use_cases: UserUseCases = Depends(get_user_use_cases),
 ):
     """Create a new user"""
     user = await use_cases.create_user(user_dto)
-    return UserResponseDTO.model_validate(user)
+    return render(UserResponseDTO.model_validate(user))
+
+
+@router.get("/search", response_model=List[UserSuggestionDTO])
+async def search_users(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+    render: Renderer = Depends(get_renderer),
+    use_cases: UserUseCases = Depends(get_read_user_use_cases),
+):
+    """Users whose username or full name starts with prefix, most followed first"""
+    users = await use_cases.search_users(prefix, limit)
+    return render([UserSuggestionDTO.model_validate(user) for user in users])
 
 
 @router.get("/{user_id}", response_model=UserResponseDTO)
 async def get_user(
-    user_id: UUID, use_cases: UserUseCases = Depends(get_user_use_cases)
+    user_id: UUID,
+    fields: Optional[List[str]] = Depends(user_fields),
+    render: Renderer = Depends(get_renderer),
+    use_cases: UserUseCases = Depends(get_read_user_use_cases),
 ):
     """Get a user by ID"""
-    user = await use_cases.get_user_by_id(user_id)
+    if fields:
+        user = await use_cases.get_partial_user_by_id(user_id, fields)
+    else:
+        user = await use_cases.get_user_by_id(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    return UserResponseDTO.model_validate(user)
+    if fields:
+        return render.partial(user)
+    return render(UserResponseDTO.model_validate(user))
 
 
 @router.get("/username/{username}", response_model=UserResponseDTO)
 async def get_user_by_username(
-    username: str, use_cases: UserUseCases = Depends(get_user_use_cases)
+    username: str,
+    fields: Optional[List[str]] = Depends(user_fields),
+    render: Renderer = Depends(get_renderer),
+    use_cases: UserUseCases = Depends(get_read_user_use_cases),
 ):
     """Get a user by username"""
-    user = await use_cases.get_user_by_username(username)
+    if fields:
+        user = await use_cases.get_partial_user_by_username(username, fields)
+    else:
+        user = await use_cases.get_user_by_username(username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    return UserResponseDTO.model_validate(user)
+    if fields:
+        return render.partial(user)
+    return render(UserResponseDTO.model_validate(user))
+
+
+@router.get("/{user_id}/stats", response_model=UserStatsResponseDTO)
+async def get_user_stats(
+    user_id: UUID,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    render: Renderer = Depends(get_renderer),
+    use_cases: UserUseCases = Depends(get_read_user_use_cases),
+):
+    """Tweets posted and likes and retweets received per hour or day"""
+    size = GRANULARITIES[granularity]
+    try:
+        until = _local(until) if until else datetime.now()
+        if since:
+            since = _local(since)
+        else:
+            since = until - DEFAULT_STATS_BUCKETS[granularity] * size
+    except OverflowError:
+        # Only at the very ends of the datetime range.
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="since and until are out of range",
+        )
+    if not since < until or until - since > MAX_STATS_BUCKETS * size:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"since must be before until, by at most {MAX_STATS_BUCKETS} "
+            f"{granularity}s",
+        )
+    buckets = await use_cases.get_user_activity(user_id, granularity, since, until)
+    if buckets is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    return render(
+        UserStatsResponseDTO(
+            user_id=user_id,
+            granularity=granularity,
+            since=since,
+            until=until,
+            buckets=[ActivityBucketDTO.model_validate(b) for b in buckets],
+        )
+    )
 
 
 @router.get("/", response_model=List[UserResponseDTO])
 async def get_all_users(
     skip: int = 0,
     limit: int = 100,
-    use_cases: UserUseCases = Depends(get_user_use_cases),
+    fields: Optional[List[str]] = Depends(user_fields),
+    render: Renderer = Depends(get_renderer),
+    use_cases: UserUseCases = Depends(get_read_user_use_cases),
 ):
     """Get all users with pagination"""
+    if fields:
+        return render.partial(
+            await use_cases.get_all_partial_users(fields, skip, limit)
+        )
     users = await use_cases.get_all_users(skip, limit)
-    return [UserResponseDTO.model_validate(user) for user in users]
+    return render([UserResponseDTO.model_validate(user) for user in users])
 
 
 @router.put("/{user_id}", response_model=UserResponseDTO)
 async def update_user(
     user_id: UUID,
     user_dto: UserUpdateDTO,
+    render: Renderer = Depends(get_renderer),
     use_cases: UserUseCases = Depends(get_user_use_cases),
 ):
     """Update a user"""
@@ -71,7 +175,7 @@ async def update_user(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    return UserResponseDTO.model_validate(user)
+    return render(UserResponseDTO.model_validate(user))
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -88,7 +192,9 @@ async def delete_user(
 
 @router.post("/{user_id}/follow", response_model=UserResponseDTO)
 async def follow_user(
-    user_id: UUID, use_cases: UserUseCases = Depends(get_user_use_cases)
+    user_id: UUID,
+    render: Renderer = Depends(get_renderer),
+    use_cases: UserUseCases = Depends(get_user_use_cases),
 ):
     """Follow a user"""
     user = await use_cases.follow_user(user_id)
@@ -96,12 +202,14 @@ async def follow_user(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    return UserResponseDTO.model_validate(user)
+    return render(UserResponseDTO.model_validate(user))
 
 
 @router.post("/{user_id}/unfollow", response_model=UserResponseDTO)
 async def unfollow_user(
-    user_id: UUID, use_cases: UserUseCases = Depends(get_user_use_cases)
+    user_id: UUID,
+    render: Renderer = Depends(get_renderer),
+    use_cases: UserUseCases = Depends(get_user_use_cases),
 ):
     """Unfollow a user"""
     user = await use_cases.unfollow_user(user_id)
@@ -109,4 +217,4 @@ async def unfollow_user(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    return UserResponseDTO.model_validate(user)
+    return render(UserResponseDTO.model_validate(user))
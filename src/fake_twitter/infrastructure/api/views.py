@@ -0,0 +1,58 @@
+"""View counting on tweet read endpoints (see ``infrastructure/views.py``).
+
+Every tweet a read endpoint returns in full counts as viewed by the
+requester: the ``viewer_id`` it sends, otherwise its address and user agent.
+Partial tweets (``?fields=``) are neither counted nor given a count, and
+neither is any tweet while ``TWEET_VIEWS`` is off.
+"""
+
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import Depends, Query, Request
+
+from src.fake_twitter.application.dtos.tweet_dtos import TweetResponseDTO
+from src.fake_twitter.application.use_cases.tweet_use_cases import TweetUseCases
+from src.fake_twitter.infrastructure.api.dependencies import get_read_tweet_use_cases
+
+
+class ViewCounter:
+    """Counts the request's views and fills in ``views_count``."""
+
+    def __init__(self, viewer: str, use_cases: TweetUseCases):
+        self.viewer = viewer
+        self.use_cases = use_cases
+
+    async def tweets(self, tweets: List[TweetResponseDTO]) -> List[TweetResponseDTO]:
+        if tweets:
+            counts = await self.use_cases.view_tweets(
+                [tweet.id for tweet in tweets], self.viewer
+            )
+            if counts is None:
+                return tweets
+            for tweet in tweets:
+                tweet.views_count = counts.get(tweet.id, 0)
+        return tweets
+
+    async def tweet(self, tweet: TweetResponseDTO) -> TweetResponseDTO:
+        return (await self.tweets([tweet]))[0]
+
+
+def viewer(
+    request: Request,
+    viewer_id: Optional[UUID] = Query(
+        None, description="The user viewing the tweets, counted once per tweet"
+    ),
+) -> str:
+    """A dependency naming who views the request's tweets."""
+    if viewer_id is not None:
+        return str(viewer_id)
+    host = request.client.host if request.client else ""
+    return f"{host} {request.headers.get('user-agent', '')}"
+
+
+async def get_view_counter(
+    viewer: str = Depends(viewer),
+    use_cases: TweetUseCases = Depends(get_read_tweet_use_cases),
+) -> ViewCounter:
+    return ViewCounter(viewer, use_cases)
@@ -0,0 +1,623 @@
+"""Cold tier of old tweets in immutable, memory-mapped segment files.
+
+``database/archiver.py`` moves tweets older than a cutoff out of Postgres
+into segments written here; ``SQLAlchemyTweetRepository`` reads them back
+by id and by author without touching the database.
+
+A segment is columnar. Rows are ordered by author, newest first, so the
+tweets of a user are one contiguous run of rows::
+
+    header
+    ids            16 bytes per row
+    user_ids       16 bytes per row
+    created_at     int64 per row, microseconds since 1970-01-01 (local time)
+    likes_count    uint32 per row
+    retweets_count uint32 per row
+    id index       row ids sorted (16 bytes each), then their row (uint32)
+    user index     distinct user ids sorted (16 bytes each), then the first
+                   row of each user plus one past the last (uint32)
+    block offsets  uint64 per content block plus the end, from blocks start
+    blocks         zlib-compressed content of ``block_rows`` rows each: the
+                   uint32 byte length of every row's text, then the texts
+    time index     every row (uint32), newest first (highest id first on
+                   ties); segments written before it existed get it built
+                   in memory when first needed
+    replies        the number of rows in the conversation index (uint32)
+    replies_count  uint32 per row
+    in_reply_to    16 bytes per row, zeros for tweets that reply to none
+    conversation   16 bytes per row, zeros likewise
+    media offsets  uint32 per row plus the end, from media start
+    media          every row's media ids, comma-separated ASCII
+    conversation   the conversation ids of the replies, sorted (16 bytes
+      index        each) and in reply order within one, then their rows
+                   (uint32)
+
+The sections from ``replies`` on were added with ``FTARCH02``. Segments
+written before (``FTARCH01``) hold no tweets with attachments, and their
+replies are served as tweets of their own, without their threads.
+
+Segments are never rewritten. Archived tweets that are deleted, and the
+users whose archived tweets all go with them once purged, are appended to a
+``tombstones`` file in the same directory (one kind byte, ``t`` or ``u``,
+then the 16-byte id per record), which every reader loads with the segments
+and honors.
+
+Fixed-width columns are read in place with ``struct.unpack_from`` and the
+compressed blocks are decompressed straight from a memoryview of the map,
+so nothing but the rows being returned is ever copied.
+"""
+
+import array
+import bisect
+import heapq
+import itertools
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.domain.entities.tweet import Tweet
+
+MAGIC = b"FTARCH02"
+# Segments without reply columns or attachments; still read.
+MAGIC_V1 = b"FTARCH01"
+SUFFIX = ".seg"
+# magic, rows, users, blocks, rows per block, cutoff, oldest, newest
+_HEADER = struct.Struct("<8sIIIIqqq")
+_EPOCH = datetime(1970, 1, 1)
+TOMBSTONES = "tombstones"
+# b"t" and a tweet id, or b"u" and a user id.
+_TOMBSTONE = struct.Struct("<c16s")
+_TWEET = b"t"
+_USER = b"u"
+
+
+def _to_micros(moment: datetime) -> int:
+    return (moment.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(micros: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+_NONE = bytes(16)
+
+
+def _uuid_bytes(value: Optional[UUID]) -> bytes:
+    return _NONE if value is None else value.bytes
+
+
+def _uuid(data: bytes) -> Optional[UUID]:
+    return None if data == _NONE else UUID(bytes=data)
+
+
+def write_segment(
+    path: str, tweets: Sequence[Tweet], cutoff: datetime, block_rows: int = 256
+) -> None:
+    """Write ``tweets`` (all created before ``cutoff``) as a segment.
+
+    The file is written next to ``path`` and renamed into place once synced,
+    so readers never see a partial segment.
+    """
+    # By author, and newest first (highest id first on ties) within one.
+    rows = sorted(tweets, key=lambda tweet: (tweet.created_at, tweet.id), reverse=True)
+    rows.sort(key=lambda tweet: tweet.user_id.bytes)
+    count = len(rows)
+    by_id = sorted(range(count), key=lambda row: rows[row].id.bytes)
+    by_time = sorted(
+        range(count),
+        key=lambda row: (rows[row].created_at, rows[row].id),
+        reverse=True,
+    )
+    user_ids: List[bytes] = []
+    user_starts: List[int] = []
+    for row, tweet in enumerate(rows):
+        if not user_ids or user_ids[-1] != tweet.user_id.bytes:
+            user_ids.append(tweet.user_id.bytes)
+            user_starts.append(row)
+    user_starts.append(count)
+
+    blocks: List[bytes] = []
+    for start in range(0, count, block_rows):
+        texts = [tweet.content.encode() for tweet in rows[start : start + block_rows]]
+        lengths = struct.pack(f"<{len(texts)}I", *map(len, texts))
+        blocks.append(zlib.compress(lengths + b"".join(texts)))
+    block_offsets = list(itertools.accumulate(map(len, blocks), initial=0))
+
+    created = [_to_micros(tweet.created_at) for tweet in rows]
+    # A conversation's replies together, in reply order.
+    replies = sorted(
+        (row for row, tweet in enumerate(rows) if tweet.conversation_id is not None),
+        key=lambda row: (
+            rows[row].conversation_id.bytes,
+            created[row],
+            rows[row].id.bytes,
+        ),
+    )
+    media = [",".join(tweet.media_ids or ()).encode("ascii") for tweet in rows]
+    media_offsets = list(itertools.accumulate(map(len, media), initial=0))
+    header = _HEADER.pack(
+        MAGIC,
+        count,
+        len(user_ids),
+        len(blocks),
+        block_rows,
+        _to_micros(cutoff),
+        min(created, default=0),
+        max(created, default=0),
+    )
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(header)
+        file.write(b"".join(tweet.id.bytes for tweet in rows))
+        file.write(b"".join(tweet.user_id.bytes for tweet in rows))
+        file.write(struct.pack(f"<{count}q", *created))
+        file.write(struct.pack(f"<{count}I", *(t.likes_count for t in rows)))
+        file.write(struct.pack(f"<{count}I", *(t.retweets_count for t in rows)))
+        file.write(b"".join(rows[row].id.bytes for row in by_id))
+        file.write(struct.pack(f"<{count}I", *by_id))
+        file.write(b"".join(user_ids))
+        file.write(struct.pack(f"<{len(user_starts)}I", *user_starts))
+        file.write(struct.pack(f"<{len(block_offsets)}Q", *block_offsets))
+        for block in blocks:
+            file.write(block)
+        file.write(struct.pack(f"<{count}I", *by_time))
+        file.write(struct.pack("<I", len(replies)))
+        file.write(struct.pack(f"<{count}I", *(t.replies_count for t in rows)))
+        file.write(b"".join(_uuid_bytes(t.in_reply_to_id) for t in rows))
+        file.write(b"".join(_uuid_bytes(t.conversation_id) for t in rows))
+        file.write(struct.pack(f"<{count + 1}I", *media_offsets))
+        file.write(b"".join(media))
+        file.write(b"".join(rows[row].conversation_id.bytes for row in replies))
+        file.write(struct.pack(f"<{len(replies)}I", *replies))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+class Segment:
+    """A read-only, memory-mapped segment file."""
+
+    def __init__(self, path: str, cached_blocks: int = 16):
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        (
+            magic,
+            self.rows,
+            self.users,
+            self.blocks,
+            self.block_rows,
+            cutoff,
+            oldest,
+            newest,
+        ) = _HEADER.unpack_from(self._map, 0)
+        if magic not in (MAGIC, MAGIC_V1):
+            raise ValueError(f"{path} is not a tweet archive segment")
+        self.cutoff = _from_micros(cutoff)
+        self.oldest = _from_micros(oldest)
+        self.newest = _from_micros(newest)
+
+        rows, users = self.rows, self.users
+        self._ids = _HEADER.size
+        self._row_user_ids = self._ids + 16 * rows
+        self._created = self._row_user_ids + 16 * rows
+        self._likes = self._created + 8 * rows
+        self._retweets = self._likes + 4 * rows
+        self._index_ids = self._retweets + 4 * rows
+        self._index_rows = self._index_ids + 16 * rows
+        self._user_ids = self._index_rows + 4 * rows
+        self._user_starts = self._user_ids + 16 * users
+        self._block_offsets = self._user_starts + 4 * (users + 1)
+        self._blocks = self._block_offsets + 8 * (self.blocks + 1)
+        self._time_index = (
+            self._blocks
+            + struct.unpack_from(
+                "<Q", self._map, self._block_offsets + 8 * self.blocks
+            )[0]
+        )
+        self._by_time: Optional[array.array] = None
+        self.replies = 0
+        self._replies_count: Optional[int] = None
+        if magic == MAGIC:
+            (self.replies,) = struct.unpack_from(
+                "<I", self._map, self._time_index + 4 * rows
+            )
+            self._replies_count = self._time_index + 4 * rows + 4
+            self._in_reply_to = self._replies_count + 4 * rows
+            self._conversations = self._in_reply_to + 16 * rows
+            self._media_offsets = self._conversations + 16 * rows
+            self._media = self._media_offsets + 4 * (rows + 1)
+            self._index_conversations = (
+                self._media
+                + struct.unpack_from("<I", self._map, self._media_offsets + 4 * rows)[0]
+            )
+            self._index_replies = self._index_conversations + 16 * self.replies
+        elif len(self._map) < self._time_index + 4 * rows:
+            self._time_index = None
+        self._cached_blocks = cached_blocks
+        self._block_cache: "OrderedDict[int, Tuple[List[int], bytes]]" = OrderedDict()
+
+    def close(self) -> None:
+        self._block_cache.clear()
+        self._view.release()
+        self._map.close()
+
+    def _key(self, start: int, position: int) -> bytes:
+        offset = start + 16 * position
+        return self._map[offset : offset + 16]
+
+    def _find(self, start: int, count: int, key: bytes) -> Optional[int]:
+        position = bisect.bisect_left(
+            range(count), key, key=lambda i: self._key(start, i)
+        )
+        if position < count and self._key(start, position) == key:
+            return position
+        return None
+
+    def id_bytes(self, row: int) -> bytes:
+        return self._key(self._ids, row)
+
+    def user_id_bytes(self, row: int) -> bytes:
+        return self._key(self._row_user_ids, row)
+
+    def created_micros(self, row: int) -> int:
+        return struct.unpack_from("<q", self._map, self._created + 8 * row)[0]
+
+    def _content(self, row: int) -> str:
+        block, position = divmod(row, self.block_rows)
+        cached = self._block_cache.get(block)
+        if cached is None:
+            start, end = struct.unpack_from(
+                "<2Q", self._map, self._block_offsets + 8 * block
+            )
+            data = zlib.decompress(
+                self._view[self._blocks + start : self._blocks + end]
+            )
+            size = min(self.block_rows, self.rows - block * self.block_rows)
+            lengths = struct.unpack_from(f"<{size}I", data)
+            cached = (list(itertools.accumulate(lengths, initial=4 * size)), data)
+            self._block_cache[block] = cached
+            if len(self._block_cache) > self._cached_blocks:
+                self._block_cache.popitem(last=False)
+        else:
+            self._block_cache.move_to_end(block)
+        offsets, data = cached
+        return data[offsets[position] : offsets[position + 1]].decode()
+
+    def _thread_fields(self, row: int) -> Dict[str, object]:
+        if self._replies_count is None:
+            return {}
+        start, end = struct.unpack_from("<2I", self._map, self._media_offsets + 4 * row)
+        media = self._map[self._media + start : self._media + end]
+        return {
+            "replies_count": struct.unpack_from(
+                "<I", self._map, self._replies_count + 4 * row
+            )[0],
+            "in_reply_to_id": _uuid(self._key(self._in_reply_to, row)),
+            "conversation_id": _uuid(self._key(self._conversations, row)),
+            "media_ids": media.decode("ascii").split(",") if media else None,
+        }
+
+    def tweet(self, row: int) -> Tweet:
+        likes_count, retweets_count = (
+            struct.unpack_from("<I", self._map, column + 4 * row)[0]
+            for column in (self._likes, self._retweets)
+        )
+        # Written from validated tweets, so validation is skipped.
+        return Tweet.model_construct(
+            id=UUID(bytes=self.id_bytes(row)),
+            content=self._content(row),
+            user_id=UUID(bytes=self.user_id_bytes(row)),
+            created_at=_from_micros(self.created_micros(row)),
+            likes_count=likes_count,
+            retweets_count=retweets_count,
+            archived=True,
+            **self._thread_fields(row),
+        )
+
+    def find(self, tweet_id: UUID) -> Optional[int]:
+        position = self._find(self._index_ids, self.rows, tweet_id.bytes)
+        if position is None:
+            return None
+        return struct.unpack_from("<I", self._map, self._index_rows + 4 * position)[0]
+
+    def user_rows(
+        self, user_id: UUID, since: Optional[int] = None, until: Optional[int] = None
+    ) -> range:
+        """Rows of a user created within [since, until), newest first."""
+        user = self._find(self._user_ids, self.users, user_id.bytes)
+        if user is None:
+            return range(0)
+        start, end = struct.unpack_from("<2I", self._map, self._user_starts + 4 * user)
+        rows = range(start, end)
+
+        # created_at descends along the run, so its negation ascends.
+        def newest_first(row: int) -> int:
+            return -self.created_micros(row)
+
+        if until is not None:
+            start = rows.start + bisect.bisect_right(rows, -until, key=newest_first)
+        if since is not None:
+            end = rows.start + bisect.bisect_right(rows, -since, key=newest_first)
+        return range(start, max(start, end))
+
+    def conversation_rows(
+        self, conversation_id: UUID, after: Optional[Tuple[int, bytes]] = None
+    ) -> range:
+        """Positions in the conversation index of the replies to
+        ``conversation_id``, after ``after`` (created_at, id) in reply order;
+        see ``reply_row``."""
+        key = conversation_id.bytes
+        positions = range(self.replies)
+        start = bisect.bisect_left(
+            positions, key, key=lambda i: self._key(self._index_conversations, i)
+        )
+        end = bisect.bisect_right(
+            positions, key, key=lambda i: self._key(self._index_conversations, i)
+        )
+        if after is not None:
+            start += bisect.bisect_right(
+                range(start, end),
+                after,
+                key=lambda i: (
+                    self.created_micros(self.reply_row(i)),
+                    self.id_bytes(self.reply_row(i)),
+                ),
+            )
+        return range(start, max(start, end))
+
+    def reply_row(self, position: int) -> int:
+        offset = self._index_replies + 4 * position
+        return struct.unpack_from("<I", self._map, offset)[0]
+
+    def _time_row(self, position: int) -> int:
+        if self._time_index is not None:
+            offset = self._time_index + 4 * position
+            return struct.unpack_from("<I", self._map, offset)[0]
+        if self._by_time is None:
+            self._by_time = array.array(
+                "I",
+                sorted(
+                    range(self.rows),
+                    key=lambda row: (self.created_micros(row), self.id_bytes(row)),
+                    reverse=True,
+                ),
+            )
+        return self._by_time[position]
+
+    def time_rows(
+        self, since: Optional[int] = None, until: Optional[int] = None
+    ) -> Iterator[int]:
+        """Rows created within [since, until), newest first."""
+        positions = range(self.rows)
+
+        def newest_first(position: int) -> int:
+            return -self.created_micros(self._time_row(position))
+
+        start, end = 0, self.rows
+        if until is not None:
+            start = bisect.bisect_right(positions, -until, key=newest_first)
+        if since is not None:
+            end = bisect.bisect_right(positions, -since, key=newest_first)
+        return map(self._time_row, range(start, max(start, end)))
+
+
+class TweetArchive:
+    """All segments of an archive directory.
+
+    The directory is rescanned at most every ``refresh_seconds`` so that
+    segments published by the archiver are picked up by running processes.
+    """
+
+    def __init__(self, directory: str, refresh_seconds: float = 5.0):
+        self.directory = directory
+        self.refresh_seconds = refresh_seconds
+        self.segments: Dict[str, Segment] = {}
+        self._checked_at = float("-inf")
+        self._deleted_tweets: Set[bytes] = set()
+        self._deleted_users: Set[bytes] = set()
+        self._tombstones_read = 0
+        self.refresh()
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_seconds:
+            return
+        self._checked_at = now
+        try:
+            names = {n for n in os.listdir(self.directory) if n.endswith(SUFFIX)}
+        except FileNotFoundError:
+            names = set()
+        for name in sorted(names - self.segments.keys()):
+            self.segments[name] = Segment(os.path.join(self.directory, name))
+        for name in self.segments.keys() - names:
+            self.segments.pop(name).close()
+        self._read_tombstones()
+
+    def _read_tombstones(self) -> None:
+        try:
+            with open(os.path.join(self.directory, TOMBSTONES), "rb") as file:
+                file.seek(self._tombstones_read)
+                data = file.read()
+        except FileNotFoundError:
+            return
+        # Leaves out a record still being appended.
+        size = len(data) - len(data) % _TOMBSTONE.size
+        for kind, key in _TOMBSTONE.iter_unpack(data[:size]):
+            (self._deleted_users if kind == _USER else self._deleted_tweets).add(key)
+        self._tombstones_read += size
+
+    def _tombstone(self, kind: bytes, key: UUID) -> None:
+        # One small O_APPEND write per record, so records from several
+        # processes never interleave.
+        descriptor = os.open(
+            os.path.join(self.directory, TOMBSTONES),
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            0o644,
+        )
+        try:
+            os.write(descriptor, _TOMBSTONE.pack(kind, key.bytes))
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+        (self._deleted_users if kind == _USER else self._deleted_tweets).add(key.bytes)
+
+    def delete(self, tweet_id: UUID) -> None:
+        """Hide an archived tweet from every reader, for good.
+
+        Other processes stop serving it within ``refresh_seconds``.
+        """
+        self._tombstone(_TWEET, tweet_id)
+
+    def delete_user(self, user_id: UUID) -> None:
+        """Hide all of a user's archived tweets, like ``delete``."""
+        self._tombstone(_USER, user_id)
+
+    def _live(self, segment: Segment, row: int) -> bool:
+        return (
+            segment.id_bytes(row) not in self._deleted_tweets
+            and segment.user_id_bytes(row) not in self._deleted_users
+        )
+
+    @property
+    def cutoff(self) -> Optional[datetime]:
+        """Every tweet created before this is archived (None when empty)."""
+        self.refresh()
+        return max((s.cutoff for s in self.segments.values()), default=None)
+
+    def get(self, tweet_id: UUID) -> Optional[Tweet]:
+        self.refresh()
+        if tweet_id.bytes in self._deleted_tweets:
+            return None
+        for segment in self.segments.values():
+            row = segment.find(tweet_id)
+            if row is not None:
+                return segment.tweet(row) if self._live(segment, row) else None
+        return None
+
+    def _page(
+        self,
+        rows: Callable[[Segment], Iterator[int]],
+        skip: int,
+        limit: int,
+    ) -> List[Tweet]:
+        """Live ``rows`` of every segment, each newest first, merged and paged."""
+
+        def entries(segment: Segment) -> Iterator[Tuple[int, bytes, Segment, int]]:
+            for row in rows(segment):
+                if self._live(segment, row):
+                    yield (
+                        segment.created_micros(row),
+                        segment.id_bytes(row),
+                        segment,
+                        row,
+                    )
+
+        merged = heapq.merge(
+            *(entries(segment) for segment in self.segments.values()),
+            key=lambda entry: entry[:2],
+            reverse=True,
+        )
+        return [
+            segment.tweet(row)
+            for _, _, segment, row in itertools.islice(merged, skip, skip + limit)
+        ]
+
+    def get_by_user(
+        self,
+        user_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tweet]:
+        """A page of the user's archived tweets, newest first."""
+        self.refresh()
+        if user_id.bytes in self._deleted_users:
+            return []
+        since_micros = _to_micros(since) if since is not None else None
+        until_micros = _to_micros(until) if until is not None else None
+        return self._page(
+            lambda segment: iter(
+                segment.user_rows(user_id, since_micros, until_micros)
+            ),
+            skip,
+            limit,
+        )
+
+    def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tweet]:
+        """A page of all archived tweets, newest first."""
+        self.refresh()
+        since_micros = _to_micros(since) if since is not None else None
+        until_micros = _to_micros(until) if until is not None else None
+        return self._page(
+            lambda segment: segment.time_rows(since_micros, until_micros),
+            skip,
+            limit,
+        )
+
+    def get_conversation(
+        self,
+        conversation_id: UUID,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        limit: int = 100,
+    ) -> List[Tweet]:
+        """Archived replies of a conversation after ``after`` (created_at,
+        id), oldest first."""
+        self.refresh()
+        after_key = (_to_micros(after[0]), after[1].bytes) if after else None
+
+        def entries(segment: Segment) -> Iterator[Tuple[int, bytes, Segment, int]]:
+            for position in segment.conversation_rows(conversation_id, after_key):
+                row = segment.reply_row(position)
+                if self._live(segment, row):
+                    yield (
+                        segment.created_micros(row),
+                        segment.id_bytes(row),
+                        segment,
+                        row,
+                    )
+
+        merged = heapq.merge(
+            *(entries(segment) for segment in self.segments.values()),
+            key=lambda entry: entry[:2],
+        )
+        return [
+            segment.tweet(row) for _, _, segment, row in itertools.islice(merged, limit)
+        ]
+
+    def close(self) -> None:
+        for segment in self.segments.values():
+            segment.close()
+        self.segments.clear()
+
+
+@lru_cache
+def get_tweet_archive() -> Optional[TweetArchive]:
+    """The process-wide archive, or None when no archive is configured."""
+    settings = get_settings()
+    if not settings.tweet_archive_dir:
+        return None
+    return TweetArchive(
+        settings.tweet_archive_dir, settings.tweet_archive_refresh_seconds
+    )
@@ -0,0 +1,175 @@
+"""Moves tweets older than a cutoff from Postgres into the tweet archive.
+
+Tweets are read by author in keyset order and written out as segments in
+``TWEET_ARCHIVE_DIR`` (see ``infrastructure/archive.py``). Rows are deleted
+from ``tweets`` only once every segment is on disk and the API processes
+have had time to pick the segments up, so no tweet is ever unreadable.
+Tweets already archived by an interrupted run are skipped, not rewritten:
+
+    python -m src.fake_twitter.infrastructure.database.archiver --older-than-days 365
+
+With ``TWEET_SHARD_URLS`` configured, only tweets in ``DATABASE_URL`` are
+archived.
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, text, tuple_
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.infrastructure.archive import (
+    SUFFIX,
+    TweetArchive,
+    write_segment,
+)
+from src.fake_twitter.infrastructure.database.connection import (
+    dispose_engine,
+    get_engine,
+)
+from src.fake_twitter.infrastructure.database.models import TweetModel
+
+tweets = TweetModel.__table__
+
+# Serializes archiver runs started from several hosts at once.
+_ADVISORY_LOCK_KEY = 0x6172_6368_6976  # "archiv"
+
+
+async def _archive_segments(
+    archive: TweetArchive, cutoff: datetime, segment_rows: int
+) -> List[UUID]:
+    """Write every tweet before ``cutoff`` into new segments; returns their ids."""
+    engine = get_engine()
+    stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    archived: List[UUID] = []
+    after: Optional[Tuple] = None
+    number = 0
+    while True:
+        query = (
+            select(tweets)
+            .where(
+                tweets.c.created_at < cutoff,
+                tweets.c.deleted_at.is_(None),
+            )
+            .order_by(tweets.c.user_id, tweets.c.created_at, tweets.c.id)
+            .limit(segment_rows)
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(tweets.c.user_id, tweets.c.created_at, tweets.c.id)
+                > tuple_(*after)
+            )
+        async with engine.connect() as conn:
+            rows = (await conn.execute(query)).mappings().all()
+        if not rows:
+            return archived
+        last = rows[-1]
+        after = (last["user_id"], last["created_at"], last["id"])
+
+        batch = [Tweet.model_validate(dict(row)) for row in rows]
+        new = [tweet for tweet in batch if archive.get(tweet.id) is None]
+        if new:
+            name = f"tweets-{stamp}-{number:04d}{SUFFIX}"
+            write_segment(os.path.join(archive.directory, name), new, cutoff)
+            number += 1
+            print(f"Wrote {name} with {len(new)} tweets")
+        archived += [tweet.id for tweet in batch]
+
+
+async def _delete_archived(ids: List[UUID], cutoff: datetime, batch_size: int) -> None:
+    for start in range(0, len(ids), batch_size):
+        async with get_engine().begin() as conn:
+            await conn.execute(
+                delete(tweets).where(
+                    # The created_at bound lets Postgres prune partitions.
+                    tweets.c.created_at < cutoff,
+                    tweets.c.id.in_(ids[start : start + batch_size]),
+                )
+            )
+
+
+async def archive_tweets(
+    cutoff: datetime,
+    segment_rows: int = 100_000,
+    delete_batch_size: int = 5_000,
+    dry_run: bool = False,
+) -> None:
+    settings = get_settings()
+    if not settings.tweet_archive_dir:
+        raise SystemExit("TWEET_ARCHIVE_DIR is not configured")
+    os.makedirs(settings.tweet_archive_dir, exist_ok=True)
+
+    async with get_engine().connect() as lock_conn:
+        # A session-level lock, held without keeping a transaction open.
+        await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = await lock_conn.scalar(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY}
+        )
+        if not locked:
+            print("Another archiver run is in progress")
+            return
+        try:
+            if dry_run:
+                count = await lock_conn.scalar(
+                    select(func.count())
+                    .select_from(tweets)
+                    .where(tweets.c.created_at < cutoff, tweets.c.deleted_at.is_(None))
+                )
+                print(
+                    f"{count} live tweets were created before {cutoff:%Y-%m-%d %H:%M}"
+                )
+                return
+
+            archive = TweetArchive(settings.tweet_archive_dir, refresh_seconds=0)
+            try:
+                ids = await _archive_segments(archive, cutoff, segment_rows)
+            finally:
+                archive.close()
+            if not ids:
+                print("Nothing to archive")
+                return
+
+            # Running processes rescan the archive on this interval.
+            await asyncio.sleep(2 * settings.tweet_archive_refresh_seconds)
+            await _delete_archived(ids, cutoff, delete_batch_size)
+            print(f"Archived {len(ids)} tweets created before {cutoff:%Y-%m-%d}")
+        finally:
+            await lock_conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY}
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    cutoff = parser.add_mutually_exclusive_group(required=True)
+    cutoff.add_argument("--older-than-days", type=int)
+    cutoff.add_argument(
+        "--before", type=datetime.fromisoformat, help="ISO date or datetime"
+    )
+    parser.add_argument("--segment-rows", type=int, default=100_000)
+    parser.add_argument("--delete-batch-size", type=int, default=5_000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    if args.before is not None:
+        before = args.before
+    else:
+        before = datetime.now() - timedelta(days=args.older_than_days)
+
+    async def run() -> None:
+        try:
+            await archive_tweets(
+                before, args.segment_rows, args.delete_batch_size, args.dry_run
+            )
+        finally:
+            await dispose_engine()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
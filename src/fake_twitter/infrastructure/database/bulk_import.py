@@ -0,0 +1,497 @@
+"""Offline bulk load of users, tweets and likes through parallel COPY.
+
+Rows come either from files, one per table, as JSON lines or CSV with a
+header (``.jsonl``/``.csv``), or from a deterministic generator whose authors
+and follower counts follow power laws, as on a real network:
+
+    python -m src.fake_twitter.infrastructure.database.bulk_import load \\
+        --users users.jsonl --tweets tweets.csv --likes likes.jsonl
+    python -m src.fake_twitter.infrastructure.database.bulk_import generate \\
+        --users 1000000 --tweets 20000000 --seed 1 --rebuild-indexes
+
+File rows are keyed by column name; columns left out get the model's
+default (a random id, the current time, zero counts). Batches of
+``--batch-rows`` rows are copied by ``--workers`` connections at once, each
+batch committed on its own with ``synchronous_commit`` off, so an aborted
+load leaves the batches copied so far.
+
+With ``--rebuild-indexes`` the secondary indexes of ``models.py`` are
+dropped first and built again after the load, which is several times
+faster than maintaining them row by row. Unique indexes are among them: a
+duplicate username fails the rebuild, not the load. Tweet likes and
+replies counts are then recomputed from the rows (``--recount``, the
+default for files), the activity rollups rebuilt (``database/rollups.py``)
+and the tables analyzed.
+
+Loads ``DATABASE_URL``; tweets outside every partition land in the default
+partition, so run the partition maintenance first for old data.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Table, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.infrastructure.archive import get_tweet_archive
+from src.fake_twitter.infrastructure.database.connection import (
+    dispose_engine,
+    get_engine,
+)
+from src.fake_twitter.infrastructure.database.rollups import rebuild as rebuild_rollups
+from src.fake_twitter.infrastructure.database.models import (
+    LikeModel,
+    TweetModel,
+    UserModel,
+)
+
+TABLES: Dict[str, Table] = {
+    "users": UserModel.__table__,
+    "tweets": TweetModel.__table__,
+    "likes": LikeModel.__table__,
+}
+# Copied columns, in the order of the row tuples.
+COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "users": (
+        "id",
+        "username",
+        "email",
+        "full_name",
+        "bio",
+        "created_at",
+        "followers_count",
+        "following_count",
+    ),
+    "tweets": (
+        "id",
+        "content",
+        "user_id",
+        "created_at",
+        "likes_count",
+        "retweets_count",
+        "in_reply_to_id",
+        "conversation_id",
+        "replies_count",
+    ),
+    "likes": ("user_id", "tweet_id", "created_at"),
+}
+
+Row = Tuple[Any, ...]
+
+_PARSERS: Dict[type, Callable[[Any], Any]] = {
+    UUID: lambda value: value if isinstance(value, UUID) else UUID(str(value)),
+    datetime: lambda value: datetime.fromisoformat(value).replace(tzinfo=None),
+    int: int,
+    str: str,
+}
+
+
+def _column_parser(table: Table, name: str) -> Callable[[Any], Any]:
+    column = table.c[name]
+    parse = _PARSERS[column.type.python_type]
+    default = column.default
+
+    def parsed(value: Any) -> Any:
+        if value is not None and value != "":
+            return parse(value)
+        if default is not None:
+            return default.arg(None) if default.is_callable else default.arg
+        if column.nullable:
+            return None
+        raise ValueError(f"{table.name}.{name} is required")
+
+    return parsed
+
+
+def read_rows(path: str, table: str) -> Iterator[Row]:
+    """Rows of ``table`` from a JSON lines or CSV file, in copy column order."""
+    columns = COLUMNS[table]
+    parsers = [_column_parser(TABLES[table], name) for name in columns]
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.endswith(".csv"):
+            records: Iterable[Dict[str, Any]] = csv.DictReader(file)
+        elif path.endswith((".jsonl", ".ndjson")):
+            records = (json.loads(line) for line in file if line.strip())
+        else:
+            raise ValueError(f"{path}: expected a .jsonl or .csv file")
+        for record in records:
+            yield tuple(
+                parse(record.get(name)) for name, parse in zip(columns, parsers)
+            )
+
+
+_WORDS = (
+    "the a of to and in is it you that was for on are with as I his they be "
+    "at one have this from or had by hot word but what some we can out other "
+    "were all there when up use your how said an each she which do their time "
+    "if will way about many then them write would like so these her long make "
+    "thing see him two has look more day could go come did number sound no "
+    "most people my over know water than call first who may down side been "
+    "now find coffee launch game music news today tonight weekend ship build"
+).split()
+
+
+def power_law_rank(rng: random.Random, n: int, exponent: float) -> int:
+    """A rank in [0, n) drawn with probability falling as rank ** -exponent."""
+    u = rng.random()
+    if exponent == 1:
+        rank = (n + 1) ** u
+    else:
+        a = 1 - exponent
+        rank = (1 + u * ((n + 1) ** a - 1)) ** (1 / a)
+    return min(int(rank) - 1, n - 1)
+
+
+class SyntheticData:
+    """Deterministic users, tweets and likes for a given seed.
+
+    Users are identified by their index: ids and creation times derive from
+    ``(seed, index)``, so tweets and likes refer to users without keeping
+    them in memory. Authors are drawn from a power law over the user index
+    (user 0 tweets most), and likes per tweet and follower counts from
+    Pareto distributions.
+    """
+
+    def __init__(
+        self,
+        users: int,
+        tweets: int,
+        seed: int = 0,
+        likes_per_tweet: float = 2.0,
+        author_skew: float = 1.1,
+        days: int = 365,
+        end: Optional[datetime] = None,
+    ):
+        self.users = users
+        self.tweets = tweets
+        self.seed = seed
+        self.likes_per_tweet = likes_per_tweet
+        self.author_skew = author_skew
+        self.end = (end or datetime(2026, 1, 1)).replace(microsecond=0)
+        self.start = self.end - timedelta(days=days)
+
+    def _between(self, start: datetime, fraction: float) -> datetime:
+        return start + (self.end - start) * fraction
+
+    def user(self, index: int) -> Tuple[UUID, datetime]:
+        digest = hashlib.blake2b(
+            f"{self.seed}:user:{index}".encode(), digest_size=24
+        ).digest()
+        fraction = int.from_bytes(digest[16:], "big") / 2**64
+        return UUID(bytes=digest[:16], version=4), self._between(self.start, fraction)
+
+    def user_rows(self) -> Iterator[Row]:
+        rng = random.Random(f"{self.seed}:users")
+        for index in range(self.users):
+            user_id, created_at = self.user(index)
+            followers = min(int(10 * (rng.paretovariate(1.2) - 1)), self.users - 1)
+            following = min(int(rng.lognormvariate(4, 1)), self.users - 1)
+            yield (
+                user_id,
+                # Seeded, so datasets of several seeds can share a database.
+                f"s{self.seed}_user{index}",
+                f"s{self.seed}_user{index}@example.com",
+                f"User {index}",
+                None,
+                created_at,
+                followers,
+                following,
+            )
+
+    def tweet_and_like_rows(self) -> Iterator[Tuple[str, Row]]:
+        rng = random.Random(f"{self.seed}:tweets")
+        for _ in range(self.tweets):
+            author_id, joined = self.user(
+                power_law_rank(rng, self.users, self.author_skew)
+            )
+            tweet_id = UUID(int=rng.getrandbits(128), version=4)
+            created_at = self._between(joined, rng.random())
+            content = " ".join(rng.choices(_WORDS, k=rng.randint(3, 30)))[:280]
+            likes = int((rng.paretovariate(1.5) - 1) * 0.5 * self.likes_per_tweet)
+            likers = rng.sample(range(self.users), min(likes, self.users))
+            retweets = int(likes * rng.random() / 4)
+            yield (
+                "tweets",
+                (
+                    tweet_id,
+                    content,
+                    author_id,
+                    created_at,
+                    len(likers),
+                    retweets,
+                    None,
+                    None,
+                    0,
+                ),
+            )
+            for liker in likers:
+                yield (
+                    "likes",
+                    (
+                        self.user(liker)[0],
+                        tweet_id,
+                        created_at + (self.end - created_at) * rng.random(),
+                    ),
+                )
+
+    def rows(self) -> Iterator[Tuple[str, Row]]:
+        for row in self.user_rows():
+            yield "users", row
+        yield from self.tweet_and_like_rows()
+
+
+def file_rows(paths: Dict[str, Optional[str]]) -> Iterator[Tuple[str, Row]]:
+    for table, path in paths.items():
+        if path is not None:
+            for row in read_rows(path, table):
+                yield table, row
+
+
+class BulkLoader:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        workers: int = 4,
+        batch_rows: int = 50_000,
+        report_seconds: float = 5.0,
+    ):
+        self.engine = engine
+        self.workers = workers
+        self.batch_rows = batch_rows
+        self.report_seconds = report_seconds
+        self.loaded: Dict[str, int] = {table: 0 for table in TABLES}
+
+    async def _copy_batches(self, queue: "asyncio.Queue") -> None:
+        async with self.engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            # Every batch is its own commit; none of them needs to wait for
+            # the WAL flush.
+            await conn.exec_driver_sql("SET synchronous_commit = off")
+            raw = (await conn.get_raw_connection()).driver_connection
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    return
+                table, rows = batch
+                await raw.copy_records_to_table(
+                    table, records=rows, columns=list(COLUMNS[table])
+                )
+                self.loaded[table] += len(rows)
+
+    def progress(self, elapsed: float) -> str:
+        total = sum(self.loaded.values())
+        counts = ", ".join(f"{n:,} {table}" for table, n in self.loaded.items())
+        return f"{counts} in {elapsed:.0f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)"
+
+    async def _report(self, started: float) -> None:
+        while True:
+            await asyncio.sleep(self.report_seconds)
+            print(self.progress(time.monotonic() - started), flush=True)
+
+    async def load(self, rows: Iterable[Tuple[str, Row]]) -> Dict[str, int]:
+        """Copy ``(table, row)`` pairs; returns the rows loaded per table."""
+        started = time.monotonic()
+        # Bounded so generating rows never runs far ahead of the copies.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * self.workers)
+        workers = [
+            asyncio.create_task(self._copy_batches(queue)) for _ in range(self.workers)
+        ]
+        reporter = asyncio.create_task(self._report(started))
+        buffers: Dict[str, List[Row]] = {table: [] for table in TABLES}
+
+        async def put(batch) -> None:
+            # A failed worker would leave the queue full forever.
+            for worker in workers:
+                if worker.done():
+                    worker.result()
+            await queue.put(batch)
+
+        try:
+            for table, row in rows:
+                buffer = buffers[table]
+                buffer.append(row)
+                if len(buffer) >= self.batch_rows:
+                    buffers[table] = []
+                    await put((table, buffer))
+            for table, buffer in buffers.items():
+                if buffer:
+                    await put((table, buffer))
+            for _ in workers:
+                await put(None)
+            await asyncio.gather(*workers)
+        finally:
+            reporter.cancel()
+            for worker in workers:
+                worker.cancel()
+        print(f"Loaded {self.progress(time.monotonic() - started)}")
+        return dict(self.loaded)
+
+
+def secondary_indexes() -> List:
+    return [
+        index
+        for table in TABLES.values()
+        for index in sorted(table.indexes, key=lambda index: index.name)
+    ]
+
+
+async def drop_indexes(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        for index in secondary_indexes():
+            await conn.execute(DropIndex(index, if_exists=True))
+
+
+async def build_indexes(
+    engine: AsyncEngine, parallel: int = 4, maintenance_work_mem: str = "1GB"
+) -> None:
+    """Build the secondary indexes, ``parallel`` at a time."""
+    limit = asyncio.Semaphore(parallel)
+
+    async def build(index) -> None:
+        async with limit, engine.begin() as conn:
+            started = time.monotonic()
+            await conn.execute(
+                text("SELECT set_config('maintenance_work_mem', :mem, true)"),
+                {"mem": maintenance_work_mem},
+            )
+            await conn.execute(CreateIndex(index, if_not_exists=True))
+            print(f"Built {index.name} in {time.monotonic() - started:.1f}s")
+
+    await asyncio.gather(*(build(index) for index in secondary_indexes()))
+
+
+# Each counter with the query counting it per tweet.
+_COUNTERS = {
+    "likes_count": "SELECT tweet_id, count(*) AS n FROM likes GROUP BY tweet_id",
+    "replies_count": (
+        "SELECT in_reply_to_id AS tweet_id, count(*) AS n FROM tweets "
+        "WHERE in_reply_to_id IS NOT NULL AND deleted_at IS NULL "
+        "GROUP BY in_reply_to_id"
+    ),
+}
+
+
+async def recount_counters(engine: AsyncEngine) -> None:
+    """Set every tweet's likes_count and replies_count from the rows."""
+    async with engine.begin() as conn:
+        for counter, counts in _COUNTERS.items():
+            await conn.execute(
+                text(
+                    f"UPDATE tweets SET {counter} = counted.n "
+                    f"FROM ({counts}) AS counted "
+                    f"WHERE tweets.id = counted.tweet_id AND tweets.{counter} <> counted.n"
+                )
+            )
+            await conn.execute(
+                text(
+                    f"UPDATE tweets SET {counter} = 0 WHERE {counter} <> 0 "
+                    f"AND id NOT IN (SELECT tweet_id FROM ({counts}) AS counted)"
+                )
+            )
+
+
+async def analyze(engine: AsyncEngine) -> None:
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in TABLES:
+            await conn.execute(text(f"ANALYZE {table}"))
+
+
+async def bulk_import(
+    engine: AsyncEngine,
+    rows: Iterable[Tuple[str, Row]],
+    workers: int = 4,
+    batch_rows: int = 50_000,
+    rebuild_indexes: bool = False,
+    recount: bool = True,
+    maintenance_work_mem: str = "1GB",
+) -> Dict[str, int]:
+    if rebuild_indexes:
+        await drop_indexes(engine)
+    try:
+        loaded = await BulkLoader(engine, workers, batch_rows).load(rows)
+    finally:
+        # Also after a failed load: the app must not run without them.
+        if rebuild_indexes:
+            await build_indexes(engine, workers, maintenance_work_mem)
+    if recount:
+        started = time.monotonic()
+        await recount_counters(engine)
+        print(f"Recounted likes and replies in {time.monotonic() - started:.1f}s")
+    await rebuild_rollups(engine, get_tweet_archive())
+    await analyze(engine)
+    return loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="load JSON lines or CSV files")
+    load.add_argument("--users", metavar="PATH")
+    load.add_argument("--tweets", metavar="PATH")
+    load.add_argument("--likes", metavar="PATH")
+    load.set_defaults(recount=True)
+    generate = commands.add_parser("generate", help="load synthetic data")
+    generate.add_argument("--users", type=int, required=True)
+    generate.add_argument("--tweets", type=int, required=True)
+    generate.add_argument("--likes-per-tweet", type=float, default=2.0)
+    generate.add_argument("--days", type=int, default=365)
+    generate.add_argument("--seed", type=int, default=0)
+    # Generated counts already match the generated likes.
+    generate.set_defaults(recount=False)
+    for command in (load, generate):
+        command.add_argument("--workers", type=int, default=4)
+        command.add_argument("--batch-rows", type=int, default=50_000)
+        command.add_argument(
+            "--rebuild-indexes",
+            action="store_true",
+            help="drop secondary indexes for the load and build them after",
+        )
+        command.add_argument("--maintenance-work-mem", default="1GB")
+        command.add_argument(
+            "--recount",
+            action=argparse.BooleanOptionalAction,
+            help="recompute tweet likes and replies counts",
+        )
+    args = parser.parse_args()
+
+    if get_settings().tweet_shard_urls:
+        raise SystemExit("Bulk import loads DATABASE_URL only; tweets are sharded")
+    if args.command == "generate":
+        rows = SyntheticData(
+            args.users, args.tweets, args.seed, args.likes_per_tweet, days=args.days
+        ).rows()
+    else:
+        rows = file_rows(
+            {"users": args.users, "tweets": args.tweets, "likes": args.likes}
+        )
+
+    async def run() -> None:
+        try:
+            await bulk_import(
+                get_engine(),
+                rows,
+                args.workers,
+                args.batch_rows,
+                args.rebuild_indexes,
+                args.recount,
+                args.maintenance_work_mem,
+            )
+        finally:
+            await dispose_engine()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,141 @@
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from typing import AsyncGenerator, Optional
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+    async_sessionmaker,
+)
 from sqlalchemy.orm import DeclarativeBase
-from src.fake_twitter.config import settings
-
-engine = create_async_engine(settings.database_url, echo=True)
-async_session_maker = async_sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
+from src.fake_twitter.config import Settings, get_settings
+from src.fake_twitter.infrastructure.deadlines import apply_statement_timeouts
+from src.fake_twitter.infrastructure.database.statement_cache import (
+    track_statement_cache,
 )
+from src.fake_twitter.infrastructure.tracing import span, trace_statements
+
+# Built on first use so that importing the app neither reads the settings
+# nor loads the database driver.
+_engine: Optional[AsyncEngine] = None
+_session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+_read_session_maker: Optional[async_sessionmaker["ReadOnlySession"]] = None
+
+
+def statement_cache_options(settings: Settings) -> dict:
+    """Engine options sizing SQLAlchemy's and asyncpg's statement caches."""
+    return {
+        "query_cache_size": settings.db_query_cache_size,
+        "connect_args": {
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size
+        },
+    }
+
+
+def create_engine_from_settings() -> AsyncEngine:
+    settings = get_settings()
+    engine = create_async_engine(
+        settings.database_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        **statement_cache_options(settings),
+    )
+    track_statement_cache(engine.sync_engine)
+    trace_statements(engine.sync_engine)
+    apply_statement_timeouts(engine.sync_engine)
+    return engine
+
+
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        _engine = create_engine_from_settings()
+    return _engine
+
+
+def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    global _session_maker
+    if _session_maker is None:
+        _session_maker = async_sessionmaker(
+            get_engine(), class_=AsyncSession, expire_on_commit=False
+        )
+    return _session_maker
+
+
+class ReadOnlySession(AsyncSession):
+    """A session for pure reads that holds a connection only per statement.
+
+    Every statement runs on a connection taken from the pool and given back
+    as soon as its (buffered) result is in, instead of staying pinned until
+    the end of the request. Results are fully loaded before the release, so
+    the objects they return stay readable, detached.
+    """
+
+    async def execute(self, *args, **kwargs):
+        try:
+            return await super().execute(*args, **kwargs)
+        finally:
+            await self.close()
+
+    async def scalar(self, *args, **kwargs):
+        try:
+            return await super().scalar(*args, **kwargs)
+        finally:
+            await self.close()
+
+    async def scalars(self, *args, **kwargs):
+        try:
+            return await super().scalars(*args, **kwargs)
+        finally:
+            await self.close()
+
+    async def get(self, *args, **kwargs):
+        try:
+            return await super().get(*args, **kwargs)
+        finally:
+            await self.close()
+
+
+def get_read_session_maker() -> async_sessionmaker[ReadOnlySession]:
+    """Sessions over the shared pool for GET endpoints.
+
+    In the default AUTOCOMMIT mode a statement is sent without BEGIN/COMMIT
+    around it, at the server's per-statement READ COMMITTED snapshot. Any
+    other isolation level runs each statement in a READ ONLY transaction at
+    that level instead.
+    """
+    global _read_session_maker
+    if _read_session_maker is None:
+        isolation_level = get_settings().db_read_isolation_level
+        if isolation_level == "AUTOCOMMIT":
+            engine = get_engine().execution_options(isolation_level=isolation_level)
+        else:
+            engine = get_engine().execution_options(
+                isolation_level=isolation_level, postgresql_readonly=True
+            )
+        _read_session_maker = async_sessionmaker(
+            engine, class_=ReadOnlySession, expire_on_commit=False, autoflush=False
+        )
+    return _read_session_maker
+
+
+async def dispose_engine() -> None:
+    global _engine, _session_maker, _read_session_maker
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_maker = None
+    _read_session_maker = None
+
+
+def reset_engine_after_fork() -> None:
+    """Give a forked worker its own connection pool.
+
+    With ``preload_app`` the engine may have been built in the gunicorn
+    master before forking. The child must not reuse any connection inherited
+    from the parent, so the pool is replaced without closing the parent's
+    sockets.
+    """
+    if _engine is not None:
+        _engine.sync_engine.dispose(close=False)
 
 
 class Base(DeclarativeBase):
@@ -14,12 +143,19 @@ class Base(DeclarativeBase):
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_maker() as session:
+    async with get_session_maker()() as session:
         try:
             yield session
-            await session.commit()
+            with span("commit"):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
+
+
+async def get_read_db() -> AsyncGenerator[ReadOnlySession, None]:
+    """Like get_db for requests that only read: nothing to commit."""
+    async with get_read_session_maker()() as session:
+        yield session
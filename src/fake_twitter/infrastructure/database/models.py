@@ -1,21 +1,48 @@
-from sqlalchemy import String, Integer, DateTime, Text, UUID
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    LargeBinary,
+    String,
+    Integer,
+    DateTime,
+    Text,
+    UUID,
+    Index,
+    event,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
+from typing import List, Optional
 import uuid
 
 from src.fake_twitter.infrastructure.database.connection import Base
 
 
+# Deleted rows stay as tombstones until the purger removes them
+# (``database/purger.py``). Reads only ever want live rows, so their indexes
+# leave tombstones out, and the purger finds tombstones through an index of
+# nothing else.
+LIVE = text("deleted_at IS NULL")
+TOMBSTONED = text("deleted_at IS NOT NULL")
+REPLIES = text("conversation_id IS NOT NULL AND deleted_at IS NULL")
+
+
 class UserModel(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_deleted_at", "deleted_at", postgresql_where=TOMBSTONED),
+        # Unique among live users: a deleted user's username and email are
+        # free again at once, not only once the purger removes the row.
+        Index("ix_users_username", "username", unique=True, postgresql_where=LIVE),
+        Index("ix_users_email", "email", unique=True, postgresql_where=LIVE),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(), primary_key=True, default=uuid.uuid4)
-    username: Mapped[str] = mapped_column(
-        String(50), unique=True, nullable=False, index=True
-    )
-    email: Mapped[str] = mapped_column(
-        String(100), unique=True, nullable=False, index=True
-    )
+    username: Mapped[str] = mapped_column(String(50), nullable=False)
+    email: Mapped[str] = mapped_column(String(100), nullable=False)
     full_name: Mapped[str] = mapped_column(String(100), nullable=False)
     bio: Mapped[str] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
@@ -23,16 +50,138 @@ class UserModel(Base):
     )
     followers_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     following_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+# Prefix search (``UserRepository.search_by_prefix``): byte-wise ordered
+# lowercase names, so a prefix is one range of the index whatever the
+# database's collation.
+Index(
+    "ix_users_username_prefix",
+    func.lower(UserModel.username).label("username_lower"),
+    postgresql_ops={"username_lower": "text_pattern_ops"},
+    postgresql_where=LIVE,
+)
+Index(
+    "ix_users_full_name_prefix",
+    func.lower(UserModel.full_name).label("full_name_lower"),
+    postgresql_ops={"full_name_lower": "text_pattern_ops"},
+    postgresql_where=LIVE,
+)
 
 
 class TweetModel(Base):
+    """Range-partitioned on ``created_at``; see ``database/partitions.py``.
+
+    Postgres requires the partition key in the primary key, hence the
+    composite ``(id, created_at)`` key.
+    """
+
     __tablename__ = "tweets"
+    __table_args__ = (
+        Index(
+            "ix_tweets_user_id_created_at",
+            "user_id",
+            "created_at",
+            postgresql_where=LIVE,
+        ),
+        Index("ix_tweets_created_at", "created_at", postgresql_where=LIVE),
+        Index("ix_tweets_deleted_at", "deleted_at", postgresql_where=TOMBSTONED),
+        # A whole conversation in reply order, from one range scan. Only
+        # replies have a conversation_id, so tweets starting none cost nothing.
+        Index(
+            "ix_tweets_conversation_id_created_at",
+            "conversation_id",
+            "created_at",
+            "id",
+            postgresql_where=REPLIES,
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(), primary_key=True, default=uuid.uuid4)
     content: Mapped[str] = mapped_column(String(280), nullable=False)
-    user_id: Mapped[uuid.UUID] = mapped_column(UUID(), nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.now, nullable=False
+        DateTime, default=datetime.now, primary_key=True
     )
     likes_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     retweets_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    in_reply_to_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(), nullable=True)
+    # The first tweet of the conversation; NULL on that tweet itself.
+    conversation_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(), nullable=True)
+    replies_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default=text("0"), nullable=False
+    )
+    # Ids of files in the media store; the files themselves are not in the
+    # database.
+    media_ids: Mapped[Optional[List[str]]] = mapped_column(
+        ARRAY(String(72)), nullable=True
+    )
+    deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class LikeModel(Base):
+    """Who liked which tweet; one row per (user, tweet) pair.
+
+    Keyed by user first so "which of these tweets has this user liked" and
+    loading a user's likes are range scans of the primary key.
+    """
+
+    __tablename__ = "likes"
+    __table_args__ = (Index("ix_likes_tweet_id", "tweet_id"),)
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(), primary_key=True)
+    tweet_id: Mapped[uuid.UUID] = mapped_column(UUID(), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, nullable=False
+    )
+
+
+class UserActivityModel(Base):
+    """A user's activity per hour and per day, kept up to date as it happens.
+
+    Keyed so a user's buckets of one granularity over a time range are a
+    range scan of the primary key. ``database/rollups.py`` rebuilds it.
+    """
+
+    __tablename__ = "user_activity"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(), primary_key=True)
+    granularity: Mapped[str] = mapped_column(String(4), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    tweets: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    likes_received: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    retweets_received: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class TweetViewsModel(Base):
+    """Unique viewers of a tweet as a HyperLogLog sketch, and its estimate.
+
+    Each API process merges the sketch of the views it served into
+    ``registers`` every few seconds (``infrastructure/views.py``), and
+    responses read ``views_count`` without decoding the sketch. Kept with
+    the users, also when tweets are sharded.
+    """
+
+    __tablename__ = "tweet_views"
+
+    tweet_id: Mapped[uuid.UUID] = mapped_column(UUID(), primary_key=True)
+    registers: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    views_count: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.now, onupdate=datetime.now, nullable=False
+    )
+
+
+# A partitioned table rejects rows outside every partition. Tables created
+# straight from the metadata (tests, fresh databases) get a catch-all default
+# partition; migrated databases also get monthly partitions kept ahead of time
+# by the maintenance task.
+event.listen(
+    TweetModel.__table__,
+    "after_create",
+    DDL("CREATE TABLE tweets_default PARTITION OF tweets DEFAULT").execute_if(
+        dialect="postgresql"
+    ),
+)
@@ -0,0 +1,81 @@
+"""In-process effects of a transaction, applied once it commits.
+
+Some writes also change state outside the database: the top tweets ranking,
+the user search trie, the activity buffer, archive tombstones. Applied at
+once, they would outlive a transaction, or savepoint, that rolls back: a
+batch operation failing after it recorded a tweet in the ranking (see
+``routes/batch.py``) would leave it ranked, though its row never committed.
+``on_commit`` holds them on the session instead and applies them when its
+outermost transaction commits; rolling back a savepoint drops the ones
+registered since it began, rolling back the transaction drops them all.
+"""
+
+from typing import Any, Callable, Collection
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+# Session.info keys: the callbacks registered in the session's transaction,
+# and how many there were when each open savepoint began.
+_PENDING = "on_commit_pending"
+_SAVEPOINTS = "on_commit_savepoints"
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], Any]) -> None:
+    """Call ``callback`` once ``session``'s transaction commits."""
+    session.sync_session.info.setdefault(_PENDING, []).append(callback)
+
+
+class AfterCommit:
+    """Proxy deferring the calls of ``methods`` of ``target`` with ``on_commit``.
+
+    Other attributes are ``target``'s own, so reads are answered at once.
+    """
+
+    def __init__(self, target: Any, session: AsyncSession, methods: Collection[str]):
+        self._target = target
+        self._session = session
+        self._methods = frozenset(methods)
+
+    def __getattr__(self, attribute: str) -> Any:
+        value = getattr(self._target, attribute)
+        if attribute not in self._methods:
+            return value
+
+        def deferred(*args, **kwargs) -> None:
+            on_commit(self._session, lambda: value(*args, **kwargs))
+
+        return deferred
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _savepoint_started(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.nested and _PENDING in session.info:
+        savepoints = session.info.setdefault(_SAVEPOINTS, {})
+        savepoints[transaction] = len(session.info[_PENDING])
+
+
+@event.listens_for(Session, "after_commit")
+def _committed(session: Session) -> None:
+    # Also fired when a savepoint is released; only the outermost commit
+    # makes the changes durable.
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_SAVEPOINTS, None)
+    for callback in session.info.pop(_PENDING, ()):
+        callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _rolled_back(session: Session, previous_transaction: SessionTransaction) -> None:
+    pending = session.info.get(_PENDING)
+    if pending is None:
+        return
+    if previous_transaction.nested:
+        # Callbacks registered before the savepoint began still wait.
+        savepoints = session.info.get(_SAVEPOINTS, {})
+        del pending[savepoints.pop(previous_transaction, 0) :]
+    else:
+        session.info.pop(_PENDING)
+        session.info.pop(_SAVEPOINTS, None)
@@ -0,0 +1,227 @@
+"""Maintenance of the time-range partitions of the ``tweets`` table.
+
+Partitions cover one ``day``, ``week`` or ``month`` (the default) each and are
+named after their first day, e.g. ``tweets_p20260101``. Run periodically (for
+example daily from cron) to keep partitions created ahead of time and to
+detach or drop the ones past the retention period:
+
+    python -m src.fake_twitter.infrastructure.database.partitions \\
+        --periods-ahead 3 --retention-periods 24 --drop
+"""
+
+import argparse
+import asyncio
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.infrastructure.database.connection import (
+    dispose_engine,
+    get_engine,
+)
+
+PARENT_TABLE = "tweets"
+INTERVALS = ("day", "week", "month")
+
+# Serializes maintenance runs started from several hosts at once.
+_ADVISORY_LOCK_KEY = 0x7477_6565_7473  # "tweets"
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    start: datetime
+    end: datetime
+
+
+def period_start(moment: datetime, interval: str) -> datetime:
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "day":
+        return day
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown partition interval {interval!r}")
+
+
+def next_period(start: datetime, interval: str) -> datetime:
+    if interval == "day":
+        return start + timedelta(days=1)
+    if interval == "week":
+        return start + timedelta(weeks=1)
+    if interval == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    raise ValueError(f"Unknown partition interval {interval!r}")
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT_TABLE}_p{start:%Y%m%d}"
+
+
+def planned_partitions(
+    now: datetime, periods_ahead: int, interval: str = "month"
+) -> List[Partition]:
+    """The current partition plus ``periods_ahead`` future ones."""
+    partitions = []
+    start = period_start(now, interval)
+    for _ in range(periods_ahead + 1):
+        end = next_period(start, interval)
+        partitions.append(Partition(partition_name(start), start, end))
+        start = end
+    return partitions
+
+
+async def list_partitions(conn: AsyncConnection) -> List[Partition]:
+    """Bounded partitions of the parent table; the default one is skipped."""
+    result = await conn.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    partitions = []
+    for name, bound in result:
+        match = _BOUND_RE.search(bound)
+        if match:
+            start, end = (datetime.fromisoformat(value) for value in match.groups())
+            partitions.append(Partition(name, start, end))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+async def ensure_partitions(
+    conn: AsyncConnection,
+    periods_ahead: int,
+    interval: str = "month",
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """Create the missing partitions up to ``periods_ahead`` periods ahead.
+
+    Creating them ahead of time matters: a new partition cannot be attached
+    while the default partition holds rows in its range.
+    """
+    existing = await list_partitions(conn)
+    created = []
+    for partition in planned_partitions(now or datetime.now(), periods_ahead, interval):
+        overlaps = any(
+            other.start < partition.end and partition.start < other.end
+            for other in existing
+        )
+        if overlaps:
+            continue
+        await conn.execute(
+            text(
+                f'CREATE TABLE "{partition.name}" PARTITION OF {PARENT_TABLE} '
+                f"FOR VALUES FROM ('{partition.start.isoformat(sep=' ')}') "
+                f"TO ('{partition.end.isoformat(sep=' ')}')"
+            )
+        )
+        created.append(partition.name)
+    return created
+
+
+async def expire_partitions(
+    conn: AsyncConnection,
+    cutoff: datetime,
+    drop: bool = False,
+) -> List[str]:
+    """Detach (and optionally drop) partitions that end before ``cutoff``.
+
+    Detaching is a catalog change, unlike deleting the rows: the detached
+    table can be archived or dropped later without touching ``tweets``.
+    """
+    expired = []
+    for partition in await list_partitions(conn):
+        if partition.end > cutoff:
+            continue
+        await conn.execute(
+            text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{partition.name}"')
+        )
+        if drop:
+            await conn.execute(text(f'DROP TABLE "{partition.name}"'))
+        expired.append(partition.name)
+    return expired
+
+
+def retention_cutoff(now: datetime, retention_periods: int, interval: str) -> datetime:
+    """Start of the oldest period that is still retained."""
+    start = period_start(now, interval)
+    for _ in range(retention_periods):
+        start = period_start(start - timedelta(days=1), interval)
+    return start
+
+
+async def run_maintenance(
+    periods_ahead: int,
+    retention_periods: Optional[int],
+    interval: str = "month",
+    drop: bool = False,
+) -> None:
+    now = datetime.now()
+    async with get_engine().begin() as conn:
+        locked = await conn.scalar(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": _ADVISORY_LOCK_KEY},
+        )
+        if not locked:
+            print("Another partition maintenance run is in progress")
+            return
+
+        created = await ensure_partitions(conn, periods_ahead, interval, now)
+        print(f"Created partitions: {', '.join(created) or 'none'}")
+
+        if retention_periods is not None:
+            cutoff = retention_cutoff(now, retention_periods, interval)
+            expired = await expire_partitions(conn, cutoff, drop=drop)
+            action = "Dropped" if drop else "Detached"
+            print(f"{action} partitions: {', '.join(expired) or 'none'}")
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--interval",
+        choices=INTERVALS,
+        default=settings.tweet_partition_interval,
+    )
+    parser.add_argument(
+        "--periods-ahead",
+        type=int,
+        default=settings.tweet_partition_periods_ahead,
+    )
+    parser.add_argument(
+        "--retention-periods",
+        type=int,
+        default=settings.tweet_partition_retention_periods,
+        help="keep this many past periods; older partitions are detached",
+    )
+    parser.add_argument(
+        "--drop", action="store_true", help="drop expired partitions too"
+    )
+    args = parser.parse_args()
+
+    async def run() -> None:
+        try:
+            await run_maintenance(
+                args.periods_ahead, args.retention_periods, args.interval, args.drop
+            )
+        finally:
+            await dispose_engine()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""Background removal of deleted users and tweets.
+
+Deleting a tweet only writes a tombstone (``deleted_at``), so the request
+does a single UPDATE; deleting a user does one more, tombstoning their
+tweets with the same moment or later. This purger removes the rows later:
+
+- tombstoned tweets, after the likes of them, and their view counts;
+- tombstoned users, after their tweets (and the likes of those) and their
+  own likes, whose tweets get their ``likes_count`` decremented, as do the
+  tweets their replies answered get their ``replies_count`` (for replies
+  tombstoned with the user: ones deleted before were uncounted then), and
+  their activity rollups; their archived tweets get a tombstone in the
+  archive.
+
+Work is done in batches of ``--batch-size`` rows, each its own short
+transaction, with a pause between batches so purging a prolific account
+never holds many locks or competes with production traffic for long. Rows
+are walked in keyset order: deleted rows stay in the indexes until vacuum,
+and restarting every batch from the beginning would scan them again.
+
+Runs every ``--interval`` seconds, or once with ``--once``:
+
+    python -m src.fake_twitter.infrastructure.database.purger --once
+"""
+
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.infrastructure.archive import TweetArchive, get_tweet_archive
+from src.fake_twitter.infrastructure.database.connection import (
+    dispose_engine,
+    get_engine,
+)
+from src.fake_twitter.infrastructure.database.models import (
+    LikeModel,
+    TweetModel,
+    TweetViewsModel,
+    UserActivityModel,
+    UserModel,
+)
+from src.fake_twitter.infrastructure.database.sharding import (
+    ShardSet,
+    dispose_shard_set,
+    get_shard_set,
+)
+
+tweets = TweetModel.__table__
+users = UserModel.__table__
+likes = LikeModel.__table__
+activity = UserActivityModel.__table__
+views = TweetViewsModel.__table__
+
+# Serializes purger runs started from several hosts at once.
+_ADVISORY_LOCK_KEY = 0x7075_7267_6572  # "purger"
+
+
+class Purger:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        shards: Optional[ShardSet] = None,
+        batch_size: int = 500,
+        pause: float = 0.05,
+        archive: Optional[TweetArchive] = None,
+    ):
+        self.engine = engine
+        self.shards = shards
+        self.batch_size = batch_size
+        self.pause = pause
+        self.archive = archive
+
+    def _tweet_engines(self) -> List[AsyncEngine]:
+        if self.shards is None:
+            return [self.engine]
+        return list(self.shards.engines.values())
+
+    def _tweet_engine_for_user(self, user_id: UUID) -> AsyncEngine:
+        if self.shards is None:
+            return self.engine
+        return self.shards.engines[self.shards.shard_for_user(user_id)]
+
+    def _by_tweet_engine(
+        self, tweet_ids: Sequence[UUID]
+    ) -> Dict[AsyncEngine, List[UUID]]:
+        if self.shards is None:
+            return {self.engine: list(tweet_ids)}
+        grouped: Dict[AsyncEngine, List[UUID]] = defaultdict(list)
+        for tweet_id in tweet_ids:
+            grouped[self.shards.engines[self.shards.shard_for_tweet(tweet_id)]].append(
+                tweet_id
+            )
+        return grouped
+
+    async def _delete_tweets(self, engine: AsyncEngine, rows: Sequence) -> None:
+        """Delete tweets given as (id, created_at) rows, after their likes and views."""
+        tweet_ids = [row.id for row in rows]
+        await self._delete_likes_of(tweet_ids)
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(views).where(views.c.tweet_id.in_(tweet_ids)))
+        created = [row.created_at for row in rows]
+        async with engine.begin() as conn:
+            await conn.execute(
+                delete(tweets).where(
+                    tweets.c.id.in_(tweet_ids),
+                    # Lets Postgres prune the partitions outside the batch.
+                    tweets.c.created_at.between(min(created), max(created)),
+                )
+            )
+
+    async def _delete_likes_of(self, tweet_ids: List[UUID]) -> None:
+        after = None
+        while True:
+            query = (
+                select(likes.c.tweet_id, likes.c.user_id)
+                .where(likes.c.tweet_id.in_(tweet_ids))
+                .order_by(likes.c.tweet_id, likes.c.user_id)
+                .limit(self.batch_size)
+            )
+            if after is not None:
+                query = query.where(
+                    tuple_(likes.c.tweet_id, likes.c.user_id) > tuple_(*after)
+                )
+            async with self.engine.begin() as conn:
+                rows = (await conn.execute(query)).all()
+                if not rows:
+                    return
+                await conn.execute(
+                    delete(likes).where(
+                        tuple_(likes.c.tweet_id, likes.c.user_id).in_(
+                            [tuple(row) for row in rows]
+                        )
+                    )
+                )
+            after = tuple(rows[-1])
+            await asyncio.sleep(self.pause)
+
+    async def _tombstoned_with_author(self, rows: Sequence) -> Counter:
+        """The parents of replies among ``rows`` that were tombstoned along
+        with their deleted author, and so are still counted."""
+        replies = [row for row in rows if row.in_reply_to_id is not None]
+        if not replies:
+            return Counter()
+        async with self.engine.connect() as conn:
+            authors = dict(
+                (
+                    await conn.execute(
+                        select(users.c.id, users.c.deleted_at).where(
+                            users.c.id.in_({row.user_id for row in replies}),
+                            users.c.deleted_at.is_not(None),
+                        )
+                    )
+                ).all()
+            )
+        return Counter(
+            row.in_reply_to_id
+            for row in replies
+            if row.user_id in authors and row.deleted_at >= authors[row.user_id]
+        )
+
+    async def purge_tweets(self) -> int:
+        """Remove tombstoned tweets; returns how many."""
+        purged = 0
+        for engine in self._tweet_engines():
+            after = None
+            while True:
+                query = (
+                    select(
+                        tweets.c.deleted_at,
+                        tweets.c.id,
+                        tweets.c.created_at,
+                        tweets.c.user_id,
+                        tweets.c.in_reply_to_id,
+                    )
+                    .where(tweets.c.deleted_at.is_not(None))
+                    .order_by(tweets.c.deleted_at, tweets.c.id)
+                    .limit(self.batch_size)
+                )
+                if after is not None:
+                    query = query.where(
+                        tuple_(tweets.c.deleted_at, tweets.c.id) > tuple_(*after)
+                    )
+                async with engine.connect() as conn:
+                    rows = (await conn.execute(query)).all()
+                if not rows:
+                    break
+                # Their author's purge would have uncounted them, had it
+                # come first.
+                parents = await self._tombstoned_with_author(rows)
+                await self._delete_tweets(engine, rows)
+                if parents:
+                    await self._decrement_replies(parents)
+                after = (rows[-1].deleted_at, rows[-1].id)
+                purged += len(rows)
+                await asyncio.sleep(self.pause)
+        return purged
+
+    async def _decrement_replies(self, parents: Counter) -> None:
+        for engine, parent_ids in self._by_tweet_engine(list(parents)).items():
+            async with engine.begin() as conn:
+                for parent_id in parent_ids:
+                    await conn.execute(
+                        update(tweets)
+                        .where(tweets.c.id == parent_id)
+                        .values(
+                            replies_count=func.greatest(
+                                tweets.c.replies_count - parents[parent_id], 0
+                            )
+                        )
+                    )
+
+    async def _purge_counted_tweets(
+        self, engine: AsyncEngine, where: Sequence, order: Sequence
+    ) -> None:
+        """Remove the tweets matching ``where``, walked in ``order``, along with
+        the replies they added to their parents."""
+        after = None
+        while True:
+            query = (
+                select(*order, tweets.c.in_reply_to_id)
+                .where(*where)
+                .order_by(*order)
+                .limit(self.batch_size)
+            )
+            if after is not None:
+                query = query.where(tuple_(*order) > tuple_(*after))
+            async with engine.connect() as conn:
+                rows = (await conn.execute(query)).all()
+            if not rows:
+                return
+            await self._delete_tweets(engine, rows)
+            parents = Counter(row.in_reply_to_id for row in rows if row.in_reply_to_id)
+            if parents:
+                await self._decrement_replies(parents)
+            after = tuple(rows[-1])[: len(order)]
+            await asyncio.sleep(self.pause)
+
+    async def purge_user(self, user_id: UUID, deleted_at: datetime) -> None:
+        engine = self._tweet_engine_for_user(user_id)
+        # Tweets tombstoned with the user, over ix_tweets_deleted_at: those
+        # deleted on their own before were uncounted then and are left to
+        # purge_tweets.
+        await self._purge_counted_tweets(
+            engine,
+            (tweets.c.deleted_at >= deleted_at, tweets.c.user_id == user_id),
+            (tweets.c.deleted_at, tweets.c.id, tweets.c.created_at),
+        )
+        # Any created while the user was being deleted.
+        await self._purge_counted_tweets(
+            engine,
+            (tweets.c.user_id == user_id, tweets.c.deleted_at.is_(None)),
+            (tweets.c.created_at, tweets.c.id),
+        )
+
+        # The user's likes go first, then the counts they added. A crash in
+        # between leaves counts one too high rather than decremented twice.
+        last_liked = None
+        while True:
+            batch = (
+                select(likes.c.user_id, likes.c.tweet_id)
+                .where(likes.c.user_id == user_id)
+                .order_by(likes.c.tweet_id)
+                .limit(self.batch_size)
+            )
+            if last_liked is not None:
+                batch = batch.where(likes.c.tweet_id > last_liked)
+            async with self.engine.begin() as conn:
+                liked = (
+                    await conn.scalars(
+                        delete(likes)
+                        .where(tuple_(likes.c.user_id, likes.c.tweet_id).in_(batch))
+                        .returning(likes.c.tweet_id)
+                    )
+                ).all()
+            if not liked:
+                break
+            last_liked = max(liked)
+            for tweet_engine, tweet_ids in self._by_tweet_engine(liked).items():
+                async with tweet_engine.begin() as conn:
+                    await conn.execute(
+                        update(tweets)
+                        .where(tweets.c.id.in_(tweet_ids))
+                        .values(likes_count=func.greatest(tweets.c.likes_count - 1, 0))
+                    )
+            await asyncio.sleep(self.pause)
+
+        # Before the user row goes, so a crash in between tombstones again.
+        if self.archive is not None:
+            self.archive.delete_user(user_id)
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(activity).where(activity.c.user_id == user_id))
+            await conn.execute(delete(users).where(users.c.id == user_id))
+
+    async def purge_users(self) -> int:
+        """Remove tombstoned users with everything of theirs; returns how many."""
+        purged = 0
+        after = None
+        while True:
+            query = (
+                select(users.c.deleted_at, users.c.id)
+                .where(users.c.deleted_at.is_not(None))
+                .order_by(users.c.deleted_at, users.c.id)
+                .limit(self.batch_size)
+            )
+            if after is not None:
+                query = query.where(
+                    tuple_(users.c.deleted_at, users.c.id) > tuple_(*after)
+                )
+            async with self.engine.connect() as conn:
+                rows = (await conn.execute(query)).all()
+            if not rows:
+                return purged
+            for row in rows:
+                await self.purge_user(row.id, row.deleted_at)
+                purged += 1
+            after = (rows[-1].deleted_at, rows[-1].id)
+
+
+async def purge(purger: Purger) -> None:
+    async with purger.engine.connect() as lock_conn:
+        # A session-level lock, held without keeping a transaction open.
+        await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = await lock_conn.scalar(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY}
+        )
+        if not locked:
+            print("Another purger is running")
+            return
+        try:
+            purged_users = await purger.purge_users()
+            purged_tweets = await purger.purge_tweets()
+            print(f"Purged {purged_users} users and {purged_tweets} tweets")
+        finally:
+            await lock_conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY}
+            )
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=settings.purge_batch_size)
+    parser.add_argument(
+        "--pause-ms",
+        type=float,
+        default=settings.purge_pause_ms,
+        help="pause between batches",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=settings.purge_interval_seconds
+    )
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    async def run() -> None:
+        purger = Purger(
+            get_engine(),
+            get_shard_set(),
+            args.batch_size,
+            args.pause_ms / 1000,
+            get_tweet_archive(),
+        )
+        try:
+            while True:
+                await purge(purger)
+                if args.once:
+                    return
+                await asyncio.sleep(args.interval)
+        finally:
+            await dispose_shard_set()
+            await dispose_engine()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Offline rebalancing of the tweet shards after the shard list changes.
+
+Compares the ring built from the previous shard names with the ring of the
+shards now configured in ``TWEET_SHARD_URLS`` and moves every bucket whose
+owner changed, i.e. all users hashed into it along with their tweets. Run it
+with tweet writes paused:
+
+    python -m src.fake_twitter.infrastructure.database.rebalance --previous s0,s1
+
+Rows are copied in batches and deleted from the source only once the copy
+has committed, so an interrupted run can simply be started again.
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.fake_twitter.infrastructure.database.models import TweetModel
+from src.fake_twitter.infrastructure.database.sharding import (
+    NUM_BUCKETS,
+    HashRing,
+    ShardSet,
+    bucket_id_range,
+    dispose_shard_set,
+    get_shard_set,
+)
+
+tweets = TweetModel.__table__
+
+
+@dataclass(frozen=True)
+class BucketMove:
+    bucket: int
+    source: str
+    target: str
+
+
+def plan_moves(previous: Sequence[str], shards: ShardSet) -> List[BucketMove]:
+    previous_owners = HashRing(sorted(previous)).bucket_owners()
+    return [
+        BucketMove(bucket, previous_owners[bucket], shards.shard_for_bucket(bucket))
+        for bucket in range(NUM_BUCKETS)
+        if previous_owners[bucket] != shards.shard_for_bucket(bucket)
+    ]
+
+
+async def move_bucket(shards: ShardSet, move: BucketMove, batch_size: int) -> int:
+    low, high = bucket_id_range(move.bucket)
+    in_bucket = tweets.c.id.between(low, high)
+    moved = 0
+    while True:
+        async with shards.session_makers[move.source].begin() as source:
+            result = await source.execute(
+                select(tweets).where(in_bucket).order_by(tweets.c.id).limit(batch_size)
+            )
+            rows = [dict(row) for row in result.mappings()]
+            if not rows:
+                return moved
+
+            async with shards.session_makers[move.target].begin() as target:
+                await target.execute(
+                    insert(tweets).values(rows).on_conflict_do_nothing()
+                )
+
+            moved_ids = [row["id"] for row in rows]
+            await source.execute(delete(tweets).where(tweets.c.id.in_(moved_ids)))
+        moved += len(rows)
+
+
+async def rebalance(
+    previous: Sequence[str], batch_size: int = 1000, dry_run: bool = False
+) -> None:
+    shards = get_shard_set()
+    if shards is None:
+        raise SystemExit("TWEET_SHARD_URLS is not configured")
+    unknown = set(previous) - set(shards.names)
+    if unknown:
+        raise SystemExit(f"Unknown shards in --previous: {', '.join(sorted(unknown))}")
+
+    moves = plan_moves(previous, shards)
+    print(f"{len(moves)} of {NUM_BUCKETS} buckets change shard")
+    if dry_run:
+        return
+
+    total = 0
+    for done, move in enumerate(moves, start=1):
+        total += await move_bucket(shards, move, batch_size)
+        print(
+            f"[{done}/{len(moves)}] bucket {move.bucket}: "
+            f"{move.source} -> {move.target}, {total} tweets moved so far"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--previous",
+        required=True,
+        help="comma-separated shard names of the previous configuration",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    async def run() -> None:
+        try:
+            await rebalance(args.previous.split(","), args.batch_size, args.dry_run)
+        finally:
+            await dispose_shard_set()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Rebuild of the per-user activity rollups (``user_activity``).
+
+The API keeps the rollups up to date as tweets are posted and deleted and
+as they are liked and retweeted. This job recomputes them from the rows,
+for a new table, after a bulk import, or to repair drift:
+
+- ``tweets`` from the live tweets, by the hour and day they were posted;
+- ``likes_received`` from the likes of each user's tweets, by the hour and
+  day they were made;
+- ``retweets_received`` is kept as recorded: retweets are only counted on
+  the tweet, with no row saying when they happened.
+
+With a tweet archive (``TWEET_ARCHIVE_DIR``), buckets starting before its
+cutoff are kept as recorded too, since the tweets they counted are no longer
+in ``tweets``; likes made since of archived tweets are counted for the
+authors the archive gives.
+
+Each granularity is rebuilt in one transaction, so readers never see it
+half done:
+
+    python -m src.fake_twitter.infrastructure.database.rollups
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.domain.entities.activity import GRANULARITIES, bucket_start
+from src.fake_twitter.infrastructure.archive import TweetArchive, get_tweet_archive
+from src.fake_twitter.infrastructure.database.connection import (
+    dispose_engine,
+    get_engine,
+)
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_activity_repository import (
+    COUNTERS,
+)
+
+# Per user and bucket: (user_id, bucket, n), from the buckets at :start on.
+_COUNTS = {
+    "tweets": (
+        "SELECT user_id, date_trunc(:granularity, created_at) AS bucket, "
+        "count(*) AS n FROM tweets WHERE deleted_at IS NULL "
+        "AND created_at >= :start GROUP BY 1, 2"
+    ),
+    # Likes of deleted tweets stay counted, as they were when received.
+    "likes_received": (
+        "SELECT tweets.user_id, date_trunc(:granularity, likes.created_at) "
+        "AS bucket, count(*) AS n FROM likes "
+        "JOIN tweets ON tweets.id = likes.tweet_id "
+        "WHERE likes.created_at >= :start GROUP BY 1, 2"
+    ),
+}
+
+# Per archived tweet and bucket: (tweet_id, bucket, n).
+_ARCHIVED_LIKES = (
+    "SELECT likes.tweet_id, date_trunc(:granularity, likes.created_at) "
+    "AS bucket, count(*) AS n FROM likes "
+    "LEFT JOIN tweets ON tweets.id = likes.tweet_id "
+    "WHERE tweets.id IS NULL AND likes.created_at >= :start GROUP BY 1, 2"
+)
+
+_ADD_LIKES = (
+    f"INSERT INTO user_activity (user_id, granularity, bucket, {', '.join(COUNTERS)}) "
+    "VALUES (:user_id, :granularity, :bucket, "
+    + ", ".join(":n" if c == "likes_received" else "0" for c in COUNTERS)
+    + ") ON CONFLICT (user_id, granularity, bucket) DO UPDATE SET "
+    "likes_received = user_activity.likes_received + excluded.likes_received"
+)
+
+
+def _first_bucket(cutoff: Optional[datetime], granularity: str) -> datetime:
+    """The first bucket holding no archived tweets."""
+    if cutoff is None:
+        return datetime.min
+    start = bucket_start(cutoff, granularity)
+    return start if start == cutoff else start + GRANULARITIES[granularity]
+
+
+async def _add_archived_likes(
+    conn: AsyncConnection, archive: TweetArchive, parameters: Dict[str, Any]
+) -> None:
+    counts: Counter = Counter()
+    for tweet_id, bucket, n in await conn.execute(text(_ARCHIVED_LIKES), parameters):
+        tweet = archive.get(tweet_id)
+        if tweet is not None:
+            counts[tweet.user_id, bucket] += n
+    if counts:
+        await conn.execute(
+            text(_ADD_LIKES),
+            [
+                {**parameters, "user_id": user_id, "bucket": bucket, "n": n}
+                for (user_id, bucket), n in counts.items()
+            ],
+        )
+
+
+async def rebuild(engine: AsyncEngine, archive: Optional[TweetArchive] = None) -> None:
+    cutoff = archive.cutoff if archive is not None else None
+    for granularity in GRANULARITIES:
+        started = time.monotonic()
+        parameters = {
+            "granularity": granularity,
+            "start": _first_bucket(cutoff, granularity),
+        }
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "UPDATE user_activity SET "
+                    + ", ".join(f"{counter} = 0" for counter in _COUNTS)
+                    + " WHERE granularity = :granularity AND bucket >= :start"
+                ),
+                parameters,
+            )
+            for counter, counts in _COUNTS.items():
+                values = ", ".join("n" if c == counter else "0" for c in COUNTERS)
+                await conn.execute(
+                    text(
+                        f"INSERT INTO user_activity (user_id, granularity, bucket, "
+                        f"{', '.join(COUNTERS)}) "
+                        f"SELECT user_id, :granularity, bucket, {values} "
+                        f"FROM ({counts}) AS counted "
+                        "ON CONFLICT (user_id, granularity, bucket) "
+                        f"DO UPDATE SET {counter} = excluded.{counter}"
+                    ),
+                    parameters,
+                )
+            if cutoff is not None:
+                await _add_archived_likes(conn, archive, parameters)
+            await conn.execute(
+                text(
+                    "DELETE FROM user_activity WHERE granularity = :granularity AND "
+                    + " AND ".join(f"{counter} = 0" for counter in COUNTERS)
+                ),
+                parameters,
+            )
+        print(f"Rebuilt {granularity} rollups in {time.monotonic() - started:.1f}s")
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+    if get_settings().tweet_shard_urls:
+        raise SystemExit("Rollups are rebuilt from DATABASE_URL; tweets are sharded")
+
+    async def run() -> None:
+        try:
+            await rebuild(get_engine(), get_tweet_archive())
+        finally:
+            await dispose_engine()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
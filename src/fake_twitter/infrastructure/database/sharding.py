@@ -0,0 +1,156 @@
+"""Placement of tweets across several Postgres databases (shards).
+
+Users are hashed into a fixed number of buckets, and a consistent hash ring
+maps buckets onto the configured shards. Every tweet id embeds its author's
+bucket in its top bits, so a tweet can be located from its id alone. The
+ids stay valid version 4 UUIDs.
+
+Adding a shard only moves the buckets that the ring reassigns to it (roughly
+1/N of them); ``database/rebalance.py`` copies their rows over.
+"""
+
+import bisect
+import hashlib
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.infrastructure.database.connection import (
+    statement_cache_options,
+)
+from src.fake_twitter.infrastructure.database.statement_cache import (
+    track_statement_cache,
+)
+from src.fake_twitter.infrastructure.deadlines import apply_statement_timeouts
+from src.fake_twitter.infrastructure.tracing import trace_statements
+
+# Part of the tweet id format: never change once tweets have been written.
+BUCKET_BITS = 10
+NUM_BUCKETS = 1 << BUCKET_BITS
+_BUCKET_SHIFT = 128 - BUCKET_BITS
+
+VIRTUAL_NODES = 64
+
+
+def _hash(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def bucket_for_user(user_id: UUID) -> int:
+    return _hash(user_id.bytes) % NUM_BUCKETS
+
+
+def bucket_for_tweet(tweet_id: UUID) -> int:
+    return tweet_id.int >> _BUCKET_SHIFT
+
+
+def make_tweet_id(bucket: int) -> UUID:
+    """A random version 4 UUID whose top bits hold ``bucket``."""
+    random_bits = uuid.uuid4().int & ((1 << _BUCKET_SHIFT) - 1)
+    return UUID(int=(bucket << _BUCKET_SHIFT) | random_bits)
+
+
+def bucket_id_range(bucket: int) -> Tuple[UUID, UUID]:
+    """Smallest and largest tweet id of a bucket, for range scans on the key."""
+    low = bucket << _BUCKET_SHIFT
+    return UUID(int=low), UUID(int=low | ((1 << _BUCKET_SHIFT) - 1))
+
+
+class HashRing:
+    """Consistent hash ring over shard names with virtual nodes."""
+
+    def __init__(self, shards: Sequence[str], virtual_nodes: int = VIRTUAL_NODES):
+        if not shards:
+            raise ValueError("A hash ring needs at least one shard")
+        points = sorted(
+            (_hash(f"{shard}#{replica}".encode()), shard)
+            for shard in shards
+            for replica in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key: bytes) -> str:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._shards[index]
+
+    def bucket_owners(self) -> List[str]:
+        """Owning shard of every bucket, indexed by bucket."""
+        return [
+            self.shard_for(bucket.to_bytes(2, "big")) for bucket in range(NUM_BUCKETS)
+        ]
+
+
+class ShardSet:
+    """Engines and session makers of the tweet shards, keyed by shard name.
+
+    Shards are identified by name rather than URL so that moving a shard to
+    another host does not change the ring.
+    """
+
+    def __init__(self, urls: Dict[str, str], **engine_options):
+        self.engines: Dict[str, AsyncEngine] = {
+            name: create_async_engine(url, **engine_options)
+            for name, url in urls.items()
+        }
+        for engine in self.engines.values():
+            track_statement_cache(engine.sync_engine)
+            trace_statements(engine.sync_engine)
+            apply_statement_timeouts(engine.sync_engine)
+        self.session_makers: Dict[str, async_sessionmaker[AsyncSession]] = {
+            name: async_sessionmaker(
+                engine, class_=AsyncSession, expire_on_commit=False
+            )
+            for name, engine in self.engines.items()
+        }
+        self.ring = HashRing(sorted(urls))
+        self._owners = self.ring.bucket_owners()
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.engines)
+
+    def shard_for_bucket(self, bucket: int) -> str:
+        return self._owners[bucket]
+
+    def shard_for_user(self, user_id: UUID) -> str:
+        return self._owners[bucket_for_user(user_id)]
+
+    def shard_for_tweet(self, tweet_id: UUID) -> str:
+        return self._owners[bucket_for_tweet(tweet_id)]
+
+    async def dispose(self) -> None:
+        for engine in self.engines.values():
+            await engine.dispose()
+
+
+_shard_set: Optional[ShardSet] = None
+
+
+def get_shard_set() -> Optional[ShardSet]:
+    """The configured tweet shards, or None when tweets are not sharded."""
+    global _shard_set
+    settings = get_settings()
+    if _shard_set is None and settings.tweet_shard_urls:
+        _shard_set = ShardSet(
+            settings.tweet_shard_urls,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            **statement_cache_options(settings),
+        )
+    return _shard_set
+
+
+async def dispose_shard_set() -> None:
+    global _shard_set
+    if _shard_set is not None:
+        await _shard_set.dispose()
+    _shard_set = None
@@ -0,0 +1,70 @@
+"""Hit rate of SQLAlchemy's compiled-statement cache.
+
+Every statement an engine executes is looked up in its compiled cache by the
+statement's cache key. A miss means the SQL was compiled again; on the hot
+path that should only happen for the first request of each query shape. The
+listener below counts the outcome of every execution, and keeps the SQL of
+the statements that missed most, so a query that recompiles on every call
+stands out.
+"""
+
+from collections import Counter
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+
+class StatementCacheStats:
+    def __init__(self, max_statements: int = 200):
+        self.max_statements = max_statements
+        self.outcomes: Counter = Counter()
+        self.misses_by_statement: Counter = Counter()
+
+    def record(self, context: Any) -> None:
+        outcome = getattr(context, "cache_hit", None)
+        if outcome is None:
+            return
+        self.outcomes[outcome.name.lower()] += 1
+        if outcome is CACHE_MISS:
+            statement = context.statement
+            # Bounded: a statement missing each time has new SQL each time.
+            if (
+                statement in self.misses_by_statement
+                or len(self.misses_by_statement) < self.max_statements
+            ):
+                self.misses_by_statement[statement] += 1
+
+    @property
+    def hit_rate(self) -> float:
+        cached = self.outcomes[CACHE_HIT.name.lower()]
+        missed = self.outcomes[CACHE_MISS.name.lower()]
+        return cached / (cached + missed) if cached + missed else 0.0
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        return {
+            "hit_rate": self.hit_rate,
+            "executions": dict(self.outcomes),
+            "top_misses": [
+                {"statement": statement, "misses": misses}
+                for statement, misses in self.misses_by_statement.most_common(top)
+            ],
+        }
+
+    def reset(self) -> None:
+        self.outcomes.clear()
+        self.misses_by_statement.clear()
+
+
+statement_cache_stats = StatementCacheStats()
+
+
+def track_statement_cache(
+    engine: Engine, stats: StatementCacheStats = statement_cache_stats
+) -> None:
+    """Count cache outcomes of ``engine`` (the ``sync_engine`` of an async one)."""
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        stats.record(context)
@@ -0,0 +1,88 @@
+"""Request deadlines, carried through a context variable.
+
+The API gives each request a deadline (``api/deadlines.py``) and cancels
+the request's task once it passes, which also cancels the query in flight:
+asyncpg sends Postgres a cancel request for it. The deadline is current
+for everything the request's task runs, down to connection checkout, so
+repositories need no parameter for it.
+
+The database backs this up on its own: a connection checked out under a
+deadline has ``statement_timeout`` set to the time the request has left,
+rounded up to the next 100 ms, so no statement outlives its request even
+when the cancel request is lost or the API process dies. The setting is
+kept per connection and only sent when it changes.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.util import await_only
+
+_STATEMENT_TIMEOUT = "statement_timeout_ms"
+# Checkouts whose remaining time rounds to the same step reuse the setting.
+_STEP_MS = 100
+
+
+class Deadline(NamedTuple):
+    seconds: float
+    # On the time.monotonic() clock.
+    expires_at: float
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[Deadline]:
+    """Make a deadline ``seconds`` from now current until the block exits."""
+    current = Deadline(seconds, time.monotonic() + seconds)
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def statement_timeout_ms(current: Optional[Deadline]) -> Optional[int]:
+    """The statement_timeout for work under ``current``; None for the default."""
+    if current is None:
+        return None
+    steps = math.ceil(current.remaining() * 1000 / _STEP_MS)
+    # 0 would turn the timeout off: past the deadline, fail at once instead.
+    return max(steps * _STEP_MS, 1)
+
+
+def apply_statement_timeouts(engine: Engine) -> None:
+    """Keep the ``statement_timeout`` of ``engine``'s (asyncpg) connections at
+    the time left to the request checking them out."""
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        connection_record.info[_STATEMENT_TIMEOUT] = None
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        wanted = statement_timeout_ms(_current.get())
+        if connection_record.info.get(_STATEMENT_TIMEOUT) == wanted:
+            return
+        # On the driver's connection: outside SQLAlchemy's transaction, so a
+        # rollback does not undo it.
+        statement = (
+            "RESET statement_timeout"
+            if wanted is None
+            else f"SET statement_timeout = {wanted}"
+        )
+        await_only(dbapi_connection.driver_connection.execute(statement))
+        connection_record.info[_STATEMENT_TIMEOUT] = wanted
@@ -0,0 +1,151 @@
+"""A HyperLogLog sketch: distinct items counted in a few KB.
+
+Each item is hashed to 64 bits; the first ``precision`` bits pick one of
+``2**precision`` registers, which keeps the longest run of leading zeros
+(plus one) seen in the rest. The count is estimated from the registers with
+a standard error of ``1.04 / sqrt(2**precision)``: about 1.2% at the
+default precision of 13. Sketches of the same precision merge exactly, by
+keeping the larger of each pair of registers, so sketches filled in
+different processes add up to the sketch of all their items.
+
+Sketches of up to ``2**precision / 32`` items keep only their non-zero
+registers. Serialized, a sketch is its precision, then either those as
+3-byte (register, value) entries, at most 768 bytes at precision 13, or
+every register in a byte: 8 KB, mostly small values that compress well
+(Postgres does when storing them). Merging, counting and (de)serializing a
+full sketch are all done in C over those bytes.
+"""
+
+import hashlib
+import math
+from typing import Dict, Optional
+
+_SPARSE = 0
+_DENSE = 1
+# Bits of a sparse entry's value: at most 64 - precision + 1.
+_BITS = 6
+
+
+def _hash(item: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(item, digest_size=8).digest(), "little")
+
+
+def _sigma(x: float) -> float:
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = 13):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.num_registers = 1 << precision
+        # Non-zero registers by index until there are too many to be worth
+        # it, then all of them.
+        self._sparse: Optional[Dict[int, int]] = {}
+        self._dense: Optional[bytearray] = None
+
+    @property
+    def _max_sparse(self) -> int:
+        # A dict entry takes some 30 times the memory of a register.
+        return self.num_registers // 32
+
+    def _set(self, index: int, value: int) -> None:
+        if self._dense is not None:
+            if value > self._dense[index]:
+                self._dense[index] = value
+            return
+        if value > self._sparse.get(index, 0):
+            self._sparse[index] = value
+            if len(self._sparse) > self._max_sparse:
+                self._to_dense()
+
+    def _to_dense(self) -> None:
+        self._dense = bytearray(self.num_registers)
+        for index, value in self._sparse.items():
+            self._dense[index] = value
+        self._sparse = None
+
+    def add(self, item: bytes) -> None:
+        hashed = _hash(item)
+        rest_bits = 64 - self.precision
+        rest = hashed & ((1 << rest_bits) - 1)
+        self._set(hashed >> rest_bits, rest_bits - rest.bit_length() + 1)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Add ``other``'s items to this sketch."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precisions")
+        if other._dense is None:
+            for index, value in other._sparse.items():
+                self._set(index, value)
+            return
+        if self._dense is None:
+            self._to_dense()
+        self._dense[:] = bytes(map(max, self._dense, other._dense))
+
+    def count(self) -> int:
+        # Ertl's improved estimator ("New cardinality estimation algorithms
+        # for HyperLogLog sketches", 2017): unbiased from empty to full, with
+        # no switch to linear counting for small counts.
+        m = self.num_registers
+        q = 64 - self.precision
+        histogram = [0] * (q + 2)
+        if self._dense is None:
+            histogram[0] = m - len(self._sparse)
+            for value in self._sparse.values():
+                histogram[value] += 1
+        else:
+            histogram = [self._dense.count(value) for value in range(q + 2)]
+        z = m * _tau(1 - histogram[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + histogram[k])
+        z += m * _sigma(histogram[0] / m)
+        if z == math.inf:
+            return 0
+        return round(m * m / (2 * math.log(2)) / z)
+
+    def to_bytes(self) -> bytes:
+        if self._dense is None:
+            entries = b"".join(
+                (index << _BITS | value).to_bytes(3, "little")
+                for index, value in sorted(self._sparse.items())
+            )
+            return bytes((self.precision, _SPARSE)) + entries
+        return bytes((self.precision, _DENSE)) + self._dense
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        sketch = cls(data[0])
+        body = memoryview(data)[2:]
+        if data[1] == _SPARSE:
+            mask = (1 << _BITS) - 1
+            for i in range(0, len(body), 3):
+                entry = int.from_bytes(body[i : i + 3], "little")
+                sketch._set(entry >> _BITS, entry & mask)
+            return sketch
+        if data[1] != _DENSE or len(body) != sketch.num_registers:
+            raise ValueError("Not a serialized HyperLogLog sketch")
+        sketch._sparse = None
+        sketch._dense = bytearray(body)
+        return sketch
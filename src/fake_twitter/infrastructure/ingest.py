@@ -0,0 +1,189 @@
+"""Group commit of new tweets.
+
+Instead of one transaction (and one WAL flush) per ``POST /tweets/``, the
+tweets submitted within ``max_delay`` of each other, up to
+``max_batch_size`` of them, are written by one multi-row INSERT in one
+transaction. Each request still waits for that commit, so a 201 means the
+tweet is durable.
+
+A batch the database rejects for its data (a constraint or a bad value) is
+split in halves and each retried, down to single tweets, so a bad row only
+fails its own request at the cost of a few writes. Any other failure, like
+a lost connection, fails the whole batch at once rather than retrying it row
+by row against a database that is not answering.
+"""
+
+import asyncio
+import contextvars
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.domain.repositories.tweet_ingestor import TweetIngestor
+from src.fake_twitter.infrastructure.database.connection import get_session_maker
+from src.fake_twitter.infrastructure.database.models import TweetModel
+
+WriteBatch = Callable[[List[Tweet]], Awaitable[List[Tweet]]]
+
+# Errors some rows of a batch are at fault for; the others can still go in.
+_ROW_ERRORS = (DataError, IntegrityError)
+
+
+def insert_tweets(
+    session_maker: Callable[[], async_sessionmaker[AsyncSession]],
+) -> WriteBatch:
+    """Writes a batch with one INSERT ... RETURNING in its own transaction."""
+
+    async def write(tweets: List[Tweet]) -> List[Tweet]:
+        async with session_maker().begin() as session:
+            result = await session.scalars(
+                insert(TweetModel).returning(TweetModel, sort_by_parameter_order=True),
+                [tweet.model_dump() for tweet in tweets],
+            )
+            return [Tweet.model_validate(tweet_model) for tweet_model in result]
+
+    return write
+
+
+class IngestMetrics:
+    def __init__(self):
+        self.batches = 0
+        self.tweets = 0
+        self.failed = 0
+        self.max_batch_size = 0
+        self.wait_seconds = 0.0
+        self.commit_seconds = 0.0
+
+    def record(self, size: int, waited: float, committed: float) -> None:
+        self.batches += 1
+        self.tweets += size
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.wait_seconds += waited
+        self.commit_seconds += committed
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "tweets": self.tweets,
+            "failed": self.failed,
+            "mean_batch_size": self.tweets / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            # Time from submit until the batch's commit started.
+            "mean_wait_ms": 1000 * self.wait_seconds / self.tweets
+            if self.tweets
+            else 0.0,
+            "mean_commit_ms": 1000 * self.commit_seconds / self.batches
+            if self.batches
+            else 0.0,
+        }
+
+
+_Pending = Tuple[Tweet, "asyncio.Future[Tweet]", float]
+
+
+class GroupCommitIngestor(TweetIngestor):
+    def __init__(
+        self,
+        write: WriteBatch,
+        max_batch_size: int = 256,
+        max_delay: float = 0.005,
+    ):
+        self.write = write
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.metrics = IngestMetrics()
+        self._pending: List[_Pending] = []
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        self._committer: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def queued(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, tweet: Tweet) -> Tweet:
+        if self._committer is None or self._committer.done():
+            # In a context of its own: a copy of this request's would carry
+            # its statement timeout, trace and request id into every batch.
+            self._committer = asyncio.create_task(
+                self._run(), context=contextvars.Context()
+            )
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((tweet, future, time.perf_counter()))
+        self._arrived.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def _run(self) -> None:
+        while not (self._closing and not self._pending):
+            await self._arrived.wait()
+            if len(self._pending) < self.max_batch_size and not self._closing:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            await self._commit_next()
+
+    async def _commit_next(self) -> None:
+        batch = self._pending[: self.max_batch_size]
+        del self._pending[: self.max_batch_size]
+        if len(self._pending) < self.max_batch_size:
+            self._full.clear()
+        if not self._pending:
+            self._arrived.clear()
+        if batch:
+            await self._commit(batch)
+
+    async def _commit(self, batch: List[_Pending]) -> None:
+        started = time.perf_counter()
+        try:
+            written = await self.write([tweet for tweet, _, _ in batch])
+        except Exception as error:
+            if len(batch) > 1 and isinstance(error, _ROW_ERRORS):
+                middle = len(batch) // 2
+                await self._commit(batch[:middle])
+                await self._commit(batch[middle:])
+                return
+            self.metrics.failed += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        waited = sum(started - submitted for _, _, submitted in batch)
+        self.metrics.record(len(batch), waited, time.perf_counter() - started)
+        for (_, future, _), tweet in zip(batch, written):
+            # The request may have gone away; its tweet is stored anyway.
+            if not future.done():
+                future.set_result(tweet)
+
+    async def close(self) -> None:
+        """Commit what is queued and stop the committer."""
+        self._closing = True
+        self._arrived.set()
+        if self._committer is not None:
+            await self._committer
+            self._committer = None
+        while self._pending:
+            await self._commit_next()
+
+
+@lru_cache
+def get_tweet_ingestor() -> Optional[GroupCommitIngestor]:
+    """The process-wide ingestor, or None when group commit is off."""
+    settings = get_settings()
+    if not settings.tweet_ingest_group_commit:
+        return None
+    return GroupCommitIngestor(
+        insert_tweets(get_session_maker),
+        settings.tweet_ingest_max_batch_size,
+        settings.tweet_ingest_max_delay_ms / 1000,
+    )
@@ -0,0 +1,307 @@
+"""Logging that never blocks a request on I/O.
+
+Every log record, the app's own, gunicorn's and uvicorn's access and error
+logs and SQLAlchemy's statements (``DB_ECHO``), goes to one ``LogQueueHandler``
+on the root logger. Handling a record on the event loop only tags it,
+filters it and puts it on a bounded queue; a background thread formats it
+as a JSON line and writes it to stdout. When the writer falls behind, new
+records are dropped and counted rather than waited for.
+
+Records are tagged with the request id of the request being served (set by
+``api/logs.py``) and the trace id when it is traced. Before being queued,
+records at the levels in ``LOG_SAMPLE_RATES`` are sampled, by request so a
+sampled request keeps all its lines, and a warning or error repeated more
+than ``LOG_REPEAT_BURST`` times within ``LOG_REPEAT_INTERVAL_SECONDS`` is
+dropped for the rest of the interval. The first record of it let through
+after the interval carries the count dropped; if it never recurs, the count
+is never reported.
+
+gunicorn applies ``logging_config`` itself (``logconfig_dict`` in
+``gunicorn.conf.py``); under other servers ``configure_logging`` does when
+the app is created.
+"""
+
+import copy
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import weakref
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from src.fake_twitter.config import Settings
+from src.fake_twitter.infrastructure.tracing import current_span
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+@contextmanager
+def request_id(value: str) -> Iterator[str]:
+    """Tag the records logged until the block exits with ``value``."""
+    token = _request_id.set(value)
+    try:
+        yield value
+    finally:
+        _request_id.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Tags records with the current request and trace ids."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        current = current_span()
+        record.trace_id = None if current is None else current.trace.trace_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps the given share of the records at each level, e.g. {"INFO": 0.1}.
+
+    Records of a request are kept or dropped together. Levels without a
+    rate are all kept.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {
+            logging.getLevelName(level.upper()): r for level, r in rates.items()
+        }
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate >= 1:
+            return True
+        current = getattr(record, "request_id", None)
+        if current is None:
+            return random.random() < rate
+        return zlib.crc32(current.encode()) < rate * 2**32
+
+
+class RepeatFilter(logging.Filter):
+    """Lets through ``burst`` records of a message per ``interval`` seconds.
+
+    Messages are told apart by logger, level and format string, so repeats
+    of a message with different arguments count together. Records past the
+    burst are dropped; the next record of the message after the interval
+    carries how many were as ``suppressed``. Nothing reports them on its
+    own, so the count of a message that stops recurring is lost.
+    """
+
+    # Messages tracked at once, beyond which the oldest windows are forgotten.
+    _MAX_MESSAGES = 1024
+
+    def __init__(self, burst: int, interval: float, level: int = logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.level = level
+        # (logger, level, msg) -> [window start, records, records suppressed]
+        self._windows: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = 0 if window is None else window[2]
+                self._windows.pop(key, None)
+                if len(self._windows) >= self._MAX_MESSAGES:
+                    del self._windows[next(iter(self._windows))]
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            window[1] += 1
+            if window[1] <= self.burst:
+                return True
+            window[2] += 1
+            return False
+
+
+# Attributes every LogRecord has; any other attribute came from ``extra``.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "request_id",
+    "trace_id",
+    # uvicorn's message with terminal colors.
+    "color_message",
+}
+# Arguments of uvicorn's access log message.
+_ACCESS_FIELDS = ("client", "method", "path", "http_version", "status")
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None) is not None:
+            line["request_id"] = record.request_id
+        if getattr(record, "trace_id", None) is not None:
+            line["trace_id"] = record.trace_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                line[key] = value
+        if record.exc_text:
+            line["exception"] = record.exc_text
+        if record.stack_info:
+            line["stack"] = record.stack_info
+        return json.dumps(line, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formats records as plain lines, for reading logs in a terminal."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        if getattr(record, "request_id", None) is not None:
+            line += f" request_id={record.request_id}"
+        return line
+
+
+_handlers: "weakref.WeakSet[LogQueueHandler]" = weakref.WeakSet()
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Queues records for a background thread that writes them to stdout.
+
+    The queue holds ``queue_size`` records; past that, records are dropped
+    and the next one written carries the count as ``dropped``.
+    """
+
+    def __init__(self, queue_size: int = 10000, json_lines: bool = True):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.writer = logging.StreamHandler(sys.stdout)
+        self.writer.setFormatter(JsonFormatter() if json_lines else TextFormatter())
+        self.dropped = 0
+        self._start()
+        _handlers.add(self)
+
+    def _start(self) -> None:
+        self._listener = logging.handlers.QueueListener(self.queue, self.writer)
+        self._listener.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only what must be done before the arguments can change: the rest of
+        # the formatting happens on the writer's thread.
+        record = copy.copy(record)
+        if record.name == "uvicorn.access" and len(record.args or ()) == 5:
+            vars(record).update(zip(_ACCESS_FIELDS, record.args))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.writer.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        dropped = self.dropped
+        if dropped:
+            record.dropped = dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped -= dropped
+
+    def close(self) -> None:
+        # Writes out the records still queued.
+        self._listener.stop()
+        self.writer.close()
+        _handlers.discard(self)
+        super().close()
+
+    def after_fork(self) -> None:
+        # The writer thread does not survive fork() and the queue's lock may
+        # have been held by it: a forked child starts both afresh.
+        self.queue = queue.Queue(self.queue_size)
+        self._start()
+
+
+def _after_fork_in_child() -> None:
+    for handler in list(_handlers):
+        handler.after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def logging_config(settings: Settings) -> Dict[str, Any]:
+    """The ``logging.config.dictConfig`` configuration of the app's logging."""
+    handlers = ["queue"]
+    # Servers' loggers with handlers of their own, replaced by the queue's.
+    server_logger = {"handlers": handlers, "propagate": False}
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "filters": {
+            "context": {"()": ContextFilter},
+            "sampling": {"()": SamplingFilter, "rates": settings.log_sample_rates},
+            "repeats": {
+                "()": RepeatFilter,
+                "burst": settings.log_repeat_burst,
+                "interval": settings.log_repeat_interval_seconds,
+            },
+        },
+        "handlers": {
+            "queue": {
+                "()": LogQueueHandler,
+                "queue_size": settings.log_queue_size,
+                "json_lines": settings.log_json,
+                "filters": ["context", "sampling", "repeats"],
+            }
+        },
+        "root": {"level": settings.log_level.upper(), "handlers": handlers},
+        "loggers": {
+            "gunicorn.error": server_logger,
+            "gunicorn.access": {**server_logger, "level": "INFO"},
+            "uvicorn": {"handlers": [], "propagate": True},
+            "uvicorn.error": server_logger,
+            "uvicorn.access": {**server_logger, "level": "INFO"},
+            # Statements are logged at INFO, results at DEBUG.
+            "sqlalchemy.engine": {"level": "INFO" if settings.db_echo else "WARNING"},
+        },
+    }
+
+
+def configure_logging(settings: Settings) -> None:
+    """Apply ``logging_config`` unless the root logger already has handlers.
+
+    Those are gunicorn's, from ``logging_config`` too, or a test runner's,
+    which are left alone.
+    """
+    if logging.getLogger().handlers:
+        return
+    logging.config.dictConfig(logging_config(settings))
@@ -0,0 +1,117 @@
+"""Content-addressed storage of uploaded media on the local file system.
+
+A file is stored once, under its SHA-256, at ``<dir>/ab/cd/<digest>.<ext>``
+(the first two bytes of the digest fan the files out over directories).
+Uploads are written to ``<dir>/incoming`` while they are received and
+hashed, then synced and renamed into place, so a stored file is always
+complete and never changes; a second upload of the same bytes is dropped.
+
+The type of a file is taken from its first bytes, not from what the client
+claims, and must be one of ``MEDIA_TYPES``.
+"""
+
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.domain.entities.media import Media
+from src.fake_twitter.domain.repositories.media_store import MediaStore
+
+# Bytes needed to tell the accepted types apart.
+SNIFF_BYTES = 12
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """The extension of the accepted type ``head`` starts, if any."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    return None
+
+
+class MediaWriter:
+    """An upload being received; ``commit`` stores it, ``abort`` drops it."""
+
+    def __init__(self, store: "LocalMediaStore"):
+        self._store = store
+        fd, self._temporary = tempfile.mkstemp(dir=store.incoming)
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.head = b""
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        if len(self.head) < SNIFF_BYTES:
+            self.head += data[: SNIFF_BYTES - len(self.head)]
+        self._hash.update(data)
+        self._file.write(data)
+        self.size += len(data)
+
+    def commit(self, extension: str) -> Media:
+        media = Media(id=f"{self._hash.hexdigest()}.{extension}", size=self.size)
+        path = self._store.path(media.id)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        if os.path.exists(path):
+            os.unlink(self._temporary)
+            return media
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.chmod(self._temporary, 0o644)
+        os.replace(self._temporary, path)
+        return media
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.unlink(self._temporary)
+        except FileNotFoundError:
+            pass
+
+
+class LocalMediaStore(MediaStore):
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.incoming = os.path.join(directory, "incoming")
+        os.makedirs(self.incoming, exist_ok=True)
+
+    def path(self, media_id: str) -> str:
+        return os.path.join(self.directory, media_id[:2], media_id[2:4], media_id)
+
+    def stat(self, media_id: str) -> Optional[os.stat_result]:
+        try:
+            return os.stat(self.path(media_id))
+        except FileNotFoundError:
+            return None
+
+    def writer(self) -> MediaWriter:
+        return MediaWriter(self)
+
+    async def get(self, media_id: str) -> Optional[Media]:
+        stat = self.stat(media_id)
+        if stat is None:
+            return None
+        return Media(id=media_id, size=stat.st_size)
+
+    async def missing(self, media_ids: Sequence[str]) -> List[str]:
+        return [media_id for media_id in media_ids if self.stat(media_id) is None]
+
+
+@lru_cache
+def get_media_store() -> Optional[LocalMediaStore]:
+    """The process-wide media store, or None when no media directory is set."""
+    settings = get_settings()
+    if not settings.media_dir:
+        return None
+    return LocalMediaStore(settings.media_dir, settings.media_max_bytes)
@@ -0,0 +1,132 @@
+"""In-memory top tweets, kept per process.
+
+Each window holds a bounded set of candidates: the best ones of the last
+full recompute (``TweetUseCases.refresh_top_tweets``), plus every tweet
+that gained engagement since, as reported by the use cases. Serving the
+window sorts the candidates by their current hot score, at most once per
+``rerank_seconds``, so a request only slices a ready list.
+
+Events only reach the process that handled them; the periodic recompute
+brings every process back to the database's view and corrects the drift
+of decaying scores.
+"""
+
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+from uuid import UUID
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.domain.repositories.tweet_ranking import TweetRanking
+
+WINDOWS = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+}
+
+
+class TopTweets:
+    def __init__(self, span: timedelta, capacity: int, rerank_seconds: float = 0.1):
+        self.span = span
+        self.capacity = capacity
+        self.rerank_seconds = rerank_seconds
+        self.candidates: Dict[UUID, Tweet] = {}
+        self._ranked: List[Tweet] = []
+        self._ranked_at = float("-inf")
+        self._changed = False
+
+    def replace(self, candidates: Sequence[Tweet]) -> None:
+        self.candidates = {tweet.id: tweet for tweet in candidates}
+        self._changed = True
+        self._ranked_at = float("-inf")
+
+    def record(self, tweet: Tweet, now: datetime) -> None:
+        if tweet.engagement <= 0 or now - tweet.created_at > self.span:
+            self.discard(tweet.id)
+            return
+        self.candidates[tweet.id] = tweet
+        self._changed = True
+        # Trimmed in bulk once well over capacity rather than on every event.
+        if len(self.candidates) > 2 * self.capacity:
+            kept = sorted(
+                self.candidates.values(),
+                key=lambda candidate: candidate.hot_score(now),
+                reverse=True,
+            )[: self.capacity]
+            self.candidates = {candidate.id: candidate for candidate in kept}
+
+    def discard(self, tweet_id: UUID) -> None:
+        if self.candidates.pop(tweet_id, None) is not None:
+            self._changed = True
+
+    def discard_user(self, user_id: UUID) -> None:
+        kept = {i: t for i, t in self.candidates.items() if t.user_id != user_id}
+        if len(kept) < len(self.candidates):
+            self.candidates = kept
+            self._changed = True
+
+    def top(self, limit: int, now: datetime) -> List[Tweet]:
+        # Scores decay with time, so even an unchanged window is re-sorted
+        # now and then.
+        elapsed = time.monotonic() - self._ranked_at
+        if elapsed >= self.rerank_seconds and (self._changed or elapsed >= 1):
+            oldest = now - self.span
+            self._ranked = sorted(
+                (t for t in self.candidates.values() if t.created_at >= oldest),
+                key=lambda tweet: tweet.hot_score(now),
+                reverse=True,
+            )
+            self._ranked_at = time.monotonic()
+            self._changed = False
+        return self._ranked[:limit]
+
+
+class InMemoryTweetRanking(TweetRanking):
+    def __init__(
+        self,
+        windows: Optional[Dict[str, timedelta]] = None,
+        capacity: int = 500,
+        rerank_seconds: float = 0.1,
+    ):
+        self._capacity = capacity
+        self._windows = dict(windows or WINDOWS)
+        self._top = {
+            name: TopTweets(span, capacity, rerank_seconds)
+            for name, span in self._windows.items()
+        }
+
+    @property
+    def windows(self) -> Dict[str, timedelta]:
+        return self._windows
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def record(self, tweet: Tweet) -> None:
+        now = datetime.now()
+        for top in self._top.values():
+            top.record(tweet, now)
+
+    def discard(self, tweet_id: UUID) -> None:
+        for top in self._top.values():
+            top.discard(tweet_id)
+
+    def discard_user(self, user_id: UUID) -> None:
+        for top in self._top.values():
+            top.discard_user(user_id)
+
+    def replace(self, window: str, candidates: Sequence[Tweet]) -> None:
+        self._top[window].replace(candidates)
+
+    def top(self, window: str, limit: int) -> List[Tweet]:
+        return self._top[window].top(limit, datetime.now())
+
+
+@lru_cache
+def get_tweet_ranking() -> InMemoryTweetRanking:
+    settings = get_settings()
+    return InMemoryTweetRanking(capacity=settings.top_tweets_candidates)
@@ -0,0 +1,138 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.domain.repositories.like_repository import LikeRepository
+from src.fake_twitter.infrastructure.bloom import BloomFilter
+
+
+class LikeFilterCache:
+    """Per-user Bloom filters of liked tweet ids, least recently used evicted.
+
+    Filters live in one process, so a like recorded by another worker is
+    missed until the filter expires: ``ttl`` bounds how long a "not liked"
+    answer can be stale. Unlikes need no bookkeeping, since a stale bit only
+    costs a database check.
+    """
+
+    # Marks users with more likes than a filter is sized for; their lookups
+    # go straight to the database until the entry expires.
+    TOO_MANY = object()
+
+    def __init__(
+        self,
+        max_users: int = 10000,
+        ttl: float = 10.0,
+        max_likes: int = 10000,
+        error_rate: float = 0.01,
+    ):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.max_likes = max_likes
+        self.error_rate = error_rate
+        self._entries: "OrderedDict[UUID, Tuple[float, object]]" = OrderedDict()
+
+    def get(self, user_id: UUID):
+        """The user's filter, TOO_MANY, or None when not cached."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return value
+
+    def put(self, user_id: UUID, tweet_ids: Optional[Sequence[UUID]]) -> None:
+        """Cache the user's likes; None records that there are too many."""
+        if tweet_ids is None:
+            value = self.TOO_MANY
+        else:
+            # Room to grow: likes added while cached go into the same filter.
+            value = BloomFilter.from_items(
+                (tweet_id.bytes for tweet_id in tweet_ids),
+                capacity=max(len(tweet_ids) * 2, 64),
+                error_rate=self.error_rate,
+            )
+        self._entries[user_id] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def record_like(self, user_id: UUID, tweet_id: UUID) -> None:
+        entry = self._entries.get(user_id)
+        if entry is not None and isinstance(entry[1], BloomFilter):
+            entry[1].add(tweet_id.bytes)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache
+def get_like_filter_cache() -> LikeFilterCache:
+    settings = get_settings()
+    return LikeFilterCache(
+        max_users=settings.like_filter_max_users,
+        ttl=settings.like_filter_ttl_seconds,
+        max_likes=settings.like_filter_max_likes,
+        error_rate=settings.like_filter_error_rate,
+    )
+
+
+class BloomFilteredLikeRepository(LikeRepository):
+    """Answers "has liked" lookups from a per-user Bloom filter.
+
+    Tweets the filter rules out are not liked; only the ones it might contain
+    are checked against the database. A lookup therefore costs one query at
+    most: loading the user's likes when the filter is cold (which answers
+    the lookup too), or confirming the candidates otherwise. Users with more
+    likes than a filter holds are looked up in the database directly.
+    """
+
+    def __init__(self, likes: LikeRepository, cache: LikeFilterCache):
+        self.likes = likes
+        self.cache = cache
+
+    async def add(self, tweet_id: UUID, user_id: UUID) -> bool:
+        added = await self.likes.add(tweet_id, user_id)
+        # Also after a rollback this is only a false positive, which the
+        # database check corrects.
+        self.cache.record_like(user_id, tweet_id)
+        return added
+
+    async def remove(self, tweet_id: UUID, user_id: UUID) -> Optional[datetime]:
+        return await self.likes.remove(tweet_id, user_id)
+
+    async def get_liked_tweet_ids(
+        self, user_id: UUID, tweet_ids: Sequence[UUID]
+    ) -> Set[UUID]:
+        if not tweet_ids:
+            return set()
+
+        bloom = self.cache.get(user_id)
+        if bloom is None:
+            liked = await self.likes.get_all_liked_tweet_ids(
+                user_id, self.cache.max_likes + 1
+            )
+            if len(liked) <= self.cache.max_likes:
+                self.cache.put(user_id, liked)
+                liked_set = set(liked)
+                return {tweet_id for tweet_id in tweet_ids if tweet_id in liked_set}
+            self.cache.put(user_id, None)
+            bloom = LikeFilterCache.TOO_MANY
+
+        if bloom is LikeFilterCache.TOO_MANY:
+            return await self.likes.get_liked_tweet_ids(user_id, tweet_ids)
+
+        candidates = [tweet_id for tweet_id in tweet_ids if tweet_id.bytes in bloom]
+        if not candidates:
+            return set()
+        return await self.likes.get_liked_tweet_ids(user_id, candidates)
+
+    async def get_all_liked_tweet_ids(self, user_id: UUID, limit: int) -> List[UUID]:
+        return await self.likes.get_all_liked_tweet_ids(user_id, limit)
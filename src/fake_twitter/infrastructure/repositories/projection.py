@@ -0,0 +1,14 @@
+from typing import List, Sequence, Type
+
+from sqlalchemy import Column
+
+from src.fake_twitter.infrastructure.database.connection import Base
+
+
+def columns(model: Type[Base], fields: Sequence[str]) -> List[Column]:
+    """The table columns named by ``fields``, in that order."""
+    table = model.__table__
+    unknown = [field for field in fields if field not in table.c]
+    if unknown:
+        raise ValueError(f"Unknown {table.name} columns: {', '.join(unknown)}")
+    return [table.c[field] for field in fields]
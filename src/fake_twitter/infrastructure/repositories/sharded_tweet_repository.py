@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import itertools
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.domain.repositories.tweet_repository import TweetRepository
+from src.fake_twitter.infrastructure.database.sharding import (
+    ShardSet,
+    bucket_for_user,
+    make_tweet_id,
+)
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_tweet_repository import (
+    SQLAlchemyTweetRepository,
+)
+
+
+def _newest_first(tweet: Tweet):
+    return (tweet.created_at, tweet.id)
+
+
+def _newest_first_row(row: Dict[str, Any]):
+    return (row["created_at"], row["id"])
+
+
+class ShardedTweetRepository(TweetRepository):
+    """Tweets spread over several databases by author.
+
+    Every call runs in its own transaction on the shard it touches, so writes
+    are committed per call rather than with the request's session.
+    """
+
+    def __init__(self, shards: ShardSet):
+        self.shards = shards
+
+    @asynccontextmanager
+    async def _on_shard(self, shard: str) -> AsyncIterator[SQLAlchemyTweetRepository]:
+        async with self.shards.session_makers[shard].begin() as session:
+            yield SQLAlchemyTweetRepository(session)
+
+    async def create(self, tweet: Tweet) -> Tweet:
+        bucket = bucket_for_user(tweet.user_id)
+        tweet = tweet.model_copy(update={"id": make_tweet_id(bucket)})
+        async with self._on_shard(self.shards.shard_for_bucket(bucket)) as repository:
+            return await repository.create(tweet)
+
+    async def get_by_id(self, tweet_id: UUID) -> Optional[Tweet]:
+        async with self._on_shard(self.shards.shard_for_tweet(tweet_id)) as repository:
+            return await repository.get_by_id(tweet_id)
+
+    async def get_by_ids(self, tweet_ids: Sequence[UUID]) -> List[Tweet]:
+        """One query per shard holding any of the ids, run concurrently."""
+        by_shard: Dict[str, List[UUID]] = defaultdict(list)
+        for tweet_id in tweet_ids:
+            by_shard[self.shards.shard_for_tweet(tweet_id)].append(tweet_id)
+
+        async def from_shard(shard: str, ids: List[UUID]) -> List[Tweet]:
+            async with self._on_shard(shard) as repository:
+                return await repository.get_by_ids(ids)
+
+        found = await asyncio.gather(
+            *(from_shard(shard, ids) for shard, ids in by_shard.items())
+        )
+        return list(itertools.chain.from_iterable(found))
+
+    async def get_by_user_id(
+        self,
+        user_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tweet]:
+        async with self._on_shard(self.shards.shard_for_user(user_id)) as repository:
+            return await repository.get_by_user_id(user_id, skip, limit, since, until)
+
+    async def get_conversation(
+        self,
+        conversation_id: UUID,
+        started_at: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        limit: int = 100,
+    ) -> List[Tweet]:
+        """Replies live on their authors' shards: a page of each, merged."""
+
+        async def from_shard(shard: str) -> List[Tweet]:
+            async with self._on_shard(shard) as repository:
+                return await repository.get_conversation(
+                    conversation_id, started_at, after, limit
+                )
+
+        pages = await asyncio.gather(*(from_shard(s) for s in self.shards.names))
+        merged = heapq.merge(*pages, key=_newest_first)
+        return list(itertools.islice(merged, limit))
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tweet]:
+        """Scatter-gather: the first skip + limit rows of every shard, merged.
+
+        Each shard returns its rows newest first, so merging the sorted
+        streams and slicing yields the same page a single database would.
+        """
+
+        async def from_shard(shard: str) -> List[Tweet]:
+            async with self._on_shard(shard) as repository:
+                return await repository.get_all(0, skip + limit, since, until)
+
+        pages = await asyncio.gather(*(from_shard(s) for s in self.shards.names))
+        merged = heapq.merge(*pages, key=_newest_first, reverse=True)
+        return list(itertools.islice(merged, skip, skip + limit))
+
+    async def get_partial_by_id(
+        self, tweet_id: UUID, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        async with self._on_shard(self.shards.shard_for_tweet(tweet_id)) as repository:
+            return await repository.get_partial_by_id(tweet_id, fields)
+
+    async def get_partial_by_user_id(
+        self,
+        user_id: UUID,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        async with self._on_shard(self.shards.shard_for_user(user_id)) as repository:
+            return await repository.get_partial_by_user_id(
+                user_id, fields, skip, limit, since, until
+            )
+
+    async def get_all_partial(
+        self,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Like get_all; the merge keys are fetched even when not asked for."""
+        sort_fields = [field for field in ("created_at", "id") if field not in fields]
+
+        async def from_shard(shard: str) -> List[Dict[str, Any]]:
+            async with self._on_shard(shard) as repository:
+                return await repository.get_all_partial(
+                    [*fields, *sort_fields], 0, skip + limit, since, until
+                )
+
+        pages = await asyncio.gather(*(from_shard(s) for s in self.shards.names))
+        merged = heapq.merge(*pages, key=_newest_first_row, reverse=True)
+        rows = list(itertools.islice(merged, skip, skip + limit))
+        for row in rows:
+            for field in sort_fields:
+                del row[field]
+        return rows
+
+    async def update(self, tweet: Tweet) -> Tweet:
+        async with self._on_shard(self.shards.shard_for_tweet(tweet.id)) as repository:
+            return await repository.update(tweet)
+
+    async def delete(self, tweet_id: UUID) -> bool:
+        async with self._on_shard(self.shards.shard_for_tweet(tweet_id)) as repository:
+            return await repository.delete(tweet_id)
+
+    async def delete_by_user(self, user_id: UUID) -> int:
+        async with self._on_shard(self.shards.shard_for_user(user_id)) as repository:
+            return await repository.delete_by_user(user_id)
+
+    async def increment_counters(
+        self, tweet_id: UUID, likes: int = 0, retweets: int = 0, replies: int = 0
+    ) -> Optional[Tweet]:
+        async with self._on_shard(self.shards.shard_for_tweet(tweet_id)) as repository:
+            return await repository.increment_counters(
+                tweet_id, likes, retweets, replies
+            )
+
+    async def get_top_candidates(
+        self, since: datetime, now: datetime, limit: int
+    ) -> List[Tweet]:
+        """The best ``limit`` of every shard, re-ranked together."""
+
+        async def from_shard(shard: str) -> List[Tweet]:
+            async with self._on_shard(shard) as repository:
+                return await repository.get_top_candidates(since, now, limit)
+
+        pages = await asyncio.gather(*(from_shard(s) for s in self.shards.names))
+        candidates = itertools.chain.from_iterable(pages)
+        return heapq.nlargest(limit, candidates, key=lambda t: t.hot_score(now))
@@ -0,0 +1,144 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.fake_twitter.domain.entities.activity import (
+    GRANULARITIES,
+    ActivityBucket,
+    bucket_start,
+)
+from src.fake_twitter.domain.repositories.activity_repository import (
+    ActivityRepository,
+)
+from src.fake_twitter.infrastructure.activity import ActivityBuffer, BucketKey
+from src.fake_twitter.infrastructure.database.models import UserActivityModel
+
+COUNTERS = ("tweets", "likes_received", "retweets_received")
+
+
+def _upsert(rows: List[Dict]):
+    """Adds to the counters of existing buckets; the first change inserts."""
+    statement = insert(UserActivityModel).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "granularity", "bucket"],
+        set_={
+            counter: getattr(UserActivityModel, counter)
+            + getattr(statement.excluded, counter)
+            for counter in COUNTERS
+        },
+    )
+
+
+# One statement adds to the hour and the day bucket. Concurrent changes to a
+# bucket serialize on its row instead of losing updates.
+_RECORD = _upsert(
+    [
+        {
+            "user_id": bindparam("user_id"),
+            "granularity": granularity,
+            "bucket": bindparam(granularity),
+            **{counter: bindparam(counter) for counter in COUNTERS},
+        }
+        for granularity in GRANULARITIES
+    ]
+)
+# One bucket, run for each of the buckets merged.
+_MERGE = _upsert(
+    [
+        {
+            "user_id": bindparam("user_id"),
+            "granularity": bindparam("granularity"),
+            "bucket": bindparam("bucket"),
+            **{counter: bindparam(counter) for counter in COUNTERS},
+        }
+    ]
+)
+_RANGE = (
+    select(UserActivityModel)
+    .where(
+        UserActivityModel.user_id == bindparam("user_id"),
+        UserActivityModel.granularity == bindparam("granularity"),
+        UserActivityModel.bucket >= bindparam("since"),
+        UserActivityModel.bucket < bindparam("until"),
+    )
+    .order_by(UserActivityModel.bucket)
+)
+
+
+class SQLAlchemyActivityRepository(ActivityRepository):
+    """Rollups in Postgres.
+
+    With a ``buffer``, changes are summed in memory once the session
+    commits and stored by ``merge`` later (see ``infrastructure/activity.py``)
+    rather than locking the buckets' rows for the rest of the transaction.
+    """
+
+    def __init__(self, session: AsyncSession, buffer: Optional[ActivityBuffer] = None):
+        self.session = session
+        self.buffer = buffer
+
+    async def record(
+        self,
+        user_id: UUID,
+        at: datetime,
+        tweets: int = 0,
+        likes_received: int = 0,
+        retweets_received: int = 0,
+    ) -> None:
+        if self.buffer is not None:
+            changes = {
+                "tweets": tweets,
+                "likes_received": likes_received,
+                "retweets_received": retweets_received,
+            }
+            self.buffer.add_on_commit(self.session, user_id, at, changes)
+            return
+        await self.session.execute(
+            _RECORD,
+            {
+                "user_id": user_id,
+                **{g: bucket_start(at, g) for g in GRANULARITIES},
+                "tweets": tweets,
+                "likes_received": likes_received,
+                "retweets_received": retweets_received,
+            },
+        )
+
+    async def merge(self, changes: Dict[BucketKey, Counter]) -> None:
+        """Add changes summed by an ``ActivityBuffer`` to the stored buckets."""
+        if not changes:
+            return
+        # In key order, so processes merging at once lock rows in the same
+        # order and never deadlock.
+        await self.session.execute(
+            _MERGE,
+            [
+                {
+                    "user_id": user_id,
+                    "granularity": granularity,
+                    "bucket": bucket,
+                    **{counter: counts[counter] for counter in COUNTERS},
+                }
+                for (user_id, granularity, bucket), counts in sorted(
+                    changes.items(), key=lambda item: item[0]
+                )
+            ],
+        )
+
+    async def get_range(
+        self, user_id: UUID, granularity: str, since: datetime, until: datetime
+    ) -> List[ActivityBucket]:
+        result = await self.session.execute(
+            _RANGE,
+            {
+                "user_id": user_id,
+                "granularity": granularity,
+                "since": since,
+                "until": until,
+            },
+        )
+        return [ActivityBucket.model_validate(row) for row in result.scalars().all()]
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Set
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import any_, bindparam, delete, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.types import Uuid
+
+from src.fake_twitter.domain.repositories.like_repository import LikeRepository
+from src.fake_twitter.infrastructure.database.models import LikeModel
+
+
+_LIKED_AMONG = select(LikeModel.tweet_id).where(
+    LikeModel.user_id == bindparam("user_id"),
+    LikeModel.tweet_id == any_(bindparam("tweet_ids", type_=ARRAY(Uuid()))),
+)
+
+
+class SQLAlchemyLikeRepository(LikeRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, tweet_id: UUID, user_id: UUID) -> bool:
+        # A concurrent like of the same pair conflicts on the primary key
+        # instead of failing, and only the winner gets a row back.
+        result = await self.session.execute(
+            insert(LikeModel)
+            .values(tweet_id=tweet_id, user_id=user_id, created_at=datetime.now())
+            .on_conflict_do_nothing()
+            .returning(LikeModel.tweet_id)
+        )
+        return result.first() is not None
+
+    async def remove(self, tweet_id: UUID, user_id: UUID) -> Optional[datetime]:
+        result = await self.session.execute(
+            delete(LikeModel)
+            .where(LikeModel.user_id == user_id, LikeModel.tweet_id == tweet_id)
+            .returning(LikeModel.created_at)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_liked_tweet_ids(
+        self, user_id: UUID, tweet_ids: Sequence[UUID]
+    ) -> Set[UUID]:
+        if not tweet_ids:
+            return set()
+        result = await self.session.execute(
+            _LIKED_AMONG, {"user_id": user_id, "tweet_ids": list(tweet_ids)}
+        )
+        return set(result.scalars().all())
+
+    async def get_all_liked_tweet_ids(self, user_id: UUID, limit: int) -> List[UUID]:
+        result = await self.session.execute(
+            select(LikeModel.tweet_id).where(LikeModel.user_id == user_id).limit(limit)
+        )
+        return list(result.scalars().all())
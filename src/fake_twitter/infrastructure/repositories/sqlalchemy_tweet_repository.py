@@ -1,16 +1,159 @@
-from typing import Optional, List
+from datetime import datetime
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional, List, Sequence, Tuple
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import (
+    Select,
+    any_,
+    bindparam,
+    extract,
+    func,
+    literal,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import Uuid
 
-from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.domain.entities.tweet import GRAVITY, RETWEET_WEIGHT, Tweet
 from src.fake_twitter.domain.repositories.tweet_repository import TweetRepository
+from src.fake_twitter.infrastructure.archive import TweetArchive
 from src.fake_twitter.infrastructure.database.models import TweetModel
+from src.fake_twitter.infrastructure.database.on_commit import on_commit
+from src.fake_twitter.infrastructure.repositories.projection import columns
+
+
+# Deleted tweets are tombstones until purged; every read leaves them out.
+LIVE = TweetModel.deleted_at.is_(None)
+
+# Listings are newest first; the id breaks ties so pages are stable.
+NEWEST_FIRST = (TweetModel.created_at.desc(), TweetModel.id.desc())
+
+
+def _naive(moment: datetime) -> datetime:
+    # created_at is stored as local time without a time zone.
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def _within(
+    statement: Select, since: Optional[datetime], until: Optional[datetime]
+) -> Select:
+    """Restrict to live tweets in [since, until) on the partition key so
+    Postgres prunes partitions outside the range."""
+    statement = statement.where(LIVE)
+    if since is not None:
+        statement = statement.where(TweetModel.created_at >= _naive(since))
+    if until is not None:
+        statement = statement.where(TweetModel.created_at < _naive(until))
+    return statement
+
+
+# The hot reads are built once, with bound parameters. A statement object's
+# cache key is memoized, so executing it again goes straight to the compiled
+# SQL in the engine's cache instead of rebuilding and re-keying a select().
+_BY_ID = select(TweetModel).where(TweetModel.id == bindparam("tweet_id"), LIVE)
+# = ANY($1) keeps a single SQL text (and asyncpg prepared statement) for any
+# number of ids, unlike an IN list.
+_BY_IDS = select(TweetModel).where(
+    TweetModel.id == any_(bindparam("tweet_ids", type_=ARRAY(Uuid()))), LIVE
+)
+_DELETE = (
+    update(TweetModel)
+    .where(TweetModel.id == bindparam("tweet_id"), LIVE)
+    .values(deleted_at=bindparam("now"))
+    .returning(TweetModel.id)
+)
+_DELETE_BY_USER = (
+    update(TweetModel)
+    .where(TweetModel.user_id == bindparam("user_id"), LIVE)
+    .values(deleted_at=bindparam("now"))
+)
+
+
+def _listing(by_user: bool, since: bool, until: bool) -> Select:
+    statement = select(TweetModel).where(LIVE)
+    if by_user:
+        statement = statement.where(TweetModel.user_id == bindparam("user_id"))
+    if since:
+        statement = statement.where(TweetModel.created_at >= bindparam("since"))
+    if until:
+        statement = statement.where(TweetModel.created_at < bindparam("until"))
+    return (
+        statement.order_by(*NEWEST_FIRST)
+        .offset(bindparam("skip"))
+        .limit(bindparam("limit"))
+    )
+
+
+def _conversation(started: bool, after: bool) -> Select:
+    statement = select(TweetModel).where(
+        TweetModel.conversation_id == bindparam("conversation_id"), LIVE
+    )
+    if started:
+        # No reply predates the conversation: prunes the older partitions.
+        statement = statement.where(TweetModel.created_at >= bindparam("started_at"))
+    if after:
+        statement = statement.where(
+            tuple_(TweetModel.created_at, TweetModel.id)
+            > tuple_(
+                bindparam("after_created_at", type_=TweetModel.created_at.type),
+                bindparam("after_id", type_=TweetModel.id.type),
+            )
+        )
+    return statement.order_by(TweetModel.created_at, TweetModel.id).limit(
+        bindparam("limit")
+    )
+
+
+_CONVERSATIONS = {
+    (started, after): _conversation(started, after)
+    for started in (False, True)
+    for after in (False, True)
+}
+
+
+# One statement per combination of filters, keyed by (by_user, since, until).
+_LISTINGS = {
+    (by_user, since, until): _listing(by_user, since, until)
+    for by_user in (False, True)
+    for since in (False, True)
+    for until in (False, True)
+}
+
+
+def _listing_params(
+    skip: int, limit: int, since: Optional[datetime], until: Optional[datetime]
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"skip": skip, "limit": limit}
+    if since is not None:
+        params["since"] = _naive(since)
+    if until is not None:
+        params["until"] = _naive(until)
+    return params
+
+
+def _project(tweets: List[Tweet], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    # Checked like the database's projections, though no column is read.
+    columns(TweetModel, fields)
+    return [{field: getattr(tweet, field) for field in fields} for tweet in tweets]
 
 
 class SQLAlchemyTweetRepository(TweetRepository):
-    def __init__(self, session: AsyncSession):
+    """Tweets in Postgres, plus the archived ones when an archive is given.
+
+    Archived tweets are served from the archive alone: lookups by id try it
+    first, and listings read the database only from the archive's cutoff
+    on. They are read-only (``Tweet.archived``), and deleting one leaves a
+    tombstone in the archive.
+    """
+
+    def __init__(self, session: AsyncSession, archive: Optional[TweetArchive] = None):
         self.session = session
+        self.archive = archive
 
     async def create(self, tweet: Tweet) -> Tweet:
         tweet_model = TweetModel(**tweet.model_dump())
@@ -20,35 +163,249 @@ class SQLAlchemyTweetRepository(TweetRepository):
         return Tweet.model_validate(tweet_model)
 
     async def get_by_id(self, tweet_id: UUID) -> Optional[Tweet]:
-        result = await self.session.execute(
-            select(TweetModel).where(TweetModel.id == tweet_id)
-        )
+        if self.archive is not None:
+            archived = self.archive.get(tweet_id)
+            if archived is not None:
+                return archived
+        result = await self.session.execute(_BY_ID, {"tweet_id": tweet_id})
         tweet_model = result.scalar_one_or_none()
         return Tweet.model_validate(tweet_model) if tweet_model else None
 
+    async def get_by_ids(self, tweet_ids: Sequence[UUID]) -> List[Tweet]:
+        tweets: List[Tweet] = []
+        if self.archive is not None:
+            tweets = [t for t in map(self.archive.get, tweet_ids) if t is not None]
+            archived = {tweet.id for tweet in tweets}
+            tweet_ids = [tweet_id for tweet_id in tweet_ids if tweet_id not in archived]
+        if not tweet_ids:
+            return tweets
+        result = await self.session.execute(_BY_IDS, {"tweet_ids": list(tweet_ids)})
+        tweet_models = result.scalars().all()
+        return tweets + [
+            Tweet.model_validate(tweet_model) for tweet_model in tweet_models
+        ]
+
+    async def _continued(
+        self,
+        recent: Callable[
+            [int, int, Optional[datetime], Optional[datetime]], Awaitable[List[Any]]
+        ],
+        count: Callable[[datetime, Optional[datetime]], Awaitable[int]],
+        archived: Callable[[int, int, Optional[datetime], datetime], List[Any]],
+        skip: int,
+        limit: int,
+        since: Optional[datetime],
+        until: Optional[datetime],
+    ) -> List[Any]:
+        """A newest-first page of ``recent`` rows, continued into ``archived``."""
+        cutoff = self.archive.cutoff if self.archive is not None else None
+        if cutoff is None:
+            return await recent(skip, limit, since, until)
+
+        # Everything in the database is newer than everything archived, so
+        # the page continues into the archive where the database runs out.
+        if until is not None and _naive(until) <= cutoff:
+            rows, skipped = [], 0
+        else:
+            recent_since = max(_naive(since), cutoff) if since else cutoff
+            rows = await recent(skip, limit, recent_since, until)
+            if len(rows) == limit:
+                return rows
+            if rows or skip == 0:
+                skipped = skip
+            else:
+                skipped = await count(recent_since, until)
+        return rows + archived(
+            max(skip - skipped, 0),
+            limit - len(rows),
+            _naive(since) if since else None,
+            min(_naive(until), cutoff) if until else cutoff,
+        )
+
     async def get_by_user_id(
-        self, user_id: UUID, skip: int = 0, limit: int = 100
+        self,
+        user_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tweet]:
+        return await self._continued(
+            lambda *page: self._get_by_user_id(user_id, *page),
+            lambda *window: self._count(user_id, *window),
+            lambda *page: self.archive.get_by_user(user_id, *page),
+            skip,
+            limit,
+            since,
+            until,
+        )
+
+    async def _get_by_user_id(
+        self,
+        user_id: UUID,
+        skip: int,
+        limit: int,
+        since: Optional[datetime],
+        until: Optional[datetime],
     ) -> List[Tweet]:
+        params = _listing_params(skip, limit, since, until)
+        params["user_id"] = user_id
         result = await self.session.execute(
-            select(TweetModel)
-            .where(TweetModel.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
+            _LISTINGS[True, since is not None, until is not None], params
         )
         tweet_models = result.scalars().all()
         return [Tweet.model_validate(tweet_model) for tweet_model in tweet_models]
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Tweet]:
+    async def _count(
+        self, user_id: Optional[UUID], since: datetime, until: Optional[datetime]
+    ) -> int:
+        statement = _within(select(func.count()), since, until).select_from(TweetModel)
+        if user_id is not None:
+            statement = statement.where(TweetModel.user_id == user_id)
+        result = await self.session.execute(statement)
+        return result.scalar_one()
+
+    async def get_conversation(
+        self,
+        conversation_id: UUID,
+        started_at: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        limit: int = 100,
+    ) -> List[Tweet]:
+        cutoff = self.archive.cutoff if self.archive is not None else None
+        archived: List[Tweet] = []
+        if not (
+            cutoff is None
+            or (started_at is not None and _naive(started_at) >= cutoff)
+            or (after is not None and _naive(after[0]) >= cutoff)
+        ):
+            # The older replies are archived; the thread continues into the
+            # database where the archive runs out.
+            archived = self.archive.get_conversation(
+                conversation_id,
+                (_naive(after[0]), after[1]) if after is not None else None,
+                limit,
+            )
+            if len(archived) == limit:
+                return archived
+            if archived:
+                after = (archived[-1].created_at, archived[-1].id)
+            limit -= len(archived)
+        # Keyset pagination: every page is one range scan of the
+        # conversation index, however deep into a large thread it is.
+        params: Dict[str, Any] = {"conversation_id": conversation_id, "limit": limit}
+        if started_at is not None:
+            params["started_at"] = _naive(started_at)
+        if after is not None:
+            params["after_created_at"], params["after_id"] = _naive(after[0]), after[1]
         result = await self.session.execute(
-            select(TweetModel).offset(skip).limit(limit)
+            _CONVERSATIONS[started_at is not None, after is not None], params
+        )
+        tweet_models = result.scalars().all()
+        return archived + [
+            Tweet.model_validate(tweet_model) for tweet_model in tweet_models
+        ]
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Tweet]:
+        return await self._continued(
+            self._get_all,
+            lambda *window: self._count(None, *window),
+            lambda *page: self.archive.get_all(*page),
+            skip,
+            limit,
+            since,
+            until,
+        )
+
+    async def _get_all(
+        self,
+        skip: int,
+        limit: int,
+        since: Optional[datetime],
+        until: Optional[datetime],
+    ) -> List[Tweet]:
+        result = await self.session.execute(
+            _LISTINGS[False, since is not None, until is not None],
+            _listing_params(skip, limit, since, until),
         )
         tweet_models = result.scalars().all()
         return [Tweet.model_validate(tweet_model) for tweet_model in tweet_models]
 
-    async def update(self, tweet: Tweet) -> Tweet:
+    async def get_partial_by_id(
+        self, tweet_id: UUID, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        if self.archive is not None:
+            archived = self.archive.get(tweet_id)
+            if archived is not None:
+                return _project([archived], fields)[0]
         result = await self.session.execute(
-            select(TweetModel).where(TweetModel.id == tweet.id)
+            select(*columns(TweetModel, fields)).where(TweetModel.id == tweet_id, LIVE)
+        )
+        row = result.mappings().one_or_none()
+        return dict(row) if row else None
+
+    async def get_partial_by_user_id(
+        self,
+        user_id: UUID,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        return await self._continued(
+            lambda *page: self._get_partial(fields, user_id, *page),
+            lambda *window: self._count(user_id, *window),
+            lambda *page: _project(self.archive.get_by_user(user_id, *page), fields),
+            skip,
+            limit,
+            since,
+            until,
         )
+
+    async def get_all_partial(
+        self,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        return await self._continued(
+            lambda *page: self._get_partial(fields, None, *page),
+            lambda *window: self._count(None, *window),
+            lambda *page: _project(self.archive.get_all(*page), fields),
+            skip,
+            limit,
+            since,
+            until,
+        )
+
+    async def _get_partial(
+        self,
+        fields: Sequence[str],
+        user_id: Optional[UUID],
+        skip: int,
+        limit: int,
+        since: Optional[datetime],
+        until: Optional[datetime],
+    ) -> List[Dict[str, Any]]:
+        statement = _within(select(*columns(TweetModel, fields)), since, until)
+        if user_id is not None:
+            statement = statement.where(TweetModel.user_id == user_id)
+        result = await self.session.execute(
+            statement.order_by(*NEWEST_FIRST).offset(skip).limit(limit)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    async def update(self, tweet: Tweet) -> Tweet:
+        result = await self.session.execute(_BY_ID, {"tweet_id": tweet.id})
         tweet_model = result.scalar_one_or_none()
         if tweet_model:
             for key, value in tweet.model_dump().items():
@@ -59,12 +416,60 @@ class SQLAlchemyTweetRepository(TweetRepository):
         raise ValueError(f"Tweet with id {tweet.id} not found")
 
     async def delete(self, tweet_id: UUID) -> bool:
+        """Leave a tombstone; the purger removes the row later.
+
+        An archived tweet gets its tombstone in the archive instead, written
+        once the transaction commits so a rolled back one leaves none.
+        """
+        if self.archive is not None and self.archive.get(tweet_id) is not None:
+            # One small append, on the event loop: callbacks cannot await.
+            on_commit(self.session, partial(self.archive.delete, tweet_id))
+            return True
         result = await self.session.execute(
-            select(TweetModel).where(TweetModel.id == tweet_id)
+            _DELETE, {"tweet_id": tweet_id, "now": datetime.now()}
+        )
+        return result.first() is not None
+
+    async def delete_by_user(self, user_id: UUID) -> int:
+        """One UPDATE, over ``ix_tweets_user_id_created_at``; the user's
+        archived tweets get a tombstone once the transaction commits."""
+        if self.archive is not None:
+            on_commit(self.session, partial(self.archive.delete_user, user_id))
+        result = await self.session.execute(
+            _DELETE_BY_USER, {"user_id": user_id, "now": datetime.now()}
+        )
+        return result.rowcount
+
+    async def increment_counters(
+        self, tweet_id: UUID, likes: int = 0, retweets: int = 0, replies: int = 0
+    ) -> Optional[Tweet]:
+        # A single UPDATE, so concurrent increments never overwrite each other.
+        result = await self.session.execute(
+            update(TweetModel)
+            .where(TweetModel.id == tweet_id, LIVE)
+            .values(
+                likes_count=func.greatest(TweetModel.likes_count + likes, 0),
+                retweets_count=func.greatest(TweetModel.retweets_count + retweets, 0),
+                replies_count=func.greatest(TweetModel.replies_count + replies, 0),
+            )
+            .returning(TweetModel)
         )
         tweet_model = result.scalar_one_or_none()
-        if tweet_model:
-            await self.session.delete(tweet_model)
-            await self.session.flush()
-            return True
-        return False
+        return Tweet.model_validate(tweet_model) if tweet_model else None
+
+    async def get_top_candidates(
+        self, since: datetime, now: datetime, limit: int
+    ) -> List[Tweet]:
+        # Tweet.hot_score, in SQL.
+        age_hours = func.greatest(
+            extract("epoch", literal(_naive(now)) - TweetModel.created_at) / 3600, 0
+        )
+        engagement = TweetModel.likes_count + RETWEET_WEIGHT * TweetModel.retweets_count
+        result = await self.session.execute(
+            _within(select(TweetModel), since, None)
+            .where(engagement > 0)
+            .order_by((engagement / func.power(age_hours + 2, GRAVITY)).desc())
+            .limit(limit)
+        )
+        tweet_models = result.scalars().all()
+        return [Tweet.model_validate(tweet_model) for tweet_model in tweet_models]
@@ -1,11 +1,95 @@
-from typing import Optional, List
+import sys
+from typing import Any, AsyncIterator, Dict, Optional, List, Sequence
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from datetime import datetime
 
-from src.fake_twitter.domain.entities.user import User
+from sqlalchemy import any_, bindparam, func, select, text, union, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import Select
+from sqlalchemy.types import Uuid
+
+from src.fake_twitter.domain.entities.user import User, UserSuggestion
 from src.fake_twitter.domain.repositories.user_repository import UserRepository
 from src.fake_twitter.infrastructure.database.models import UserModel
+from src.fake_twitter.infrastructure.repositories.projection import columns
+
+
+# Deleted users are tombstones until purged along with their tweets.
+LIVE = UserModel.deleted_at.is_(None)
+
+# Built once; see sqlalchemy_tweet_repository.py.
+_BY_ID = select(UserModel).where(UserModel.id == bindparam("user_id"), LIVE)
+_BY_IDS = select(UserModel).where(
+    UserModel.id == any_(bindparam("user_ids", type_=ARRAY(Uuid()))), LIVE
+)
+_BY_USERNAME = select(UserModel).where(
+    UserModel.username == bindparam("username"), LIVE
+)
+_ALL = select(UserModel).where(LIVE).offset(bindparam("skip")).limit(bindparam("limit"))
+
+SUGGESTION = (
+    UserModel.id,
+    UserModel.username,
+    UserModel.full_name,
+    UserModel.followers_count,
+)
+
+
+def _starting_with(column, bounded: bool) -> Select:
+    """Live users whose lowercase ``column`` is in [low, high), or from low on
+    when not ``bounded``: one range of its text_pattern_ops index
+    (``models.py``), read in index order."""
+    lowered = func.lower(column)
+    statement = select(*SUGGESTION).where(lowered.op("~>=~")(bindparam("low")), LIVE)
+    if bounded:
+        statement = statement.where(lowered.op("~<~")(bindparam("high")))
+    return statement.order_by(text(f"lower(users.{column.name}) USING ~<~")).limit(
+        bindparam("scan")
+    )
+
+
+def _after_prefix(prefix: str) -> Optional[str]:
+    """The smallest string after every one starting with ``prefix``, or None
+    when there is none (it is all U+10FFFF)."""
+    # Text compares by code point here (UTF-8 bytes). Trailing U+10FFFF have
+    # no next code point, so the character before them is incremented;
+    # surrogates are skipped, as no text holds them.
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return None
+    following = ord(stem[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        following = 0xE000
+    return stem[:-1] + chr(following)
+
+
+# Ranked among the first SEARCH_SCAN matches of each name in index order:
+# all of them unless the prefix is short and common.
+SEARCH_SCAN = 500
+
+
+def _by_prefix(bounded: bool) -> Select:
+    matches = union(
+        _starting_with(UserModel.username, bounded),
+        _starting_with(UserModel.full_name, bounded),
+    ).subquery()
+    return (
+        select(matches)
+        .order_by(matches.c.followers_count.desc(), matches.c.username, matches.c.id)
+        .limit(bindparam("limit"))
+    )
+
+
+# Keyed by whether the prefix has an upper bound.
+_BY_PREFIX = {bounded: _by_prefix(bounded) for bounded in (False, True)}
+
+_DELETE = (
+    update(UserModel)
+    .where(UserModel.id == bindparam("user_id"), LIVE)
+    .values(deleted_at=bindparam("now"))
+    .returning(UserModel.id)
+)
 
 
 class SQLAlchemyUserRepository(UserRepository):
@@ -20,28 +104,85 @@ class SQLAlchemyUserRepository(UserRepository):
         return User.model_validate(user_model)
 
     async def get_by_id(self, user_id: UUID) -> Optional[User]:
-        result = await self.session.execute(
-            select(UserModel).where(UserModel.id == user_id)
-        )
+        result = await self.session.execute(_BY_ID, {"user_id": user_id})
         user_model = result.scalar_one_or_none()
         return User.model_validate(user_model) if user_model else None
 
+    async def get_by_ids(self, user_ids: Sequence[UUID]) -> List[User]:
+        if not user_ids:
+            return []
+        result = await self.session.execute(_BY_IDS, {"user_ids": list(user_ids)})
+        user_models = result.scalars().all()
+        return [User.model_validate(user_model) for user_model in user_models]
+
     async def get_by_username(self, username: str) -> Optional[User]:
-        result = await self.session.execute(
-            select(UserModel).where(UserModel.username == username)
-        )
+        result = await self.session.execute(_BY_USERNAME, {"username": username})
         user_model = result.scalar_one_or_none()
         return User.model_validate(user_model) if user_model else None
 
     async def get_all(self, skip: int = 0, limit: int = 100) -> List[User]:
-        result = await self.session.execute(select(UserModel).offset(skip).limit(limit))
+        result = await self.session.execute(_ALL, {"skip": skip, "limit": limit})
         user_models = result.scalars().all()
         return [User.model_validate(user_model) for user_model in user_models]
 
-    async def update(self, user: User) -> User:
+    async def search_by_prefix(self, prefix: str, limit: int) -> List[UserSuggestion]:
+        low = prefix.lower()
+        if not low:
+            return []
+        high = _after_prefix(low)
+        result = await self.session.execute(
+            _BY_PREFIX[high is not None],
+            {"low": low, "high": high, "scan": SEARCH_SCAN, "limit": limit},
+        )
+        return [UserSuggestion(*row) for row in result.all()]
+
+    async def iter_suggestions(
+        self, batch_size: int
+    ) -> AsyncIterator[List[UserSuggestion]]:
+        after = None
+        while True:
+            statement = select(*SUGGESTION).where(LIVE)
+            if after is not None:
+                statement = statement.where(UserModel.id > after)
+            result = await self.session.execute(
+                statement.order_by(UserModel.id).limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return
+            yield [UserSuggestion(*row) for row in rows]
+            after = rows[-1].id
+
+    async def get_partial_by_id(
+        self, user_id: UUID, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
         result = await self.session.execute(
-            select(UserModel).where(UserModel.id == user.id)
+            select(*columns(UserModel, fields)).where(UserModel.id == user_id, LIVE)
         )
+        row = result.mappings().one_or_none()
+        return dict(row) if row else None
+
+    async def get_partial_by_username(
+        self, username: str, fields: Sequence[str]
+    ) -> Optional[Dict[str, Any]]:
+        result = await self.session.execute(
+            select(*columns(UserModel, fields)).where(
+                UserModel.username == username, LIVE
+            )
+        )
+        row = result.mappings().one_or_none()
+        return dict(row) if row else None
+
+    async def get_all_partial(
+        self, fields: Sequence[str], skip: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        result = await self.session.execute(
+            select(*columns(UserModel, fields)).where(LIVE).offset(skip).limit(limit)
+        )
+        return [dict(row) for row in result.mappings()]
+
+    async def update(self, user: User) -> User:
+        result = await self.session.execute(_BY_ID, {"user_id": user.id})
         user_model = result.scalar_one_or_none()
         if user_model:
             for key, value in user.model_dump().items():
@@ -52,12 +193,8 @@ class SQLAlchemyUserRepository(UserRepository):
         raise ValueError(f"User with id {user.id} not found")
 
     async def delete(self, user_id: UUID) -> bool:
+        """Leave a tombstone; the purger removes the user and their tweets."""
         result = await self.session.execute(
-            select(UserModel).where(UserModel.id == user_id)
+            _DELETE, {"user_id": user_id, "now": datetime.now()}
         )
-        user_model = result.scalar_one_or_none()
-        if user_model:
-            await self.session.delete(user_model)
-            await self.session.flush()
-            return True
-        return False
+        return result.first() is not None
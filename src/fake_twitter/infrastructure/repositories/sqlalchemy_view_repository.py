@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Dict, Sequence
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.types import Uuid
+
+from src.fake_twitter.domain.repositories.view_repository import ViewRepository
+from src.fake_twitter.infrastructure.database.models import TweetViewsModel
+from src.fake_twitter.infrastructure.hyperloglog import HyperLogLog
+
+_IDS = bindparam("tweet_ids", type_=ARRAY(Uuid()))
+
+_COUNTS = select(TweetViewsModel.tweet_id, TweetViewsModel.views_count).where(
+    TweetViewsModel.tweet_id == any_(_IDS)
+)
+# Tweets seen for the first time get their row as is; the rest are merged.
+_INSERT_NEW = (
+    insert(TweetViewsModel).on_conflict_do_nothing().returning(TweetViewsModel.tweet_id)
+)
+# Locked in id order, so processes merging overlapping tweets wait for each
+# other instead of deadlocking.
+_LOCK_STORED = (
+    select(TweetViewsModel.tweet_id, TweetViewsModel.registers)
+    .where(TweetViewsModel.tweet_id == any_(_IDS))
+    .order_by(TweetViewsModel.tweet_id)
+    .with_for_update()
+)
+
+
+class SQLAlchemyViewRepository(ViewRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_counts(self, tweet_ids: Sequence[UUID]) -> Dict[UUID, int]:
+        if not tweet_ids:
+            return {}
+        result = await self.session.execute(_COUNTS, {"tweet_ids": list(tweet_ids)})
+        return {row.tweet_id: row.views_count for row in result}
+
+    async def merge(self, sketches: Dict[UUID, bytes]) -> None:
+        if not sketches:
+            return
+        now = datetime.now()
+        tweet_ids = sorted(sketches)
+        inserted = set(
+            (
+                await self.session.scalars(
+                    _INSERT_NEW,
+                    [
+                        {
+                            "tweet_id": tweet_id,
+                            "registers": sketches[tweet_id],
+                            "views_count": HyperLogLog.from_bytes(
+                                sketches[tweet_id]
+                            ).count(),
+                            "updated_at": now,
+                        }
+                        for tweet_id in tweet_ids
+                    ],
+                )
+            ).all()
+        )
+        stored = [tweet_id for tweet_id in tweet_ids if tweet_id not in inserted]
+        if not stored:
+            return
+        changes = []
+        for row in await self.session.execute(_LOCK_STORED, {"tweet_ids": stored}):
+            sketch = HyperLogLog.from_bytes(row.registers)
+            sketch.merge(HyperLogLog.from_bytes(sketches[row.tweet_id]))
+            changes.append(
+                {
+                    "tweet_id": row.tweet_id,
+                    "registers": sketch.to_bytes(),
+                    "views_count": sketch.count(),
+                    "updated_at": now,
+                }
+            )
+        if changes:
+            await self.session.execute(update(TweetViewsModel), changes)
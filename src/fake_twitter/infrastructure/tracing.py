@@ -0,0 +1,374 @@
+"""Request tracing: nested spans exported per trace.
+
+A trace starts at the API (``api/tracing.py``), continuing the caller's W3C
+``traceparent`` when there is one and otherwise sampled at
+``TRACE_SAMPLE_RATE``. Spans nest through a context variable, so a span
+opened anywhere in the request's task becomes a child of the innermost open
+one:
+
+    request  GET /api/v1/tweets/{tweet_id}/like
+      route  like_tweet
+        TweetUseCases.like_tweet
+          SQLAlchemyTweetRepository.get_by_id
+            SELECT ...
+        ...
+      commit
+
+Use cases and repositories are traced from the outside, by wrapping them in
+``Traced`` (see ``api/dependencies.py``), and statements by engine events
+(``trace_statements``). Outside a sampled trace every span is a no-op.
+
+When the request span ends the trace's spans go to a ``SpanSink``: a file of
+OTLP/JSON lines (``TRACE_FILE``), one ``ExportTraceServiceRequest`` per trace,
+or a list in memory for tests. The file is written by a background thread,
+like the logs (``logs.py``), so a request never waits on it.
+"""
+
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.fake_twitter.config import get_settings
+
+# OTLP span kinds.
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_MAX_STATEMENT = 2000
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+    )
+
+    def __init__(
+        self,
+        trace: "Trace",
+        name: str,
+        parent_id: Optional[str],
+        kind: int = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace.trace_id}-{self.span_id}-01"
+
+    def child(
+        self, name: str, kind: int = INTERNAL, attributes: Optional[Dict] = None
+    ) -> "Span":
+        return Span(self.trace, name, self.span_id, kind, attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.trace.spans.append(self)
+        if self.parent_id == self.trace.parent_id:
+            self.trace.sink.export(self.trace.spans)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        otlp: Dict[str, Any] = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items()],
+        }
+        if self.parent_id is not None:
+            otlp["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            otlp["status"] = {"code": 2, "message": self.error}
+        return otlp
+
+
+class Trace:
+    def __init__(self, sink: "SpanSink", trace_id: str, parent_id: Optional[str]):
+        self.sink = sink
+        self.trace_id = trace_id
+        # The caller's span, when continuing a trace from traceparent.
+        self.parent_id = parent_id
+        self.spans: List[Span] = []
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def to_otlp(spans: List[Span], service: str = "fake-twitter") -> Dict[str, Any]:
+    """Spans as an OTLP/JSON ``ExportTraceServiceRequest``."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_attribute("service.name", service)]},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "fake_twitter"},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class SpanSink(ABC):
+    @abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        """Receive the spans of a finished trace."""
+        pass
+
+    def close(self) -> None:
+        """Hand over what is still pending."""
+
+
+class InMemorySpanSink(SpanSink):
+    def __init__(self):
+        self.traces: List[List[Span]] = []
+
+    def export(self, spans: List[Span]) -> None:
+        self.traces.append(list(spans))
+
+    @property
+    def spans(self) -> List[Span]:
+        return [span for trace in self.traces for span in trace]
+
+
+_file_sinks: "weakref.WeakSet[JsonFileSpanSink]" = weakref.WeakSet()
+
+
+class JsonFileSpanSink(SpanSink):
+    """Appends one OTLP/JSON line per trace to ``path``.
+
+    Traces are queued for a background thread that formats and writes
+    them. The queue holds ``queue_size`` traces; past that, traces are
+    dropped and counted in ``dropped``.
+    """
+
+    def __init__(self, path: str, queue_size: int = 1000):
+        self.path = path
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._file = open(path, "a", encoding="utf-8")
+        self._start()
+        _file_sinks.add(self)
+
+    def _start(self) -> None:
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(self.queue_size)
+        self._writer = threading.Thread(
+            target=self._write, name="span-writer", daemon=True
+        )
+        self._writer.start()
+
+    def _write(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                break
+            self._file.write(json.dumps(to_otlp(spans), separators=(",", ":")) + "\n")
+            # One flush per burst of traces rather than per trace.
+            if self._queue.empty():
+                self._file.flush()
+        self._file.flush()
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(list(spans))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Write out the queued traces, then close the file."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self._file.close()
+        _file_sinks.discard(self)
+
+    def after_fork(self) -> None:
+        # As for the log writer: the thread does not survive fork().
+        self._start()
+
+
+def _after_fork_in_child() -> None:
+    for sink in list(_file_sinks):
+        sink.after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+class Tracer:
+    def __init__(self, sink: SpanSink, sample_rate: float = 0.0):
+        self.sink = sink
+        self.sample_rate = sample_rate
+
+    def start_trace(
+        self, name: str, traceparent: Optional[str] = None, **attributes: Any
+    ) -> Optional[Span]:
+        """The root span of a new trace, or None when it is not sampled.
+
+        A valid ``traceparent`` decides sampling by its flag; otherwise the
+        trace is sampled at ``sample_rate``.
+        """
+        match = _TRACEPARENT.match(traceparent or "")
+        if match is not None and int(match[1], 16) and int(match[2], 16):
+            if not int(match[3], 16) & 1:
+                return None
+            trace = Trace(self.sink, match[1], match[2])
+        elif random.random() < self.sample_rate:
+            trace = Trace(self.sink, os.urandom(16).hex(), None)
+        else:
+            return None
+        return Span(trace, name, trace.parent_id, SERVER, attributes)
+
+
+@contextmanager
+def activate(root: Span) -> Iterator[Span]:
+    """Make ``root`` the current span until the block exits, then end it."""
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as error:
+        root.end(error)
+        raise
+    else:
+        root.end()
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """A child of the current span, or nothing outside a sampled trace."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with activate(parent.child(name, attributes=attributes)) as child:
+        yield child
+
+
+class Traced:
+    """Proxy opening a span around every coroutine method of ``target``."""
+
+    def __init__(self, target: Any, name: Optional[str] = None):
+        self._target = target
+        self._name = name or type(target).__name__
+
+    def __getattr__(self, attribute: str) -> Any:
+        value = getattr(self._target, attribute)
+        if not inspect.iscoroutinefunction(value):
+            return value
+        name = f"{self._name}.{attribute}"
+
+        @functools.wraps(value)
+        async def traced(*args, **kwargs):
+            if _current.get() is None:
+                return await value(*args, **kwargs)
+            with span(name):
+                return await value(*args, **kwargs)
+
+        # Cached on the proxy: later lookups skip __getattr__.
+        setattr(self, attribute, traced)
+        return traced
+
+
+def trace_statements(engine: Engine) -> None:
+    """Record a span per statement ``engine`` (an async ``sync_engine``) runs.
+
+    Statements run in a greenlet sharing the request's context, so the
+    current span is their parent; they never become current themselves.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start(conn, cursor, statement, parameters, context, executemany):
+        parent = _current.get()
+        if parent is None or context is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        context._trace_span = parent.child(
+            f"db {operation}",
+            CLIENT,
+            {
+                "db.system": engine.dialect.name,
+                "db.statement": statement[:_MAX_STATEMENT],
+                "db.executemany": executemany,
+            },
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end(conn, cursor, statement, parameters, context, executemany):
+        statement_span = getattr(context, "_trace_span", None)
+        if statement_span is not None:
+            context._trace_span = None
+            statement_span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def failed(exception_context):
+        context = exception_context.execution_context
+        statement_span = getattr(context, "_trace_span", None)
+        if statement_span is not None:
+            context._trace_span = None
+            statement_span.end(exception_context.original_exception)
+
+
+@lru_cache
+def get_tracer() -> Optional[Tracer]:
+    """The process-wide tracer, or None when no trace sink is configured."""
+    settings = get_settings()
+    if not settings.trace_file:
+        return None
+    return Tracer(JsonFileSpanSink(settings.trace_file), settings.trace_sample_rate)
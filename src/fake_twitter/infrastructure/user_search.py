@@ -0,0 +1,195 @@
+"""In-memory prefix search over usernames and full names, kept per process.
+
+Lowercase usernames and full names are keys of a radix trie (a trie with
+single-child chains collapsed into one edge). Every node keeps the
+``capacity`` most followed users below it, so a search walks at most the
+prefix's length and slices a ready list, without visiting the matches.
+
+The trie is built from the database by ``UserUseCases.refresh_user_search``
+at start-up and then periodically, while searches go to the database until
+the first build is done. Users created, changed or deleted in between
+reach the trie of the process that handled them; the rebuild brings every
+process back to the database's view, including follower counts.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.domain.entities.user import UserSuggestion
+from src.fake_twitter.domain.repositories.user_search_index import UserSearchIndex
+
+
+def _rank(user: UserSuggestion) -> Tuple[int, str, UUID]:
+    return -user.followers_count, user.username, user.id
+
+
+class _Node:
+    __slots__ = ("children", "users", "top")
+
+    def __init__(self):
+        # First character of the edge -> (edge label, child).
+        self.children: Dict[str, Tuple[str, "_Node"]] = {}
+        # Users whose key ends here.
+        self.users: Optional[Dict[UUID, UserSuggestion]] = None
+        self.top: List[UserSuggestion] = []
+
+
+class PrefixTrie:
+    def __init__(self, capacity: int = 20):
+        self.capacity = capacity
+        self.root = _Node()
+
+    @staticmethod
+    def keys(user: UserSuggestion) -> Iterator[str]:
+        yield user.username.lower()
+        if user.full_name.lower() != user.username.lower():
+            yield user.full_name.lower()
+
+    def add(self, user: UserSuggestion) -> None:
+        for key in self.keys(user):
+            path = self._path(key, create=True)
+            node = path[-1]
+            if node.users is None:
+                node.users = {}
+            previous = node.users.get(user.id)
+            node.users[user.id] = user
+            if previous is not None and _rank(user) > _rank(previous):
+                # Ranked lower now: a user outside the lists may overtake it.
+                self._recompute(path)
+            else:
+                for node in path:
+                    self._offer(node, user)
+
+    def discard(self, user: UserSuggestion) -> None:
+        for key in self.keys(user):
+            path = self._path(key, create=False)
+            if path is None or not path[-1].users:
+                continue
+            if path[-1].users.pop(user.id, None) is not None:
+                self._recompute(path)
+
+    def search(self, prefix: str, limit: int) -> List[UserSuggestion]:
+        node, rest = self.root, prefix.lower()
+        while rest:
+            entry = node.children.get(rest[0])
+            if entry is None:
+                return []
+            label, child = entry
+            if label.startswith(rest):
+                # The prefix ends on this edge: everything below matches.
+                return child.top[:limit]
+            if not rest.startswith(label):
+                return []
+            node, rest = child, rest[len(label) :]
+        return node.top[:limit]
+
+    def _path(self, key: str, create: bool) -> Optional[List[_Node]]:
+        """The nodes from the root to ``key``'s, split or added if ``create``."""
+        node, rest = self.root, key
+        path = [node]
+        while rest:
+            entry = node.children.get(rest[0])
+            if entry is None:
+                if not create:
+                    return None
+                child = _Node()
+                node.children[rest[0]] = (rest, child)
+                path.append(child)
+                return path
+            label, child = entry
+            common = 0
+            for a, b in zip(label, rest):
+                if a != b:
+                    break
+                common += 1
+            if common < len(label):
+                if not create:
+                    return None
+                # Split the edge; the new middle node has the same subtree.
+                middle = _Node()
+                middle.children[label[common]] = (label[common:], child)
+                middle.top = list(child.top)
+                node.children[rest[0]] = (label[:common], middle)
+                child = middle
+            node, rest = child, rest[common:]
+            path.append(node)
+        return path
+
+    def _offer(self, node: _Node, user: UserSuggestion) -> None:
+        top = [ranked for ranked in node.top if ranked.id != user.id]
+        if len(top) >= self.capacity and _rank(user) >= _rank(top[-1]):
+            if len(top) < len(node.top):
+                node.top = top
+            return
+        top.append(user)
+        top.sort(key=_rank)
+        node.top = top[: self.capacity]
+
+    def _recompute(self, path: List[_Node]) -> None:
+        # Bottom up: each node's list is merged from its children's.
+        for node in reversed(path):
+            best: Dict[UUID, UserSuggestion] = dict(node.users or {})
+            for _, child in node.children.values():
+                for user in child.top:
+                    best.setdefault(user.id, user)
+            node.top = sorted(best.values(), key=_rank)[: self.capacity]
+
+
+class TrieUserSearchIndex(UserSearchIndex):
+    def __init__(self, capacity: int = 20):
+        self._capacity = capacity
+        self._trie: Optional[PrefixTrie] = None
+        self._building: Optional[PrefixTrie] = None
+        # Changes made during a rebuild, replayed onto the new trie.
+        self._changes: List[Tuple[bool, UserSuggestion]] = []
+
+    @property
+    def ready(self) -> bool:
+        return self._trie is not None
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def search(self, prefix: str, limit: int) -> List[UserSuggestion]:
+        if self._trie is None:
+            return []
+        return self._trie.search(prefix, min(limit, self._capacity))
+
+    def add(self, user: UserSuggestion) -> None:
+        self._change(True, user)
+
+    def discard(self, user: UserSuggestion) -> None:
+        self._change(False, user)
+
+    def _change(self, added: bool, user: UserSuggestion) -> None:
+        if self._trie is not None:
+            (self._trie.add if added else self._trie.discard)(user)
+        if self._building is not None:
+            self._changes.append((added, user))
+
+    def begin_rebuild(self) -> None:
+        self._building = PrefixTrie(self._capacity)
+        self._changes = []
+
+    def add_to_rebuild(self, users: Sequence[UserSuggestion]) -> None:
+        for user in users:
+            self._building.add(user)
+
+    def finish_rebuild(self) -> None:
+        trie, self._building = self._building, None
+        for added, user in self._changes:
+            (trie.add if added else trie.discard)(user)
+        self._changes = []
+        self._trie = trie
+
+
+@lru_cache
+def get_user_search_index() -> Optional[TrieUserSearchIndex]:
+    """The process-wide user search trie, or None when it is turned off."""
+    settings = get_settings()
+    if not settings.user_search_trie:
+        return None
+    return TrieUserSearchIndex()
@@ -0,0 +1,72 @@
+"""Start-up work done before a worker reports ready.
+
+The first requests after a deploy would otherwise pay for opening database
+connections, compiling the repository statements (SQLAlchemy's compiled
+cache and asyncpg's per-connection prepared statements) and the first pass
+through the DTO serializers.
+"""
+
+import asyncio
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.fake_twitter.application.dtos.tweet_dtos import TweetResponseDTO
+from src.fake_twitter.application.dtos.user_dtos import UserResponseDTO
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.domain.entities.user import User
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_tweet_repository import (
+    SQLAlchemyTweetRepository,
+)
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_user_repository import (
+    SQLAlchemyUserRepository,
+)
+
+# Never a real row: the hot queries run for their side effects only.
+_PROBE_ID = UUID(int=0)
+
+
+async def _run_hot_tweet_queries(session: AsyncSession) -> None:
+    tweets = SQLAlchemyTweetRepository(session)
+    await tweets.get_by_id(_PROBE_ID)
+    await tweets.get_by_user_id(_PROBE_ID, limit=1)
+    await tweets.get_all(limit=1)
+
+
+async def _run_hot_queries(session: AsyncSession) -> None:
+    await _run_hot_tweet_queries(session)
+    users = SQLAlchemyUserRepository(session)
+    await users.get_by_id(_PROBE_ID)
+    await users.get_by_username("")
+    await users.get_all(limit=1)
+
+
+async def warm_connections(
+    session_maker: async_sessionmaker[AsyncSession],
+    count: int,
+    tweets_only: bool = False,
+) -> None:
+    """Open ``count`` pooled connections and prepare the hot statements on each.
+
+    All sessions are held until every one of them has its own connection, so
+    the pool cannot hand the same connection to two of them. Tweet shards
+    only get the tweet statements (``tweets_only``).
+    """
+    if count <= 0:
+        return
+    barrier = asyncio.Barrier(count)
+    run_hot_queries = _run_hot_tweet_queries if tweets_only else _run_hot_queries
+
+    async def warm_one() -> None:
+        async with session_maker() as session:
+            await run_hot_queries(session)
+            await barrier.wait()
+
+    await asyncio.gather(*(warm_one() for _ in range(count)))
+
+
+def warm_serializers() -> None:
+    tweet = Tweet(content="warm-up", user_id=_PROBE_ID)
+    TweetResponseDTO.model_validate(tweet).model_dump_json()
+    user = User(username="warmup", email="warmup@example.com", full_name="Warm Up")
+    UserResponseDTO.model_validate(user).model_dump_json()
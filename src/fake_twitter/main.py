@@ -1,15 +1,176 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from src.fake_twitter.config import get_settings
+from src.fake_twitter.infrastructure.activity import get_activity_buffer
 from src.fake_twitter.infrastructure.api import router as api_router
+from src.fake_twitter.infrastructure.api.compression import CompressionMiddleware
+from src.fake_twitter.infrastructure.api.dependencies import (
+    build_tweet_use_cases,
+    build_user_use_cases,
+)
+from src.fake_twitter.infrastructure.api.logs import RequestIdMiddleware
+from src.fake_twitter.infrastructure.api.profiling import (
+    ProfilingMiddleware,
+    get_profiler,
+)
+from src.fake_twitter.infrastructure.api.tracing import TracingMiddleware
+from src.fake_twitter.infrastructure.database.connection import (
+    dispose_engine,
+    get_read_session_maker,
+    get_session_maker,
+)
+from src.fake_twitter.infrastructure.database.sharding import (
+    dispose_shard_set,
+    get_shard_set,
+)
+from src.fake_twitter.infrastructure.ingest import get_tweet_ingestor
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_activity_repository import (
+    SQLAlchemyActivityRepository,
+)
+from src.fake_twitter.infrastructure.logs import configure_logging
+from src.fake_twitter.infrastructure.tracing import get_tracer
+from src.fake_twitter.infrastructure.user_search import get_user_search_index
+from src.fake_twitter.infrastructure.views import get_tweet_views
+from src.fake_twitter.infrastructure.warmup import warm_connections, warm_serializers
+
+
+logger = logging.getLogger(__name__)
+
+
+async def refresh_top_tweets_periodically(interval: float) -> None:
+    """Recompute the in-memory top tweets now and then every ``interval``."""
+    while True:
+        try:
+            async with get_read_session_maker()() as session:
+                await build_tweet_use_cases(session).refresh_top_tweets()
+        except Exception:
+            logger.exception("Refreshing the top tweets failed")
+        await asyncio.sleep(interval)
+
+
+async def refresh_user_search_periodically(interval: float) -> None:
+    """Build the user search trie now, then again every ``interval``."""
+    while True:
+        try:
+            async with get_read_session_maker()() as session:
+                await build_user_use_cases(session).refresh_user_search()
+        except Exception:
+            logger.exception("Rebuilding the user search index failed")
+        await asyncio.sleep(interval)
+
+
+async def flush_tweet_views() -> None:
+    """Merge the views counted by this process into the database."""
+    try:
+        async with get_session_maker()() as session:
+            await build_tweet_use_cases(session).flush_views()
+            await session.commit()
+    except Exception:
+        logger.exception("Storing tweet views failed")
+
+
+async def flush_tweet_views_periodically(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await flush_tweet_views()
+
+
+async def flush_activity() -> None:
+    """Add the activity summed by this process to the rollups."""
+    buffer = get_activity_buffer()
+    changes = buffer.drain()
+    try:
+        async with get_session_maker()() as session:
+            await SQLAlchemyActivityRepository(session).merge(changes)
+            await session.commit()
+    except Exception:
+        buffer.restore(changes)
+        logger.exception("Storing activity rollups failed")
+
+
+async def flush_activity_periodically(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await flush_activity()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    app.state.ready = False
+
+    prewarm = min(settings.db_prewarm_connections, settings.db_pool_size)
+    await warm_connections(get_session_maker(), prewarm)
+    shards = get_shard_set()
+    if shards is not None:
+        await asyncio.gather(
+            *(
+                warm_connections(session_maker, prewarm, tweets_only=True)
+                for session_maker in shards.session_makers.values()
+            )
+        )
+    warm_serializers()
+    app.openapi()
+    refreshers = [
+        asyncio.create_task(
+            refresh_top_tweets_periodically(settings.top_tweets_refresh_seconds)
+        )
+    ]
+    if get_user_search_index() is not None:
+        # Not waited for: searches use the database until it is built.
+        refreshers.append(
+            asyncio.create_task(
+                refresh_user_search_periodically(settings.user_search_refresh_seconds)
+            )
+        )
+    if get_activity_buffer() is not None:
+        refreshers.append(
+            asyncio.create_task(
+                flush_activity_periodically(settings.activity_flush_seconds)
+            )
+        )
+    if get_tweet_views() is not None:
+        refreshers.append(
+            asyncio.create_task(
+                flush_tweet_views_periodically(settings.tweet_views_flush_seconds)
+            )
+        )
+
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    for refresher in refreshers:
+        refresher.cancel()
+    ingestor = get_tweet_ingestor()
+    if ingestor is not None:
+        await ingestor.close()
+    if get_activity_buffer() is not None:
+        await flush_activity()
+    if get_tweet_views() is not None:
+        await flush_tweet_views()
+    await dispose_shard_set()
+    await dispose_engine()
+    tracer = get_tracer()
+    if tracer is not None:
+        tracer.sink.close()
 
 
 def create_app() -> FastAPI:
+    settings = get_settings()
+    configure_logging(settings)
     app = FastAPI(
         title="Fake Twitter API",
         description="A Twitter-like API built with FastAPI and DDD architecture",
         version="1.0.0",
+        lifespan=lifespan,
     )
+    app.state.ready = False
 
     app.add_middleware(
         CORSMiddleware,  # ty: ignore
@@ -18,6 +179,23 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(
+        CompressionMiddleware,  # ty: ignore
+        minimum_size=settings.compression_minimum_size,
+        cache_entries=settings.compression_cache_entries,
+    )
+    if settings.profile_sample_rate > 0 or settings.admin_token is not None:
+        app.add_middleware(
+            ProfilingMiddleware,  # ty: ignore
+            profiler=get_profiler(),
+            sample_rate=settings.profile_sample_rate,
+            token=settings.admin_token,
+        )
+    tracer = get_tracer()
+    if tracer is not None:
+        app.add_middleware(TracingMiddleware, tracer=tracer)  # ty: ignore
+    # Outermost, so that everything logged while serving a request has its id.
+    app.add_middleware(RequestIdMiddleware)  # ty: ignore
 
     app.include_router(api_router)
 
@@ -33,6 +211,15 @@ def create_app() -> FastAPI:
     async def health():
         return {"status": "healthy"}
 
+    @app.get("/ready")
+    async def ready():
+        if not app.state.ready:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"status": "starting"},
+            )
+        return {"status": "ready"}
+
     return app
 
 
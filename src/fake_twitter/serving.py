@@ -0,0 +1,56 @@
+"""Worker and connection pool sizing for the multi-process serving profile."""
+
+from dataclasses import dataclass
+from typing import Optional
+
+# Below this many connections per worker a single slow query starves the
+# worker's event loop, so the budget caps the worker count first.
+MIN_CONNECTIONS_PER_WORKER = 2
+
+
+@dataclass(frozen=True)
+class PoolLimits:
+    pool_size: int
+    max_overflow: int
+
+    @property
+    def total(self) -> int:
+        return self.pool_size + self.max_overflow
+
+
+def connection_budget(db_max_connections: int, reserved: int = 0) -> int:
+    """Connections the application servers may hold on the database."""
+    return max(db_max_connections - reserved, 1)
+
+
+def compute_worker_count(
+    cpu_count: Optional[int],
+    db_max_connections: int,
+    reserved: int = 0,
+    override: Optional[int] = None,
+) -> int:
+    """One event loop per core, bounded by the database connection budget.
+
+    An explicit worker count is still capped at one worker per connection
+    in the budget, so the pools of all workers never exceed it.
+    """
+    budget = connection_budget(db_max_connections, reserved)
+    if override:
+        return min(max(override, 1), budget)
+
+    by_cpu = max(cpu_count or 1, 1)
+    by_budget = budget // MIN_CONNECTIONS_PER_WORKER
+    return max(min(by_cpu, by_budget), 1)
+
+
+def compute_pool_limits(
+    workers: int, db_max_connections: int, reserved: int = 0
+) -> PoolLimits:
+    """Split the connection budget evenly across workers.
+
+    Three quarters of each worker's share is kept open in the pool and the
+    rest is overflow, so idle workers give connections back to the server.
+    """
+    share = max(connection_budget(db_max_connections, reserved) // workers, 1)
+    pool_size = max(share * 3 // 4, 1)
+    return PoolLimits(pool_size=pool_size, max_overflow=share - pool_size)
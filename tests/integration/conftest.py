@@ -10,7 +10,11 @@ from sqlalchemy.ext.asyncio import (
 from httpx import ASGITransport, AsyncClient
 
 from src.fake_twitter.main import create_app
-from src.fake_twitter.infrastructure.database.connection import Base, get_db
+from src.fake_twitter.infrastructure.database.connection import (
+    Base,
+    get_db,
+    get_read_db,
+)
 
 
 @pytest.fixture(scope="session")
@@ -61,6 +65,7 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
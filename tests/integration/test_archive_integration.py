@@ -0,0 +1,154 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.fake_twitter.application.dtos.tweet_dtos import TweetCreateDTO
+from src.fake_twitter.application.use_cases.tweet_use_cases import TweetUseCases
+from src.fake_twitter.domain.entities.tweet import ArchivedTweetError, Tweet
+from src.fake_twitter.infrastructure.archive import TweetArchive, write_segment
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_like_repository import (
+    SQLAlchemyLikeRepository,
+)
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_tweet_repository import (
+    SQLAlchemyTweetRepository,
+)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_repository_pages_from_database_into_archive(
+    db_session: AsyncSession, tmp_path
+):
+    """Test that listings continue into the archive and archived ids resolve"""
+    user_id = uuid.uuid4()
+    cutoff = datetime.now() - timedelta(days=30)
+    archived = [
+        Tweet(
+            content=f"old {n}",
+            user_id=user_id,
+            created_at=cutoff - timedelta(n + 1),
+            archived=True,
+        )
+        for n in range(5)
+    ]
+    write_segment(str(tmp_path / "old.seg"), archived, cutoff)
+    archive = TweetArchive(str(tmp_path))
+    repository = SQLAlchemyTweetRepository(db_session, archive)
+
+    recent = [
+        await repository.create(Tweet(content=f"new {n}", user_id=user_id))
+        for n in range(3)
+    ]
+    newest_first = sorted(recent, key=lambda t: t.created_at, reverse=True) + archived
+
+    assert await repository.get_by_user_id(user_id, 0, 100) == newest_first
+    assert await repository.get_by_user_id(user_id, 2, 3) == newest_first[2:5]
+    assert await repository.get_by_user_id(user_id, 4, 10) == newest_first[4:]
+    assert await repository.get_by_id(archived[3].id) == archived[3]
+    archive.close()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_archived_tweets_are_served_everywhere_and_read_only(
+    db_session: AsyncSession, tmp_path
+):
+    """Test that every read finds archived tweets, deletes hide them and
+    changes to them are refused"""
+    user_id = uuid.uuid4()
+    cutoff = datetime.now() - timedelta(days=30)
+    archived = [
+        Tweet(
+            content=f"old {n}",
+            user_id=user_id,
+            created_at=cutoff - timedelta(n + 1),
+            archived=True,
+        )
+        for n in range(3)
+    ]
+    write_segment(str(tmp_path / "old.seg"), archived, cutoff)
+    archive = TweetArchive(str(tmp_path))
+    repository = SQLAlchemyTweetRepository(db_session, archive)
+    recent = await repository.create(Tweet(content="new", user_id=user_id))
+
+    found = await repository.get_by_ids([recent.id, archived[0].id, uuid.uuid4()])
+    assert {tweet.id for tweet in found} == {recent.id, archived[0].id}
+    assert await repository.get_partial_by_id(archived[1].id, ["content"]) == {
+        "content": "old 1"
+    }
+    page = await repository.get_all(0, 1000, since=cutoff - timedelta(days=10))
+    assert [t.id for t in page if t.user_id == user_id] == [
+        recent.id,
+        *(tweet.id for tweet in archived),
+    ]
+    rows = await repository.get_partial_by_user_id(user_id, ["content"], 1, 10)
+    assert rows == [{"content": f"old {n}"} for n in range(3)]
+
+    use_cases = TweetUseCases(repository, SQLAlchemyLikeRepository(db_session))
+    with pytest.raises(ArchivedTweetError):
+        await use_cases.retweet(archived[0].id)
+    with pytest.raises(ArchivedTweetError):
+        await use_cases.like_tweet(archived[0].id, uuid.uuid4())
+    with pytest.raises(ArchivedTweetError):
+        await use_cases.create_tweet(
+            TweetCreateDTO(
+                content="reply", user_id=user_id, in_reply_to_id=archived[0].id
+            )
+        )
+
+    assert await use_cases.delete_tweet(archived[0].id) is True
+    assert await repository.get_by_id(archived[0].id) is None
+    assert await use_cases.delete_tweet(archived[0].id) is False
+    archive.delete_user(user_id)
+    assert await repository.get_partial_by_user_id(user_id, ["content"], 1, 10) == []
+    archive.close()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_conversation_continues_from_archive_into_database(
+    db_session: AsyncSession, tmp_path
+):
+    """Test that a thread's archived replies come before those in the database"""
+    cutoff = datetime.now() - timedelta(days=30)
+    root = Tweet(
+        content="root",
+        user_id=uuid.uuid4(),
+        created_at=cutoff - timedelta(days=10),
+        replies_count=3,
+        archived=True,
+    )
+    archived = [
+        Tweet(
+            content=f"old reply {n}",
+            user_id=uuid.uuid4(),
+            created_at=cutoff - timedelta(days=5 - n),
+            in_reply_to_id=root.id,
+            conversation_id=root.id,
+            archived=True,
+        )
+        for n in range(3)
+    ]
+    write_segment(str(tmp_path / "old.seg"), [root] + archived, cutoff)
+    archive = TweetArchive(str(tmp_path))
+    repository = SQLAlchemyTweetRepository(db_session, archive)
+
+    recent = [
+        await repository.create(
+            Tweet(
+                content=f"new reply {n}",
+                user_id=uuid.uuid4(),
+                in_reply_to_id=archived[-1].id,
+                conversation_id=root.id,
+            )
+        )
+        for n in range(2)
+    ]
+    thread = archived + sorted(recent, key=lambda t: (t.created_at, t.id))
+
+    assert await repository.get_conversation(root.id, root.created_at) == thread
+    pages, after = [], None
+    while page := await repository.get_conversation(root.id, after=after, limit=2):
+        pages.append(page)
+        after = (page[-1].created_at, page[-1].id)
+    assert pages == [thread[:2], thread[2:4], thread[4:]]
+    archive.close()
@@ -0,0 +1,94 @@
+import uuid
+
+from httpx import AsyncClient
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.fake_twitter.infrastructure.database.models import TweetModel
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_batch_runs_operations_in_order(
+    client: AsyncClient,
+    sample_user_data,
+    sample_tweet_data,
+):
+    """Test a batch of reads and writes with per-operation statuses"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = user_response.json()["id"]
+
+    tweet_data = sample_tweet_data.copy()
+    tweet_data["user_id"] = user_id
+    tweet_ids = []
+    for _ in range(2):
+        create_response = await client.post("/api/v1/tweets/", json=tweet_data)
+        tweet_ids.append(create_response.json()["id"])
+
+    missing_id = str(uuid.uuid4())
+    response = await client.post(
+        "/api/v1/batch",
+        json={
+            "operations": [
+                {
+                    "op": "like_tweet",
+                    "args": {"tweet_id": tweet_ids[0], "user_id": user_id},
+                },
+                {
+                    "op": "like_tweet",
+                    "args": {"tweet_id": missing_id, "user_id": user_id},
+                },
+                {"op": "get_tweet", "args": {"tweet_id": tweet_ids[0]}},
+                {"op": "get_tweet", "args": {"tweet_id": tweet_ids[1]}},
+                {"op": "get_user", "args": {"user_id": user_id}},
+                {"op": "follow_user", "args": {"user_id": "not-a-uuid"}},
+                {"op": "unknown"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["committed"] is True
+    statuses = [result["status"] for result in data["results"]]
+    assert statuses == [200, 404, 200, 200, 200, 422, 400]
+    assert data["results"][2]["body"]["likes_count"] == 1
+    assert data["results"][3]["body"]["id"] == tweet_ids[1]
+    assert data["results"][4]["body"]["id"] == user_id
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_atomic_batch_rolls_back_on_failure(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_user_data,
+    sample_tweet_data,
+):
+    """Test that an atomic batch commits nothing when an operation fails"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = user_response.json()["id"]
+
+    tweet_data = sample_tweet_data.copy()
+    tweet_data["user_id"] = user_id
+    response = await client.post(
+        "/api/v1/batch",
+        json={
+            "atomic": True,
+            "operations": [
+                {"op": "create_tweet", "args": tweet_data},
+                {"op": "retweet", "args": {"tweet_id": str(uuid.uuid4())}},
+                {"op": "create_tweet", "args": tweet_data},
+            ],
+        },
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["committed"] is False
+    assert [result["status"] for result in data["results"]] == [201, 404, 424]
+
+    await db_session.commit()
+    result = await db_session.execute(
+        select(TweetModel).where(TweetModel.user_id == user_id)
+    )
+    assert result.scalars().all() == []
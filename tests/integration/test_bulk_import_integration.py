@@ -0,0 +1,65 @@
+import random
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.fake_twitter.infrastructure.database.bulk_import import (
+    SyntheticData,
+    bulk_import,
+    secondary_indexes,
+)
+from src.fake_twitter.infrastructure.database.models import (
+    LikeModel,
+    TweetModel,
+    UserModel,
+)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_import_generated_data(test_engine: AsyncEngine):
+    """Test that generated data is copied, indexes rebuilt and likes recounted"""
+    data = SyntheticData(200, 1000, seed=random.randrange(1 << 30))
+    rows = list(data.rows())
+    user_ids = [row[0] for table, row in rows if table == "users"]
+    expected = {
+        table: sum(1 for name, _ in rows if name == table)
+        for table in ("users", "tweets", "likes")
+    }
+
+    loaded = await bulk_import(
+        test_engine, rows, workers=3, batch_rows=100, rebuild_indexes=True
+    )
+
+    assert loaded == expected
+    async with test_engine.connect() as conn:
+        assert (
+            await conn.scalar(
+                select(func.count())
+                .select_from(UserModel)
+                .where(UserModel.id.in_(user_ids))
+            )
+            == expected["users"]
+        )
+        assert (
+            await conn.scalar(
+                select(func.count())
+                .select_from(TweetModel)
+                .where(TweetModel.user_id.in_(user_ids))
+            )
+            == expected["tweets"]
+        )
+        likes = (
+            select(func.count())
+            .where(LikeModel.tweet_id == TweetModel.id)
+            .scalar_subquery()
+        )
+        assert not await conn.scalar(
+            select(func.count())
+            .select_from(TweetModel)
+            .where(TweetModel.user_id.in_(user_ids), TweetModel.likes_count != likes)
+        )
+        indexes = set(
+            (await conn.execute(text("SELECT indexname FROM pg_indexes"))).scalars()
+        )
+    assert {index.name for index in secondary_indexes()} <= indexes
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.fake_twitter.infrastructure.database.partitions import (
+    ensure_partitions,
+    expire_partitions,
+    list_partitions,
+)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_ensure_and_expire_partitions(test_engine: AsyncEngine):
+    """Test creating future partitions and detaching expired ones"""
+    # Far from today so the rows of the other tests, which live in the
+    # default partition, never overlap these ranges.
+    now = datetime(2100, 1, 15)
+
+    async with test_engine.begin() as conn:
+        created = await ensure_partitions(conn, periods_ahead=2, now=now)
+        assert created == ["tweets_p21000101", "tweets_p21000201", "tweets_p21000301"]
+
+        # Idempotent
+        assert await ensure_partitions(conn, periods_ahead=2, now=now) == []
+
+        expired = await expire_partitions(conn, cutoff=datetime(2100, 3, 1), drop=True)
+        assert expired == ["tweets_p21000101", "tweets_p21000201"]
+
+        names = [partition.name for partition in await list_partitions(conn)]
+        assert "tweets_p21000101" not in names
+        assert "tweets_p21000301" in names
+
+        await expire_partitions(conn, cutoff=datetime(2101, 1, 1), drop=True)
@@ -0,0 +1,114 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.fake_twitter.infrastructure.database.models import (
+    LikeModel,
+    TweetModel,
+    UserModel,
+)
+from src.fake_twitter.infrastructure.database.purger import Purger
+
+
+def user_data():
+    unique_id = str(uuid.uuid4())[:8]
+    return {
+        "username": f"purged_{unique_id}",
+        "email": f"purged_{unique_id}@example.com",
+        "full_name": "Purged User",
+    }
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_purger_cascades_deleted_user(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    test_engine: AsyncEngine,
+):
+    """Test that purging a deleted user removes their tweets and likes"""
+    user_id = (await client.post("/api/v1/users/", json=user_data())).json()["id"]
+    other_id = (await client.post("/api/v1/users/", json=user_data())).json()["id"]
+    tweet_ids = [
+        (
+            await client.post(
+                "/api/v1/tweets/", json={"content": f"tweet {n}", "user_id": user_id}
+            )
+        ).json()["id"]
+        for n in range(5)
+    ]
+    other_tweet_id = (
+        await client.post(
+            "/api/v1/tweets/", json={"content": "other", "user_id": other_id}
+        )
+    ).json()["id"]
+    await client.post(f"/api/v1/tweets/{tweet_ids[0]}/like", json={"user_id": other_id})
+    await client.post(
+        f"/api/v1/tweets/{other_tweet_id}/like", json={"user_id": user_id}
+    )
+
+    reply_id = (
+        await client.post(
+            "/api/v1/tweets/",
+            json={
+                "content": "reply",
+                "user_id": user_id,
+                "in_reply_to_id": other_tweet_id,
+            },
+        )
+    ).json()["id"]
+
+    assert (await client.delete(f"/api/v1/users/{user_id}")).status_code == 204
+    await db_session.commit()
+    # Hidden at once, not only once purged.
+    assert (await client.get(f"/api/v1/tweets/{tweet_ids[0]}")).status_code == 404
+    assert (await client.get(f"/api/v1/tweets/user/{user_id}")).json() == []
+    response = await client.post(f"/api/v1/tweets/{reply_id}/retweet")
+    assert response.status_code == 404
+
+    purger = Purger(test_engine, batch_size=2, pause=0)
+    assert await purger.purge_users() >= 1
+
+    db_session.expire_all()
+    assert await db_session.get(UserModel, uuid.UUID(user_id)) is None
+    remaining = await db_session.scalars(
+        select(TweetModel.id).where(TweetModel.user_id == uuid.UUID(user_id))
+    )
+    assert remaining.all() == []
+    likes = await db_session.scalars(
+        select(LikeModel.user_id).where(
+            LikeModel.tweet_id.in_([uuid.UUID(tweet_ids[0]), uuid.UUID(other_tweet_id)])
+        )
+    )
+    assert likes.all() == []
+    other_tweet = await db_session.scalar(
+        select(TweetModel).where(TweetModel.id == uuid.UUID(other_tweet_id))
+    )
+    assert other_tweet.likes_count == 0
+    assert other_tweet.replies_count == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_purger_removes_tombstoned_tweets(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    test_engine: AsyncEngine,
+):
+    """Test that deleted tweets stay as tombstones until purged"""
+    user_id = (await client.post("/api/v1/users/", json=user_data())).json()["id"]
+    tweet_id = (
+        await client.post(
+            "/api/v1/tweets/", json={"content": "short-lived", "user_id": user_id}
+        )
+    ).json()["id"]
+    await client.delete(f"/api/v1/tweets/{tweet_id}")
+    await db_session.commit()
+
+    assert await Purger(test_engine, pause=0).purge_tweets() >= 1
+    db_session.expire_all()
+    remaining = await db_session.scalar(
+        select(TweetModel.id).where(TweetModel.id == uuid.UUID(tweet_id))
+    )
+    assert remaining is None
@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.fake_twitter.infrastructure.database.connection import ReadOnlySession
+from src.fake_twitter.infrastructure.database.models import UserModel
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_read_only_session_releases_connection_per_statement(
+    test_engine: AsyncEngine,
+):
+    """Test that a read-only session holds no connection between statements"""
+    session_maker = async_sessionmaker(
+        test_engine.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=ReadOnlySession,
+        expire_on_commit=False,
+    )
+
+    async with session_maker() as session:
+        result = await session.execute(select(UserModel).limit(5))
+        assert test_engine.pool.checkedout() == 0
+        assert isinstance(result.scalars().all(), list)
+
+        in_transaction = await session.scalar(
+            text("SELECT now() <> statement_timestamp()")
+        )
+        assert test_engine.pool.checkedout() == 0
+        assert in_transaction is False
@@ -0,0 +1,143 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.infrastructure.activity import get_activity_buffer
+from src.fake_twitter.infrastructure.archive import TweetArchive, write_segment
+from src.fake_twitter.infrastructure.database.rollups import rebuild
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_activity_repository import (
+    SQLAlchemyActivityRepository,
+)
+
+
+def user_data():
+    unique_id = str(uuid.uuid4())[:8]
+    return {
+        "username": f"stats_{unique_id}",
+        "email": f"stats_{unique_id}@example.com",
+        "full_name": "Stats User",
+    }
+
+
+async def stats(client: AsyncClient, user_id: str, granularity: str):
+    response = await client.get(
+        f"/api/v1/users/{user_id}/stats", params={"granularity": granularity}
+    )
+    assert response.status_code == 200
+    return [
+        {k: bucket[k] for k in ("tweets", "likes_received", "retweets_received")}
+        for bucket in response.json()["buckets"]
+    ]
+
+
+async def flush_activity(session: AsyncSession, user_ids) -> None:
+    """Commit the requests' changes and store those of ``user_ids``."""
+    await session.commit()
+    buffer = get_activity_buffer()
+    changes = buffer.drain()
+    await SQLAlchemyActivityRepository(session).merge(
+        {key: counts for key, counts in changes.items() if str(key[0]) in user_ids}
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stats_follow_activity_and_survive_a_rebuild(
+    client: AsyncClient, db_session: AsyncSession, test_engine: AsyncEngine
+):
+    """Test that rollups count tweets and engagement, and rebuild to the same"""
+    user_id = (await client.post("/api/v1/users/", json=user_data())).json()["id"]
+    fan_id = (await client.post("/api/v1/users/", json=user_data())).json()["id"]
+    tweet_ids = [
+        (
+            await client.post(
+                "/api/v1/tweets/", json={"content": f"tweet {n}", "user_id": user_id}
+            )
+        ).json()["id"]
+        for n in range(3)
+    ]
+    await client.post(f"/api/v1/tweets/{tweet_ids[0]}/like", json={"user_id": fan_id})
+    await client.post(f"/api/v1/tweets/{tweet_ids[0]}/retweet")
+    await client.delete(f"/api/v1/tweets/{tweet_ids[2]}")
+    await flush_activity(db_session, {user_id, fan_id})
+
+    expected = [{"tweets": 2, "likes_received": 1, "retweets_received": 1}]
+    assert await stats(client, user_id, "day") == expected
+    assert sum(b["tweets"] for b in await stats(client, user_id, "hour")) == 2
+    assert await stats(client, fan_id, "day") == []
+
+    async with test_engine.begin() as conn:
+        await conn.execute(
+            text("UPDATE user_activity SET tweets = 40 WHERE user_id = :user_id"),
+            {"user_id": user_id},
+        )
+    await rebuild(test_engine)
+
+    assert await stats(client, user_id, "day") == expected
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rebuild_keeps_archived_history(
+    client: AsyncClient, test_engine: AsyncEngine, tmp_path
+):
+    """Test that buckets before the archive cutoff survive a rebuild and that
+    likes of archived tweets are counted for their authors"""
+    user_id = (await client.post("/api/v1/users/", json=user_data())).json()["id"]
+    cutoff = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(
+        days=10
+    )
+    archived = Tweet(
+        content="old",
+        user_id=uuid.UUID(user_id),
+        created_at=cutoff - timedelta(days=2),
+        archived=True,
+    )
+    write_segment(str(tmp_path / "old.seg"), [archived], cutoff)
+    archive = TweetArchive(str(tmp_path))
+    async with test_engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO user_activity (user_id, granularity, bucket, tweets, "
+                "likes_received, retweets_received) "
+                "VALUES (:user_id, 'day', :bucket, 1, 0, 0)"
+            ),
+            {"user_id": user_id, "bucket": archived.created_at.replace(hour=0)},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO likes (user_id, tweet_id, created_at) "
+                "VALUES (:user_id, :tweet_id, now())"
+            ),
+            {"user_id": uuid.uuid4(), "tweet_id": archived.id},
+        )
+    await rebuild(test_engine, archive)
+    archive.close()
+
+    assert await stats(client, user_id, "day") == [
+        {"tweets": 1, "likes_received": 0, "retweets_received": 0},
+        {"tweets": 0, "likes_received": 1, "retweets_received": 0},
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stats_ranges(client: AsyncClient):
+    """Test the stats of missing users and over invalid ranges"""
+    user_id = (await client.post("/api/v1/users/", json=user_data())).json()["id"]
+
+    response = await client.get(f"/api/v1/users/{uuid.uuid4()}/stats")
+    assert response.status_code == 404
+
+    response = await client.get(
+        f"/api/v1/users/{user_id}/stats",
+        params={"granularity": "hour", "since": "2020-01-01T00:00:00"},
+    )
+    assert response.status_code == 422
+    response = await client.get(
+        f"/api/v1/users/{user_id}/stats", params={"granularity": "week"}
+    )
+    assert response.status_code == 422
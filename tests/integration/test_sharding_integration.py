@@ -0,0 +1,104 @@
+import uuid
+from typing import AsyncGenerator, Dict
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.infrastructure.database.connection import Base
+from src.fake_twitter.infrastructure.database.models import TweetModel
+from src.fake_twitter.infrastructure.database.rebalance import move_bucket, plan_moves
+from src.fake_twitter.infrastructure.database.sharding import ShardSet
+from src.fake_twitter.infrastructure.repositories.sharded_tweet_repository import (
+    ShardedTweetRepository,
+)
+
+
+@pytest.fixture(scope="session")
+async def shard_urls(test_database_url: str) -> Dict[str, str]:
+    """Three extra databases in the test container, used as tweet shards"""
+    admin_engine = create_async_engine(test_database_url, isolation_level="AUTOCOMMIT")
+    urls = {}
+    async with admin_engine.connect() as conn:
+        for name in ("s0", "s1", "s2"):
+            database = f"tweets_{name}"
+            await conn.execute(text(f"CREATE DATABASE {database}"))
+            url = make_url(test_database_url).set(database=database)
+            urls[name] = url.render_as_string(hide_password=False)
+    await admin_engine.dispose()
+
+    for url in urls.values():
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+    return urls
+
+
+@pytest.fixture
+async def two_shards(shard_urls) -> AsyncGenerator[ShardSet, None]:
+    shards = ShardSet({name: shard_urls[name] for name in ("s0", "s1")})
+    yield shards
+    await shards.dispose()
+
+
+async def _count_on_shard(shards: ShardSet, shard: str, **filters) -> int:
+    async with shards.session_makers[shard]() as session:
+        statement = select(func.count()).select_from(TweetModel).filter_by(**filters)
+        return await session.scalar(statement)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_sharded_reads_and_writes(two_shards: ShardSet):
+    """Test that tweets land on their author's shard and are found again"""
+    repository = ShardedTweetRepository(two_shards)
+    user_ids = [uuid.uuid4() for _ in range(6)]
+
+    created = []
+    for user_id in user_ids:
+        for i in range(2):
+            tweet = Tweet(content=f"tweet {i}", user_id=user_id)
+            created.append(await repository.create(tweet))
+
+    for tweet in created:
+        shard = two_shards.shard_for_user(tweet.user_id)
+        assert two_shards.shard_for_tweet(tweet.id) == shard
+        assert await _count_on_shard(two_shards, shard, id=tweet.id) == 1
+        assert (await repository.get_by_id(tweet.id)) == tweet
+
+    for user_id in user_ids:
+        tweets = await repository.get_by_user_id(user_id)
+        assert len(tweets) == 2
+        assert all(tweet.user_id == user_id for tweet in tweets)
+
+    page = await repository.get_all(skip=3, limit=5)
+    everything = await repository.get_all(limit=1000)
+    ordered = sorted(everything, key=lambda t: (t.created_at, t.id), reverse=True)
+    assert everything == ordered
+    assert page == everything[3:8]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_rebalance_moves_users_to_new_shard(shard_urls, two_shards: ShardSet):
+    """Test that adding a shard and rebalancing keeps every tweet reachable"""
+    old_repository = ShardedTweetRepository(two_shards)
+    created = [
+        await old_repository.create(Tweet(content="hello", user_id=uuid.uuid4()))
+        for _ in range(40)
+    ]
+
+    three_shards = ShardSet(shard_urls)
+    try:
+        moves = plan_moves(["s0", "s1"], three_shards)
+        assert moves and all(move.target == "s2" for move in moves)
+        for move in moves:
+            await move_bucket(three_shards, move, batch_size=3)
+
+        new_repository = ShardedTweetRepository(three_shards)
+        for tweet in created:
+            assert (await new_repository.get_by_id(tweet.id)) == tweet
+            assert tweet in await new_repository.get_by_user_id(tweet.user_id)
+    finally:
+        await three_shards.dispose()
@@ -0,0 +1,76 @@
+from httpx import AsyncClient
+import pytest
+
+
+async def _post(client: AsyncClient, user_id: str, content: str, parent=None):
+    payload = {"content": content, "user_id": user_id}
+    if parent is not None:
+        payload["in_reply_to_id"] = parent
+    response = await client.post("/api/v1/tweets/", json=payload)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_thread_pages_through_the_conversation(
+    client: AsyncClient, sample_user_data
+):
+    """Test that a thread returns the root and all replies, page by page"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = user_response.json()["id"]
+
+    root = await _post(client, user_id, "root")
+    first = await _post(client, user_id, "first", root)
+    nested = await _post(client, user_id, "nested", first)
+    second = await _post(client, user_id, "second", root)
+
+    response = await client.get(f"/api/v1/tweets/{nested}/thread", params={"limit": 2})
+    assert response.status_code == 200
+    page = response.json()
+    assert page["root"]["id"] == root
+    assert page["root"]["replies_count"] == 2
+    assert [t["id"] for t in page["replies"]] == [first, nested]
+    assert page["replies"][1]["in_reply_to_id"] == first
+    assert page["replies"][1]["conversation_id"] == root
+
+    response = await client.get(
+        f"/api/v1/tweets/{root}/thread",
+        params={"limit": 2, "cursor": page["next_cursor"]},
+    )
+    page = response.json()
+    assert [t["id"] for t in page["replies"]] == [second]
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_replies_count_follows_replies(client: AsyncClient, sample_user_data):
+    """Test that replying and deleting a reply update the parent's replies_count"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = user_response.json()["id"]
+    root = await _post(client, user_id, "root")
+    reply = await _post(client, user_id, "reply", root)
+
+    assert (await client.get(f"/api/v1/tweets/{root}")).json()["replies_count"] == 1
+
+    assert (await client.delete(f"/api/v1/tweets/{reply}")).status_code == 204
+    assert (await client.get(f"/api/v1/tweets/{root}")).json()["replies_count"] == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_reply_to_missing_tweet(client: AsyncClient, sample_user_data):
+    """Test replying to a tweet that does not exist"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    response = await client.post(
+        "/api/v1/tweets/",
+        json={
+            "content": "reply",
+            "user_id": user_response.json()["id"],
+            "in_reply_to_id": "00000000-0000-0000-0000-000000000000",
+        },
+    )
+    assert response.status_code == 404
+
+    response = await client.get(
+        "/api/v1/tweets/00000000-0000-0000-0000-000000000000/thread"
+    )
+    assert response.status_code == 404
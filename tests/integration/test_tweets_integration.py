@@ -1,9 +1,14 @@
+from uuid import uuid4
+
 from httpx import AsyncClient
 import pytest
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.fake_twitter.infrastructure.api import dependencies
+from src.fake_twitter.infrastructure.api.dependencies import build_tweet_use_cases
 from src.fake_twitter.infrastructure.database.models import TweetModel
+from src.fake_twitter.infrastructure.views import InMemoryTweetViews
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -108,7 +113,7 @@ async def test_delete_tweet_and_verify_in_db(
     sample_user_data,
     sample_tweet_data,
 ):
-    """Test deleting a tweet via API and verify it's removed from database"""
+    """Test deleting a tweet via API leaves a tombstone until it is purged"""
     # Create user and tweet
     user_response = await client.post("/api/v1/users/", json=sample_user_data)
     user_id = user_response.json()["id"]
@@ -122,15 +127,18 @@ async def test_delete_tweet_and_verify_in_db(
     response = await client.delete(f"/api/v1/tweets/{tweet_id}")
 
     assert response.status_code == 204
+    assert (await client.get(f"/api/v1/tweets/{tweet_id}")).status_code == 404
+    user_tweets = await client.get(f"/api/v1/tweets/user/{user_id}")
+    assert user_tweets.json() == []
 
-    # Verify not in database
+    # Verify tombstoned in database
     await db_session.commit()
     result = await db_session.execute(
         select(TweetModel).where(TweetModel.id == tweet_id)
     )
     db_tweet = result.scalar_one_or_none()
 
-    assert db_tweet is None
+    assert db_tweet.deleted_at is not None
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -151,7 +159,9 @@ async def test_like_tweet_and_verify_count_in_db(
     tweet_id = create_response.json()["id"]
 
     # Like tweet via API
-    response = await client.post(f"/api/v1/tweets/{tweet_id}/like")
+    response = await client.post(
+        f"/api/v1/tweets/{tweet_id}/like", json={"user_id": user_id}
+    )
 
     assert response.status_code == 200
     data = response.json()
@@ -239,3 +249,231 @@ async def test_get_tweets_by_user_and_verify_in_db(
 
     assert len(db_tweets) == 3
     assert len(api_tweets) == 3
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_tweets_by_user_within_time_range(
+    client: AsyncClient,
+    sample_user_data,
+    sample_tweet_data,
+):
+    """Test that since/until restrict the tweets returned for a user"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = user_response.json()["id"]
+
+    tweet_data = sample_tweet_data.copy()
+    tweet_data["user_id"] = user_id
+    for _ in range(2):
+        await client.post("/api/v1/tweets/", json=tweet_data)
+
+    past = "2000-01-01T00:00:00"
+    future = "2100-01-01T00:00:00"
+
+    response = await client.get(
+        f"/api/v1/tweets/user/{user_id}", params={"since": past, "until": future}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    response = await client.get(
+        f"/api/v1/tweets/user/{user_id}", params={"since": future}
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+
+    response = await client.get("/api/v1/tweets/", params={"until": past})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_like_is_idempotent_per_user(
+    client: AsyncClient,
+    sample_user_data,
+    sample_tweet_data,
+):
+    """Test that repeated likes and unlikes only count real changes"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = user_response.json()["id"]
+
+    tweet_data = sample_tweet_data.copy()
+    tweet_data["user_id"] = user_id
+    create_response = await client.post("/api/v1/tweets/", json=tweet_data)
+    tweet_id = create_response.json()["id"]
+
+    for _ in range(3):
+        response = await client.post(
+            f"/api/v1/tweets/{tweet_id}/like", json={"user_id": user_id}
+        )
+        assert response.status_code == 200
+        assert response.json()["likes_count"] == 1
+
+    for _ in range(2):
+        response = await client.post(
+            f"/api/v1/tweets/{tweet_id}/unlike", json={"user_id": user_id}
+        )
+        assert response.status_code == 200
+        assert response.json()["likes_count"] == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_like_requires_an_existing_user(
+    client: AsyncClient,
+    sample_user_data,
+    sample_tweet_data,
+):
+    """Test that likes on behalf of unknown users are refused and not counted"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    tweet_data = sample_tweet_data.copy()
+    tweet_data["user_id"] = user_response.json()["id"]
+    create_response = await client.post("/api/v1/tweets/", json=tweet_data)
+    tweet_id = create_response.json()["id"]
+
+    for verb in ("like", "unlike"):
+        response = await client.post(
+            f"/api/v1/tweets/{tweet_id}/{verb}", json={"user_id": str(uuid4())}
+        )
+        assert response.status_code == 422
+        assert response.json() == {"detail": "User not found"}
+
+    response = await client.get(f"/api/v1/tweets/{tweet_id}")
+    assert response.json()["likes_count"] == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_lookup_liked_tweets(
+    client: AsyncClient,
+    sample_user_data,
+    sample_tweet_data,
+):
+    """Test looking up which of several tweets a user has liked"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = user_response.json()["id"]
+
+    tweet_data = sample_tweet_data.copy()
+    tweet_data["user_id"] = user_id
+    tweet_ids = []
+    for _ in range(3):
+        create_response = await client.post("/api/v1/tweets/", json=tweet_data)
+        tweet_ids.append(create_response.json()["id"])
+
+    lookup = {"user_id": user_id, "tweet_ids": tweet_ids}
+    response = await client.post("/api/v1/tweets/likes/lookup", json=lookup)
+    assert response.status_code == 200
+    assert response.json()["liked_tweet_ids"] == []
+
+    await client.post(f"/api/v1/tweets/{tweet_ids[1]}/like", json={"user_id": user_id})
+
+    response = await client.post("/api/v1/tweets/likes/lookup", json=lookup)
+    assert response.status_code == 200
+    assert response.json() == {"user_id": user_id, "liked_tweet_ids": [tweet_ids[1]]}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_tweets_with_sparse_fields(
+    client: AsyncClient,
+    sample_user_data,
+    sample_tweet_data,
+):
+    """Test that tweet listings return only the requested fields"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = user_response.json()["id"]
+
+    tweet_data = sample_tweet_data.copy()
+    tweet_data["user_id"] = user_id
+    for _ in range(2):
+        await client.post("/api/v1/tweets/", json=tweet_data)
+
+    response = await client.get(
+        f"/api/v1/tweets/user/{user_id}", params={"fields": "content,created_at"}
+    )
+    assert response.status_code == 200
+    tweets = response.json()
+    assert len(tweets) == 2
+    assert all(set(tweet) == {"content", "created_at"} for tweet in tweets)
+
+    response = await client.get("/api/v1/tweets/", params={"fields": "id", "limit": 1})
+    assert response.status_code == 200
+    assert list(response.json()[0]) == ["id"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_tweets_with_authors(
+    client: AsyncClient,
+    sample_user_data,
+    sample_tweet_data,
+):
+    """Test that expand=user embeds each tweet's author"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = user_response.json()["id"]
+
+    tweet_data = sample_tweet_data.copy()
+    tweet_data["user_id"] = user_id
+    for _ in range(2):
+        await client.post("/api/v1/tweets/", json=tweet_data)
+
+    response = await client.get(f"/api/v1/tweets/user/{user_id}")
+    assert all(tweet["user"] is None for tweet in response.json())
+
+    response = await client.get(
+        f"/api/v1/tweets/user/{user_id}", params={"expand": "user"}
+    )
+    assert response.status_code == 200
+    author = {
+        "id": user_id,
+        "username": sample_user_data["username"],
+        "full_name": sample_user_data["full_name"],
+    }
+    assert [tweet["user"] for tweet in response.json()] == [author, author]
+
+    response = await client.get(
+        f"/api/v1/tweets/user/{user_id}",
+        params={"expand": "user", "fields": "id,user_id"},
+    )
+    assert response.json()[0]["user"] == author
+
+    response = await client.get(
+        f"/api/v1/tweets/user/{user_id}", params={"expand": "user", "fields": "id"}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_tweet_views_count_unique_viewers(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    sample_user_data,
+    sample_tweet_data,
+    mocker,
+):
+    """Test that views are counted once per viewer once flushed"""
+    user_response = await client.post("/api/v1/users/", json=sample_user_data)
+    tweet_data = sample_tweet_data.copy()
+    tweet_data["user_id"] = user_response.json()["id"]
+    tweet_id = (await client.post("/api/v1/tweets/", json=tweet_data)).json()["id"]
+    response = await client.get(f"/api/v1/tweets/{tweet_id}")
+    assert response.json()["views_count"] is None
+
+    views = InMemoryTweetViews()
+    mocker.patch.object(dependencies, "get_tweet_views", return_value=views)
+
+    viewers = [str(uuid4()) for _ in range(3)]
+    for viewer_id in viewers + viewers:
+        response = await client.get(
+            f"/api/v1/tweets/{tweet_id}", params={"viewer_id": viewer_id}
+        )
+        assert response.json()["views_count"] == 0
+
+    # Merged twice, as by two API processes.
+    use_cases = build_tweet_use_cases(db_session)
+    await use_cases.flush_views()
+    await client.get(f"/api/v1/tweets/{tweet_id}", params={"viewer_id": viewers[0]})
+    await client.get(f"/api/v1/tweets/{tweet_id}", params={"viewer_id": str(uuid4())})
+    await use_cases.flush_views()
+
+    response = await client.get(f"/api/v1/tweets/{tweet_id}")
+    assert response.json()["views_count"] == 4
+    response = await client.get("/api/v1/tweets/", params={"limit": 10})
+    assert {tweet["id"]: tweet["views_count"] for tweet in response.json()}[
+        tweet_id
+    ] == 4
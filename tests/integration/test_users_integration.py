@@ -87,7 +87,7 @@ async def test_delete_user_and_verify_in_db(
     db_session: AsyncSession,
     sample_user_data,
 ):
-    """Test deleting a user via API and verify it's removed from database"""
+    """Test deleting a user via API leaves a tombstone until it is purged"""
     # Create user
     create_response = await client.post("/api/v1/users/", json=sample_user_data)
     user_id = create_response.json()["id"]
@@ -96,13 +96,19 @@ async def test_delete_user_and_verify_in_db(
     response = await client.delete(f"/api/v1/users/{user_id}")
 
     assert response.status_code == 204
+    assert (await client.get(f"/api/v1/users/{user_id}")).status_code == 404
+    assert (await client.delete(f"/api/v1/users/{user_id}")).status_code == 404
 
-    # Verify not in database
+    # Verify tombstoned in database
     await db_session.commit()  # Commit to see changes
     result = await db_session.execute(select(UserModel).where(UserModel.id == user_id))
     db_user = result.scalar_one_or_none()
 
-    assert db_user is None
+    assert db_user.deleted_at is not None
+
+    # Its username and email are free again before it is purged.
+    response = await client.post("/api/v1/users/", json=sample_user_data)
+    assert response.status_code == 201
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -163,3 +169,70 @@ async def test_get_all_users_from_db(
 
     assert len(db_users) == 3
     assert len(api_users) >= 3
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_user_with_sparse_fields(
+    client: AsyncClient,
+    sample_user_data,
+):
+    """Test that ?fields= returns only the requested user fields"""
+    create_response = await client.post("/api/v1/users/", json=sample_user_data)
+    user_id = create_response.json()["id"]
+
+    response = await client.get(
+        f"/api/v1/users/{user_id}", params={"fields": "id,username"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": user_id,
+        "username": sample_user_data["username"],
+    }
+
+    response = await client.get(
+        f"/api/v1/users/username/{sample_user_data['username']}",
+        params={"fields": "full_name"},
+    )
+    assert response.json() == {"full_name": sample_user_data["full_name"]}
+
+    response = await client.get("/api/v1/users/", params={"fields": "id,password"})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_search_users_by_prefix(
+    client: AsyncClient,
+    sample_user_data,
+):
+    """Test that users are found by a prefix of their username or full name"""
+    unique_id = sample_user_data["username"].removeprefix("testuser_")
+    user_ids = []
+    for i, full_name in enumerate([f"Zelda {unique_id}", f"zebra {unique_id}"]):
+        user_data = sample_user_data.copy()
+        user_data["username"] = f"search_{unique_id}_{i}"
+        user_data["email"] = f"search_{i}_{sample_user_data['email']}"
+        user_data["full_name"] = full_name
+        create_response = await client.post("/api/v1/users/", json=user_data)
+        user_ids.append(create_response.json()["id"])
+    await client.post(f"/api/v1/users/{user_ids[1]}/follow")
+
+    response = await client.get(
+        "/api/v1/users/search", params={"prefix": f"SEARCH_{unique_id}"}
+    )
+    assert response.status_code == 200
+    assert [user["id"] for user in response.json()] == [user_ids[1], user_ids[0]]
+
+    response = await client.get(
+        "/api/v1/users/search", params={"prefix": f"zelda {unique_id}", "limit": 1}
+    )
+    assert response.json() == [
+        {
+            "id": user_ids[0],
+            "username": f"search_{unique_id}_0",
+            "full_name": f"Zelda {unique_id}",
+            "followers_count": 0,
+        }
+    ]
+
+    response = await client.get("/api/v1/users/search", params={"prefix": ""})
+    assert response.status_code == 422
@@ -0,0 +1,209 @@
+import asyncio
+import uuid
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.fake_twitter.application.dtos.tweet_dtos import TweetCreateDTO
+from src.fake_twitter.application.use_cases.tweet_use_cases import TweetUseCases
+from src.fake_twitter.domain.entities.activity import bucket_start
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.infrastructure.activity import ActivityBuffer
+from src.fake_twitter.infrastructure.api.dependencies import get_read_user_use_cases
+from src.fake_twitter.infrastructure.api.v1.routes import users
+
+
+class InMemoryTweetRepository:
+    def __init__(self):
+        self.tweets = {}
+
+    async def create(self, tweet):
+        self.tweets[tweet.id] = tweet
+        return tweet
+
+    async def get_by_id(self, tweet_id):
+        return self.tweets.get(tweet_id)
+
+    async def update(self, tweet):
+        return tweet
+
+    async def delete(self, tweet_id):
+        return self.tweets.pop(tweet_id, None) is not None
+
+    async def increment_counters(self, tweet_id, likes=0, retweets=0, replies=0):
+        tweet = self.tweets[tweet_id]
+        tweet.likes_count += likes
+        tweet.retweets_count += retweets
+        return tweet
+
+
+class InMemoryLikeRepository:
+    def __init__(self):
+        self.likes = {}
+
+    async def add(self, tweet_id, user_id):
+        added = (user_id, tweet_id) not in self.likes
+        self.likes.setdefault((user_id, tweet_id), datetime.now())
+        return added
+
+    async def remove(self, tweet_id, user_id):
+        return self.likes.pop((user_id, tweet_id), None)
+
+
+class InMemoryActivityRepository:
+    def __init__(self):
+        self.buckets = Counter()
+
+    async def record(self, user_id, at, **changes):
+        for granularity in ("hour", "day"):
+            for counter, change in changes.items():
+                key = (user_id, granularity, bucket_start(at, granularity), counter)
+                self.buckets[key] += change
+
+
+def test_bucket_start():
+    """Test that moments fall in the hour and day they belong to"""
+    at = datetime(2025, 3, 9, 17, 45, 12, 500)
+
+    assert bucket_start(at, "hour") == datetime(2025, 3, 9, 17)
+    assert bucket_start(at, "day") == datetime(2025, 3, 9)
+
+
+async def test_activity_is_recorded_as_it_happens():
+    """Test that tweets and engagement update the author's buckets"""
+    activity = InMemoryActivityRepository()
+    use_cases = TweetUseCases(
+        InMemoryTweetRepository(),
+        InMemoryLikeRepository(),
+        activity_repository=activity,
+    )
+    author, fan = uuid.uuid4(), uuid.uuid4()
+
+    tweet = await use_cases.create_tweet(TweetCreateDTO(content="hi", user_id=author))
+    other = await use_cases.create_tweet(TweetCreateDTO(content="yo", user_id=author))
+    await use_cases.like_tweet(tweet.id, fan)
+    await use_cases.like_tweet(tweet.id, fan)
+    await use_cases.retweet(tweet.id)
+    await use_cases.delete_tweet(other.id)
+
+    day = bucket_start(tweet.created_at, "day")
+    assert activity.buckets[(author, "day", day, "tweets")] == 1
+    assert activity.buckets[(author, "day", day, "retweets_received")] == 1
+    # Counted once, however often it is repeated.
+    assert (
+        sum(n for key, n in activity.buckets.items() if key[3] == "likes_received") == 2
+    )
+
+    await use_cases.unlike_tweet(tweet.id, fan)
+    await use_cases.unlike_tweet(tweet.id, fan)
+
+    likes = [n for key, n in activity.buckets.items() if key[3] == "likes_received"]
+    assert likes == [0, 0]
+    assert not any(key[0] == fan for key in activity.buckets)
+
+
+class StaleTweetRepository(InMemoryTweetRepository):
+    """Hands out copies, as concurrent requests each read their own row."""
+
+    async def get_by_id(self, tweet_id):
+        tweet = self.tweets.get(tweet_id)
+        tweet = tweet.model_copy() if tweet else None
+        await asyncio.sleep(0)
+        return tweet
+
+    async def update(self, tweet):
+        self.tweets[tweet.id] = tweet
+        return tweet
+
+
+async def test_concurrent_retweets_are_all_counted():
+    """Test that retweets add to the stored count instead of overwriting it"""
+    tweets = StaleTweetRepository()
+    use_cases = TweetUseCases(tweets, InMemoryLikeRepository())
+    tweet = await use_cases.create_tweet(
+        TweetCreateDTO(content="hi", user_id=uuid.uuid4())
+    )
+
+    await asyncio.gather(*(use_cases.retweet(tweet.id) for _ in range(3)))
+
+    assert tweets.tweets[tweet.id].retweets_count == 3
+
+
+async def test_use_cases_work_without_rollups():
+    """Test that recording is skipped when there is no activity repository"""
+    use_cases = TweetUseCases(InMemoryTweetRepository(), InMemoryLikeRepository())
+
+    tweet = await use_cases.create_tweet(
+        TweetCreateDTO(content="hi", user_id=uuid.uuid4())
+    )
+
+    assert isinstance(tweet, Tweet)
+
+
+async def test_buffered_changes_count_once_their_transaction_commits():
+    """Test that rolled back transactions and savepoints take their changes"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    buffer = ActivityBuffer()
+    author = uuid.uuid4()
+    at = datetime(2025, 3, 9, 17, 45)
+    day = (author, "day", datetime(2025, 3, 9))
+
+    async with AsyncSession(engine) as session:
+        await session.execute(text("SELECT 1"))
+        buffer.add_on_commit(session, author, at, {"tweets": 1})
+        await session.rollback()
+        assert len(buffer) == 0
+
+        buffer.add_on_commit(session, author, at, {"tweets": 1})
+        async with session.begin_nested():
+            buffer.add_on_commit(session, author, at, {"likes_received": 1})
+        try:
+            async with session.begin_nested():
+                buffer.add_on_commit(session, author, at, {"retweets_received": 1})
+                raise ValueError
+        except ValueError:
+            pass
+        # Releasing the savepoint commits nothing yet.
+        assert len(buffer) == 0
+        await session.commit()
+    await engine.dispose()
+
+    changes = buffer.drain()
+    assert set(changes) == {day, (author, "hour", datetime(2025, 3, 9, 17))}
+    assert changes[day] == Counter(tweets=1, likes_received=1)
+    assert len(buffer) == 0
+
+    buffer.restore(changes)
+    buffer.restore(changes)
+    assert buffer.drain()[day] == Counter(tweets=2, likes_received=2)
+
+
+class _NoActivity:
+    async def get_user_activity(self, user_id, granularity, since, until):
+        return []
+
+
+@pytest.mark.parametrize(
+    "params, status_code",
+    [
+        ({"until": "0001-01-01T00:00:00"}, 422),
+        ({"since": "0001-01-01T00:00:00+14:00", "until": "2020-01-01T00:00:00"}, 422),
+        ({"since": "9999-12-31T00:00:00", "until": "9999-12-31T23:00:00"}, 200),
+        ({"since": "0001-01-01T00:00:00", "until": "0001-01-02T00:00:00"}, 200),
+    ],
+)
+async def test_stats_at_the_ends_of_the_datetime_range(params, status_code):
+    """Test that stats ranges near datetime.min and max answer, not overflow"""
+    app = FastAPI()
+    app.include_router(users.router)
+    app.dependency_overrides[get_read_user_use_cases] = _NoActivity
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(f"/users/{uuid.uuid4()}/stats", params=params)
+    assert response.status_code == status_code
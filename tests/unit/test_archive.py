@@ -0,0 +1,185 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.infrastructure.archive import (
+    MAGIC_V1,
+    Segment,
+    TweetArchive,
+    write_segment,
+)
+
+START = datetime(2020, 1, 1)
+
+
+def make_tweets(user_id, count, offset=0):
+    return [
+        Tweet(
+            content=f"tweet {offset + n} " + "é" * (n % 50),
+            user_id=user_id,
+            created_at=START + timedelta(hours=offset + n),
+            likes_count=n,
+            retweets_count=2 * n,
+            # As read back: archived tweets are read-only.
+            archived=True,
+        )
+        for n in range(count)
+    ]
+
+
+def downgrade(path, time_index=True):
+    """Rewrite a segment as written before replies, and the time index."""
+    segment = Segment(str(path))
+    end = segment._time_index + (4 * segment.rows if time_index else 0)
+    segment.close()
+    with open(path, "r+b") as file:
+        file.write(MAGIC_V1)
+    os.truncate(path, end)
+
+
+def test_archive_reads_tweets_back_by_id(tmp_path):
+    """Test that every archived tweet is found by id with all its columns"""
+    tweets = make_tweets(uuid.uuid4(), 300) + make_tweets(uuid.uuid4(), 5)
+    write_segment(str(tmp_path / "a.seg"), tweets, START + timedelta(days=30))
+
+    archive = TweetArchive(str(tmp_path))
+    try:
+        for tweet in tweets:
+            assert archive.get(tweet.id) == tweet
+        assert archive.get(uuid.uuid4()) is None
+        assert archive.cutoff == START + timedelta(days=30)
+    finally:
+        archive.close()
+
+
+def test_archive_pages_a_user_across_segments(tmp_path):
+    """Test that a user's tweets merge newest first over segments and ranges"""
+    user_id = uuid.uuid4()
+    older = make_tweets(user_id, 10)
+    newer = make_tweets(user_id, 10, offset=10)
+    write_segment(str(tmp_path / "a.seg"), older, START + timedelta(days=1))
+    write_segment(
+        str(tmp_path / "b.seg"),
+        newer + make_tweets(uuid.uuid4(), 3),
+        START + timedelta(days=2),
+    )
+    expected = sorted(older + newer, key=lambda t: t.created_at, reverse=True)
+
+    archive = TweetArchive(str(tmp_path))
+    try:
+        assert archive.get_by_user(user_id, 0, 100) == expected
+        assert archive.get_by_user(user_id, 8, 4) == expected[8:12]
+        window = archive.get_by_user(
+            user_id,
+            since=START + timedelta(hours=5),
+            until=START + timedelta(hours=15),
+        )
+        assert [t.created_at.hour for t in window] == list(range(14, 4, -1))
+        assert archive.get_by_user(uuid.uuid4()) == []
+    finally:
+        archive.close()
+
+
+def test_archive_pages_all_tweets_newest_first(tmp_path):
+    """Test that all tweets merge newest first, also without a time index"""
+    tweets = make_tweets(uuid.uuid4(), 30) + make_tweets(uuid.uuid4(), 30, offset=5)
+    write_segment(str(tmp_path / "a.seg"), tweets[:40], START + timedelta(days=3))
+    write_segment(str(tmp_path / "b.seg"), tweets[40:], START + timedelta(days=3))
+    downgrade(tmp_path / "b.seg", time_index=False)
+    expected = sorted(tweets, key=lambda t: (t.created_at, t.id), reverse=True)
+
+    archive = TweetArchive(str(tmp_path))
+    try:
+        assert archive.get_all(0, 100) == expected
+        assert archive.get_all(10, 5) == expected[10:15]
+        since, until = START + timedelta(hours=10), START + timedelta(hours=12)
+        window = archive.get_all(since=since, until=until)
+        assert window == [t for t in expected if since <= t.created_at < until]
+        assert len(window) == 4
+    finally:
+        archive.close()
+
+
+def test_archive_honors_tombstones_from_other_processes(tmp_path):
+    """Test that deleted tweets and users are hidden here and elsewhere"""
+    user_id, other_id = uuid.uuid4(), uuid.uuid4()
+    tweets = make_tweets(user_id, 5) + make_tweets(other_id, 5, offset=5)
+    write_segment(str(tmp_path / "a.seg"), tweets, START + timedelta(days=1))
+
+    archive = TweetArchive(str(tmp_path))
+    elsewhere = TweetArchive(str(tmp_path), refresh_seconds=0)
+    try:
+        archive.delete(tweets[1].id)
+        archive.delete_user(other_id)
+        for reader in (archive, elsewhere):
+            assert reader.get(tweets[1].id) is None
+            assert reader.get(tweets[7].id) is None
+            assert reader.get(tweets[2].id) == tweets[2]
+            assert reader.get_by_user(other_id) == []
+            assert reader.get_by_user(user_id) == [tweets[n] for n in (4, 3, 2, 0)]
+            assert reader.get_all() == [tweets[n] for n in (4, 3, 2, 0)]
+    finally:
+        archive.close()
+        elsewhere.close()
+
+
+def test_archive_keeps_replies_and_attachments(tmp_path):
+    """Test that reply columns and media ids are read back, but not from old segments"""
+    user_id = uuid.uuid4()
+    root, reply, other = make_tweets(user_id, 3)
+    root = root.model_copy(
+        update={"replies_count": 1, "media_ids": ["a" * 64 + ".png"]}
+    )
+    reply = reply.model_copy(
+        update={
+            "in_reply_to_id": root.id,
+            "conversation_id": root.id,
+            "media_ids": ["b" * 64 + ".jpg", "c" * 64 + ".mp4"],
+        }
+    )
+    write_segment(str(tmp_path / "a.seg"), [root, reply], START + timedelta(days=1))
+    write_segment(str(tmp_path / "b.seg"), [other], START + timedelta(days=1))
+    downgrade(tmp_path / "b.seg")
+
+    archive = TweetArchive(str(tmp_path))
+    try:
+        assert archive.get(root.id) == root
+        assert archive.get(reply.id) == reply
+        assert archive.get(other.id) == other
+        assert archive.get_conversation(other.id) == []
+    finally:
+        archive.close()
+
+
+def test_archive_pages_a_conversation_oldest_first(tmp_path):
+    """Test that a conversation's replies merge oldest first over segments"""
+    root = make_tweets(uuid.uuid4(), 1)[0]
+    replies = [
+        tweet.model_copy(update={"in_reply_to_id": root.id, "conversation_id": root.id})
+        for tweet in make_tweets(uuid.uuid4(), 10, offset=1)
+    ]
+    unrelated = make_tweets(uuid.uuid4(), 3)
+    unrelated[1] = unrelated[1].model_copy(
+        update={"in_reply_to_id": unrelated[0].id, "conversation_id": unrelated[0].id}
+    )
+    write_segment(
+        str(tmp_path / "a.seg"),
+        [root] + replies[::2] + unrelated,
+        START + timedelta(days=1),
+    )
+    write_segment(str(tmp_path / "b.seg"), replies[1::2], START + timedelta(days=1))
+
+    archive = TweetArchive(str(tmp_path))
+    try:
+        assert archive.get_conversation(root.id) == replies
+        assert archive.get_conversation(root.id, limit=4) == replies[:4]
+        after = (replies[3].created_at, replies[3].id)
+        assert archive.get_conversation(root.id, after, 3) == replies[4:7]
+        archive.delete(replies[5].id)
+        assert archive.get_conversation(root.id, after, 3) == [
+            replies[n] for n in (4, 6, 7)
+        ]
+        assert archive.get_conversation(unrelated[0].id) == [unrelated[1]]
+    finally:
+        archive.close()
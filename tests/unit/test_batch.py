@@ -0,0 +1,120 @@
+import uuid
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.exc import OperationalError
+
+from src.fake_twitter.domain.entities.tweet import ArchivedTweetError, Tweet
+from src.fake_twitter.infrastructure.api.dependencies import (
+    get_db_session,
+    get_tweet_use_cases,
+    get_user_use_cases,
+)
+from src.fake_twitter.infrastructure.api.v1.routes import batch
+
+
+class _Session:
+    """Counts savepoints, and those released by a failing operation."""
+
+    def __init__(self):
+        self.savepoints = 0
+        self.rolled_back = 0
+        self.commit = AsyncMock()
+        self.rollback = AsyncMock()
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        self.savepoints += 1
+        try:
+            yield
+        except Exception:
+            self.rolled_back += 1
+            raise
+
+
+def _client(session, tweets) -> AsyncClient:
+    app = FastAPI()
+    app.include_router(batch.router)
+    app.dependency_overrides[get_db_session] = lambda: session
+    app.dependency_overrides[get_tweet_use_cases] = lambda: tweets
+    app.dependency_overrides[get_user_use_cases] = lambda: AsyncMock()
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+async def test_every_operation_runs_in_a_savepoint():
+    """Test that a failing read is undone alone and the batch still commits"""
+    tweet = Tweet(content="hello", user_id=uuid.uuid4())
+    tweets = AsyncMock()
+    tweets.get_tweets_by_user.side_effect = OperationalError("SELECT", {}, None)
+    tweets.like_tweet.side_effect = [None, ValueError("User not found")]
+    tweets.retweet.return_value = tweet
+    session = _Session()
+    like = {"tweet_id": str(tweet.id), "user_id": str(uuid.uuid4())}
+
+    async with _client(session, tweets) as client:
+        response = await client.post(
+            "/batch",
+            json={
+                "operations": [
+                    {
+                        "op": "get_tweets_by_user",
+                        "args": {"user_id": str(uuid.uuid4())},
+                    },
+                    {"op": "like_tweet", "args": like},
+                    {"op": "like_tweet", "args": like},
+                    {"op": "retweet", "args": {"tweet_id": str(tweet.id)}},
+                ]
+            },
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["status"] for result in data["results"]] == [500, 404, 422, 200]
+    assert data["results"][2]["detail"] == "User not found"
+    assert data["committed"] is True
+    assert (session.savepoints, session.rolled_back) == (4, 2)
+    session.commit.assert_awaited_once()
+
+
+async def test_atomic_batches_are_refused_with_group_commit(mocker):
+    """Test that atomic batches are refused when tweets commit on their own"""
+    mocker.patch.object(batch, "get_tweet_ingestor", return_value=object())
+    tweets = AsyncMock()
+
+    async with _client(_Session(), tweets) as client:
+        response = await client.post(
+            "/batch",
+            json={
+                "atomic": True,
+                "operations": [
+                    {"op": "retweet", "args": {"tweet_id": str(uuid.uuid4())}}
+                ],
+            },
+        )
+
+    assert response.status_code == 400
+    tweets.retweet.assert_not_called()
+
+
+async def test_changes_to_archived_tweets_conflict():
+    """Test that a change to an archived tweet is answered with a 409"""
+    tweets = AsyncMock()
+    tweets.retweet.side_effect = ArchivedTweetError("Tweet is archived")
+    session = _Session()
+
+    async with _client(session, tweets) as client:
+        response = await client.post(
+            "/batch",
+            json={
+                "operations": [
+                    {"op": "retweet", "args": {"tweet_id": str(uuid.uuid4())}}
+                ]
+            },
+        )
+
+    assert response.json()["results"] == [
+        {"status": 409, "detail": "Tweet is archived", "body": None}
+    ]
+    assert session.rolled_back == 1
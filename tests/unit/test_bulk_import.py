@@ -0,0 +1,116 @@
+import json
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import AsyncMock
+from uuid import UUID
+
+import pytest
+
+from src.fake_twitter.infrastructure.database import bulk_import as module
+from src.fake_twitter.infrastructure.database.bulk_import import (
+    SyntheticData,
+    bulk_import,
+    read_rows,
+)
+
+
+def test_synthetic_data_is_deterministic():
+    """Test that the same seed generates the same rows"""
+    first = list(SyntheticData(50, 200, seed=7).rows())
+    second = list(SyntheticData(50, 200, seed=7).rows())
+    other = list(SyntheticData(50, 200, seed=8).rows())
+
+    assert first == second
+    assert first != other
+
+
+def test_synthetic_tweets_are_skewed_and_consistent():
+    """Test that a few users write most tweets and counts match the likes"""
+    data = SyntheticData(1000, 5000, seed=1)
+    rows = list(data.rows())
+    users = {row[0]: row for table, row in rows if table == "users"}
+    tweets = [row for table, row in rows if table == "tweets"]
+    likes = [row for table, row in rows if table == "likes"]
+
+    assert len(users) == 1000 and len(tweets) == 5000
+    by_author = Counter(tweet[2] for tweet in tweets)
+    assert set(by_author) <= set(users)
+    top_share = sum(n for _, n in by_author.most_common(10)) / len(tweets)
+    assert top_share > 0.2
+
+    likes_by_tweet = Counter(like[1] for like in likes)
+    assert len(set((like[0], like[1]) for like in likes)) == len(likes)
+    for tweet in tweets:
+        assert tweet[4] == likes_by_tweet[tweet[0]]
+        assert tweet[3] >= users[tweet[2]][5]
+
+
+def test_read_rows_fills_defaults(tmp_path):
+    """Test that JSON lines and CSV rows are parsed with model defaults"""
+    user_id = "0b6f6c3e-3c4a-4d4c-9b1e-2f1f2e3d4c5b"
+    jsonl = tmp_path / "tweets.jsonl"
+    jsonl.write_text(
+        json.dumps(
+            {"content": "hi", "user_id": user_id, "created_at": "2025-05-01T10:00:00"}
+        )
+        + "\n"
+    )
+    csv_file = tmp_path / "users.csv"
+    csv_file.write_text("username,email,full_name,bio\nann,ann@example.com,Ann,\n")
+
+    [tweet] = read_rows(str(jsonl), "tweets")
+    assert isinstance(tweet[0], UUID)
+    assert tweet[1:] == (
+        "hi",
+        UUID(user_id),
+        datetime(2025, 5, 1, 10),
+        0,
+        0,
+        None,
+        None,
+        0,
+    )
+
+    [user] = read_rows(str(csv_file), "users")
+    assert user[1:5] == ("ann", "ann@example.com", "Ann", None)
+    assert user[6:] == (0, 0)
+
+
+def test_read_rows_rejects_missing_required_columns(tmp_path):
+    """Test that a row without a required column is an error"""
+    path = tmp_path / "likes.csv"
+    path.write_text("user_id\n0b6f6c3e-3c4a-4d4c-9b1e-2f1f2e3d4c5b\n")
+
+    with pytest.raises(ValueError, match="likes.tweet_id"):
+        list(read_rows(str(path), "likes"))
+
+
+class _Engine:
+    """Records the statements run in its transactions."""
+
+    def __init__(self):
+        self.conn = AsyncMock()
+
+    @asynccontextmanager
+    async def begin(self):
+        yield self.conn
+
+
+async def test_bulk_import_recounts_after_loading(mocker):
+    """Test that recount=True recomputes the likes and replies counts"""
+    mocker.patch.object(module.BulkLoader, "load", return_value={"tweets": 2})
+    rebuild_rollups = mocker.patch.object(module, "rebuild_rollups")
+    mocker.patch.object(module, "analyze")
+    engine = _Engine()
+
+    assert await bulk_import(engine, [], recount=True) == {"tweets": 2}
+
+    statements = [str(call.args[0]) for call in engine.conn.execute.await_args_list]
+    assert [s.split(" = ")[0] for s in statements] == [
+        "UPDATE tweets SET likes_count",
+        "UPDATE tweets SET likes_count",
+        "UPDATE tweets SET replies_count",
+        "UPDATE tweets SET replies_count",
+    ]
+    rebuild_rollups.assert_awaited_once_with(engine, module.get_tweet_archive())
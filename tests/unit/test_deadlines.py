@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.util import greenlet_spawn
+
+from src.fake_twitter.config import Settings
+from src.fake_twitter.infrastructure.api.deadlines import (
+    DeadlineRoute,
+    request_timeout,
+)
+from src.fake_twitter.infrastructure.deadlines import (
+    Deadline,
+    apply_statement_timeouts,
+    current_deadline,
+    deadline,
+    statement_timeout_ms,
+)
+
+
+def _app() -> FastAPI:
+    router = APIRouter(route_class=DeadlineRoute)
+
+    @router.get("/slow")
+    async def slow(seconds: float):
+        await asyncio.sleep(seconds)
+        return {"deadline": current_deadline().seconds}
+
+    @router.get("/stream")
+    async def stream():
+        async def body():
+            yield b"started"
+            await asyncio.sleep(0.3)
+            yield b" finished"
+
+        return StreamingResponse(body())
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def _client(app: FastAPI) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, 10.0),
+        ("2.5", 2.5),
+        ("0", 0.1),
+        ("600", 30.0),
+        ("soon", 10.0),
+        ("nan", 10.0),
+        ("inf", 10.0),
+    ],
+)
+def test_request_timeout_is_held_within_bounds(header, expected):
+    """Test that the header is clamped, and ignored when it is not a number"""
+    assert request_timeout(10.0, header, Settings()) == expected
+
+
+async def test_slow_requests_get_504():
+    """Test that a request past its deadline is cut and answered with 504"""
+    async with _client(_app()) as client:
+        response = await client.get(
+            "/slow", params={"seconds": 5}, headers={"X-Request-Timeout": "0.1"}
+        )
+        assert response.status_code == 504
+        assert response.json() == {"detail": "Request deadline of 0.1s exceeded"}
+
+        response = await client.get(
+            "/slow", params={"seconds": 0}, headers={"X-Request-Timeout": "2"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"deadline": 2.0}
+
+
+async def test_started_responses_are_not_cut():
+    """Test that the deadline stops once the response has started"""
+    async with _client(_app()) as client:
+        response = await client.get("/stream", headers={"X-Request-Timeout": "0.1"})
+
+    assert response.status_code == 200
+    assert response.content == b"started finished"
+
+
+async def test_disconnect_cancels_the_request():
+    """Test that a client going away cancels its request without an answer"""
+    app = _app()
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/slow",
+        "raw_path": b"/slow",
+        "root_path": "",
+        "query_string": b"seconds=5",
+        "headers": [],
+        "server": ("test", 80),
+        "client": ("test", 1234),
+        "app": app,
+    }
+    disconnect = asyncio.Event()
+    sent = []
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    request = asyncio.create_task(app(scope, receive, send))
+    await asyncio.sleep(0.05)
+    disconnect.set()
+    await asyncio.wait_for(request, 1)
+
+    assert not request.cancelled()
+    assert sent == []
+
+
+class _Driver:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+
+class _Connection:
+    def __init__(self):
+        self.driver_connection = _Driver()
+
+
+class _Record:
+    def __init__(self):
+        self.info = {}
+
+
+async def test_statement_timeout_follows_the_deadline():
+    """Test that statement_timeout is only sent when the deadline changes"""
+    pool = QueuePool(_Connection)
+    apply_statement_timeouts(pool)
+    connection, record = _Connection(), _Record()
+
+    def check_out():
+        pool.dispatch.checkout(connection, record, None)
+
+    pool.dispatch.connect(connection, record)
+    with deadline(2.5):
+        await greenlet_spawn(check_out)
+        await greenlet_spawn(check_out)
+    with deadline(0.2):
+        await greenlet_spawn(check_out)
+    await greenlet_spawn(check_out)
+    await greenlet_spawn(check_out)
+
+    assert connection.driver_connection.statements == [
+        "SET statement_timeout = 2500",
+        "SET statement_timeout = 200",
+        "RESET statement_timeout",
+    ]
+    assert statement_timeout_ms(None) is None
+
+
+def test_statement_timeout_is_the_time_left():
+    """Test that a partly spent deadline leaves statements only what is left"""
+    now = time.monotonic()
+
+    assert statement_timeout_ms(Deadline(5.0, now + 0.25)) == 300
+    assert statement_timeout_ms(Deadline(5.0, now + 4.0)) == 4000
+    assert statement_timeout_ms(Deadline(5.0, now - 1.0)) == 1
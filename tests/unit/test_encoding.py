@@ -0,0 +1,110 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from httpx import ASGITransport, AsyncClient
+
+from src.fake_twitter.infrastructure.api.compression import CompressionMiddleware
+from src.fake_twitter.infrastructure.api.negotiation import preferred
+
+
+def test_preferred_follows_quality_values():
+    """Test that the highest rated offer wins and ties keep server order"""
+    offered = ["application/json", "application/msgpack"]
+
+    assert preferred(None, offered) is None
+    assert preferred("*/*", offered) == "application/json"
+    assert preferred("application/msgpack", offered) == "application/msgpack"
+    assert (
+        preferred("application/json;q=0.5, application/*", offered)
+        == "application/msgpack"
+    )
+    assert preferred("gzip;q=0, br", ["gzip"]) is None
+
+
+def test_msgpack_packs_uuids_and_datetimes_compactly():
+    """Test that UUIDs become 16 bytes and datetimes epoch microseconds"""
+    msgpack = pytest.importorskip("msgpack")
+    from src.fake_twitter.infrastructure.api.rendering import packb
+
+    tweet_id = uuid.uuid4()
+    moment = datetime(2026, 1, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+
+    data = msgpack.unpackb(packb({"id": tweet_id, "created_at": moment}))
+
+    assert data["id"] == tweet_id.bytes
+    assert data["created_at"] == int(moment.timestamp()) * 1_000_000 + 6
+
+
+def _app(body: str) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/")
+    async def root():
+        return PlainTextResponse(body)
+
+    return app
+
+
+async def _get(app: FastAPI, accept_encoding: str):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        return await client.get("/", headers={"Accept-Encoding": accept_encoding})
+
+
+async def test_compresses_only_above_minimum_size():
+    """Test that small bodies are sent as they are"""
+    small = await _get(_app("tweet"), "gzip")
+    large = await _get(_app("tweet " * 100), "gzip")
+
+    assert "content-encoding" not in small.headers
+    assert small.headers["vary"] == "Accept-Encoding"
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.text == "tweet " * 100
+    assert int(large.headers["content-length"]) < len("tweet " * 100)
+
+
+async def test_repeated_bodies_come_from_the_cache():
+    """Test that an identical body is compressed once"""
+    app = _app("tweet " * 100)
+    for _ in range(3):
+        response = await _get(app, "gzip")
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == "tweet " * 100
+
+    served = app.middleware_stack
+    while not isinstance(served, CompressionMiddleware):
+        served = served.app
+    assert (served.cache.misses, served.cache.hits) == (1, 2)
+
+
+async def test_file_bodies_pass_through():
+    """Test that a body sent by path follows its response start uncompressed"""
+
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send({"type": "http.response.pathsend", "path": "/srv/file.txt"})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    await CompressionMiddleware(app)(scope, None, send)
+
+    assert [message["type"] for message in messages] == [
+        "http.response.start",
+        "http.response.pathsend",
+    ]
+    assert (b"vary", b"Accept-Encoding") in messages[0]["headers"]
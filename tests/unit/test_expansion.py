@@ -0,0 +1,96 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from src.fake_twitter.application.dtos.tweet_dtos import TweetResponseDTO
+from src.fake_twitter.domain.entities.user import User
+from src.fake_twitter.infrastructure.api.expansion import (
+    Expander,
+    UserLoader,
+    expansions,
+)
+
+
+class InMemoryUserUseCases:
+    def __init__(self, users):
+        self.users = {user.id: user for user in users}
+        self.queries = []
+
+    async def get_users_by_ids(self, user_ids):
+        self.queries.append(list(user_ids))
+        return [self.users[i] for i in user_ids if i in self.users]
+
+
+def make_user(name):
+    return User(username=name, email=f"{name}@example.com", full_name=name.title())
+
+
+def make_tweet(user_id):
+    return TweetResponseDTO(
+        id=uuid.uuid4(),
+        content="hello",
+        user_id=user_id,
+        created_at=datetime.now(),
+        likes_count=0,
+        retweets_count=0,
+    )
+
+
+async def test_authors_of_a_page_are_loaded_with_one_query():
+    """Test that distinct authors are queried once and cached for the request"""
+    alice, bob = make_user("alice"), make_user("bob")
+    use_cases = InMemoryUserUseCases([alice, bob])
+    gone = uuid.uuid4()
+    expander = Expander({"user"}, UserLoader(use_cases))
+
+    page = [make_tweet(alice.id), make_tweet(bob.id), make_tweet(alice.id)]
+    page.append(make_tweet(gone))
+    await expander.tweets(page)
+    await expander.tweet(make_tweet(bob.id))
+
+    assert use_cases.queries == [[alice.id, bob.id, gone]]
+    assert [t.user.username if t.user else None for t in page] == [
+        "alice",
+        "bob",
+        "alice",
+        None,
+    ]
+    assert page[0].user.model_dump() == {
+        "id": alice.id,
+        "username": "alice",
+        "full_name": "Alice",
+    }
+
+
+async def test_nothing_is_loaded_without_expand():
+    """Test that tweets are left alone when expand is not asked for"""
+    use_cases = InMemoryUserUseCases([])
+    tweet = make_tweet(uuid.uuid4())
+
+    await Expander(set(), UserLoader(use_cases)).tweets([tweet])
+
+    assert use_cases.queries == []
+    assert tweet.user is None
+
+
+async def test_partial_tweets_need_their_user_id():
+    """Test expanding partial tweets with and without user_id among the fields"""
+    alice = make_user("alice")
+    expander = Expander({"user"}, UserLoader(InMemoryUserUseCases([alice])))
+
+    [row] = await expander.partial([{"content": "hi", "user_id": alice.id}])
+    assert row["user"]["username"] == "alice"
+
+    with pytest.raises(HTTPException) as error:
+        await expander.partial([{"content": "hi"}])
+    assert error.value.status_code == 422
+
+
+def test_unknown_expansions_are_rejected():
+    """Test parsing the expand parameter"""
+    assert expansions(None) == set()
+    assert expansions("user, user") == {"user"}
+    with pytest.raises(HTTPException):
+        expansions("likes")
@@ -0,0 +1,97 @@
+import asyncio
+import contextvars
+import uuid
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.infrastructure.ingest import GroupCommitIngestor
+
+
+class RecordingWriter:
+    def __init__(self, reject=None, error=None):
+        self.batches = []
+        self.attempts = 0
+        self.reject = reject
+        self.error = error
+
+    async def __call__(self, tweets):
+        await asyncio.sleep(0)
+        self.attempts += 1
+        if self.error is not None:
+            raise self.error
+        if any(tweet.content == self.reject for tweet in tweets):
+            raise IntegrityError("INSERT", {}, Exception("rejected"))
+        self.batches.append([tweet.id for tweet in tweets])
+        return tweets
+
+
+def make_tweet(content="hello"):
+    return Tweet(content=content, user_id=uuid.uuid4())
+
+
+async def test_concurrent_submissions_share_a_commit():
+    """Test that tweets submitted together are written in batches of the max size"""
+    writer = RecordingWriter()
+    ingestor = GroupCommitIngestor(writer, max_batch_size=4, max_delay=0.05)
+    tweets = [make_tweet() for _ in range(10)]
+
+    stored = await asyncio.gather(*(ingestor.submit(tweet) for tweet in tweets))
+    await ingestor.close()
+
+    assert stored == tweets
+    assert [len(batch) for batch in writer.batches] == [4, 4, 2]
+    assert ingestor.metrics.snapshot()["tweets"] == 10
+
+
+async def test_failing_tweet_only_fails_its_own_submission():
+    """Test that a rejected batch is split until the bad tweet is alone"""
+    writer = RecordingWriter(reject="bad")
+    ingestor = GroupCommitIngestor(writer, max_batch_size=8, max_delay=0.01)
+    contents = ["ok"] * 5 + ["bad"] + ["ok"] * 2
+
+    results = await asyncio.gather(
+        *(ingestor.submit(make_tweet(content)) for content in contents),
+        return_exceptions=True,
+    )
+    await ingestor.close()
+
+    assert isinstance(results[5], IntegrityError)
+    assert all(isinstance(result, Tweet) for result in results[:5] + results[6:])
+    assert ingestor.metrics.failed == 1
+    # 8, then 4 + 4, then 2 + 2 of the bad half, then 1 + 1 of the bad quarter.
+    assert [len(batch) for batch in writer.batches] == [4, 1, 2]
+    assert writer.attempts == 7
+
+
+async def test_unavailable_database_fails_the_whole_batch_once():
+    """Test that a batch failing for another reason is not retried"""
+    error = OperationalError("INSERT", {}, Exception("connection lost"))
+    writer = RecordingWriter(error=error)
+    ingestor = GroupCommitIngestor(writer, max_batch_size=8, max_delay=0.01)
+
+    results = await asyncio.gather(
+        *(ingestor.submit(make_tweet()) for _ in range(6)), return_exceptions=True
+    )
+    await ingestor.close()
+
+    assert all(result is error for result in results)
+    assert writer.attempts == 1
+    assert ingestor.metrics.failed == 6
+
+
+async def test_committer_does_not_inherit_the_submitters_context():
+    """Test that batches run outside the context of the first submission"""
+    request_id = contextvars.ContextVar("request_id", default=None)
+    seen = []
+
+    async def write(tweets):
+        seen.append(request_id.get())
+        return tweets
+
+    ingestor = GroupCommitIngestor(write, max_batch_size=1, max_delay=0.01)
+    request_id.set("first request")
+    await ingestor.submit(make_tweet())
+    await ingestor.close()
+
+    assert seen == [None]
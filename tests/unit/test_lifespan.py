@@ -0,0 +1,67 @@
+from unittest.mock import AsyncMock
+
+from httpx import ASGITransport, AsyncClient
+
+from src.fake_twitter.main import create_app
+
+
+async def test_ready_only_after_warm_up(mocker):
+    """Test that /ready reports ready only while the lifespan has warmed up"""
+    warm_connections = mocker.patch(
+        "src.fake_twitter.main.warm_connections", new=AsyncMock()
+    )
+    dispose_engine = mocker.patch(
+        "src.fake_twitter.main.dispose_engine", new=AsyncMock()
+    )
+    mocker.patch("src.fake_twitter.main.get_session_maker")
+    refresh = mocker.patch(
+        "src.fake_twitter.main.refresh_top_tweets_periodically", new=AsyncMock()
+    )
+    app = create_app()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        assert (await client.get("/ready")).status_code == 503
+        assert (await client.get("/health")).status_code == 200
+
+        async with app.router.lifespan_context(app):
+            response = await client.get("/ready")
+            assert response.status_code == 200
+            assert response.json() == {"status": "ready"}
+
+        assert (await client.get("/ready")).status_code == 503
+
+    warm_connections.assert_awaited_once()
+    dispose_engine.assert_awaited_once()
+    refresh.assert_called_once()
+
+
+async def test_shard_pools_are_warmed_up(mocker):
+    """Test that every tweet shard's pool is warmed up besides the main one"""
+    warm_connections = mocker.patch(
+        "src.fake_twitter.main.warm_connections", new=AsyncMock()
+    )
+    mocker.patch("src.fake_twitter.main.dispose_engine", new=AsyncMock())
+    mocker.patch("src.fake_twitter.main.dispose_shard_set", new=AsyncMock())
+    main_sessions = mocker.patch("src.fake_twitter.main.get_session_maker")
+    shards = mocker.patch("src.fake_twitter.main.get_shard_set").return_value
+    shards.session_makers = {"s0": mocker.sentinel.s0, "s1": mocker.sentinel.s1}
+    mocker.patch(
+        "src.fake_twitter.main.refresh_top_tweets_periodically", new=AsyncMock()
+    )
+    app = create_app()
+
+    async with app.router.lifespan_context(app):
+        pass
+
+    warmed = [call.args[0] for call in warm_connections.await_args_list]
+    assert warmed == [
+        main_sessions.return_value,
+        mocker.sentinel.s0,
+        mocker.sentinel.s1,
+    ]
+    assert all(
+        call.kwargs == {"tweets_only": True}
+        for call in warm_connections.await_args_list[1:]
+    )
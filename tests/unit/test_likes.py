@@ -0,0 +1,105 @@
+import uuid
+
+from src.fake_twitter.domain.repositories.like_repository import LikeRepository
+from src.fake_twitter.infrastructure.bloom import BloomFilter
+from src.fake_twitter.infrastructure.repositories.bloom_like_repository import (
+    BloomFilteredLikeRepository,
+    LikeFilterCache,
+)
+
+
+class InMemoryLikeRepository(LikeRepository):
+    def __init__(self):
+        self.likes = set()
+        self.queries = 0
+
+    async def add(self, tweet_id, user_id):
+        added = (user_id, tweet_id) not in self.likes
+        self.likes.add((user_id, tweet_id))
+        return added
+
+    async def remove(self, tweet_id, user_id):
+        removed = (user_id, tweet_id) in self.likes
+        self.likes.discard((user_id, tweet_id))
+        return removed
+
+    async def get_liked_tweet_ids(self, user_id, tweet_ids):
+        self.queries += 1
+        return {t for t in tweet_ids if (user_id, t) in self.likes}
+
+    async def get_all_liked_tweet_ids(self, user_id, limit):
+        self.queries += 1
+        return [t for u, t in self.likes if u == user_id][:limit]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test that every added item is reported present and few others are"""
+    items = [uuid.uuid4().bytes for _ in range(1000)]
+    bloom = BloomFilter.from_items(items, capacity=1000, error_rate=0.01)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(uuid.uuid4().bytes in bloom for _ in range(10000))
+    assert false_positives < 300
+
+
+async def test_feed_lookup_costs_at_most_one_query():
+    """Test that a cold and a warm 100-tweet lookup each take one query"""
+    likes = InMemoryLikeRepository()
+    repository = BloomFilteredLikeRepository(likes, LikeFilterCache())
+    user_id = uuid.uuid4()
+    feed = [uuid.uuid4() for _ in range(100)]
+    await repository.add(feed[3], user_id)
+    await repository.add(feed[42], user_id)
+
+    assert await repository.get_liked_tweet_ids(user_id, feed) == {feed[3], feed[42]}
+    assert likes.queries == 1
+
+    assert await repository.get_liked_tweet_ids(user_id, feed) == {feed[3], feed[42]}
+    assert likes.queries == 2
+
+    # A like made after the filter was loaded is seen by this process.
+    await repository.add(feed[7], user_id)
+    liked = await repository.get_liked_tweet_ids(user_id, feed)
+    assert liked == {feed[3], feed[7], feed[42]}
+
+
+async def test_lookup_without_likes_needs_no_query_once_cached():
+    """Test that the filter alone answers when nothing in the feed was liked"""
+    likes = InMemoryLikeRepository()
+    repository = BloomFilteredLikeRepository(likes, LikeFilterCache())
+    user_id = uuid.uuid4()
+    await repository.add(uuid.uuid4(), user_id)
+
+    await repository.get_liked_tweet_ids(user_id, [uuid.uuid4()])
+    queries = likes.queries
+    assert await repository.get_liked_tweet_ids(user_id, [uuid.uuid4()]) == set()
+    assert likes.queries == queries
+
+
+async def test_heavy_likers_are_looked_up_directly():
+    """Test that users with more likes than a filter holds skip the filter"""
+    likes = InMemoryLikeRepository()
+    repository = BloomFilteredLikeRepository(likes, LikeFilterCache(max_likes=5))
+    user_id = uuid.uuid4()
+    liked = [uuid.uuid4() for _ in range(10)]
+    for tweet_id in liked:
+        await repository.add(tweet_id, user_id)
+
+    assert await repository.get_liked_tweet_ids(user_id, liked[:3]) == set(liked[:3])
+    queries = likes.queries
+    assert await repository.get_liked_tweet_ids(user_id, liked[3:6]) == set(liked[3:6])
+    assert likes.queries == queries + 1
+
+
+def test_filter_cache_evicts_least_recently_used():
+    """Test that the cache keeps at most max_users filters"""
+    cache = LikeFilterCache(max_users=2)
+    first, second, third = (uuid.uuid4() for _ in range(3))
+    cache.put(first, [])
+    cache.put(second, [])
+    cache.get(first)
+    cache.put(third, [])
+
+    assert len(cache) == 2
+    assert cache.get(second) is None
+    assert cache.get(first) is not None
@@ -0,0 +1,109 @@
+import json
+import logging
+import queue
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.fake_twitter.infrastructure.api.logs import RequestIdMiddleware
+from src.fake_twitter.infrastructure.logs import (
+    ContextFilter,
+    JsonFormatter,
+    LogQueueHandler,
+    RepeatFilter,
+    SamplingFilter,
+    current_request_id,
+    request_id,
+)
+
+
+def _record(msg="message %s", args=("a",), level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    vars(record).update(extra)
+    return record
+
+
+def test_json_lines_carry_ids_and_extra_fields():
+    """Test that records are formatted as JSON with their context"""
+    context = ContextFilter()
+    with request_id("req-1"):
+        record = _record(user_id="u1")
+        context.filter(record)
+
+    line = json.loads(JsonFormatter().format(record))
+
+    assert line["message"] == "message a"
+    assert line["level"] == "INFO"
+    assert line["request_id"] == "req-1"
+    assert line["user_id"] == "u1"
+    assert "trace_id" not in line
+
+
+def test_sampling_keeps_whole_requests():
+    """Test that a request's records are all kept or all dropped"""
+    sampling = SamplingFilter({"info": 0.5})
+
+    kept = {}
+    for i in range(200):
+        decisions = {sampling.filter(_record(request_id=f"req-{i}")) for _ in range(5)}
+        assert len(decisions) == 1
+        kept[i] = decisions.pop()
+
+    assert 50 < sum(kept.values()) < 150
+    assert sampling.filter(_record(level=logging.WARNING, request_id="req-0"))
+
+
+def test_repeated_warnings_are_held_back():
+    """Test that repeats past the burst are suppressed, then counted"""
+    repeats = RepeatFilter(burst=3, interval=60.0)
+
+    passed = [repeats.filter(_record(level=logging.ERROR)) for _ in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    assert all(repeats.filter(_record()) for _ in range(10))
+
+    repeats.interval = 0.0
+    record = _record(level=logging.ERROR)
+    assert repeats.filter(record)
+    assert record.suppressed == 7
+
+
+def test_full_queue_drops_records_without_blocking():
+    """Test that records past the queue size are counted, not waited for"""
+    handler = LogQueueHandler(queue_size=2)
+    handler._listener.stop()
+    handler.queue = queue.Queue(2)
+    try:
+        for i in range(5):
+            handler.handle(_record(args=(i,)))
+
+        assert handler.dropped == 3
+        assert handler.queue.get_nowait().getMessage() == "message 0"
+        handler.handle(_record(args=("after",)))
+        assert handler.queue.get_nowait().getMessage() == "message 1"
+        record = handler.queue.get_nowait()
+        assert record.getMessage() == "message after"
+        assert record.dropped == 3
+    finally:
+        handler._start()
+        handler.close()
+
+
+async def test_request_id_is_current_and_returned():
+    """Test that requests get an id, the caller's when it is usable"""
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/")
+    async def root():
+        return {"request_id": current_request_id()}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/", headers={"X-Request-ID": "abc-123"})
+        assert response.headers["x-request-id"] == "abc-123"
+        assert response.json() == {"request_id": "abc-123"}
+
+        response = await client.get("/", headers={"X-Request-ID": "no spaces"})
+        generated = response.headers["x-request-id"]
+        assert generated != "no spaces"
+        assert response.json() == {"request_id": generated}
@@ -0,0 +1,233 @@
+import hashlib
+import os
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.fake_twitter.application.dtos.tweet_dtos import TweetCreateDTO
+from src.fake_twitter.application.use_cases.tweet_use_cases import TweetUseCases
+from src.fake_twitter.domain.entities.media import Media
+from src.fake_twitter.infrastructure.api.files import (
+    MediaFileResponse,
+    RangeNotSatisfiable,
+    byte_range,
+)
+from src.fake_twitter.infrastructure.api.v1.routes.media import (
+    require_media_store,
+    router,
+)
+from src.fake_twitter.infrastructure.media import LocalMediaStore, sniff
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40
+
+
+def _app(store: LocalMediaStore) -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[require_media_store] = lambda: store
+    return app
+
+
+def _client(app: FastAPI) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_sniff_recognizes_accepted_types_only():
+    """Test that the type comes from the first bytes of the file"""
+    assert sniff(b"\xff\xd8\xff\xe0\x00\x10JFIF\x00") == "jpg"
+    assert sniff(PNG) == "png"
+    assert sniff(b"GIF89a\x01\x00\x01\x00") == "gif"
+    assert sniff(b"RIFF\x24\x00\x00\x00WEBPVP8 ") == "webp"
+    assert sniff(b"\x00\x00\x00\x20ftypisom") == "mp4"
+    assert sniff(b"<svg xmlns=") is None
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("bytes=0-9", (0, 10)),
+        ("bytes=90-", (90, 100)),
+        ("bytes=-10", (90, 100)),
+        ("bytes=-500", (0, 100)),
+        ("bytes=95-200", (95, 100)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-9", None),
+        ("bytes=9-0", None),
+        ("bytes=x-", None),
+    ],
+)
+def test_byte_range(header, expected):
+    """Test that single ranges are clamped and anything else means all"""
+    assert byte_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=-0"])
+def test_byte_range_past_the_end(header):
+    """Test that ranges starting past the end are not satisfiable"""
+    with pytest.raises(RangeNotSatisfiable):
+        byte_range(header, 100)
+
+
+def test_store_keeps_one_copy_per_content(tmp_path):
+    """Test that uploads are stored under their digest, once"""
+    store = LocalMediaStore(str(tmp_path), max_bytes=1 << 20)
+
+    ids = []
+    for _ in range(2):
+        writer = store.writer()
+        writer.write(PNG[:100])
+        writer.write(PNG[100:])
+        ids.append(writer.commit("png").id)
+
+    assert ids[0] == ids[1] == f"{hashlib.sha256(PNG).hexdigest()}.png"
+    with open(store.path(ids[0]), "rb") as file:
+        assert file.read() == PNG
+    assert os.listdir(store.incoming) == []
+
+
+async def test_upload_and_download_with_ranges(tmp_path):
+    """Test the upload, conditional and ranged reads of a media file"""
+    store = LocalMediaStore(str(tmp_path), max_bytes=1 << 20)
+    async with _client(_app(store)) as client:
+        response = await client.post(
+            "/media/",
+            data={"alt": "a picture"},
+            files={"file": ("picture.bin", PNG, "application/octet-stream")},
+        )
+        assert response.status_code == 201
+        media = response.json()
+        assert media == {
+            "id": f"{hashlib.sha256(PNG).hexdigest()}.png",
+            "content_type": "image/png",
+            "size": len(PNG),
+        }
+
+        response = await client.get(f"/media/{media['id']}")
+        assert response.status_code == 200
+        assert response.content == PNG
+        assert response.headers["content-type"] == "image/png"
+        assert "immutable" in response.headers["cache-control"]
+        etag = response.headers["etag"]
+
+        response = await client.get(
+            f"/media/{media['id']}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+
+        response = await client.get(
+            f"/media/{media['id']}", headers={"Range": "bytes=8-15"}
+        )
+        assert response.status_code == 206
+        assert response.content == PNG[8:16]
+        assert response.headers["content-range"] == f"bytes 8-15/{len(PNG)}"
+
+        response = await client.get(
+            f"/media/{media['id']}",
+            headers={"Range": "bytes=8-15", "If-Range": '"stale"'},
+        )
+        assert response.status_code == 200
+
+        response = await client.get(
+            f"/media/{media['id']}", headers={"Range": f"bytes={len(PNG)}-"}
+        )
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(PNG)}"
+
+        response = await client.get(f"/media/{'0' * 64}.png")
+        assert response.status_code == 404
+        response = await client.get("/media/../../etc/passwd")
+        assert response.status_code == 404
+
+
+async def test_upload_refuses_other_types_and_large_files(tmp_path):
+    """Test that refused uploads leave nothing behind"""
+    store = LocalMediaStore(str(tmp_path), max_bytes=len(PNG) - 1)
+    async with _client(_app(store)) as client:
+        response = await client.post(
+            "/media/", files={"file": ("page.html", b"<html>" * 10, "image/png")}
+        )
+        assert response.status_code == 415
+
+        response = await client.post(
+            "/media/", files={"file": ("picture.png", PNG, "image/png")}
+        )
+        assert response.status_code == 413
+
+        response = await client.post("/media/", data={"other": "field"}, files={})
+        assert response.status_code == 415
+
+    assert os.listdir(store.incoming) == []
+    assert sorted(os.listdir(tmp_path)) == ["incoming"]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"not a multipart body",
+        b"--x\r\nContent-Disposition: form-data; name=file\r\n\r\n"
+        + PNG
+        + b"\r\n--x\r\nnot a header\r\n\r\n",
+    ],
+    ids=["no boundary", "bad part header"],
+)
+async def test_upload_refuses_malformed_bodies(tmp_path, body):
+    """Test that a body the multipart parser rejects answers 400"""
+    store = LocalMediaStore(str(tmp_path), max_bytes=1 << 20)
+    async with _client(_app(store)) as client:
+        response = await client.post(
+            "/media/",
+            content=body,
+            headers={"Content-Type": "multipart/form-data; boundary=x"},
+        )
+        assert response.status_code == 400
+
+    assert os.listdir(store.incoming) == []
+
+
+async def test_zero_copy_send_when_the_server_offers_it(tmp_path):
+    """Test that the file descriptor is handed to the server for ranges"""
+    path = tmp_path / "file.png"
+    path.write_bytes(PNG)
+    response = MediaFileResponse(str(path), Media(id="a" * 64 + ".png", size=len(PNG)))
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"range", b"bytes=10-19")],
+        "extensions": {"http.response.zerocopysend": {}},
+    }
+    messages = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message = {**message, "data": os.pread(message["file"].fileno(), 10, 10)}
+        messages.append(message)
+
+    await response(scope, None, send)
+
+    assert messages[0]["status"] == 206
+    assert messages[1]["offset"] == 10
+    assert messages[1]["count"] == 10
+    assert messages[1]["data"] == PNG[10:20]
+
+
+class _NoMedia:
+    async def get(self, media_id):
+        return None
+
+    async def missing(self, media_ids):
+        return list(media_ids)
+
+
+async def test_tweets_only_attach_uploaded_media():
+    """Test that creating a tweet with unknown media is refused"""
+    use_cases = TweetUseCases(None, None, media_store=_NoMedia())
+    tweet_dto = TweetCreateDTO(
+        content="look", user_id=uuid4(), media_ids=[f"{'0' * 64}.jpg"]
+    )
+
+    with pytest.raises(ValueError, match="Media not found"):
+        await use_cases.create_tweet(tweet_dto)
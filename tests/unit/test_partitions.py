@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from src.fake_twitter.infrastructure.database.partitions import (
+    planned_partitions,
+    retention_cutoff,
+)
+
+
+def test_planned_monthly_partitions_cross_year_boundary():
+    """Test that monthly partitions are contiguous across the year end"""
+    partitions = planned_partitions(datetime(2026, 11, 30, 17, 5), periods_ahead=2)
+
+    assert [partition.name for partition in partitions] == [
+        "tweets_p20261101",
+        "tweets_p20261201",
+        "tweets_p20270101",
+    ]
+    assert partitions[0].end == partitions[1].start
+    assert partitions[-1].end == datetime(2027, 2, 1)
+
+
+def test_planned_weekly_partitions_start_on_monday():
+    """Test that weekly partitions are aligned on Mondays"""
+    partitions = planned_partitions(datetime(2026, 10, 22), 0, interval="week")
+
+    assert partitions[0].start == datetime(2026, 10, 19)
+    assert partitions[0].end == datetime(2026, 10, 26)
+
+
+def test_retention_cutoff():
+    """Test the start of the oldest retained period"""
+    assert retention_cutoff(datetime(2026, 3, 15), 24, "month") == datetime(2024, 3, 1)
+    assert retention_cutoff(datetime(2026, 3, 15), 0, "day") == datetime(2026, 3, 15)
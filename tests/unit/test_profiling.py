@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.fake_twitter.infrastructure.api.profiling import (
+    WAITING,
+    Profiler,
+    ProfilingMiddleware,
+)
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def make_app(profiler, **options):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        busy(0.03)
+        await asyncio.sleep(0.03)
+        return {"id": item_id}
+
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, **options)
+    return app
+
+
+async def test_sampled_requests_are_profiled_per_route():
+    """Test that sampled requests record running and awaiting stacks by route"""
+    profiler = Profiler(interval=0.001)
+    app = make_app(profiler, sample_rate=1.0)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        for item_id in range(3):
+            assert (await client.get(f"/items/{item_id}")).status_code == 200
+
+    [route] = profiler.summary()
+    assert route["route"] == "GET /items/{item_id}"
+    assert route["requests"] == 3
+    assert route["mean_ms"] >= 60
+    assert route["samples"] > 0
+
+    folded = profiler.folded("GET /items/{item_id}").splitlines()
+    assert any("get_item" in line and "busy" in line for line in folded)
+    assert any("get_item" in line and WAITING in line for line in folded)
+    for line in folded:
+        _, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert profiler.folded().startswith(
+        "GET /items/{item_id};ProfilingMiddleware.__call__"
+    )
+
+
+async def test_header_selects_requests_to_profile():
+    """Test that only requests with the admin token in X-Profile are profiled"""
+    profiler = Profiler(interval=0.001)
+    app = make_app(profiler, token="secret")
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        await client.get("/items/1")
+        await client.get("/items/1", headers={"X-Profile": "wrong"})
+        assert profiler.summary() == []
+
+        await client.get("/items/1", headers={"X-Profile": "secret"})
+
+    assert [route["requests"] for route in profiler.summary()] == [1]
+    profiler.reset()
+    assert profiler.folded() == ""
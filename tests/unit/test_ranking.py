@@ -0,0 +1,147 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.fake_twitter.application.use_cases.tweet_use_cases import TweetUseCases
+from src.fake_twitter.application.use_cases.user_use_cases import UserUseCases
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.infrastructure.database.on_commit import AfterCommit
+from src.fake_twitter.infrastructure.ranking import InMemoryTweetRanking
+
+
+def make_tweet(likes=0, retweets=0, age=timedelta(0)):
+    return Tweet(
+        content="hello",
+        user_id=uuid.uuid4(),
+        likes_count=likes,
+        retweets_count=retweets,
+        created_at=datetime.now() - age,
+    )
+
+
+class CandidateRepository:
+    def __init__(self, tweets):
+        self.tweets = tweets
+        self.calls = []
+
+    async def get_top_candidates(self, since, now, limit):
+        self.calls.append((now - since, limit))
+        return [tweet for tweet in self.tweets if tweet.created_at >= since][:limit]
+
+
+def test_top_orders_by_decayed_engagement():
+    """Test that newer tweets outrank older ones with the same engagement"""
+    ranking = InMemoryTweetRanking(rerank_seconds=0)
+    old = make_tweet(likes=10, age=timedelta(hours=6))
+    new = make_tweet(likes=10, age=timedelta(minutes=5))
+    retweeted = make_tweet(retweets=6, age=timedelta(minutes=5))
+    for tweet in (old, new, retweeted):
+        ranking.record(tweet)
+
+    assert ranking.top("24h", 10) == [retweeted, new, old]
+    assert ranking.top("1h", 10) == [retweeted, new]
+    assert ranking.top("24h", 1) == [retweeted]
+
+
+def test_events_update_and_discard_candidates():
+    """Test that recorded changes re-rank a tweet and discarded tweets drop out"""
+    ranking = InMemoryTweetRanking(rerank_seconds=0)
+    first, second = make_tweet(likes=2), make_tweet(likes=1)
+    ranking.record(first)
+    ranking.record(second)
+    assert ranking.top("24h", 10) == [first, second]
+
+    second.likes_count = 5
+    ranking.record(second)
+    assert ranking.top("24h", 10) == [second, first]
+
+    first.likes_count = 0
+    ranking.record(first)
+    ranking.discard(second.id)
+    assert ranking.top("24h", 10) == []
+
+
+def test_candidates_are_trimmed_to_capacity():
+    """Test that a window keeps only the best candidates once well over capacity"""
+    ranking = InMemoryTweetRanking(capacity=2, rerank_seconds=0)
+    tweets = [make_tweet(likes=likes) for likes in range(1, 6)]
+    for tweet in tweets:
+        ranking.record(tweet)
+
+    assert ranking.top("7d", 10)[:2] == [tweets[4], tweets[3]]
+    assert len(ranking.top("7d", 10)) <= 4
+
+
+async def test_refresh_replaces_every_window():
+    """Test that the periodic recompute replaces the candidates of each window"""
+    ranking = InMemoryTweetRanking(capacity=50, rerank_seconds=0)
+    stale = make_tweet(likes=100)
+    ranking.record(stale)
+    fresh = make_tweet(likes=3, age=timedelta(minutes=30))
+    older = make_tweet(likes=3, age=timedelta(hours=3))
+    repository = CandidateRepository([fresh, older])
+    use_cases = TweetUseCases(repository, None, tweet_ranking=ranking)
+
+    await use_cases.refresh_top_tweets()
+
+    assert await use_cases.get_top_tweets("1h", 10) == [fresh]
+    assert await use_cases.get_top_tweets("24h", 10) == [fresh, older]
+    assert sorted(repository.calls) == [
+        (timedelta(hours=1), 50),
+        (timedelta(hours=24), 50),
+        (timedelta(days=7), 50),
+    ]
+
+
+async def test_ranking_follows_only_committed_writes():
+    """Test that a tweet recorded in a rolled back savepoint is not ranked"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    ranking = InMemoryTweetRanking(rerank_seconds=0)
+    kept, undone = make_tweet(likes=2), make_tweet(likes=3)
+
+    async with AsyncSession(engine) as session:
+        deferred = AfterCommit(ranking, session, ("record",))
+        deferred.record(kept)
+        try:
+            async with session.begin_nested():
+                deferred.record(undone)
+                raise ValueError
+        except ValueError:
+            pass
+        assert deferred.top("24h", 10) == []
+        await session.commit()
+    await engine.dispose()
+
+    assert ranking.top("24h", 10) == [kept]
+
+
+class _Deletions:
+    def __init__(self):
+        self.deleted = []
+
+    async def get_by_id(self, user_id):
+        return None
+
+    async def delete(self, user_id):
+        self.deleted.append(user_id)
+        return True
+
+    async def delete_by_user(self, user_id):
+        self.deleted.append(user_id)
+        return 2
+
+
+async def test_deleting_a_user_hides_their_tweets_at_once():
+    """Test that a deleted user's tweets are tombstoned and leave the ranking"""
+    ranking = InMemoryTweetRanking(rerank_seconds=0)
+    gone, kept = make_tweet(likes=5), make_tweet(likes=1)
+    for tweet in (gone, kept):
+        ranking.record(tweet)
+    users, tweets = _Deletions(), _Deletions()
+
+    use_cases = UserUseCases(users, tweet_repository=tweets, tweet_ranking=ranking)
+    assert await use_cases.delete_user(gone.user_id)
+
+    assert users.deleted == tweets.deleted == [gone.user_id]
+    assert ranking.top("24h", 10) == [kept]
@@ -0,0 +1,42 @@
+from src.fake_twitter.serving import (
+    PoolLimits,
+    compute_pool_limits,
+    compute_worker_count,
+)
+
+
+def test_worker_count_follows_cpu_count():
+    """Test one worker per core when the connection budget allows it"""
+    assert compute_worker_count(8, db_max_connections=100, reserved=10) == 8
+
+
+def test_worker_count_capped_by_connection_budget():
+    """Test that every worker keeps at least two connections"""
+    assert compute_worker_count(32, db_max_connections=40, reserved=10) == 15
+
+
+def test_worker_count_override():
+    """Test that an explicit worker count wins over autotuning"""
+    assert compute_worker_count(32, db_max_connections=40, override=3) == 3
+    assert compute_worker_count(None, db_max_connections=100) == 1
+
+
+def test_worker_count_override_capped_by_connection_budget():
+    """Test that a pinned worker count never outgrows the connection budget"""
+    workers = compute_worker_count(8, db_max_connections=20, reserved=10, override=64)
+
+    assert workers == 10
+    assert compute_pool_limits(workers, 20, reserved=10).total * workers <= 10
+
+
+def test_pool_limits_split_budget_across_workers():
+    """Test that the pools of all workers fit in the connection budget"""
+    limits = compute_pool_limits(8, db_max_connections=100, reserved=10)
+
+    assert limits == PoolLimits(pool_size=8, max_overflow=3)
+    assert limits.total * 8 <= 90
+
+
+def test_pool_limits_never_empty():
+    """Test that a worker always gets at least one connection"""
+    assert compute_pool_limits(64, db_max_connections=10) == PoolLimits(1, 0)
@@ -0,0 +1,49 @@
+import uuid
+from collections import Counter
+
+from src.fake_twitter.infrastructure.database.sharding import (
+    NUM_BUCKETS,
+    HashRing,
+    bucket_for_tweet,
+    bucket_for_user,
+    bucket_id_range,
+    make_tweet_id,
+)
+
+
+def test_tweet_id_embeds_bucket():
+    """Test that tweet ids carry their bucket and stay version 4 UUIDs"""
+    for bucket in (0, 1, 511, NUM_BUCKETS - 1):
+        tweet_id = make_tweet_id(bucket)
+        low, high = bucket_id_range(bucket)
+
+        assert bucket_for_tweet(tweet_id) == bucket
+        assert tweet_id.version == 4
+        assert low <= tweet_id <= high
+
+
+def test_user_bucket_is_stable():
+    """Test that a user always hashes into the same bucket"""
+    user_id = uuid.uuid4()
+
+    assert bucket_for_user(user_id) == bucket_for_user(uuid.UUID(str(user_id)))
+    assert 0 <= bucket_for_user(user_id) < NUM_BUCKETS
+
+
+def test_ring_spreads_buckets_over_shards():
+    """Test that every shard owns a fair share of the buckets"""
+    owners = Counter(HashRing(["s0", "s1", "s2"]).bucket_owners())
+
+    assert set(owners) == {"s0", "s1", "s2"}
+    assert min(owners.values()) > NUM_BUCKETS / 3 * 0.7
+
+
+def test_adding_a_shard_only_moves_its_share():
+    """Test that a new shard takes buckets without reshuffling the others"""
+    before = HashRing(["s0", "s1", "s2"]).bucket_owners()
+    after = HashRing(["s0", "s1", "s2", "s3"]).bucket_owners()
+
+    moved = [bucket for bucket in range(NUM_BUCKETS) if before[bucket] != after[bucket]]
+
+    assert all(after[bucket] == "s3" for bucket in moved)
+    assert len(moved) < NUM_BUCKETS / 2
@@ -0,0 +1,52 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine
+
+from src.fake_twitter.config import Settings
+from src.fake_twitter.infrastructure.api import admin
+from src.fake_twitter.infrastructure.database.models import UserModel
+from src.fake_twitter.infrastructure.database.statement_cache import (
+    StatementCacheStats,
+    track_statement_cache,
+)
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_user_repository import (
+    _BY_USERNAME,
+)
+
+
+def test_prebuilt_statement_compiles_once():
+    """Test that re-executing a prebuilt statement hits the compiled cache"""
+    engine = create_engine("sqlite://")
+    UserModel.__table__.create(engine)
+    stats = StatementCacheStats()
+    track_statement_cache(engine, stats)
+
+    with engine.connect() as connection:
+        for username in ("alice", "bob", "carol"):
+            connection.execute(_BY_USERNAME, {"username": username})
+
+    assert stats.outcomes["cache_miss"] == 1
+    assert stats.outcomes["cache_hit"] == 2
+    assert stats.hit_rate == pytest.approx(2 / 3)
+    assert stats.snapshot()["top_misses"][0]["misses"] == 1
+
+    stats.reset()
+    assert stats.hit_rate == 0.0
+
+
+async def test_admin_endpoints_require_the_configured_token(monkeypatch):
+    """Test that admin endpoints are hidden without a token and checked with one"""
+    app = FastAPI()
+    app.include_router(admin.router)
+    transport = ASGITransport(app=app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        monkeypatch.setattr(admin, "get_settings", lambda: Settings())
+        assert (await client.get("/admin/sql-cache")).status_code == 404
+
+        monkeypatch.setattr(admin, "get_settings", lambda: Settings(admin_token="s3"))
+        assert (await client.get("/admin/sql-cache")).status_code == 403
+        response = await client.get("/admin/sql-cache", headers={"X-Admin-Token": "s3"})
+        assert response.status_code == 200
+        assert "hit_rate" in response.json()
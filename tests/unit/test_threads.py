@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from src.fake_twitter.domain.entities.tweet import Tweet
+from src.fake_twitter.infrastructure.api.cursors import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    """Test that a cursor decodes to the position it was made from"""
+    position = (datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc), uuid4())
+
+    cursor = encode_cursor(*position)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == position
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "bm8gc2VwYXJhdG9y", "YXxi"])
+def test_invalid_cursor_is_a_bad_request(cursor):
+    """Test that malformed cursors are rejected with 400"""
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_replies_join_the_conversation_of_their_root():
+    """Test that replies point at their parent and at the conversation root"""
+    root = Tweet(id=uuid4(), content="root", user_id=uuid4())
+
+    reply = root.reply("first", uuid4())
+    nested = reply.reply("second", uuid4())
+
+    assert root.conversation_id is None
+    assert reply.in_reply_to_id == root.id
+    assert reply.conversation_id == root.id
+    assert nested.in_reply_to_id == reply.id
+    assert nested.conversation_id == root.id
@@ -0,0 +1,145 @@
+import json
+
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, text
+
+from src.fake_twitter.infrastructure.api.tracing import TracedRoute, TracingMiddleware
+from src.fake_twitter.infrastructure.tracing import (
+    InMemorySpanSink,
+    JsonFileSpanSink,
+    Traced,
+    Tracer,
+    activate,
+    span,
+    to_otlp,
+    trace_statements,
+)
+
+CALLER = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+class Repository:
+    async def get_by_id(self, item_id):
+        return {"id": item_id}
+
+
+class UseCases:
+    def __init__(self, repository):
+        self.repository = repository
+
+    async def get_item(self, item_id):
+        return await self.repository.get_by_id(item_id)
+
+
+def make_app(tracer):
+    router = APIRouter(prefix="/items", route_class=TracedRoute)
+
+    @router.get("/{item_id}")
+    async def get_item(item_id: int):
+        use_cases = Traced(UseCases(Traced(Repository())))
+        return await use_cases.get_item(item_id)
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+    return app
+
+
+def test_spans_nest_and_export_once_per_trace():
+    """Test that spans are children of the current span and exported with the root"""
+    sink = InMemorySpanSink()
+    root = Tracer(sink, sample_rate=1.0).start_trace("request")
+
+    with activate(root):
+        with span("outer") as outer:
+            with span("inner") as inner:
+                pass
+        assert sink.traces == []
+
+    [trace] = sink.traces
+    assert [s.name for s in trace] == ["inner", "outer", "request"]
+    assert inner.parent_id == outer.span_id
+    assert outer.parent_id == root.span_id
+    assert root.parent_id is None
+
+    otlp = to_otlp(trace)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {s["traceId"] for s in otlp} == {root.trace.trace_id}
+    assert "parentSpanId" not in otlp[-1]
+
+
+def test_file_sink_writes_traces_from_its_own_thread(tmp_path):
+    """Test that traces are written as OTLP/JSON lines, all of them by close"""
+    sink = JsonFileSpanSink(str(tmp_path / "traces.jsonl"))
+    tracer = Tracer(sink, sample_rate=1.0)
+    roots = []
+    for _ in range(3):
+        with activate(tracer.start_trace("request")) as root:
+            roots.append(root)
+    sink.close()
+
+    lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [to_otlp([r]) for r in roots]
+    assert sink.dropped == 0
+
+
+def test_spans_outside_a_trace_are_no_ops():
+    """Test that span() yields nothing without a sampled trace"""
+    with span("orphan") as orphan:
+        assert orphan is None
+
+
+def test_traceparent_decides_sampling():
+    """Test that a valid traceparent is continued and its flag overrides the rate"""
+    tracer = Tracer(InMemorySpanSink(), sample_rate=0.0)
+
+    root = tracer.start_trace("request", CALLER)
+    assert root.trace.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert root.parent_id == "b7ad6b7169203331"
+    assert tracer.start_trace("request", CALLER[:-2] + "00") is None
+    assert tracer.start_trace("request", "garbage") is None
+    assert Tracer(InMemorySpanSink(), 1.0).start_trace("request", "garbage")
+
+
+def test_statements_are_traced():
+    """Test that each statement gets a client span under the current span"""
+    engine = create_engine("sqlite://")
+    trace_statements(engine)
+    sink = InMemorySpanSink()
+
+    with activate(Tracer(sink, 1.0).start_trace("request")) as root:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 2"))
+
+    [statement] = [s for s in sink.spans if s.name.startswith("db ")]
+    assert statement.name == "db SELECT"
+    assert statement.parent_id == root.span_id
+    assert statement.attributes["db.statement"] == "SELECT 1"
+
+
+async def test_request_spans_from_route_to_repository():
+    """Test that a traced request nests route, use case and repository spans"""
+    sink = InMemorySpanSink()
+    app = make_app(Tracer(sink, sample_rate=0.0))
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        untraced = await client.get("/items/1")
+        response = await client.get("/items/1", headers={"traceparent": CALLER})
+
+    assert "traceparent" not in untraced.headers
+    assert response.json() == {"id": 1}
+    [trace] = sink.traces
+    by_name = {s.name: s for s in trace}
+    root = by_name["GET /items/{item_id}"]
+    assert response.headers["traceparent"] == root.traceparent
+    assert root.attributes["http.status_code"] == 200
+    assert by_name["route get_item"].parent_id == root.span_id
+    assert by_name["UseCases.get_item"].parent_id == by_name["route get_item"].span_id
+    assert (
+        by_name["Repository.get_by_id"].parent_id
+        == by_name["UseCases.get_item"].span_id
+    )
@@ -0,0 +1,121 @@
+import random
+import sys
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.fake_twitter.application.dtos.user_dtos import UserSuggestionDTO
+from src.fake_twitter.domain.entities.user import UserSuggestion
+from src.fake_twitter.infrastructure.repositories.sqlalchemy_user_repository import (
+    SQLAlchemyUserRepository,
+)
+from src.fake_twitter.infrastructure.user_search import (
+    PrefixTrie,
+    TrieUserSearchIndex,
+)
+
+
+def make_user(username, full_name="Some One", followers=0):
+    return UserSuggestion(uuid.uuid4(), username, full_name, followers)
+
+
+def brute_force(users, prefix, limit):
+    prefix = prefix.lower()
+    matches = [
+        user
+        for user in users.values()
+        if user.username.lower().startswith(prefix)
+        or user.full_name.lower().startswith(prefix)
+    ]
+    matches.sort(key=lambda user: (-user.followers_count, user.username, user.id))
+    return matches[:limit]
+
+
+def test_search_ranks_matches_by_followers():
+    """Test that prefixes match usernames and full names in any case"""
+    trie = PrefixTrie(capacity=3)
+    ana = make_user("ana", "Ana Lima", 10)
+    anabel = make_user("Anabel", "Belle", 50)
+    bob = make_user("bob", "Anakin Bob", 30)
+    for user in (ana, anabel, bob):
+        trie.add(user)
+
+    assert trie.search("ana", 10) == [anabel, bob, ana]
+    assert trie.search("ANAB", 10) == [anabel]
+    assert trie.search("an", 2) == [anabel, bob]
+    assert trie.search("b", 10) == [anabel, bob]
+    assert trie.search("c", 10) == []
+    assert trie.search("anax", 10) == []
+
+
+def test_trie_matches_a_brute_force_search():
+    """Test random adds, re-ranks and discards against a linear scan"""
+    rng = random.Random(7)
+    trie = PrefixTrie(capacity=5)
+    users = {}
+
+    def name():
+        return "".join(rng.choice("abc") for _ in range(rng.randint(1, 6)))
+
+    for step in range(3000):
+        action = rng.random()
+        if action < 0.5 or not users:
+            user = make_user(name(), name().title(), rng.randint(0, 100))
+            users[user.id] = user
+            trie.add(user)
+        elif action < 0.8:
+            user = rng.choice(list(users.values()))
+            user = user._replace(followers_count=rng.randint(0, 100))
+            users[user.id] = user
+            trie.add(user)
+        else:
+            user = users.pop(rng.choice(list(users)))
+            trie.discard(user)
+        if step % 50 == 0:
+            for prefix in ("", "a", "ab", "b", "cab", "bca", "abcab"):
+                assert trie.search(prefix, 5) == brute_force(users, prefix, 5)
+
+
+def test_changes_during_a_rebuild_are_kept():
+    """Test that users added or removed while rebuilding reach the new trie"""
+    index = TrieUserSearchIndex(capacity=5)
+    stale = make_user("stale")
+    assert not index.ready
+
+    index.begin_rebuild()
+    index.add_to_rebuild([stale, make_user("steady")])
+    created = make_user("star", followers=9)
+    index.add(created)
+    index.discard(stale)
+    index.finish_rebuild()
+
+    assert index.ready
+    assert [user.username for user in index.search("st", 10)] == ["star", "steady"]
+
+
+def test_suggestions_serialize():
+    """Test that suggestions validate into their DTO"""
+    user = make_user("ana", "Ana Lima", 3)
+
+    assert UserSuggestionDTO.model_validate(user).model_dump() == user._asdict()
+
+
+@pytest.mark.parametrize(
+    "prefix, high",
+    [
+        ("Ann", "ano"),
+        ("a\ud7ff", "a\ue000"),
+        ("a" + chr(sys.maxunicode), "b"),
+        (chr(sys.maxunicode) * 2, None),
+    ],
+)
+async def test_prefix_search_bounds(prefix, high):
+    """Test the range a prefix searches, up to the last code point"""
+    session = MagicMock(execute=AsyncMock(return_value=MagicMock()))
+
+    await SQLAlchemyUserRepository(session).search_by_prefix(prefix, 10)
+
+    statement, params = session.execute.await_args.args
+    assert (params["low"], params["high"]) == (prefix.lower(), high)
+    assert (":high" in str(statement.compile())) == (high is not None)
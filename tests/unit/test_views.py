@@ -0,0 +1,86 @@
+from uuid import uuid4
+
+import pytest
+
+from src.fake_twitter.application.use_cases.tweet_use_cases import TweetUseCases
+from src.fake_twitter.infrastructure.hyperloglog import HyperLogLog
+from src.fake_twitter.infrastructure.views import InMemoryTweetViews
+
+
+def _sketch(start: int, stop: int) -> HyperLogLog:
+    sketch = HyperLogLog()
+    for i in range(start, stop):
+        sketch.add(f"viewer-{i}".encode())
+    return sketch
+
+
+@pytest.mark.parametrize("count", [0, 1, 100, 1000, 20000, 200000])
+def test_count_is_within_a_few_percent(count):
+    """Test the estimate at small, medium and large counts"""
+    assert _sketch(0, count).count() == pytest.approx(count, rel=0.04, abs=1)
+
+
+def test_repeats_are_counted_once():
+    """Test that adding an item again changes nothing"""
+    sketch = _sketch(0, 50)
+    for _ in range(10):
+        sketch.add(b"viewer-1")
+
+    assert sketch.count() == 50
+
+
+@pytest.mark.parametrize("size", [100, 5000])
+def test_serialized_sketches_round_trip(size):
+    """Test that sparse and dense sketches survive serialization"""
+    sketch = _sketch(0, size)
+    data = sketch.to_bytes()
+
+    assert len(data) <= 8194
+    assert HyperLogLog.from_bytes(data).count() == sketch.count()
+    assert HyperLogLog.from_bytes(data).to_bytes() == data
+
+
+def test_merge_counts_the_union():
+    """Test that merged sketches count overlapping items once"""
+    sparse, dense = _sketch(0, 100), _sketch(50, 30000)
+    sketch = _sketch(0, 0)
+    sketch.merge(sparse)
+    sketch.merge(dense)
+
+    assert sketch.count() == pytest.approx(30000, rel=0.04)
+    with pytest.raises(ValueError):
+        sketch.merge(HyperLogLog(precision=12))
+
+
+class _FailingViewRepository:
+    async def get_counts(self, tweet_ids):
+        return {}
+
+    async def merge(self, sketches):
+        raise ConnectionError("database is down")
+
+
+async def test_views_are_kept_when_they_cannot_be_stored():
+    """Test that a failed flush puts the drained views back"""
+    tweet_id = uuid4()
+    views = InMemoryTweetViews()
+    use_cases = TweetUseCases(
+        None, None, tweet_views=views, view_repository=_FailingViewRepository()
+    )
+    await use_cases.view_tweets([tweet_id], "a")
+    await use_cases.view_tweets([tweet_id], "b")
+
+    with pytest.raises(ConnectionError):
+        await use_cases.flush_views()
+
+    assert len(views) == 1
+    await use_cases.view_tweets([tweet_id], "a")
+    assert HyperLogLog.from_bytes(views.drain()[tweet_id]).count() == 2
+    assert views.drain() == {}
+
+
+async def test_views_are_not_counted_without_sketches():
+    """Test that tweets get no count while views are not counted"""
+    use_cases = TweetUseCases(None, None, view_repository=_FailingViewRepository())
+
+    assert await use_cases.view_tweets([uuid4()], "a") is None